@@ -88,12 +88,49 @@ create table if not exists Empleados (
     fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now())
 );
 
--- Tabla dedicada a almacenar las tareas extraidas
+-- Si existe la tabla Tareas de versiones anteriores (sin particionar), se aparta para
+-- migrar sus datos a la tabla particionada. Se renombran sus restricciones e índices
+-- para que no choquen con los de la tabla nueva
+DO $$
+DECLARE
+    r record;
+BEGIN
+    IF to_regclass('tareas') IS NOT NULL
+       AND (SELECT relkind FROM pg_class WHERE oid = to_regclass('tareas')) = 'r' THEN
+        DROP VIEW IF EXISTS Vista_Tareas_Habilidades;
+        DROP VIEW IF EXISTS Vista_Informe_Tareas;
+        ALTER TABLE tareas RENAME TO tareas_sin_particionar;
+        ALTER SEQUENCE IF EXISTS tareas_id_seq OWNED BY NONE;
+
+        FOR r IN SELECT conname FROM pg_constraint WHERE conrelid = 'tareas_sin_particionar'::regclass LOOP
+            EXECUTE format('ALTER TABLE tareas_sin_particionar RENAME CONSTRAINT %I TO %I', r.conname, r.conname || '_antigua');
+        END LOOP;
+
+        FOR r IN
+            SELECT c.relname
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = 'tareas_sin_particionar'::regclass AND c.relname NOT LIKE '%\_antigua'
+        LOOP
+            EXECUTE format('ALTER INDEX %I RENAME TO %I', r.relname, r.relname || '_antigua');
+        END LOOP;
+    END IF;
+END$$;
+
+
+-- Tabla dedicada a almacenar las tareas extraidas.
+-- Se particiona primero por archivada (tareas activas / archivo) y las activas por rangos
+-- anuales de fecha, para que las etapas diarias solo lean las particiones que necesitan.
+-- Las claves únicas de una tabla particionada deben incluir las columnas de partición,
+-- por eso la clave primaria es (id, fecha, archivada); la unicidad de id y de clave en
+-- toda la tabla la garantiza Tareas_Claves
+create sequence if not exists tareas_id_seq;
+
 create table if not exists Tareas (
-    id serial primary key,
-    clave varchar unique not null,
-    fecha timestamp,
+    id integer not null default nextval('tareas_id_seq'),
+    clave varchar not null,
+    fecha timestamp not null default '9999-12-31 00:00:00',
     timespent_real numeric default 0.0,
+    timespent_jira numeric,
     timespent_estimado numeric default 0.0,
     bien_estimado boolean default null,
     project_key varchar,
@@ -104,8 +141,731 @@ create table if not exists Tareas (
     candidatos Candidatos[],
     habilidades_extraidas habilidades_tarea[],
     assignee_in_candidatos boolean default false,
+    archivada boolean not null default false,
     fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now()),
+    primary key (id, fecha, archivada),
     foreign key (project_key) references Proyectos(codificacion),
     foreign key (assignee) references Empleados(codificacion)
+) partition by list (archivada);
+
+alter sequence tareas_id_seq owned by Tareas.id;
+
+-- Segundos registrados en Jira tal y como se cargaron; timespent_real guarda las horas.
+-- La carga lo compara para saber si la tarea ha cambiado de verdad. Las tareas de antes
+-- de la columna toman los segundos de sus horas, para que la estimación no las mezcle
+alter table Tareas add column if not exists timespent_jira numeric;
+update Tareas set timespent_jira = timespent_real * 3600 where timespent_jira is null;
+
+create table if not exists Tareas_Activas partition of Tareas
+    for values in (false) partition by range (fecha);
+
+create table if not exists Tareas_Activas_Defecto partition of Tareas_Activas default;
+
+create table if not exists Tareas_Archivo partition of Tareas for values in (true);
+
+
+-- Tabla sin particionar con el id y la clave de cada tarea, que mantiene sus restricciones
+-- únicas sobre todas las particiones. Al mover una tarea entre particiones (archivarla o
+-- reabrirla) los triggers por fila ven un DELETE seguido de un INSERT
+DO $$
+DECLARE
+    duplicadas integer;
+BEGIN
+    IF to_regclass('tareas_claves') IS NULL THEN
+        create table Tareas_Claves (
+            id integer primary key,
+            clave varchar unique not null
+        );
+
+        -- Sin la restricción se han podido colar tareas repetidas: se conserva la
+        -- modificada más recientemente, que la siguiente carga vuelve a actualizar
+        delete from Tareas t
+        using (
+            select id, row_number() over (
+                partition by clave order by fecha_modificacion desc nulls last, id desc
+            ) as orden
+            from Tareas
+        ) r
+        where t.id = r.id and r.orden > 1;
+
+        GET DIAGNOSTICS duplicadas = ROW_COUNT;
+        IF duplicadas > 0 THEN
+            RAISE NOTICE 'Se han eliminado % tareas con la clave repetida', duplicadas;
+        END IF;
+
+        insert into Tareas_Claves (id, clave)
+        select id, clave from Tareas;
+    END IF;
+END$$;
+
+create or replace function sincronizar_claves_tarea() returns trigger as $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        insert into Tareas_Claves (id, clave) values (NEW.id, NEW.clave);
+    ELSIF TG_OP = 'UPDATE' THEN
+        update Tareas_Claves set id = NEW.id, clave = NEW.clave where id = OLD.id;
+    ELSE
+        delete from Tareas_Claves where id = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language plpgsql;
+
+create or replace trigger trg_tareas_claves_insert_delete
+    after insert or delete on Tareas
+    for each row execute function sincronizar_claves_tarea();
+
+create or replace trigger trg_tareas_claves_update
+    after update of id, clave on Tareas
+    for each row
+    when (OLD.id IS DISTINCT FROM NEW.id OR OLD.clave IS DISTINCT FROM NEW.clave)
+    execute function sincronizar_claves_tarea();
+
+
+-- Crea las particiones anuales de tareas activas que falten entre dos años (incluidos)
+create or replace function crear_particiones_tareas(anio_desde integer, anio_hasta integer)
+returns void as $$
+DECLARE
+    anio integer;
+    particion text;
+    inicio timestamp;
+    fin timestamp;
+BEGIN
+    FOR anio IN anio_desde..anio_hasta LOOP
+        particion := 'tareas_activas_' || anio;
+        inicio := make_timestamp(anio, 1, 1, 0, 0, 0);
+        fin := make_timestamp(anio + 1, 1, 1, 0, 0, 0);
+
+        CONTINUE WHEN to_regclass(particion) IS NOT NULL;
+
+        -- No se puede crear una partición si la partición por defecto ya tiene filas de ese rango
+        IF EXISTS (SELECT 1 FROM Tareas_Activas_Defecto WHERE fecha >= inicio AND fecha < fin) THEN
+            RAISE NOTICE 'La partición por defecto tiene tareas de %, no se crea %', anio, particion;
+            CONTINUE;
+        END IF;
+
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF Tareas_Activas FOR VALUES FROM (%L) TO (%L)',
+            particion, inicio, fin
+        );
+    END LOOP;
+END;
+$$ language plpgsql;
+
+
+-- Mueve al archivo las tareas cerradas con más de `dias` de antigüedad. Nunca archiva
+-- tareas de los últimos tres meses, que son las que lee el informe del mes actual
+create or replace function archivar_tareas(dias integer) returns integer as $$
+DECLARE
+    movidas integer;
+BEGIN
+    update Tareas
+    set archivada = true
+    where not archivada
+      and status_text = 'Closed'
+      and fecha < now() - make_interval(days => dias)
+      and fecha < date_trunc('month', now()) - interval '3 months';
+
+    GET DIAGNOSTICS movidas = ROW_COUNT;
+    RETURN movidas;
+END;
+$$ language plpgsql;
+
+
+-- Migración de los datos de la tabla sin particionar
+DO $$
+BEGIN
+    IF to_regclass('tareas_sin_particionar') IS NOT NULL THEN
+        PERFORM crear_particiones_tareas(
+            COALESCE((SELECT MIN(extract(year from fecha))::integer FROM tareas_sin_particionar WHERE fecha < '9999-01-01'), extract(year from now())::integer),
+            extract(year from now())::integer + 1
+        );
+
+        insert into Tareas (
+            id, clave, fecha, timespent_real, timespent_estimado, bien_estimado, project_key,
+            assignee, status_text, issue_type, texto, candidatos, habilidades_extraidas,
+            assignee_in_candidatos, fecha_modificacion
+        )
+        select
+            id, clave, COALESCE(fecha, '9999-12-31 00:00:00'), timespent_real, timespent_estimado,
+            bien_estimado, project_key, assignee, status_text, issue_type, texto, candidatos,
+            habilidades_extraidas, assignee_in_candidatos, fecha_modificacion
+        from tareas_sin_particionar;
+
+        PERFORM setval('tareas_id_seq', GREATEST((SELECT MAX(id) FROM Tareas), 1));
+        DROP TABLE tareas_sin_particionar;
+    ELSE
+        PERFORM crear_particiones_tareas(
+            extract(year from now())::integer, extract(year from now())::integer + 1
+        );
+    END IF;
+END$$;
+
+
+-- Índices para los predicados que usan las etapas y el informe
+create index if not exists idx_tareas_clave on Tareas (clave);
+create index if not exists idx_tareas_fecha on Tareas (fecha);
+create index if not exists idx_tareas_project_key_fecha on Tareas (project_key, fecha);
+create index if not exists idx_tareas_status_text_fecha on Tareas (status_text, fecha);
+create index if not exists idx_tareas_fecha_modificacion on Tareas (fecha_modificacion);
+
+
+-- Experiencia acumulada por empleado y habilidad. Se mantiene de forma incremental
+-- desde Tareas para no tener que recorrer todo el histórico en cada ejecución
+DO $$
+BEGIN
+    IF to_regclass('experiencia_empleados') IS NULL THEN
+        create table Experiencia_Empleados (
+            assignee varchar not null,
+            habilidad varchar not null,
+            total_experiencia numeric not null default 0,
+            num_apariciones integer not null default 0,
+            fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now()),
+            primary key (assignee, habilidad)
+        );
+
+        insert into Experiencia_Empleados (assignee, habilidad, total_experiencia, num_apariciones)
+        select t.assignee, h.habilidad, COALESCE(SUM(CAST(h.experiencia AS NUMERIC)), 0), COUNT(*)
+        from tareas t, unnest(t.habilidades_extraidas) AS h(habilidad, experiencia, fecha_modificacion)
+        where t.assignee is not null and h.habilidad is not null
+        group by t.assignee, h.habilidad;
+    END IF;
+END$$;
+
+
+-- Fechas de la primera y la última tarea de cada empleado
+DO $$
+BEGIN
+    IF to_regclass('actividad_empleados') IS NULL THEN
+        create table Actividad_Empleados (
+            assignee varchar primary key,
+            primera_fecha TIMESTAMP,
+            ultima_fecha TIMESTAMP,
+            fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now())
+        );
+
+        insert into Actividad_Empleados (assignee, primera_fecha, ultima_fecha)
+        select assignee, MIN(fecha), MAX(fecha)
+        from tareas
+        where assignee is not null
+        group by assignee;
+    END IF;
+END$$;
+
+create index if not exists idx_tareas_assignee_fecha on Tareas (assignee, fecha);
+
+
+-- Huella de las habilidades de una tarea sin la fecha de modificación, para saber si han cambiado de verdad
+create or replace function huella_habilidades(habilidades habilidades_tarea[])
+returns text[] as $$
+    select array(select (h.habilidad, h.experiencia)::text from unnest(habilidades) h)
+$$ language sql immutable;
+
+
+-- Lo mismo para los candidatos de una tarea
+create or replace function huella_candidatos(candidatos Candidatos[])
+returns text[] as $$
+    select array(select (c.codificacion, c.porcentaje_acierto)::text from unnest(candidatos) c)
+$$ language sql immutable;
+
+
+create or replace function actualizar_agregados_empleados() returns trigger as $$
+BEGIN
+    -- Se descuenta la contribución anterior de la tarea
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.assignee IS NOT NULL THEN
+        update Experiencia_Empleados x
+        set total_experiencia = x.total_experiencia - d.total_experiencia,
+            num_apariciones = x.num_apariciones - d.num_apariciones,
+            fecha_modificacion = date_trunc('second', now())
+        from (
+            select h.habilidad, COALESCE(SUM(CAST(h.experiencia AS NUMERIC)), 0) as total_experiencia, COUNT(*) as num_apariciones
+            from unnest(OLD.habilidades_extraidas) AS h(habilidad, experiencia, fecha_modificacion)
+            where h.habilidad is not null
+            group by h.habilidad
+        ) d
+        where x.assignee = OLD.assignee and x.habilidad = d.habilidad;
+
+        delete from Experiencia_Empleados
+        where assignee = OLD.assignee and num_apariciones <= 0;
+
+        -- La primera o la última fecha pueden haber cambiado, se recalculan con el índice (assignee, fecha)
+        update Actividad_Empleados a
+        set primera_fecha = (select MIN(fecha) from tareas where assignee = OLD.assignee),
+            ultima_fecha = (select MAX(fecha) from tareas where assignee = OLD.assignee),
+            fecha_modificacion = date_trunc('second', now())
+        where a.assignee = OLD.assignee;
+
+        delete from Actividad_Empleados a
+        where a.assignee = OLD.assignee
+          and not exists (select 1 from tareas where assignee = OLD.assignee);
+    END IF;
+
+    -- Se suma la contribución nueva
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.assignee IS NOT NULL THEN
+        insert into Experiencia_Empleados (assignee, habilidad, total_experiencia, num_apariciones)
+        select NEW.assignee, h.habilidad, COALESCE(SUM(CAST(h.experiencia AS NUMERIC)), 0), COUNT(*)
+        from unnest(NEW.habilidades_extraidas) AS h(habilidad, experiencia, fecha_modificacion)
+        where h.habilidad is not null
+        group by h.habilidad
+        on conflict (assignee, habilidad) do update set
+            total_experiencia = Experiencia_Empleados.total_experiencia + EXCLUDED.total_experiencia,
+            num_apariciones = Experiencia_Empleados.num_apariciones + EXCLUDED.num_apariciones,
+            fecha_modificacion = date_trunc('second', now());
+
+        insert into Actividad_Empleados (assignee, primera_fecha, ultima_fecha)
+        values (NEW.assignee, NEW.fecha, NEW.fecha)
+        on conflict (assignee) do update set
+            primera_fecha = LEAST(Actividad_Empleados.primera_fecha, EXCLUDED.primera_fecha),
+            ultima_fecha = GREATEST(Actividad_Empleados.ultima_fecha, EXCLUDED.ultima_fecha),
+            fecha_modificacion = date_trunc('second', now());
+    END IF;
+
+    RETURN NULL;
+END;
+$$ language plpgsql;
+
+
+create or replace trigger trg_tareas_agregados_insert_delete
+    after insert or delete on Tareas
+    for each row execute function actualizar_agregados_empleados();
+
+-- Solo se recalcula cuando cambian el empleado, la fecha o las habilidades (sin contar su fecha de modificación)
+create or replace trigger trg_tareas_agregados_update
+    after update of assignee, fecha, habilidades_extraidas on Tareas
+    for each row
+    when (
+        OLD.assignee IS DISTINCT FROM NEW.assignee
+        OR OLD.fecha IS DISTINCT FROM NEW.fecha
+        OR huella_habilidades(OLD.habilidades_extraidas) IS DISTINCT FROM huella_habilidades(NEW.habilidades_extraidas)
+    )
+    execute function actualizar_agregados_empleados();
+
+
+
+----------------------------------------------------
+-- KPIs de proyectos, empleados y meses --
+----------------------------------------------------
+-- Horas, precisión de las estimaciones y acierto de los candidatos por proyecto, empleado
+-- y mes, mantenidos por trigger como Experiencia_Empleados. El coste no se guarda: se
+-- calcula al exportar con Tarifas_Empleados, así un cambio de tarifa no obliga a recalcular
+DO $$
+BEGIN
+    IF to_regclass('kpi_tareas') IS NULL THEN
+        create table KPI_Tareas (
+            project_key varchar,
+            assignee varchar,
+            mes date not null,
+            num_tareas integer not null default 0,
+            horas_reales numeric not null default 0,
+            horas_estimadas numeric not null default 0,
+            tareas_evaluadas integer not null default 0,      -- con bien_estimado
+            tareas_bien_estimadas integer not null default 0,
+            tareas_con_candidatos integer not null default 0, -- asignadas y con candidatos
+            aciertos_candidatos integer not null default 0,   -- assignee_in_candidatos
+            fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now())
+        );
+        -- Las tareas sin proyecto o sin empleado se agrupan juntas
+        create unique index idx_kpi_tareas_clave on KPI_Tareas (project_key, assignee, mes) nulls not distinct;
+
+        insert into KPI_Tareas (
+            project_key, assignee, mes, num_tareas, horas_reales, horas_estimadas, tareas_evaluadas,
+            tareas_bien_estimadas, tareas_con_candidatos, aciertos_candidatos
+        )
+        select
+            project_key, assignee, date_trunc('month', fecha)::date, COUNT(*),
+            COALESCE(SUM(timespent_real), 0), COALESCE(SUM(timespent_estimado), 0),
+            COUNT(bien_estimado), COUNT(*) filter (where bien_estimado),
+            COUNT(*) filter (where assignee is not null and cardinality(candidatos) > 0),
+            COUNT(*) filter (where assignee_in_candidatos)
+        from tareas
+        group by project_key, assignee, date_trunc('month', fecha)::date;
+    END IF;
+END$$;
+
+-- Coste por hora de cada empleado; los que no tienen tarifa usan TARIFA_HORA_POR_DEFECTO
+create table if not exists Tarifas_Empleados (
+    codificacion varchar primary key,
+    tarifa_hora numeric not null check (tarifa_hora >= 0),
+    fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now())
+);
+
+
+-- Suma (signo 1) o descuenta (signo -1) la contribución de una tarea. Va siempre por el
+-- índice único con ON CONFLICT: con IS NOT DISTINCT FROM cada fila recorrería toda la tabla
+create or replace function acumular_kpi_tarea(t tareas, signo integer) returns void as $$
+DECLARE
+    fila tid;
+    restantes integer;
+BEGIN
+    insert into KPI_Tareas (
+        project_key, assignee, mes, num_tareas, horas_reales, horas_estimadas, tareas_evaluadas,
+        tareas_bien_estimadas, tareas_con_candidatos, aciertos_candidatos
+    )
+    values (
+        t.project_key, t.assignee, date_trunc('month', t.fecha)::date, signo,
+        signo * COALESCE(t.timespent_real, 0), signo * COALESCE(t.timespent_estimado, 0),
+        signo * (t.bien_estimado IS NOT NULL)::integer, signo * COALESCE(t.bien_estimado, false)::integer,
+        signo * (t.assignee IS NOT NULL AND COALESCE(cardinality(t.candidatos), 0) > 0)::integer,
+        signo * COALESCE(t.assignee_in_candidatos, false)::integer
+    )
+    on conflict (project_key, assignee, mes) do update set
+        num_tareas = KPI_Tareas.num_tareas + EXCLUDED.num_tareas,
+        horas_reales = KPI_Tareas.horas_reales + EXCLUDED.horas_reales,
+        horas_estimadas = KPI_Tareas.horas_estimadas + EXCLUDED.horas_estimadas,
+        tareas_evaluadas = KPI_Tareas.tareas_evaluadas + EXCLUDED.tareas_evaluadas,
+        tareas_bien_estimadas = KPI_Tareas.tareas_bien_estimadas + EXCLUDED.tareas_bien_estimadas,
+        tareas_con_candidatos = KPI_Tareas.tareas_con_candidatos + EXCLUDED.tareas_con_candidatos,
+        aciertos_candidatos = KPI_Tareas.aciertos_candidatos + EXCLUDED.aciertos_candidatos,
+        fecha_modificacion = date_trunc('second', now())
+    returning ctid, num_tareas into fila, restantes;
+
+    -- Los grupos que se quedan sin tareas se borran
+    IF restantes <= 0 THEN
+        delete from KPI_Tareas where ctid = fila;
+    END IF;
+END;
+$$ language plpgsql;
+
+
+create or replace function actualizar_kpi_tareas() returns trigger as $$
+BEGIN
+    -- Se descuenta la contribución anterior de la tarea y se suma la nueva
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM acumular_kpi_tarea(OLD, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM acumular_kpi_tarea(NEW, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ language plpgsql;
+
+
+create or replace trigger trg_tareas_kpi_insert_delete
+    after insert or delete on Tareas
+    for each row execute function actualizar_kpi_tareas();
+
+-- Solo cuando cambia algo que entra en los KPIs (no, por ejemplo, el texto o la fecha de modificación)
+create or replace trigger trg_tareas_kpi_update
+    after update of project_key, assignee, fecha, timespent_real, timespent_estimado, bien_estimado,
+        assignee_in_candidatos, candidatos on Tareas
+    for each row
+    when (
+        OLD.project_key IS DISTINCT FROM NEW.project_key
+        OR OLD.assignee IS DISTINCT FROM NEW.assignee
+        OR date_trunc('month', OLD.fecha) IS DISTINCT FROM date_trunc('month', NEW.fecha)
+        OR OLD.timespent_real IS DISTINCT FROM NEW.timespent_real
+        OR OLD.timespent_estimado IS DISTINCT FROM NEW.timespent_estimado
+        OR OLD.bien_estimado IS DISTINCT FROM NEW.bien_estimado
+        OR OLD.assignee_in_candidatos IS DISTINCT FROM NEW.assignee_in_candidatos
+        OR COALESCE(cardinality(OLD.candidatos), 0) > 0 IS DISTINCT FROM COALESCE(cardinality(NEW.candidatos), 0) > 0
+    )
+    execute function actualizar_kpi_tareas();
+
+----------------------------------------------------
+-- Tablas normalizadas de habilidades y candidatos --
+----------------------------------------------------
+-- Se mantienen junto a los arrays de tipos compuestos: los triggers las sincronizan
+-- cada vez que cambian los arrays, con columnas numéricas tipadas e índices propios
+
+-- Conversión tolerante de los niveles y experiencias guardados como texto
+create or replace function texto_a_numerico(valor varchar) returns numeric as $$
+BEGIN
+    RETURN valor::numeric;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ language plpgsql immutable;
+
+
+DO $$
+BEGIN
+    IF to_regclass('tarea_habilidad') IS NULL THEN
+        create table Tarea_Habilidad (
+            tarea_id integer not null,
+            posicion integer not null,
+            habilidad varchar,
+            experiencia numeric,
+            fecha_modificacion TIMESTAMP,
+            primary key (tarea_id, posicion)
+        );
+
+        insert into Tarea_Habilidad (tarea_id, posicion, habilidad, experiencia, fecha_modificacion)
+        select t.id, h.posicion, h.habilidad, texto_a_numerico(h.experiencia), h.fecha_modificacion
+        from tareas t, unnest(t.habilidades_extraidas) WITH ORDINALITY AS h(habilidad, experiencia, fecha_modificacion, posicion);
+    END IF;
+
+    IF to_regclass('tarea_candidato') IS NULL THEN
+        create table Tarea_Candidato (
+            tarea_id integer not null,
+            posicion integer not null,
+            codificacion varchar,
+            porcentaje_acierto numeric,
+            fecha_modificacion TIMESTAMP,
+            primary key (tarea_id, posicion)
+        );
+
+        insert into Tarea_Candidato (tarea_id, posicion, codificacion, porcentaje_acierto, fecha_modificacion)
+        select t.id, c.posicion, c.codificacion, c.porcentaje_acierto, c.fecha_modificacion
+        from tareas t, unnest(t.candidatos) WITH ORDINALITY AS c(codificacion, porcentaje_acierto, fecha_modificacion, posicion);
+    END IF;
+
+    IF to_regclass('empleado_habilidad') IS NULL THEN
+        create table Empleado_Habilidad (
+            codificacion varchar not null,
+            posicion integer not null,
+            habilidad varchar,
+            nivel numeric,
+            fecha_modificacion TIMESTAMP,
+            primary key (codificacion, posicion)
+        );
+
+        insert into Empleado_Habilidad (codificacion, posicion, habilidad, nivel, fecha_modificacion)
+        select e.codificacion, h.posicion, h.habilidad, texto_a_numerico(h.nivel_actual), h.fecha_modificacion
+        from empleados e, unnest(e.habilidades) WITH ORDINALITY AS h(habilidad, nivel_actual, fecha_modificacion, posicion);
+    END IF;
+END$$;
+
+-- "Quién tiene la habilidad X con nivel >= N" y "qué tareas requieren X"
+create index if not exists idx_empleado_habilidad_nivel on Empleado_Habilidad (habilidad, nivel);
+create index if not exists idx_empleado_habilidad_codificacion on Empleado_Habilidad (codificacion, habilidad);
+create index if not exists idx_tarea_habilidad_habilidad on Tarea_Habilidad (habilidad, experiencia);
+create index if not exists idx_tarea_candidato_codificacion on Tarea_Candidato (codificacion);
+
+
+create or replace function sincronizar_habilidades_tarea() returns trigger as $$
+BEGIN
+    IF TG_OP = 'DELETE' OR OLD.habilidades_extraidas IS DISTINCT FROM NEW.habilidades_extraidas THEN
+        delete from Tarea_Habilidad where tarea_id = OLD.id;
+    END IF;
+    IF TG_OP = 'DELETE' OR OLD.candidatos IS DISTINCT FROM NEW.candidatos THEN
+        delete from Tarea_Candidato where tarea_id = OLD.id;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' OR OLD.habilidades_extraidas IS DISTINCT FROM NEW.habilidades_extraidas THEN
+        insert into Tarea_Habilidad (tarea_id, posicion, habilidad, experiencia, fecha_modificacion)
+        select NEW.id, h.posicion, h.habilidad, texto_a_numerico(h.experiencia), h.fecha_modificacion
+        from unnest(NEW.habilidades_extraidas) WITH ORDINALITY AS h(habilidad, experiencia, fecha_modificacion, posicion);
+    END IF;
+    IF TG_OP = 'INSERT' OR OLD.candidatos IS DISTINCT FROM NEW.candidatos THEN
+        insert into Tarea_Candidato (tarea_id, posicion, codificacion, porcentaje_acierto, fecha_modificacion)
+        select NEW.id, c.posicion, c.codificacion, c.porcentaje_acierto, c.fecha_modificacion
+        from unnest(NEW.candidatos) WITH ORDINALITY AS c(codificacion, porcentaje_acierto, fecha_modificacion, posicion);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ language plpgsql;
+
+
+create or replace function sincronizar_habilidades_empleado() returns trigger as $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        delete from Empleado_Habilidad where codificacion = OLD.codificacion;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        insert into Empleado_Habilidad (codificacion, posicion, habilidad, nivel, fecha_modificacion)
+        select NEW.codificacion, h.posicion, h.habilidad, texto_a_numerico(h.nivel_actual), h.fecha_modificacion
+        from unnest(NEW.habilidades) WITH ORDINALITY AS h(habilidad, nivel_actual, fecha_modificacion, posicion);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ language plpgsql;
+
+
+create or replace trigger trg_tareas_normalizadas_insert_delete
+    after insert or delete on Tareas
+    for each row execute function sincronizar_habilidades_tarea();
+
+create or replace trigger trg_tareas_normalizadas_update
+    after update of habilidades_extraidas, candidatos on Tareas
+    for each row
+    when (
+        OLD.habilidades_extraidas IS DISTINCT FROM NEW.habilidades_extraidas
+        OR OLD.candidatos IS DISTINCT FROM NEW.candidatos
+    )
+    execute function sincronizar_habilidades_tarea();
+
+create or replace trigger trg_empleados_normalizadas_insert_delete
+    after insert or delete on Empleados
+    for each row execute function sincronizar_habilidades_empleado();
+
+create or replace trigger trg_empleados_normalizadas_update
+    after update of codificacion, habilidades on Empleados
+    for each row
+    when (
+        OLD.codificacion IS DISTINCT FROM NEW.codificacion
+        OR OLD.habilidades IS DISTINCT FROM NEW.habilidades
+    )
+    execute function sincronizar_habilidades_empleado();
+
+
+----------------------------------------------------
+-- Estado de la asignación incremental de candidatos --
+----------------------------------------------------
+-- Horas que reservan los candidatos de cada tarea en su mes. Las ejecuciones
+-- incrementales parten de las reservas de las tareas que no se vuelven a puntuar
+create table if not exists Reservas_Horas (
+    tarea_id integer not null,
+    codificacion varchar not null,
+    mes date not null,
+    horas numeric not null,
+    fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now()),
+    primary key (tarea_id, codificacion)
 );
 
+create index if not exists idx_reservas_horas_mes on Reservas_Horas (mes, codificacion);
+
+-- Firma de los datos de cada tarea con los que se calcularon sus candidatos
+create table if not exists Firmas_Asignacion (
+    tarea_id integer primary key,
+    firma varchar not null,
+    fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now())
+);
+
+-- Modelo y empleados activos de cada ejecución; si cambian, se vuelven a puntuar todas las tareas
+create table if not exists Ejecuciones_Asignacion (
+    id serial primary key,
+    huella_modelo varchar not null,
+    huella_empleados varchar not null,
+    incremental boolean not null,
+    tareas_puntuadas integer not null,
+    fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now())
+);
+
+
+----------------------------------------------------
+-- Disponibilidad de los empleados --
+----------------------------------------------------
+-- Vacaciones, bajas, huelgas o jornadas reducidas: horas disponibles en cada día
+-- laborable del periodo (0 para una ausencia), ambos días incluidos. Los días que no
+-- aparecen tienen el límite mensual repartido entre los laborables del mes. Si dos
+-- periodos de un empleado se solapan, manda el registrado después
+create table if not exists Disponibilidad_Empleados (
+    id serial primary key,
+    codificacion varchar not null,
+    fecha_inicio date not null,
+    fecha_fin date not null,
+    horas_dia numeric not null check (horas_dia >= 0),
+    motivo varchar,
+    fecha_modificacion TIMESTAMP DEFAULT date_trunc('second', now()),
+    check (fecha_fin >= fecha_inicio)
+);
+
+create index if not exists idx_disponibilidad_empleados_fechas on Disponibilidad_Empleados (fecha_fin, fecha_inicio);
+
+
+-- TRUNCATE no dispara los triggers por fila, así que se vacían también las tablas derivadas
+create or replace function vaciar_tablas_derivadas() returns trigger as $$
+BEGIN
+    IF TG_TABLE_NAME = 'tareas' THEN
+        truncate Tareas_Claves, Tarea_Habilidad, Tarea_Candidato, Experiencia_Empleados,
+            Actividad_Empleados, Reservas_Horas, Firmas_Asignacion, Ejecuciones_Asignacion, KPI_Tareas;
+    ELSE
+        truncate Empleado_Habilidad;
+    END IF;
+    RETURN NULL;
+END;
+$$ language plpgsql;
+
+create or replace trigger trg_tareas_truncate
+    after truncate on Tareas
+    for each statement execute function vaciar_tablas_derivadas();
+
+create or replace trigger trg_empleados_truncate
+    after truncate on Empleados
+    for each statement execute function vaciar_tablas_derivadas();
+
+
+-- Vistas de compatibilidad: reconstruyen los arrays de tipos compuestos a partir de las
+-- tablas normalizadas, para los consumidores que todavía esperan el formato antiguo
+create or replace view Vista_Tareas_Habilidades as
+select
+    t.id,
+    t.clave,
+    array(
+        select ROW(h.habilidad, h.experiencia::varchar, h.fecha_modificacion)::habilidades_tarea
+        from Tarea_Habilidad h
+        where h.tarea_id = t.id
+        order by h.posicion
+    ) as habilidades_extraidas,
+    array(
+        select ROW(c.codificacion, c.porcentaje_acierto, c.fecha_modificacion)::Candidatos
+        from Tarea_Candidato c
+        where c.tarea_id = t.id
+        order by c.posicion
+    ) as candidatos
+from tareas t;
+
+create or replace view Vista_Empleados_Habilidades as
+select
+    e.id,
+    e.codificacion,
+    array(
+        select ROW(h.habilidad, h.nivel::varchar, h.fecha_modificacion)::habilidades_empleado
+        from Empleado_Habilidad h
+        where h.codificacion = e.codificacion
+        order by h.posicion
+    ) as habilidades
+from empleados e;
+
+
+-- Filas del informe Excel: cada fila empareja el candidato y la habilidad de la misma
+-- posición de la tarea. Las tareas sin candidatos ni habilidades aparecen una vez; las que
+-- solo tienen uno de los dos, no. Se consulta una sola vez por informe y la hoja del mes
+-- actual se obtiene filtrando el resultado con `archivada`, `fecha` y `status_text`.
+-- Las parejas salen de los arrays de la propia fila (de los que los triggers copian
+-- Tarea_Candidato y Tarea_Habilidad): así una consulta filtrada por fecha o proyecto solo
+-- expande sus tareas, en lugar de cruzar las tablas normalizadas enteras con un hash join
+create or replace view Vista_Informe_Tareas as
+select
+    t.id,
+    p.proyecto || '-' || split_part(t.clave, '-', 2) as clave,
+    t.fecha,
+    t.timespent_real,
+    t.timespent_estimado,
+    t.bien_estimado,
+    p.proyecto as nombre_proyecto,
+    t.assignee_in_candidatos as "Empleado entre candidatos",
+    a.empleado as nombre_assignee,
+    t.status_text,
+    t.issue_type,
+    t.texto,
+    e.empleado as nombre_candidato,
+    eh.nivel as nivel_candidato,
+    ch.habilidad,
+    least(ch.experiencia, 10) as experiencia,
+    t.fecha_modificacion,
+    t.archivada
+from
+    tareas t
+    left join proyectos p on p.codificacion = t.project_key
+    left join empleados a on a.codificacion = t.assignee
+    left join lateral (
+        select c.posicion, c.codificacion, h.habilidad, texto_a_numerico(h.experiencia) as experiencia
+        from unnest(t.candidatos) WITH ORDINALITY AS c(codificacion, porcentaje_acierto, fecha_modificacion, posicion)
+        join unnest(t.habilidades_extraidas) WITH ORDINALITY AS h(habilidad, experiencia, fecha_modificacion, posicion)
+            on h.posicion = c.posicion
+    ) ch on true
+    left join empleados e on e.codificacion = ch.codificacion
+    left join lateral (
+        select eh.nivel
+        from empleado_habilidad eh
+        where eh.codificacion = e.codificacion and eh.habilidad = ch.habilidad
+        order by eh.posicion
+        limit 1
+    ) eh on true
+where
+    ch.posicion is not null
+    or (
+        coalesce(cardinality(t.candidatos), 0) = 0
+        and coalesce(cardinality(t.habilidades_extraidas), 0) = 0
+    );
@@ -0,0 +1,243 @@
+# -------------------- Standard Library --------------------
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+# -------------------- Third-Party Libraries --------------------
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# -------------------- Configuración --------------------
+DELTAS_POR_COMPACTACION = 20  # Deltas que se acumulan antes de fundirlos en la base
+FILAS_POR_BLOQUE = 50_000  # Filas de la base que se leen de cada vez al compactar
+
+
+class AlmacenHistorico:
+    """
+    Copia local del histórico de tareas del informe, que se actualiza solo con las filas
+    de las tareas modificadas desde la última exportación.
+
+    El almacén es una carpeta con:
+
+    - `base.parquet`: el histórico completo en la última reconstrucción o compactación.
+    - `delta_NNNNN.parquet`: todas las filas de las tareas modificadas en cada exportación.
+    - `estado.json`: la marca de agua (última `fecha_modificacion` exportada), los deltas
+      vigentes, en orden, y los ids de las tareas borradas desde la base.
+
+    Cada tarea puede ocupar varias filas (una por candidato y habilidad), así que un delta
+    sustituye todas las filas de sus tareas. Al leer, cada tarea se toma del último delta
+    que la contiene o, si no está en ninguno, de la base, y se descartan las borradas.
+    """
+
+    def __init__(self, directorio: Path):
+        self.directorio = Path(directorio)
+        self.ruta_estado = self.directorio / "estado.json"
+        self.ruta_base = self.directorio / "base.parquet"
+        self.estado = (
+            json.loads(self.ruta_estado.read_text())
+            if self.ruta_estado.exists()
+            else {"marca_agua": None, "deltas": [], "siguiente_delta": 1}
+        )
+        self.estado.setdefault("borradas", [])  # Almacenes anteriores a las tareas borradas
+
+    # ---------- Estado ----------
+    @property
+    def vacio(self) -> bool:
+        return self.estado["marca_agua"] is None or not self.ruta_base.exists()
+
+    @property
+    def marca_agua(self) -> pd.Timestamp | None:
+        return pd.Timestamp(self.estado["marca_agua"]) if self.estado["marca_agua"] else None
+
+    @property
+    def deltas(self) -> List[Path]:
+        return [self.directorio / nombre for nombre in self.estado["deltas"]]
+
+    @property
+    def columnas(self) -> List[str]:
+        return pq.read_schema(self.ruta_base).names if self.ruta_base.exists() else []
+
+    def ids(self) -> set:
+        """
+        Returns:
+            set: Ids de las tareas que están en la base o en algún delta, borradas incluidas.
+        """
+
+        ids = set()
+        for ruta in [self.ruta_base, *self.deltas]:
+            if "id" in pq.read_schema(ruta).names:
+                ids.update(pq.read_table(ruta, columns=["id"]).column("id").to_pylist())
+        return ids
+
+    def _guardar_estado(self) -> None:
+        # Se escribe en un fichero temporal y se renombra, para no dejar nunca un estado a medias
+        temporal = self.ruta_estado.with_suffix(".tmp")
+        temporal.write_text(json.dumps(self.estado, indent=2))
+        os.replace(temporal, self.ruta_estado)
+
+    def _escribir(self, df: pd.DataFrame, ruta: Path) -> None:
+        temporal = ruta.with_suffix(".tmp")
+        df.to_parquet(temporal, index=False)
+        os.replace(temporal, ruta)
+
+    @staticmethod
+    def _nueva_marca(df: pd.DataFrame, anterior: str | None) -> str | None:
+        if df.empty or df["fecha_modificacion"].isna().all():
+            return anterior
+        marca = pd.Timestamp(df["fecha_modificacion"].max())
+        if anterior is not None:
+            marca = max(marca, pd.Timestamp(anterior))
+        return marca.isoformat()
+
+    # ---------- Escritura ----------
+    def reconstruir(self, historico: pd.DataFrame | Iterable[pd.DataFrame]) -> int:
+        """
+        Sustituye el almacén por un histórico completo leído de la base de datos.
+        Args:
+            historico (pd.DataFrame | Iterable[pd.DataFrame]): Todas las filas de la vista
+                del informe, de una vez o por bloques con las mismas columnas.
+        Returns:
+            int: Filas guardadas.
+        """
+
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        anteriores = self.deltas
+        bloques = [historico] if isinstance(historico, pd.DataFrame) else historico
+
+        # Los bloques se van añadiendo al fichero, así que no hace falta tenerlos todos en memoria
+        temporal = self.ruta_base.with_suffix(".tmp")
+        escritor, esquema, filas, marca = None, None, 0, None
+        for bloque in bloques:
+            tabla = pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False)
+            if escritor is None:
+                esquema = tabla.schema
+                escritor = pq.ParquetWriter(temporal, esquema)
+            escritor.write_table(tabla)
+            filas += len(bloque)
+            marca = self._nueva_marca(bloque, marca)
+        if escritor is None:
+            pd.DataFrame().to_parquet(temporal, index=False)
+        else:
+            escritor.close()
+        os.replace(temporal, self.ruta_base)
+
+        self.estado = {
+            "marca_agua": marca,
+            "deltas": [],
+            "siguiente_delta": self.estado["siguiente_delta"],
+            "borradas": [],
+        }
+        self._guardar_estado()
+        for ruta in anteriores:
+            ruta.unlink(missing_ok=True)
+        return filas
+
+    def anadir(self, cambios: pd.DataFrame, vigentes: Iterable[int] | None = None) -> set:
+        """
+        Guarda las filas de las tareas modificadas desde la marca de agua como un delta
+        nuevo y avanza la marca. Compacta el almacén cada DELTAS_POR_COMPACTACION deltas.
+        Args:
+            cambios (pd.DataFrame): Todas las filas de cada tarea modificada.
+            vigentes (Iterable[int], optional): Ids de todas las tareas que siguen en la base
+                de datos, leídos después de `cambios`; las demás se marcan como borradas.
+        Returns:
+            set: Ids de las tareas que se han marcado como borradas en esta llamada.
+        """
+
+        borradas = set()
+        if vigentes is not None:
+            conocidas = self.ids() | (set(cambios["id"]) if not cambios.empty else set())
+            borradas = conocidas - set(vigentes) - set(self.estado["borradas"])
+
+        if cambios.empty and not borradas:
+            return borradas
+
+        if not cambios.empty:
+            nombre = f"delta_{self.estado['siguiente_delta']:05d}.parquet"
+            self._escribir(cambios, self.directorio / nombre)
+            self.estado["deltas"].append(nombre)
+            self.estado["siguiente_delta"] += 1
+            self.estado["marca_agua"] = self._nueva_marca(cambios, self.estado["marca_agua"])
+        self.estado["borradas"] = sorted(set(self.estado["borradas"]) | borradas)
+        self._guardar_estado()
+
+        if len(self.estado["deltas"]) >= DELTAS_POR_COMPACTACION:
+            self.compactar()
+        return borradas
+
+    def compactar(self) -> None:
+        """
+        Funde los deltas en la base, por bloques, y quita las tareas borradas. Si se
+        interrumpe, los deltas que sigan en el estado se vuelven a aplicar sobre la base
+        nueva, que ya los contiene, sin cambiar nada.
+        """
+
+        self.reconstruir(self.iterar(FILAS_POR_BLOQUE))
+
+    # ---------- Lectura ----------
+    def _cambios(self) -> pd.DataFrame | None:
+        """
+        Returns:
+            pd.DataFrame | None: Última versión de cada tarea de los deltas, o None si no hay.
+        """
+
+        deltas = [pd.read_parquet(ruta).assign(_delta=i) for i, ruta in enumerate(self.deltas)]
+        if not deltas:
+            return None
+        cambios = pd.concat(deltas, ignore_index=True)
+        ultimo = cambios.groupby("id")["_delta"].transform("max")
+        cambios = cambios[cambios["_delta"] == ultimo].drop(columns="_delta")
+        return cambios[~cambios["id"].isin(self.estado["borradas"])]
+
+    def leer(self, desde: pd.Timestamp | None = None) -> pd.DataFrame:
+        """
+        Args:
+            desde (pd.Timestamp, optional): Si se indica, solo las tareas con `fecha`
+                posterior; de la base solo se leen los grupos de filas que pueden tenerlas.
+        Returns:
+            pd.DataFrame: La última versión de cada tarea, ordenada por fecha_modificacion.
+        """
+
+        base = pd.read_parquet(
+            self.ruta_base, filters=[("fecha", ">=", desde)] if desde is not None else None
+        )
+
+        if self.estado["borradas"]:
+            base = base[~base["id"].isin(self.estado["borradas"])]
+        cambios = self._cambios()
+        if cambios is not None:
+            # Las filas de la base de una tarea modificada se descartan aunque su versión
+            # nueva quede fuera del filtro
+            base = base[~base["id"].isin(cambios["id"])]
+            if desde is not None:
+                cambios = cambios[cambios["fecha"] >= desde]
+            base = pd.concat([base, cambios], ignore_index=True)
+
+        return base.sort_values("fecha_modificacion", kind="stable").reset_index(drop=True)
+
+    def iterar(self, filas: int) -> Iterator[pd.DataFrame]:
+        """
+        Recorre el histórico completo por bloques sin cargarlo entero: primero la base (sin
+        las tareas que están en algún delta) y después la última versión de las modificadas.
+        Args:
+            filas (int): Filas por bloque de la base.
+        Returns:
+            Iterator[pd.DataFrame]: Bloques, en orden de fecha_modificacion.
+        """
+
+        cambios = self._cambios()
+        for lote in pq.ParquetFile(self.ruta_base).iter_batches(batch_size=filas):
+            bloque = lote.to_pandas()
+            if self.estado["borradas"]:
+                bloque = bloque[~bloque["id"].isin(self.estado["borradas"])]
+            if cambios is not None:
+                bloque = bloque[~bloque["id"].isin(cambios["id"])]
+            if len(bloque):
+                yield bloque.reset_index(drop=True)
+
+        if cambios is not None:
+            cambios = cambios.sort_values("fecha_modificacion", kind="stable")
+            for inicio in range(0, len(cambios), filas):
+                yield cambios.iloc[inicio : inicio + filas].reset_index(drop=True)
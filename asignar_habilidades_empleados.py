@@ -1,13 +1,13 @@
 # -------------------- Standard Library --------------------
 import os
+import time
 from datetime import date, datetime
-from typing import Any
 import warnings
 
 # -------------------- Third-Party Libraries --------------------
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, Engine, text
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
 
@@ -25,162 +25,232 @@ db_config = {
     "dbname": os.getenv("DATABASE", "Jira"),
 }
 
-db_url = (
-    f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
-    f"@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
-)
-try:
-    engine = create_engine(db_url)
-    with engine.connect() as conn:
-        pass  # test de conexión
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al conectar con la base de datos: {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
+DIAS_INACTIVIDAD = 60  # Días sin tareas tras los que un empleado deja de estar activo
 
 # -------------------- Consultas SQL --------------------
+# Agregados mantenidos por los triggers de Tablas.sql sobre la tabla Tareas
 query = """
-SELECT
-    t.assignee,
-    h.habilidad,
-    SUM(CAST(h.experiencia AS NUMERIC)) AS total_experiencia
-FROM tareas t,
-     UNNEST(t.habilidades_extraidas) AS h(habilidad, experiencia, fecha_modificacion)
-GROUP BY t.assignee, h.habilidad
-ORDER BY t.assignee, h.habilidad
+SELECT assignee, habilidad, total_experiencia
+FROM experiencia_empleados
+ORDER BY assignee, habilidad
 """
 
-query_max_fecha = (
-    "SELECT tareas.assignee, max(tareas.fecha) as fecha FROM tareas GROUP BY assignee"
+query_fechas = "SELECT assignee, primera_fecha, ultima_fecha FROM actividad_empleados"
+
+# Actualiza todos los empleados en una única sentencia a partir de arrays paralelos
+update_empleados = """
+WITH niveles AS (
+    SELECT
+        h.codificacion,
+        array_agg(
+            ROW(h.habilidad, h.nivel, CAST(:hoy AS timestamp))::habilidades_empleado
+            ORDER BY h.orden
+        ) AS habilidades
+    FROM unnest(
+        CAST(:h_codificacion AS varchar[]),
+        CAST(:h_habilidad AS varchar[]),
+        CAST(:h_nivel AS varchar[]),
+        CAST(:h_orden AS integer[])
+    ) AS h(codificacion, habilidad, nivel, orden)
+    GROUP BY h.codificacion
+),
+estados AS (
+    SELECT a.codificacion, a.is_active
+    FROM unnest(
+        CAST(:e_codificacion AS varchar[]),
+        CAST(:e_activo AS boolean[])
+    ) AS a(codificacion, is_active)
 )
-query_min_fecha = "SELECT assignee, fecha FROM tareas"
-query_empleados = "SELECT codificacion, habilidades FROM empleados"
-
-# -------------------- Cargar datos --------------------
-try:
-    with engine.begin() as conn:
-        tasks_dat = pd.read_sql(text(query), conn)
-        empleados_dat = pd.read_sql(text(query_empleados), conn)
-        empleados_fecha = pd.read_sql(text(query_max_fecha), conn)
-        tareas_min_fecha = pd.read_sql(text(query_min_fecha), conn)
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al leer datos de la base de datos: {e}\n"
-        + Style.RESET_ALL
+UPDATE empleados e
+SET habilidades = COALESCE(n.habilidades, ARRAY[]::habilidades_empleado[]),
+    fecha_modificacion = :fecha_modificacion,
+    is_active = s.is_active
+FROM estados s
+LEFT JOIN niveles n ON n.codificacion = s.codificacion
+WHERE e.codificacion = s.codificacion
+"""
+
+
+def obtener_conexion() -> Engine:
+    """
+    Crea una conexión a la base de datos PostgreSQL utilizando SQLAlchemy.
+    Returns:
+        Engine: Un objeto Engine de SQLAlchemy para interactuar con la base de datos.
+    """
+
+    db_url = (
+        f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
+        f"@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
     )
-    exit(1)
+    try:
+        engine = create_engine(db_url)
+        with engine.connect() as conn:
+            pass  # test de conexión
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al conectar con la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-print(
-    f"{Fore.GREEN}✅ Datos de tareas y empleados cargados correctamente\n{Style.RESET_ALL}"
-)
-# ------------------------------------------
-# Guardar experiencia por empleado
-# ------------------------------------------
+    return engine
 
-empleados_fecha["is_active"] = empleados_fecha["fecha"].apply(
-    lambda x: x > pd.Timestamp(date.today() - pd.Timedelta(days=60))
-)
+
+def cargar_datos(engine: Engine) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Carga la experiencia por empleado y habilidad y las fechas de la primera y la
+    última tarea de cada empleado.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    Returns:
+        tuple: Un tuple que contiene dos DataFrames:
+            - experiencia: assignee, habilidad y total_experiencia.
+            - fechas: assignee, primera_fecha y ultima_fecha.
+    """
+
+    try:
+        with engine.begin() as conn:
+            experiencia = pd.read_sql(text(query), conn)
+            fechas = pd.read_sql(text(query_fechas), conn)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer datos de la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    print(
+        f"{Fore.GREEN}✅ Datos de tareas y empleados cargados correctamente\n{Style.RESET_ALL}"
+    )
+    return experiencia, fechas
 
 
-# -------------------- Funciones auxiliares --------------------
-def escapar_pg(valor: str) -> str:
-    return valor.replace("'", "''")
+def calcular_niveles_habilidades(
+    experiencia: pd.DataFrame, fechas: pd.DataFrame, hoy: date
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Calcula en una sola pasada agrupada el nivel de cada habilidad de todos los empleados.
+    El nivel combina la experiencia normalizada entre el mínimo y el máximo del propio
+    empleado (70 %) y su antigüedad normalizada respecto al empleado más antiguo (30 %):
+    nivel = 1 + 9 * (0.7 * experiencia_norm + 0.3 * antiguedad_norm).
 
+    Args:
+        experiencia (pd.DataFrame): assignee, habilidad y total_experiencia.
+        fechas (pd.DataFrame): assignee, primera_fecha y ultima_fecha.
+        hoy (date): Fecha de referencia.
+    Returns:
+        tuple: Un tuple que contiene dos DataFrames:
+            - niveles: codificacion, habilidad y nivel, en el orden de `experiencia`.
+            - estados: codificacion e is_active de cada empleado con habilidades.
+    """
 
-def construir_array_habilidades(
-    df: pd.DataFrame, fecha_primera_tarea: pd.Timestamp, max_dias_antiguedad: int
-) -> str:
-    if df.empty:
-        return "ARRAY[]::habilidades_empleado[]"
+    hoy = pd.Timestamp(hoy)
+    experiencia = experiencia.dropna(subset=["assignee"])
 
-    min_exp = df["total_experiencia"].min()
-    max_exp = df["total_experiencia"].max()
+    primera_fecha = pd.to_datetime(fechas.set_index("assignee")["primera_fecha"])
+    dias_antiguedad = (hoy - primera_fecha).dt.days
+    max_dias_antiguedad = dias_antiguedad.max()
 
-    def calcular_nivel(exp: float) -> float:
-        experiencia_norm = (
-            0.5 if min_exp == max_exp else (exp - min_exp) / (max_exp - min_exp)
+    ultima_fecha = pd.to_datetime(fechas.set_index("assignee")["ultima_fecha"])
+    activo = ultima_fecha > hoy - pd.Timedelta(days=DIAS_INACTIVIDAD)
+
+    exp = experiencia["total_experiencia"].astype(float)
+    grupos = exp.groupby(experiencia["assignee"])
+    min_exp = grupos.transform("min")
+    max_exp = grupos.transform("max")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        experiencia_norm = ((exp - min_exp) / (max_exp - min_exp)).where(
+            min_exp != max_exp, 0.5
+        )
+        antiguedad_norm = np.minimum(
+            experiencia["assignee"].map(dias_antiguedad) / max_dias_antiguedad, 1.0
         )
-        dias_antiguedad = (pd.Timestamp(date.today()) - fecha_primera_tarea).days
-        antiguedad_norm = min(dias_antiguedad / max_dias_antiguedad, 1.0)
-        return 1 + 9 * (0.7 * experiencia_norm + 0.3 * antiguedad_norm)
-
-    filas = [
-        f"ROW('{escapar_pg(row['habilidad'])}', {calcular_nivel(row['total_experiencia'])}, '{date.today()}')::habilidades_empleado"
-        for _, row in df.iterrows()
-    ]
-    return f"ARRAY[{', '.join(filas)}]::habilidades_empleado[]"
-
-
-# ------------------------------------------
-# Procesar tareas por empleado
-# ------------------------------------------
-
-tareas_min_fecha["fecha"] = pd.to_datetime(tareas_min_fecha["fecha"])
-antiguedad_max = (
-    tareas_min_fecha.groupby("assignee")["fecha"]
-    .min()
-    .apply(lambda x: (pd.Timestamp(date.today()) - x).days)
-    .max()
-)
 
-print(f"{Fore.YELLOW}⚙️ Procesando habilidades de empleados...\n{Style.RESET_ALL}")
-try:
-    with engine.begin() as conn:
-        for employee in tasks_dat["assignee"].dropna().unique():
-            print(
-                f"{Fore.CYAN}\t🔄 Procesando habilidades para: {employee}{Style.RESET_ALL}"
-            )
-            employee_tasks = tasks_dat[tasks_dat["assignee"] == employee]
-            fecha_empleado_df = empleados_fecha[empleados_fecha["assignee"] == employee]
+    niveles = pd.DataFrame(
+        {
+            "codificacion": experiencia["assignee"].str.lower().str.replace(" ", "_"),
+            "habilidad": experiencia["habilidad"],
+            "nivel": 1 + 9 * (0.7 * experiencia_norm + 0.3 * antiguedad_norm),
+        }
+    )
 
-            fecha_primera = tareas_min_fecha[tareas_min_fecha["assignee"] == employee][
-                "fecha"
-            ].min()
+    empleados = pd.Series(experiencia["assignee"].unique())
+    estados = pd.DataFrame(
+        {
+            "codificacion": empleados.str.lower().str.replace(" ", "_"),
+            "is_active": empleados.map(activo).fillna(False).astype(bool),
+        }
+    )
 
-            habilidades_pg = construir_array_habilidades(
-                employee_tasks,
-                fecha_primera_tarea=fecha_primera,
-                max_dias_antiguedad=antiguedad_max,
-            )
+    return niveles, estados
 
-            codificacion = employee.lower().replace(" ", "_")
-            fecha_modificacion = datetime.now()
-            is_active = (
-                bool(fecha_empleado_df["is_active"].values[0])
-                if not fecha_empleado_df.empty
-                else False
-            )
 
-            update_sql = f"""
-                UPDATE empleados
-                SET habilidades = {habilidades_pg},
-                    fecha_modificacion = :fecha_modificacion,
-                    is_active = :is_active
-                WHERE codificacion = :codificacion
-            """
+def guardar_habilidades_empleados(
+    engine: Engine, niveles: pd.DataFrame, estados: pd.DataFrame, hoy: date
+) -> None:
+    """
+    Escribe las habilidades y el estado de todos los empleados con una única sentencia UPDATE.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        niveles (pd.DataFrame): codificacion, habilidad y nivel.
+        estados (pd.DataFrame): codificacion e is_active.
+        hoy (date): Fecha que se guarda en cada habilidad.
+    """
+
+    try:
+        with engine.begin() as conn:
             conn.execute(
-                text(update_sql),
+                text(update_empleados),
                 {
-                    "fecha_modificacion": fecha_modificacion,
-                    "is_active": is_active,
-                    "codificacion": codificacion,
+                    "hoy": hoy,
+                    "h_codificacion": niveles["codificacion"].tolist(),
+                    "h_habilidad": niveles["habilidad"].tolist(),
+                    "h_nivel": [str(n) for n in niveles["nivel"].tolist()],
+                    "h_orden": list(range(len(niveles))),
+                    "e_codificacion": estados["codificacion"].tolist(),
+                    "e_activo": estados["is_active"].tolist(),
+                    "fecha_modificacion": datetime.now(),
                 },
             )
-            
-            
-except Exception as e:
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al actualizar la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+
+def ejecutar(engine: Engine) -> None:
+    """
+    Etapa de cálculo de las habilidades de los empleados.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    """
+
+    experiencia, fechas = cargar_datos(engine)
+    hoy = date.today()
+
+    print(f"{Fore.YELLOW}⚙️ Procesando habilidades de empleados...\n{Style.RESET_ALL}")
+    inicio = time.perf_counter()
+    niveles, estados = calcular_niveles_habilidades(experiencia, fechas, hoy)
+    tiempo_calculo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    guardar_habilidades_empleados(engine, niveles, estados, hoy)
+    tiempo_escritura = time.perf_counter() - inicio
+
     print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al actualizar la base de datos: {e}\n"
-        + Style.RESET_ALL
+        f"{Fore.CYAN}\t⏱️  {len(estados)} empleados y {len(niveles)} habilidades: "
+        f"cálculo {tiempo_calculo:.3f} s | escritura {tiempo_escritura:.3f} s{Style.RESET_ALL}"
     )
-    exit(1)
+    print(f"{Fore.GREEN}\n✅ Habilidades actualizadas correctamente{Style.RESET_ALL}")
+
 
-print(f"{Fore.GREEN}\n✅ Habilidades actualizadas correctamente{Style.RESET_ALL}")
+if __name__ == "__main__":
+    ejecutar(obtener_conexion())
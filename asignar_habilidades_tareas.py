@@ -22,6 +22,14 @@ from sklearn.preprocessing import MultiLabelBinarizer
 import nlpaug.augmenter.word as naw
 from transformers.utils import logging
 
+from compilar_modelos import (
+    RUTA_CLASIFICADOR_HABILIDADES,
+    ClasificadorHabilidadesCompilado,
+    exportar_clasificador_habilidades,
+    publicar_compilado,
+    verificar_clasificador_habilidades,
+)
+
 load_dotenv()
 logging.set_verbosity_error()
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -36,205 +44,251 @@ db_config: dict[str, str | int] = {
     "dbname": os.getenv("DATABASE", ""),
 }
 
-# Consulta a la base de datos para extraer datos de tareas y empleados
-query: str = "SELECT * FROM tareas"
-query_empleados: str = "SELECT codificacion, habilidades FROM empleados"
+# Consulta a la base de datos para extraer datos de tareas
+query: str = "SELECT * FROM tareas WHERE NOT archivada"  # El archivo ya tiene sus habilidades
 
-db_url: str = (
-    f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
-    f"@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
-)  # Cadena de conexión para SQLAlchemy
+# Textos de las tareas pre-etiquetadas
+consulta: str = """
+SELECT clave, texto
+FROM tareas
+WHERE clave = ANY(:claves)
+"""
 
-try:
-    engine: Engine = create_engine(db_url)
-    with engine.connect() as conn:
-        pass
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al conectar con la base de datos: {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
 
-# Leer los datos directamente a un DataFrame
-try:
-    tasks_dat: pd.DataFrame = pd.read_sql_query(query, engine)
-    empleados_dat: pd.DataFrame = pd.read_sql_query(query_empleados, engine)
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al leer datos de la base de datos: {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
+def obtener_conexion() -> Engine:
+    """
+    Crea una conexión a la base de datos PostgreSQL utilizando SQLAlchemy.
+    Returns:
+        Engine: Un objeto Engine de SQLAlchemy para interactuar con la base de datos.
+    """
 
+    db_url: str = (
+        f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
+        f"@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
+    )  # Cadena de conexión para SQLAlchemy
 
-print(
-    f"{Fore.GREEN}✅ Datos de tareas y empleados cargados correctamente\n{Style.RESET_ALL}"
-)
+    try:
+        engine: Engine = create_engine(db_url)
+        with engine.connect() as conn:
+            pass
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al conectar con la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-ruta_preetiq = Path("data/tareas_preetiquetadas.csv")
-if not ruta_preetiq.exists():
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "\n❌ El archivo 'data/tareas_preetiquetadas.csv' no se ha encontrado.\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
+    return engine
 
-try:
-    tareas_etiquetadas: pd.DataFrame = pd.read_csv(ruta_preetiq)
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al leer 'data/tareas_preetiquetadas.csv': {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
 
-if tareas_etiquetadas.empty:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "\n❌ El archivo de tareas pre-etiquetadas está vacío.\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
+def cargar_tareas(engine: Engine) -> pd.DataFrame:
+    """
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    Returns:
+        pd.DataFrame: Las tareas activas.
+    """
 
-tareas_etiquetadas["habilidades"] = tareas_etiquetadas["habilidades"].str.split(
-    "|"
-)  # Convertir habilidades a listas
+    # Leer los datos directamente a un DataFrame
+    try:
+        tasks_dat: pd.DataFrame = pd.read_sql_query(query, engine)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer datos de la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-# ------------------------------------------
-# ----- Generar dataset de entrenamiento ---
-# ------------------------------------------
+    print(f"{Fore.GREEN}✅ Datos de tareas cargados correctamente\n{Style.RESET_ALL}")
+    return tasks_dat
 
-claves: List[str] = tareas_etiquetadas["clave"].unique().tolist()
 
-# Ejecutar consulta con cláusula IN segura
-consulta: str = """
-SELECT clave, texto
-FROM tareas
-WHERE clave = ANY(:claves)
-"""
+def cargar_datos_entrenamiento(engine: Engine) -> pd.DataFrame:
+    """
+    Une las tareas pre-etiquetadas con sus textos y con las tareas aumentadas, que se
+    generan la primera vez y se guardan en 'data/tareas_aumentadas.csv'.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    Returns:
+        pd.DataFrame: clave, texto y lista de habilidades de cada tarea de entrenamiento.
+    """
 
-with engine.connect() as conn:
-    tareas_texto: pd.DataFrame = pd.read_sql_query(
-        text(consulta), conn, params={"claves": claves}
-    )
+    ruta_preetiq = Path("data/tareas_preetiquetadas.csv")
+    if not ruta_preetiq.exists():
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "\n❌ El archivo 'data/tareas_preetiquetadas.csv' no se ha encontrado.\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-# Unir etiquetas y texto
-df: pd.DataFrame = tareas_etiquetadas.merge(tareas_texto, on="clave", how="left")
+    try:
+        tareas_etiquetadas: pd.DataFrame = pd.read_csv(ruta_preetiq)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer 'data/tareas_preetiquetadas.csv': {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-# ------------------------------------------
-# Comprobación: que todas las claves existen en la base de datos
-# ------------------------------------------
-faltan_claves = df["texto"].isnull()
-if faltan_claves.any():
-    claves_faltantes = df.loc[faltan_claves, "clave"].tolist()
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "\n❌ No se han encontrado todas las claves en la base de datos\n"
-        + Fore.RESET
-        + Style.RESET_ALL
-    )
-    exit(1)
+    if tareas_etiquetadas.empty:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "\n❌ El archivo de tareas pre-etiquetadas está vacío.\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-# ------------------------------------------
-# ------------ Aumentar Tareas -------------
-# ------------------------------------------
+    tareas_etiquetadas["habilidades"] = tareas_etiquetadas["habilidades"].str.split(
+        "|"
+    )  # Convertir habilidades a listas
 
-ruta_aug = Path("data/tareas_aumentadas.csv")
+    # ------------------------------------------
+    # ----- Generar dataset de entrenamiento ---
+    # ------------------------------------------
 
-if ruta_aug.exists():
-    print(
-        f"{Fore.CYAN}\n📄 Archivo de aumentos encontrado. Cargando tareas aumentadas...\n{Style.RESET_ALL}"
-    )
-    df_aug = pd.read_csv(ruta_aug)
-    df_aug["habilidades"] = df_aug["habilidades"].apply(
-        lambda x: x.split("|") if isinstance(x, str) else []
-    )
-else:
-    print(
-        f"{Fore.BLUE}🧪 Archivo de aumentos no encontrado. Generando tareas aumentadas...\n{Style.RESET_ALL}"
-    )
+    claves: List[str] = tareas_etiquetadas["clave"].unique().tolist()
 
-    aug = naw.ContextualWordEmbsAug(
-        model_path="./modelos/", action="substitute", model_type="bert"
-    )
+    # Ejecutar consulta con cláusula IN segura
+    with engine.connect() as conn:
+        tareas_texto: pd.DataFrame = pd.read_sql_query(
+            text(consulta), conn, params={"claves": claves}
+        )
 
-    tareas_aug = []
-    for i, row in df.iterrows():
-        texto = row["texto"]
-        habilidades = row["habilidades"]
-        clave = row["clave"]
+    # Unir etiquetas y texto
+    df: pd.DataFrame = tareas_etiquetadas.merge(tareas_texto, on="clave", how="left")
 
-        print(f"{Fore.YELLOW}\tAumentando tarea: {i + 1}{Style.RESET_ALL}")
+    # ------------------------------------------
+    # Comprobación: que todas las claves existen en la base de datos
+    # ------------------------------------------
+    faltan_claves = df["texto"].isnull()
+    if faltan_claves.any():
+        claves_faltantes = df.loc[faltan_claves, "clave"].tolist()
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + "\n❌ No se han encontrado todas las claves en la base de datos\n"
+            + Fore.RESET
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-        try:
-            resultados = aug.augment(texto, n=5)
-        except Exception as e:
-            print(
-                f"{Fore.RED}\t⚠️ Error al aumentar tarea '{clave}': {e}{Style.RESET_ALL}"
-            )
-            continue
-
-        for j, t in enumerate(resultados):
-            tareas_aug.append(
-                {
-                    "clave": f"{clave}_aug{j}",
-                    "texto": t,
-                    "habilidades": "|".join(habilidades),
-                }
-            )
+    # ------------------------------------------
+    # ------------ Aumentar Tareas -------------
+    # ------------------------------------------
 
-    df_aug = pd.DataFrame(tareas_aug)
-    ruta_aug.parent.mkdir(parents=True, exist_ok=True)
-    df_aug.to_csv(ruta_aug, index=False)
-    print(
-        f"{Fore.GREEN}\n✅ Archivo de tareas aumentadas guardado en: {ruta_aug}{Style.RESET_ALL}"
-    )
+    ruta_aug = Path("data/tareas_aumentadas.csv")
 
-# Convertir de nuevo habilidades a listas
-df_aug["habilidades"] = df_aug["habilidades"].apply(
-    lambda x: x.split("|") if isinstance(x, str) else []
-)
+    if ruta_aug.exists():
+        print(
+            f"{Fore.CYAN}\n📄 Archivo de aumentos encontrado. Cargando tareas aumentadas...\n{Style.RESET_ALL}"
+        )
+        df_aug = pd.read_csv(ruta_aug)
+        df_aug["habilidades"] = df_aug["habilidades"].apply(
+            lambda x: x.split("|") if isinstance(x, str) else []
+        )
+    else:
+        print(
+            f"{Fore.BLUE}🧪 Archivo de aumentos no encontrado. Generando tareas aumentadas...\n{Style.RESET_ALL}"
+        )
+
+        aug = naw.ContextualWordEmbsAug(
+            model_path="./modelos/", action="substitute", model_type="bert"
+        )
+
+        tareas_aug = []
+        for i, row in df.iterrows():
+            texto = row["texto"]
+            habilidades = row["habilidades"]
+            clave = row["clave"]
+
+            print(f"{Fore.YELLOW}\tAumentando tarea: {i + 1}{Style.RESET_ALL}")
+
+            try:
+                resultados = aug.augment(texto, n=5)
+            except Exception as e:
+                print(
+                    f"{Fore.RED}\t⚠️ Error al aumentar tarea '{clave}': {e}{Style.RESET_ALL}"
+                )
+                continue
+
+            for j, t in enumerate(resultados):
+                tareas_aug.append(
+                    {
+                        "clave": f"{clave}_aug{j}",
+                        "texto": t,
+                        "habilidades": "|".join(habilidades),
+                    }
+                )
+
+        df_aug = pd.DataFrame(tareas_aug)
+        ruta_aug.parent.mkdir(parents=True, exist_ok=True)
+        df_aug.to_csv(ruta_aug, index=False)
+        print(
+            f"{Fore.GREEN}\n✅ Archivo de tareas aumentadas guardado en: {ruta_aug}{Style.RESET_ALL}"
+        )
 
-# Concatenar tareas etiquetadas + aumentadas
-df = pd.concat([df, df_aug], ignore_index=True)
-df["habilidades"] = df["habilidades"].apply(lambda x: x if isinstance(x, list) else [])
+    # Convertir de nuevo habilidades a listas
+    df_aug["habilidades"] = df_aug["habilidades"].apply(
+        lambda x: x.split("|") if isinstance(x, str) else []
+    )
 
-# --------------------------------------------
-# -------- Entrenamiento del modelo ----------
-# --------------------------------------------
+    # Concatenar tareas etiquetadas + aumentadas
+    df = pd.concat([df, df_aug], ignore_index=True)
+    df["habilidades"] = df["habilidades"].apply(lambda x: x if isinstance(x, list) else [])
 
-mlb: MultiLabelBinarizer = MultiLabelBinarizer()
-y: np.ndarray = mlb.fit_transform(df["habilidades"])
-X: pd.Series = df["texto"].fillna("")
+    return df
 
-pipeline: Pipeline = make_pipeline(
-    TfidfVectorizer(),
-    OneVsRestClassifier(RandomForestClassifier(n_estimators=100, n_jobs=-1)),
-)
-pipeline.fit(X, y)
 
-# --------------------------------------------
-# --------- Predicción de habilidades --------
-# --------------------------------------------
-X_pred: pd.Series = tasks_dat["texto"].fillna("")
-y_pred: np.ndarray = pipeline.predict(X_pred)
-habilidades_pred = mlb.inverse_transform(y_pred)
+def entrenar_clasificador(df: pd.DataFrame) -> tuple[Pipeline, MultiLabelBinarizer]:
+    """
+    Entrena el clasificador de habilidades y exporta su versión compilada.
+    Args:
+        df (pd.DataFrame): Resultado de `cargar_datos_entrenamiento`.
+    Returns:
+        tuple: El pipeline TF-IDF + RandomForest y el binarizador de las habilidades.
+    """
 
+    mlb: MultiLabelBinarizer = MultiLabelBinarizer()
+    y: np.ndarray = mlb.fit_transform(df["habilidades"])
+    X: pd.Series = df["texto"].fillna("")
 
-# --------------------------------------------
-# ---- Actualización de la base de datos -----
-# --------------------------------------------
+    pipeline: Pipeline = make_pipeline(
+        TfidfVectorizer(),
+        OneVsRestClassifier(RandomForestClassifier(n_estimators=100, n_jobs=-1)),
+    )
+    pipeline.fit(X, y)
+
+    # --------------------------------------------
+    # ------ Exportación del modelo compilado ----
+    # --------------------------------------------
+    try:
+        muestra = X.sample(min(200, len(X)), random_state=42).tolist()
+        ruta_compilado = publicar_compilado(
+            lambda ruta: exportar_clasificador_habilidades(pipeline, mlb, ruta),
+            lambda ruta: verificar_clasificador_habilidades(
+                pipeline, ClasificadorHabilidadesCompilado(ruta), muestra
+            ),
+            RUTA_CLASIFICADOR_HABILIDADES,
+        )
+        print(
+            f"{Fore.GREEN}✅ Modelo de habilidades compilado en: {ruta_compilado}\n{Style.RESET_ALL}"
+        )
+    except Exception as e:
+        print(
+            f"{Fore.RED}⚠️ No se ha podido exportar el modelo compilado: {e}. "
+            f"Se ha eliminado {RUTA_CLASIFICADOR_HABILIDADES}\n{Style.RESET_ALL}"
+        )
+
+    return pipeline, mlb
 
 
 def formatear_habilidades_sql(habs: List[str], tarea: pd.Series) -> str:
@@ -250,38 +304,77 @@ def formatear_habilidades_sql(habs: List[str], tarea: pd.Series) -> str:
     return f"ARRAY[{', '.join(rows)}]"
 
 
-tasks_dat["habilidades_pg_sql"] = [
-    formatear_habilidades_sql(habs, row)
-    for habs, (_, row) in zip(habilidades_pred, tasks_dat.iterrows())
-]
+def guardar_habilidades(engine: Engine, tasks_dat: pd.DataFrame, habilidades_pred: list) -> None:
+    """
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        tasks_dat (pd.DataFrame): Tareas activas.
+        habilidades_pred (list): Habilidades predichas de cada tarea, en el mismo orden.
+    """
+
+    tasks_dat["habilidades_pg_sql"] = [
+        formatear_habilidades_sql(habs, row)
+        for habs, (_, row) in zip(habilidades_pred, tasks_dat.iterrows())
+    ]
 
-try:
-    with engine.begin() as connection:
+    try:
+        with engine.begin() as connection:
+            print(
+                f"\n{Fore.YELLOW}Actualizando habilidades extraídas en la base de datos...\n{Style.RESET_ALL}"
+            )
+            for _, row in tasks_dat.iterrows():
+                if row["habilidades_pg_sql"] == "null":
+                    continue  # No actualizar si no hay habilidades
+
+                # Solo se actualizan las tareas cuyas habilidades cambian (sin contar su fecha),
+                # para no mover la fecha_modificacion que usa la exportación incremental
+                query_sql = f"""
+                    UPDATE tareas
+                    SET habilidades_extraidas = {row["habilidades_pg_sql"]}, fecha_modificacion = date_trunc('second', now())
+                    WHERE clave = :clave
+                      AND huella_habilidades(habilidades_extraidas)
+                          IS DISTINCT FROM huella_habilidades({row["habilidades_pg_sql"]})
+                """
+                connection.execute(text(query_sql), {"clave": row["clave"]})
+
+            # Commit changes
+            connection.commit()
+    except Exception as e:
         print(
-            f"\n{Fore.YELLOW}Actualizando habilidades extraídas en la base de datos...\n{Style.RESET_ALL}"
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al actualizar la base de datos: {e}\n"
+            + Style.RESET_ALL
         )
-        for _, row in tasks_dat.iterrows():
-            if row["habilidades_pg_sql"] == "null":
-                continue  # No actualizar si no hay habilidades
-
-            query_sql = f"""
-                UPDATE tareas
-                SET habilidades_extraidas = {row["habilidades_pg_sql"]}, fecha_modificacion = date_trunc('second', now())
-                WHERE clave = :clave
-            """
-            connection.execute(text(query_sql), {"clave": row["clave"]})
-
-        # Commit changes
-        connection.commit()
-except Exception as e:
+        exit(1)
+
     print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al actualizar la base de datos: {e}\n"
-        + Style.RESET_ALL
+        f"{Fore.GREEN}✅ Habilidades extraídas y actualizadas correctamente en la base de datos{Style.RESET_ALL}"
     )
-    exit(1)
 
-print(
-    f"{Fore.GREEN}✅ Habilidades extraídas y actualizadas correctamente en la base de datos{Style.RESET_ALL}"
-)
+
+def ejecutar(engine: Engine, tasks_dat: pd.DataFrame | None = None) -> None:
+    """
+    Etapa de asignación de habilidades a las tareas.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        tasks_dat (pd.DataFrame, optional): Tareas activas, si ya se han leído (por ejemplo,
+            las que devuelve la estimación de tiempos).
+    """
+
+    if tasks_dat is None:
+        tasks_dat = cargar_tareas(engine)
+    pipeline, mlb = entrenar_clasificador(cargar_datos_entrenamiento(engine))
+
+    # --------------------------------------------
+    # --------- Predicción de habilidades --------
+    # --------------------------------------------
+    X_pred: pd.Series = tasks_dat["texto"].fillna("")
+    y_pred: np.ndarray = pipeline.predict(X_pred)
+    habilidades_pred = mlb.inverse_transform(y_pred)
+
+    guardar_habilidades(engine, tasks_dat, habilidades_pred)
+
+
+if __name__ == "__main__":
+    ejecutar(obtener_conexion())
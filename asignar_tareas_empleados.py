@@ -1,24 +1,45 @@
 # -------------------- Librerías estándar --------------------
+import csv
+import hashlib
+import io
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import warnings
 from datetime import date, datetime
+from pathlib import Path
 from typing import Any, List, Tuple
 
 # -------------------- Terceros --------------------
+import joblib
+import numpy as np
 import pandas as pd
 from colorama import Fore, Style, init
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, Engine, text
-from collections import defaultdict
-import ast
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
 
 # -------------------- Machine Learning --------------------
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.decomposition import TruncatedSVD
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn import __version__ as version_sklearn
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
+from calendario_disponibilidad import CalendarioDisponibilidad, cargar_disponibilidad
+from matrices_habilidades import MatricesHabilidades
+from compilar_modelos import (
+    RUTA_REGRESOR_ASIGNACION,
+    RegresorAsignacionCompilado,
+    exportar_regresor_asignacion,
+    publicar_compilado,
+    verificar_regresor_asignacion,
+)
+
 # -------------------- Configuración --------------------
 warnings.filterwarnings("ignore", category=UserWarning)
 load_dotenv()
@@ -32,21 +53,35 @@ db_config = {
     "dbname": os.getenv("DATABASE", ""),
 }
 
-db_url = f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
-try:
-    engine: Engine = create_engine(db_url)
-    with engine.connect() as conn:
-        pass  # test de conexión
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al conectar con la base de datos: {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
+NUM_CANDIDATOS = 3  # Candidatos propuestos por tarea
+
+# voraz: recorre las tareas en orden; global: optimiza cada mes con un solver MILP
+MODO_ASIGNACION = os.getenv("MODO_ASIGNACION", "voraz")
+LIMITE_TIEMPO_SOLVER = float(os.getenv("LIMITE_TIEMPO_SOLVER", 60))  # Segundos para todos los meses
+CANDIDATOS_SOLVER = int(os.getenv("CANDIDATOS_SOLVER", 10))  # Candidatos por tarea que ve el solver
+PROCESOS_ASIGNACION = int(os.getenv("PROCESOS_ASIGNACION", os.cpu_count() or 1))
+GRUPOS_POR_PROCESO = 4  # Grupos de meses por proceso, para repartir mejor la carga
+FILAS_POR_BLOQUE = 250_000  # Pares tarea-empleado que se puntúan en cada llamada al modelo
+PARES_MINIMOS_PARTICION = 64  # Pares de una tarea a partir de los que se preseleccionan con np.partition
+FILAS_POR_ESCRITURA = int(os.getenv("FILAS_POR_ESCRITURA", 5000))  # Tareas que se acumulan antes de escribir sus candidatos
+
+# gb: GradientBoostingRegressor; hgb: HistGradientBoostingRegressor con parada temprana
+MODELO_ASIGNACION = os.getenv("MODELO_ASIGNACION", "gb")
+RUTA_CACHE_MODELO = Path(
+    os.getenv("RUTA_CACHE_MODELO_ASIGNACION", "modelos/asignacion_tareas.joblib")
+)  # Pipeline entrenado, que se reutiliza mientras los datos de entrenamiento no cambien
+
+# Solo se vuelven a puntuar las tareas abiertas o cuyos datos han cambiado desde la última ejecución
+ASIGNACION_INCREMENTAL = os.getenv("ASIGNACION_INCREMENTAL", "false").lower() == "true"
+ESTADOS_ABIERTOS = ("To Do", "In Progress")  # Estados cuyas tareas se puntúan en cada ejecución
+# En modo incremental, días que se sigue usando el modelo guardado aunque los datos cambien
+DIAS_REENTRENAMIENTO = int(os.getenv("DIAS_REENTRENAMIENTO", 7))
 
 # -------------------- Consultas --------------------
+# Las tareas archivadas no se entrenan ni se puntúan: sus candidatos se quedan como
+# estaban al archivarlas y solo se vuelven a calcular si la tarea se reabre. La
+# asignación voraz recorre las tareas en este orden, así que no puede depender de la
+# posición de las filas en disco, que cambia cada vez que se actualizan
 query_tareas = """
 SELECT
     t.id AS tarea_id,
@@ -58,15 +93,20 @@ SELECT
     t.texto,
     t.fecha,
     e.codificacion AS empleado_id,
-    e.habilidades AS habilidades_empleado
+    e.habilidades AS habilidades_empleado,
+    md5(concat_ws('|', t.texto, huella_habilidades(t.habilidades_extraidas)::text, t.fecha,
+        t.assignee, t.status_text, t.issue_type)) AS firma
 FROM Tareas t
 JOIN Empleados e ON t.assignee = e.codificacion
 WHERE t.habilidades_extraidas IS NOT NULL
   AND e.habilidades IS NOT NULL
+  AND NOT t.archivada
+ORDER BY t.id
 """
 
+# Ordenados, para que los empates entre empleados se resuelvan igual en cada ejecución
 query_empleados = (
-    "SELECT codificacion, habilidades FROM empleados where is_active = true"
+    "SELECT codificacion, habilidades FROM empleados where is_active = true ORDER BY id"
 )
 
 query_antiguedad = """
@@ -75,258 +115,1525 @@ FROM tareas
 GROUP BY assignee
 """
 
-try:
-    with engine.connect() as conn:
-        tasks_dat = pd.read_sql(text(query_tareas), conn)
-        empleados_dat = pd.read_sql(text(query_empleados), conn)
-        antiguedad_dat = pd.read_sql(text(query_antiguedad), conn)
-except Exception as e:
+# Estado de la última ejecución, para la asignación incremental
+query_ultima_ejecucion = """
+SELECT huella_modelo, huella_empleados
+FROM ejecuciones_asignacion
+ORDER BY id DESC
+LIMIT 1
+"""
+
+query_firmas = "SELECT tarea_id, firma FROM firmas_asignacion"
+
+query_reservas = """
+SELECT tarea_id, codificacion, to_char(mes, 'YYYY-MM') AS mes, horas
+FROM reservas_horas
+"""
+
+insert_reservas = """
+INSERT INTO reservas_horas (tarea_id, codificacion, mes, horas)
+SELECT r.tarea_id, r.codificacion, to_date(r.mes, 'YYYY-MM'), r.horas
+FROM unnest(
+    CAST(:tarea_id AS integer[]),
+    CAST(:codificacion AS varchar[]),
+    CAST(:mes AS varchar[]),
+    CAST(:horas AS numeric[])
+) AS r(tarea_id, codificacion, mes, horas)
+"""
+
+crear_candidatos_pendientes = """
+CREATE TEMP TABLE IF NOT EXISTS candidatos_pendientes (
+    tarea_id integer,
+    candidatos Candidatos[],
+    assignee_in_candidatos boolean
+) ON COMMIT DROP
+"""
+
+copy_candidatos_pendientes = """
+COPY candidatos_pendientes (tarea_id, candidatos, assignee_in_candidatos) FROM STDIN WITH (FORMAT csv)
+"""
+
+# Las tareas cuyos candidatos no cambian (sin contar su fecha) no se tocan, para no mover
+# la fecha_modificacion que usa la exportación incremental
+update_candidatos = """
+UPDATE Tareas t
+SET candidatos = p.candidatos,
+    fecha_modificacion = date_trunc('second', now()),
+    assignee_in_candidatos = p.assignee_in_candidatos
+FROM candidatos_pendientes p
+WHERE t.id = p.tarea_id
+  AND (huella_candidatos(t.candidatos), t.assignee_in_candidatos)
+      IS DISTINCT FROM (huella_candidatos(p.candidatos), p.assignee_in_candidatos)
+"""
+
+upsert_firmas = """
+INSERT INTO firmas_asignacion (tarea_id, firma)
+SELECT f.tarea_id, f.firma
+FROM unnest(CAST(:tarea_id AS integer[]), CAST(:firma AS varchar[])) AS f(tarea_id, firma)
+ON CONFLICT (tarea_id) DO UPDATE SET
+    firma = EXCLUDED.firma,
+    fecha_modificacion = date_trunc('second', now())
+"""
+
+
+def obtener_conexion() -> Engine:
+    """
+    Crea una conexión a la base de datos PostgreSQL utilizando SQLAlchemy.
+    Returns:
+        Engine: Un objeto Engine de SQLAlchemy para interactuar con la base de datos.
+    """
+
+    db_url = f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
+    try:
+        engine: Engine = create_engine(db_url)
+        with engine.connect() as conn:
+            pass  # test de conexión
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al conectar con la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    return engine
+
+
+def cargar_datos(
+    engine: Engine, incluir_antiguedad: bool = True
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame | None]:
+    """
+    Carga las tareas asignadas, los empleados activos y la primera tarea de cada empleado.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        incluir_antiguedad (bool): Si se lee la primera tarea de cada empleado; el
+            orquestador la calcula con las tareas que ya tiene en memoria.
+    Returns:
+        tuple: tareas, empleados y antigüedad (None si no se incluye), como DataFrames.
+    """
+
+    try:
+        with engine.connect() as conn:
+            tasks_dat = pd.read_sql(text(query_tareas), conn)
+            empleados_dat = pd.read_sql(text(query_empleados), conn)
+            antiguedad_dat = (
+                pd.read_sql(text(query_antiguedad), conn) if incluir_antiguedad else None
+            )
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer datos de la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
     print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al leer datos de la base de datos: {e}\n"
-        + Style.RESET_ALL
+        f"{Fore.GREEN}✅ Datos de tareas y empleados cargados correctamente\n{Style.RESET_ALL}"
     )
-    exit(1)
+    return tasks_dat, empleados_dat, antiguedad_dat
 
-print(
-    f"{Fore.GREEN}✅ Datos de tareas y empleados cargados correctamente\n{Style.RESET_ALL}"
-)
 
+def antiguedad_desde_tareas(tareas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula lo mismo que query_antiguedad a partir de todas las tareas ya leídas.
+    Args:
+        tareas (pd.DataFrame): Todas las tareas, con assignee y fecha.
+    Returns:
+        pd.DataFrame: codificacion y primera_fecha de cada empleado.
+    """
+
+    return (
+        tareas.groupby("assignee", dropna=False)["fecha"]
+        .min()
+        .rename_axis("codificacion")
+        .reset_index(name="primera_fecha")
+    )
 
-# -------------------- Calcular antigüedad normalizada --------------------
-hoy = pd.Timestamp(date.today())
-antiguedad_dat["primera_fecha"] = pd.to_datetime(antiguedad_dat["primera_fecha"])
-antiguedad_dat["antiguedad_dias"] = (hoy - antiguedad_dat["primera_fecha"]).dt.days
 
-# Normalización entre 0 y 1
-max_antiguedad = antiguedad_dat["antiguedad_dias"].max()
-antiguedad_dat["antiguedad_norm"] = antiguedad_dat["antiguedad_dias"] / max_antiguedad
+def calcular_antiguedad(antiguedad_dat: pd.DataFrame, hoy: date) -> dict:
+    """
+    Args:
+        antiguedad_dat (pd.DataFrame): codificacion y primera_fecha de cada empleado.
+        hoy (date): Fecha de referencia.
+    Returns:
+        dict: codificacion -> antigüedad normalizada entre 0 y 1.
+    """
 
-# Mapeo de codificacion -> antigüedad normalizada
-antiguedad_dict = antiguedad_dat.set_index("codificacion")["antiguedad_norm"].to_dict()
+    hoy = pd.Timestamp(hoy)
+    antiguedad_dat["primera_fecha"] = pd.to_datetime(antiguedad_dat["primera_fecha"])
+    antiguedad_dat["antiguedad_dias"] = (hoy - antiguedad_dat["primera_fecha"]).dt.days
 
+    # Normalización entre 0 y 1
+    max_antiguedad = antiguedad_dat["antiguedad_dias"].max()
+    antiguedad_dat["antiguedad_norm"] = antiguedad_dat["antiguedad_dias"] / max_antiguedad
 
-# -------------------- Funciones --------------------
-def parsear_habilidad(entry: Any) -> Tuple[str | None, str | None]:
-    if isinstance(entry, tuple) and len(entry) >= 2:
-        return entry[0], entry[1]
-    elif isinstance(entry, str) and entry.startswith("("):
-        partes = entry.strip("()").split(",")
-        if len(partes) >= 2:
-            return partes[0], partes[1]
-    return None, None
+    # Mapeo de codificacion -> antigüedad normalizada
+    return antiguedad_dat.set_index("codificacion")["antiguedad_norm"].to_dict()
 
 
-def get_hab_info(hab, tipo="empleado"):
+# -------------------- Entrenamiento --------------------
+def crear_regresor(tipo: str = MODELO_ASIGNACION) -> Pipeline:
+    """
+    Args:
+        tipo (str): "gb" para GradientBoostingRegressor o "hgb" para
+            HistGradientBoostingRegressor, que agrupa cada característica en
+            histogramas y deja de añadir árboles cuando la validación no mejora.
+    Returns:
+        Pipeline: scaler + regresor sin entrenar.
+    """
 
-    if isinstance(hab, dict):
-        if tipo == "empleado":
-            return hab.get("habilidad"), hab.get("nivel_actual")
-        else:
-            return hab.get("habilidad"), hab.get("experiencia")
-    elif isinstance(hab, tuple):
+    if tipo == "hgb":
+        regresor = HistGradientBoostingRegressor(
+            max_iter=500,
+            learning_rate=0.1,
+            max_depth=5,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=10,
+            random_state=42,
+        )
+    else:
+        regresor = GradientBoostingRegressor(n_estimators=200, learning_rate=0.05, max_depth=5)
 
-        return hab[0], hab[1]
-    elif isinstance(hab, str):
+    return Pipeline([("scaler", StandardScaler()), ("gb", regresor)])
 
-        try:
-            tup = ast.literal_eval(hab)
-            return tup[0], tup[1]
-        except Exception:
-            return None, None
-    return None, None
-
-
-def cumple_experiencia_minima(habs_tarea, habs_empleado):
-    if not habs_tarea or not habs_empleado:
-        return False
-
-    dict_emp = {}
-    for h in habs_empleado:
-        hab, nivel = get_hab_info(h, tipo="empleado")
-        if hab and nivel:
-            try:
-                dict_emp[hab] = int(nivel)
-            except ValueError:
-                continue
-
-    dict_tar = {}
-    for h in habs_tarea:
-        hab, exp = get_hab_info(h, tipo="tarea")
-        if hab and exp:
-            try:
-                dict_tar[hab] = int(exp)
-            except ValueError:
-                continue
-
-    for hab, exp_req in dict_tar.items():
-        nivel_emp = dict_emp.get(hab)
-        if nivel_emp is None or nivel_emp < exp_req:
-            return False
-    return True
-
-
-def calcular_match(
-    habs_tarea: List[str | None], habs_empleado: List[str | None]
-) -> float:
-    set_tarea = set(h[0] for h in map(parsear_habilidad, habs_tarea or []) if h[0])
-    set_emp = set(h[0] for h in map(parsear_habilidad, habs_empleado or []) if h[0])
-    if not set_tarea:
-        return 0.0
-    interseccion = set_tarea & set_emp
-    return len(interseccion) / len(set_tarea)
-
-
-# -------------------- Preprocesamiento --------------------
-corpus_textos = tasks_dat["texto"].fillna("").tolist()
-tfidf = TfidfVectorizer(max_features=250, stop_words=None)
-X_tfidf = tfidf.fit_transform(corpus_textos)
-
-n_svd_components = min(5, X_tfidf.shape[1])
-svd = TruncatedSVD(n_components=n_svd_components, random_state=42)
-X_texto = svd.fit_transform(X_tfidf)
 
-# -------------------- Entrenamiento --------------------
-X, y = [], []
-max_time = tasks_dat["timespent_real"].max()
-
-print(f"{Fore.YELLOW}Entrenando modelo de asignación...\n{Style.RESET_ALL}")
-
-for i, row in tasks_dat.iterrows():
-    match = calcular_match(row["habilidades_extraidas"], row["habilidades_empleado"])
-    antiguedad = antiguedad_dict.get(row["empleado_id"], 0.0)
-
-    features = [
-        match,
-        len(row["habilidades_extraidas"] or []),
-        len(row["habilidades_empleado"] or []),
-        antiguedad,
-        row["status_text"] == "Resolved",
-        row["status_text"] == "Closed",
-        row["issue_type"] == "Sub-task",
-        *X_texto[i].tolist(),
-    ]
-    X.append(features)
-    y.append((max_time - row["timespent_real"]) / max_time)
-
-pipeline = Pipeline(
-    [
-        ("scaler", StandardScaler()),
-        (
-            "gb",
-            GradientBoostingRegressor(
-                n_estimators=200, learning_rate=0.05, max_depth=5
-            ),
-        ),
+def caracteristicas_entrenamiento(
+    tasks_dat: pd.DataFrame, antiguedad_dict: dict, X_texto: np.ndarray
+) -> np.ndarray:
+    """
+    Construye la matriz de entrenamiento, un par (tarea, su empleado asignado) por
+    fila, con las mismas funciones y el mismo orden de columnas que la predicción.
+    Args:
+        tasks_dat (pd.DataFrame): Tareas asignadas con las habilidades de su empleado.
+        antiguedad_dict (dict): codificacion -> antigüedad normalizada.
+        X_texto (np.ndarray): Vector de texto de cada tarea.
+    Returns:
+        np.ndarray: Características de cada tarea con su empleado.
+    """
+
+    # Cada empleado aparece una sola vez en las matrices de habilidades
+    codigos, codificaciones = pd.factorize(tasks_dat["empleado_id"])
+    _, primera_fila = np.unique(codigos, return_index=True)
+    empleados = pd.DataFrame(
+        {
+            "codificacion": codificaciones,
+            "habilidades": tasks_dat["habilidades_empleado"].to_numpy()[primera_fila],
+        }
+    )
+
+    matrices = MatricesHabilidades(
+        tasks_dat["habilidades_extraidas"].tolist(), empleados["habilidades"].tolist()
+    )
+    filas = np.arange(len(tasks_dat))
+    return ensamblar_caracteristicas(
+        caracteristicas_tareas(tasks_dat, texto_vec=X_texto),
+        caracteristicas_empleados(empleados, antiguedad_dict),
+        filas,
+        codigos,
+        matrices.match_pares(filas, codigos),
+    )
+
+
+def huella_entrenamiento(tasks_dat: pd.DataFrame, primeras_fechas: dict, tipo: str) -> str:
+    """
+    Resume en un hash los datos de los que depende el modelo: las columnas de las
+    tareas que se usan, la fecha de la primera tarea de sus empleados, los
+    hiperparámetros y la versión de scikit-learn. No depende del orden de las filas.
+    Se usan las fechas y no la antigüedad normalizada, que cambia cada día.
+
+    Args:
+        tasks_dat (pd.DataFrame): Tareas de entrenamiento.
+        primeras_fechas (dict): codificacion -> fecha de su primera tarea.
+        tipo (str): Tipo de regresor.
+    Returns:
+        str: Hash hexadecimal.
+    """
+
+    columnas = [
+        "texto", "habilidades_extraidas", "habilidades_empleado", "timespent_real",
+        "status_text", "issue_type", "empleado_id",
     ]
-)
-pipeline.fit(X, y)
+    datos = tasks_dat[columnas].astype(str)
+    datos["primera_fecha"] = pd.to_datetime(
+        tasks_dat["empleado_id"].map(primeras_fechas)
+    ).astype(str)
+
+    huella = hashlib.sha256(
+        np.sort(pd.util.hash_pandas_object(datos, index=False).to_numpy()).tobytes()
+    )
+    huella.update(repr(crear_regresor(tipo).get_params(deep=True)).encode())
+    huella.update(version_sklearn.encode())
+    return huella.hexdigest()
+
+
+def cargar_modelo_cacheado(
+    huella: str, tipo: str, dias_validez: int = 0, ruta: Path = RUTA_CACHE_MODELO
+) -> dict | None:
+    """
+    Args:
+        huella (str): Hash de los datos de entrenamiento actuales.
+        tipo (str): Tipo de regresor.
+        dias_validez (int): Días durante los que el modelo guardado sirve aunque los
+            datos hayan cambiado, siempre que sea del mismo tipo y versión de scikit-learn.
+        ruta (Path): Fichero de la caché.
+    Returns:
+        dict | None: El modelo guardado si se puede reutilizar, o None.
+    """
+
+    if not ruta.exists():
+        return None
+    try:
+        cache = joblib.load(ruta)
+    except Exception as e:
+        print(f"{Fore.RED}⚠️ No se ha podido leer el modelo guardado: {e}\n{Style.RESET_ALL}")
+        return None
+
+    if cache.get("huella") == huella:
+        return cache
+    vigente = (
+        cache.get("tipo") == tipo
+        and cache.get("version") == version_sklearn
+        and datetime.now() - cache.get("fecha", datetime.min) < pd.Timedelta(days=dias_validez)
+    )
+    return cache if vigente else None
+
+
+def guardar_modelo_cacheado(cache: dict, ruta: Path = RUTA_CACHE_MODELO) -> None:
+    """
+    Escribe la caché en un fichero temporal y lo renombra, como `compilar_modelos`.
+    Args:
+        cache (dict): Huella, pipeline, vectorizador, SVD, tiempo máximo y muestra de características.
+        ruta (Path): Fichero de la caché.
+    """
+
+    try:
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(f".{ruta.name}.tmp")
+        joblib.dump(cache, temporal)
+        os.replace(temporal, ruta)
+    except Exception as e:
+        print(f"{Fore.RED}⚠️ No se ha podido guardar el modelo entrenado: {e}\n{Style.RESET_ALL}")
+
+
+def entrenar_modelo(
+    tasks_dat: pd.DataFrame,
+    antiguedad_dict: dict,
+    primeras_fechas: dict,
+    tipo: str = MODELO_ASIGNACION,
+    dias_validez: int = 0,
+) -> Tuple[Pipeline, TfidfVectorizer, TruncatedSVD, float, str]:
+    """
+    Entrena el regresor que puntúa la idoneidad de un empleado para una tarea, o
+    reutiliza el guardado en RUTA_CACHE_MODELO si los datos de entrenamiento no han
+    cambiado desde entonces (o si tiene menos de `dias_validez` días).
+    Args:
+        tasks_dat (pd.DataFrame): Tareas asignadas con las habilidades de su empleado.
+        antiguedad_dict (dict): codificacion -> antigüedad normalizada.
+        primeras_fechas (dict): codificacion -> fecha de su primera tarea, para la huella.
+        tipo (str): Tipo de regresor, como en `crear_regresor`.
+        dias_validez (int): Días que se reutiliza el modelo guardado aunque los datos cambien.
+    Returns:
+        tuple: pipeline entrenado, vectorizador TF-IDF, SVD, tiempo máximo de las tareas
+            y huella de los datos con los que se entrenó.
+    """
+
+    huella = huella_entrenamiento(tasks_dat, primeras_fechas, tipo)
+    cache = cargar_modelo_cacheado(huella, tipo, dias_validez)
+    reutilizado = cache is not None
+
+    if reutilizado:
+        motivo = "Datos de entrenamiento sin cambios" if cache["huella"] == huella else (
+            f"Modelo de menos de {dias_validez} días"
+        )
+        print(
+            f"{Fore.GREEN}♻️  {motivo}: se reutiliza el modelo de "
+            f"{RUTA_CACHE_MODELO}\n{Style.RESET_ALL}"
+        )
+    else:
+        print(f"{Fore.YELLOW}Entrenando modelo de asignación ({tipo})...\n{Style.RESET_ALL}")
+
+        inicio = time.perf_counter()
+        corpus_textos = tasks_dat["texto"].fillna("").tolist()
+        tfidf = TfidfVectorizer(max_features=250, stop_words=None)
+        X_tfidf = tfidf.fit_transform(corpus_textos)
+
+        n_svd_components = min(5, X_tfidf.shape[1])
+        svd = TruncatedSVD(n_components=n_svd_components, random_state=42)
+        X_texto = svd.fit_transform(X_tfidf)
+
+        X = caracteristicas_entrenamiento(tasks_dat, antiguedad_dict, X_texto)
+        max_time = tasks_dat["timespent_real"].max()
+        y = ((max_time - tasks_dat["timespent_real"]) / max_time).to_numpy(float)
+        tiempo_caracteristicas = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        pipeline = crear_regresor(tipo)
+        pipeline.fit(X, y)
+        tiempo_ajuste = time.perf_counter() - inicio
+
+        regresor = pipeline.named_steps["gb"]
+        arboles = getattr(regresor, "n_iter_", None) or regresor.n_estimators_
+        print(
+            f"{Fore.CYAN}\t⏱️  {len(X)} filas: características {tiempo_caracteristicas:.3f} s | "
+            f"ajuste {tiempo_ajuste:.3f} s ({arboles} árboles){Style.RESET_ALL}"
+        )
+
+        cache = {
+            "huella": huella,
+            "tipo": tipo,
+            "version": version_sklearn,
+            "fecha": datetime.now(),
+            "pipeline": pipeline,
+            "tfidf": tfidf,
+            "svd": svd,
+            "max_time": max_time,
+            "muestra": X[:200],
+        }
+        guardar_modelo_cacheado(cache)
+
+    # -------------------- Exportación del modelo compilado --------------------
+    # Con el modelo reutilizado, el compilado solo se regenera si falta o es anterior a
+    # la caché (p. ej. un GradientBoosting antiguo tras pasar a HistGradientBoosting)
+    if (
+        not reutilizado
+        or not RUTA_REGRESOR_ASIGNACION.exists()
+        or not RUTA_CACHE_MODELO.exists()
+        or RUTA_REGRESOR_ASIGNACION.stat().st_mtime < RUTA_CACHE_MODELO.stat().st_mtime
+    ):
+        try:
+            ruta_compilado = publicar_compilado(
+                lambda ruta: exportar_regresor_asignacion(
+                    cache["pipeline"], cache["tfidf"], cache["svd"], ruta
+                ),
+                lambda ruta: verificar_regresor_asignacion(
+                    cache["pipeline"], RegresorAsignacionCompilado(ruta), cache["muestra"]
+                ),
+                RUTA_REGRESOR_ASIGNACION,
+            )
+            print(
+                f"{Fore.GREEN}✅ Modelo de asignación compilado en: {ruta_compilado}\n{Style.RESET_ALL}"
+            )
+        except Exception as e:
+            print(
+                f"{Fore.RED}⚠️ No se ha podido exportar el modelo compilado: {e}. "
+                f"Se ha eliminado {RUTA_REGRESOR_ASIGNACION}\n{Style.RESET_ALL}"
+            )
+
+    return cache["pipeline"], cache["tfidf"], cache["svd"], cache["max_time"], cache["huella"]
 
 
 # -------------------- Predicción --------------------
-def construir_features(tarea, empleado):
-    texto_vec = svd.transform(tfidf.transform([tarea["texto"] or ""]))[0]
-    antiguedad = antiguedad_dict.get(empleado["codificacion"], 0.0)
-    return [
-        calcular_match(tarea["habilidades_extraidas"], empleado["habilidades"]),
-        len(tarea["habilidades_extraidas"] or []),
-        len(empleado["habilidades"] or []),
-        antiguedad,
-        tarea["status_text"] == "Resolved",
-        tarea["status_text"] == "Closed",
-        tarea["issue_type"] == "Sub-task",
-        *texto_vec.tolist(),
-    ]
+def caracteristicas_tareas(
+    tareas: pd.DataFrame,
+    tfidf: TfidfVectorizer | None = None,
+    svd: TruncatedSVD | None = None,
+    texto_vec: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Calcula una sola vez las columnas del modelo que dependen solo de la tarea.
+    Args:
+        tareas (pd.DataFrame): Tareas a puntuar.
+        tfidf (TfidfVectorizer, optional): Vectorizador entrenado.
+        svd (TruncatedSVD, optional): Reducción de dimensión entrenada.
+        texto_vec (np.ndarray, optional): Vector de texto ya calculado, como el del
+            entrenamiento; si no se da, se calcula con `tfidf` y `svd`.
+    Returns:
+        np.ndarray: Una fila por tarea con el número de habilidades, los indicadores de
+            estado y tipo, y el vector de texto.
+    """
+
+    if texto_vec is None:
+        texto_vec = svd.transform(tfidf.transform(tareas["texto"].fillna("").tolist()))
+    return np.column_stack(
+        [
+            tareas["habilidades_extraidas"].map(lambda h: len(h or [])).to_numpy(float),
+            (tareas["status_text"] == "Resolved").to_numpy(float),
+            (tareas["status_text"] == "Closed").to_numpy(float),
+            (tareas["issue_type"] == "Sub-task").to_numpy(float),
+            texto_vec,
+        ]
+    )
+
+
+def caracteristicas_empleados(empleados: pd.DataFrame, antiguedad_dict: dict) -> np.ndarray:
+    """
+    Args:
+        empleados (pd.DataFrame): Empleados candidatos.
+        antiguedad_dict (dict): codificacion -> antigüedad normalizada.
+    Returns:
+        np.ndarray: Una fila por empleado con el número de habilidades y su antigüedad.
+    """
 
+    return np.column_stack(
+        [
+            empleados["habilidades"].map(lambda h: len(h or [])).to_numpy(float),
+            empleados["codificacion"].map(lambda c: antiguedad_dict.get(c, 0.0)).to_numpy(float),
+        ]
+    )
+
+
+def ensamblar_caracteristicas(
+    feat_tareas: np.ndarray,
+    feat_empleados: np.ndarray,
+    tareas: np.ndarray,
+    empleados: np.ndarray,
+    match: np.ndarray,
+) -> np.ndarray:
+    """
+    Junta las características de una lista de pares tarea-empleado en el orden de
+    columnas del modelo: match, habilidades de la tarea, habilidades del empleado,
+    antigüedad, estado, tipo y vector de texto.
+
+    Args:
+        feat_tareas (np.ndarray): Características de todas las tareas.
+        feat_empleados (np.ndarray): Características de todos los empleados.
+        tareas (np.ndarray): Fila de la tarea de cada par.
+        empleados (np.ndarray): Fila del empleado de cada par.
+        match (np.ndarray): Solapamiento de habilidades de cada par.
+    Returns:
+        np.ndarray: Una fila por par.
+    """
+
+    por_tarea = feat_tareas[tareas]
+    return np.column_stack(
+        [match, por_tarea[:, :1], feat_empleados[empleados], por_tarea[:, 1:]]
+    )
+
+
+def puntuar_pares(
+    modelo: Any,
+    feat_tareas: np.ndarray,
+    feat_empleados: np.ndarray,
+    tareas: np.ndarray,
+    empleados: np.ndarray,
+    match: np.ndarray,
+) -> np.ndarray:
+    """
+    Puntúa una lista de pares tarea-empleado en una sola llamada al modelo.
+    Args:
+        modelo (Any): Modelo con método `predict`.
+        feat_tareas (np.ndarray): Características de todas las tareas.
+        feat_empleados (np.ndarray): Características de todos los empleados.
+        tareas (np.ndarray): Fila de la tarea de cada par.
+        empleados (np.ndarray): Fila del empleado de cada par.
+        match (np.ndarray): Solapamiento de habilidades de cada par.
+    Returns:
+        np.ndarray: La puntuación de cada par.
+    """
 
-def predecir_top_empleados(tarea, empleados, modelo):
-    resultados = [
-        (emp["codificacion"], modelo.predict([construir_features(tarea, emp)])[0])
-        for _, emp in empleados.iterrows()
+    if len(tareas) == 0:
+        return np.empty(0)
+
+    X = ensamblar_caracteristicas(feat_tareas, feat_empleados, tareas, empleados, match)
+    return np.asarray(modelo.predict(X))
+
+
+def seleccionar_top(
+    tareas: np.ndarray, empleados: np.ndarray, puntuaciones: np.ndarray, k: int
+) -> np.ndarray:
+    """
+    Elige los k mejores pares de cada tarea. Los empates se resuelven a favor del
+    empleado con el índice menor, igual que una ordenación estable.
+
+    En las tareas con más de PARES_MINIMOS_PARTICION pares, `np.partition` calcula
+    primero su k-ésima mejor puntuación y solo se ordenan los pares que la alcanzan
+    (empates incluidos), en lugar de ordenar todos los pares del bloque.
+
+    Args:
+        tareas (np.ndarray): Fila de la tarea de cada par.
+        empleados (np.ndarray): Fila del empleado de cada par.
+        puntuaciones (np.ndarray): Puntuación de cada par.
+        k (int): Candidatos por tarea.
+    Returns:
+        np.ndarray: Posiciones de los pares elegidos, agrupados por tarea y de mayor a
+            menor puntuación.
+    """
+
+    n = len(tareas)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Los pares de cada tarea juntos; si ya llegan agrupados (como en `puntuar_candidatos`) no se reordenan
+    agrupados = (
+        np.arange(n) if np.all(tareas[1:] >= tareas[:-1]) else np.argsort(tareas, kind="stable")
+    )
+    puntuaciones_agrupadas = puntuaciones[agrupados]
+    inicio_grupo = np.r_[0, np.flatnonzero(np.diff(tareas[agrupados])) + 1]
+    tamano_grupo = np.diff(np.r_[inicio_grupo, n])
+
+    umbral = np.full(len(inicio_grupo), -np.inf)
+    for g in np.flatnonzero(tamano_grupo > max(k, PARES_MINIMOS_PARTICION)):
+        grupo = puntuaciones_agrupadas[inicio_grupo[g] : inicio_grupo[g] + tamano_grupo[g]]
+        umbral[g] = np.partition(grupo, tamano_grupo[g] - k)[tamano_grupo[g] - k]
+    preseleccion = agrupados[puntuaciones_agrupadas >= np.repeat(umbral, tamano_grupo)]
+
+    orden = preseleccion[
+        np.lexsort(
+            (empleados[preseleccion], -puntuaciones[preseleccion], tareas[preseleccion])
+        )
     ]
-    return sorted(resultados, key=lambda x: x[1], reverse=True)[:3]
+    tareas_ordenadas = tareas[orden]
+    inicio_grupo = np.r_[0, np.flatnonzero(np.diff(tareas_ordenadas)) + 1]
+    tamano_grupo = np.diff(np.r_[inicio_grupo, len(orden)])
+    posicion = np.arange(len(orden)) - np.repeat(inicio_grupo, tamano_grupo)
+    return orden[posicion < k]
+
+
+def preparar_puntuacion(
+    tasks_dat: pd.DataFrame,
+    empleados_dat: pd.DataFrame,
+    tfidf: TfidfVectorizer,
+    svd: TruncatedSVD,
+    antiguedad_dict: dict,
+) -> dict:
+    """
+    Calcula una sola vez todo lo que la puntuación necesita de las tareas y de los
+    empleados. El resultado solo se lee, así que los procesos de
+    `asignar_por_meses` lo comparten sin copiarlo.
 
+    Args:
+        tasks_dat (pd.DataFrame): Tareas a puntuar.
+        empleados_dat (pd.DataFrame): Empleados activos.
+        tfidf (TfidfVectorizer): Vectorizador entrenado.
+        svd (TruncatedSVD): Reducción de dimensión entrenada.
+        antiguedad_dict (dict): codificacion -> antigüedad normalizada.
+    Returns:
+        dict: Características de tareas y empleados y `MatricesHabilidades`.
+    """
+
+    return {
+        "feat_tareas": caracteristicas_tareas(tasks_dat, tfidf, svd),
+        "feat_empleados": caracteristicas_empleados(empleados_dat, antiguedad_dict),
+        "matrices": MatricesHabilidades(
+            tasks_dat["habilidades_extraidas"].tolist(), empleados_dat["habilidades"].tolist()
+        ),
+    }
 
-# -------------------- Resultados --------------------
-print(f"{Fore.YELLOW}Realizando predicciones para las tareas...\n{Style.RESET_ALL}")
 
-horas_estimadas_por_empleado_mes = defaultdict(lambda: defaultdict(float))
-LIMITE_HORAS_MENSUAL = 160
-predicciones_df = []
+def puntuar_candidatos(
+    contexto: dict,
+    modelo: Any,
+    filas: np.ndarray,
+    num_candidatos: int = NUM_CANDIDATOS,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Calcula los mejores empleados de un conjunto de tareas. Con el índice invertido
+    de `MatricesHabilidades` solo se puntúan los empleados que cumplen la
+    experiencia mínima de la tarea, y los pares se envían al modelo por bloques.
 
-for _, row in tasks_dat.iterrows():
-    tarea = row[
-        ["habilidades_extraidas", "status_text", "texto", "issue_type", "fecha"]
-    ].to_dict()
+    Args:
+        contexto (dict): Resultado de `preparar_puntuacion`.
+        modelo (Any): Modelo con método `predict`.
+        filas (np.ndarray): Filas de las tareas a puntuar, en orden ascendente.
+        num_candidatos (int): Candidatos que se guardan por tarea.
+    Returns:
+        tuple: Candidatos en formato CSR sobre `filas`: `inicio` (len(filas) + 1) con la
+            posición del primer candidato de cada tarea, y los índices de los empleados
+            y sus puntuaciones, de mayor a menor dentro de cada tarea. Además, el número
+            de pares puntuados.
+    """
 
-    if tarea["fecha"] is None:
-        continue
+    feat_tareas = contexto["feat_tareas"]
+    feat_empleados = contexto["feat_empleados"]
+    matrices = contexto["matrices"]
 
-    fecha_tarea = pd.to_datetime(tarea["fecha"])
-    mes_clave = fecha_tarea.strftime("%Y-%m")
-    top3_bruto = predecir_top_empleados(tarea, empleados_dat, pipeline)
+    candidatos_tareas, candidatos_empleados, candidatos_puntuaciones = [], [], []
+    pares_evaluados = 0
 
-    top3_filtrado = []
-    for emp_id, score in top3_bruto:
-        empleado = empleados_dat[empleados_dat["codificacion"] == emp_id].iloc[0]
+    def puntuar(tareas: List[np.ndarray], empleados: List[np.ndarray]) -> None:
+        tareas, empleados = np.concatenate(tareas), np.concatenate(empleados)
+        puntuaciones = puntuar_pares(
+            modelo, feat_tareas, feat_empleados, tareas, empleados,
+            matrices.match_pares(tareas, empleados),
+        )
+        elegidos = seleccionar_top(tareas, empleados, puntuaciones, num_candidatos)
+        candidatos_tareas.append(tareas[elegidos])
+        candidatos_empleados.append(empleados[elegidos])
+        candidatos_puntuaciones.append(puntuaciones[elegidos])
 
-        if not cumple_experiencia_minima(
-            row["habilidades_extraidas"], empleado["habilidades"]
-        ):
+    bloque_tareas, bloque_empleados, pares_bloque = [], [], 0
+    for i in filas:
+        elegibles = matrices.elegibles(i)
+        if elegibles.size == 0:
             continue
+        bloque_tareas.append(np.full(elegibles.size, i))
+        bloque_empleados.append(elegibles)
+        pares_bloque += elegibles.size
+        if pares_bloque >= FILAS_POR_BLOQUE:
+            puntuar(bloque_tareas, bloque_empleados)
+            pares_evaluados += pares_bloque
+            bloque_tareas, bloque_empleados, pares_bloque = [], [], 0
+    if bloque_tareas:
+        puntuar(bloque_tareas, bloque_empleados)
+        pares_evaluados += pares_bloque
 
-        horas_actuales = horas_estimadas_por_empleado_mes[emp_id][mes_clave]
-        horas_estimadas = max_time * (1 - score)
-        if horas_actuales + horas_estimadas <= LIMITE_HORAS_MENSUAL:
-            top3_filtrado.append((emp_id, score))
-            horas_estimadas_por_empleado_mes[emp_id][mes_clave] += horas_estimadas
+    tareas = np.concatenate(candidatos_tareas) if candidatos_tareas else np.empty(0, dtype=int)
+    inicio = np.searchsorted(tareas, np.r_[filas, np.iinfo(np.int64).max])
+    inicio[-1] = len(tareas)
 
-        if len(top3_filtrado) == 3:
-            break
+    return (
+        inicio,
+        np.concatenate(candidatos_empleados) if candidatos_empleados else np.empty(0, dtype=int),
+        np.concatenate(candidatos_puntuaciones) if candidatos_puntuaciones else np.empty(0),
+        pares_evaluados,
+    )
 
-# -------------------- Guardar resultados con SQLAlchemy --------------------
-try:
-    with engine.begin() as conn:
-        tareas_db = conn.execute(text("SELECT id, texto FROM Tareas")).fetchall()
-        texto_to_id = {texto: tarea_id for tarea_id, texto in tareas_db}
-
-        for pred in predicciones_df:
-            tarea_id = texto_to_id.get(pred["tarea"])
-            if tarea_id is None:
-                continue
-
-            top3 = pred["top3_empleados"]
-            empleados_pg = ", ".join(
-                f"ROW('{emp}', {round(score, 4)}, '{date.today()}')::Candidatos"
-                for emp, score in top3
+
+def predecir_candidatos(
+    tasks_dat: pd.DataFrame,
+    empleados_dat: pd.DataFrame,
+    modelo: Any,
+    tfidf: TfidfVectorizer,
+    svd: TruncatedSVD,
+    antiguedad_dict: dict,
+    num_candidatos: int = NUM_CANDIDATOS,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calcula los mejores empleados de todas las tareas en el proceso actual.
+    Args:
+        tasks_dat (pd.DataFrame): Tareas a puntuar.
+        empleados_dat (pd.DataFrame): Empleados activos.
+        modelo (Any): Modelo con método `predict`.
+        tfidf (TfidfVectorizer): Vectorizador entrenado.
+        svd (TruncatedSVD): Reducción de dimensión entrenada.
+        antiguedad_dict (dict): codificacion -> antigüedad normalizada.
+        num_candidatos (int): Candidatos que se guardan por tarea.
+    Returns:
+        tuple: Candidatos de todas las tareas en formato CSR, como en `puntuar_candidatos`.
+    """
+
+    contexto = preparar_puntuacion(tasks_dat, empleados_dat, tfidf, svd, antiguedad_dict)
+    inicio, candidatos, puntuaciones, pares_evaluados = puntuar_candidatos(
+        contexto, modelo, np.arange(len(tasks_dat)), num_candidatos
+    )
+
+    print(
+        f"{Fore.CYAN}\t🔎 Pares puntuados: {pares_evaluados} de "
+        f"{len(tasks_dat) * len(empleados_dat)} posibles{Style.RESET_ALL}"
+    )
+    return inicio, candidatos, puntuaciones
+
+
+def recortar_candidatos(
+    inicio: np.ndarray, candidatos: np.ndarray, puntuaciones: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Args:
+        inicio (np.ndarray): Posición del primer candidato de cada tarea.
+        candidatos (np.ndarray): Índices de los empleados candidatos.
+        puntuaciones (np.ndarray): Puntuación de cada candidato.
+        k (int): Candidatos que se conservan por tarea.
+    Returns:
+        tuple: Los mismos candidatos en formato CSR, con como mucho los k primeros de cada tarea.
+    """
+
+    posicion = np.arange(len(candidatos)) - np.repeat(inicio[:-1], np.diff(inicio))
+    conservar = posicion < k
+    nuevo_inicio = np.r_[0, np.cumsum(np.minimum(np.diff(inicio), k))]
+    return nuevo_inicio, candidatos[conservar], puntuaciones[conservar]
+
+
+def asignar_candidatos(
+    tasks_dat: pd.DataFrame,
+    empleados_dat: pd.DataFrame,
+    inicio: np.ndarray,
+    candidatos: np.ndarray,
+    puntuaciones: np.ndarray,
+    max_time: float,
+    horas_comprometidas: dict | None = None,
+    calendario: CalendarioDisponibilidad | None = None,
+) -> List[dict]:
+    """
+    Recorre las tareas en orden y se queda con los candidatos que no superan las
+    horas disponibles en el mes de la tarea. Todos los candidatos cumplen ya la
+    experiencia mínima.
+    Args:
+        tasks_dat (pd.DataFrame): Tareas puntuadas.
+        empleados_dat (pd.DataFrame): Empleados activos.
+        inicio (np.ndarray): Posición del primer candidato de cada tarea.
+        candidatos (np.ndarray): Índices de los empleados candidatos.
+        puntuaciones (np.ndarray): Puntuación de cada candidato.
+        max_time (float): Tiempo máximo de las tareas de entrenamiento.
+        horas_comprometidas (dict, optional): (codificacion, mes) -> horas ya
+            reservadas antes de empezar.
+        calendario (CalendarioDisponibilidad, optional): Horas disponibles de cada
+            empleado; si no se indica, LIMITE_HORAS_MENSUAL en todos los meses.
+    Returns:
+        list: Por tarea, su id, los candidatos con su puntuación y si el empleado
+            asignado está entre ellos.
+    """
+
+    codificaciones = empleados_dat["codificacion"].tolist()
+    if calendario is None:
+        calendario = calendario_por_defecto(tasks_dat, empleados_dat)
+    capacidad = calendario.capacidad(codificaciones)
+    reservado = calendario.reservas(horas_comprometidas, codificaciones)
+    meses = calendario.indice_mes(tasks_dat["fecha"])
+    predicciones_df = []
+
+    for i, row in enumerate(tasks_dat.itertuples(index=False)):
+        mes = meses[i]
+        if mes < 0:
+            continue
+
+        # Un empleado aparece una sola vez entre los candidatos de una tarea, así que
+        # se pueden comprobar todos a la vez y quedarse con los NUM_CANDIDATOS primeros que caben
+        emp = candidatos[inicio[i] : inicio[i + 1]]
+        scores = puntuaciones[inicio[i] : inicio[i + 1]]
+        horas_estimadas = max_time * (1 - scores)
+        cabe = np.flatnonzero(reservado[emp, mes] + horas_estimadas <= capacidad[emp, mes])[:NUM_CANDIDATOS]
+        reservado[emp[cabe], mes] += horas_estimadas[cabe]
+
+        top3_filtrado = [(codificaciones[emp[k]], float(scores[k])) for k in cabe]
+        predicciones_df.append(
+            {
+                "tarea_id": row.tarea_id,
+                "top3_empleados": top3_filtrado,
+                "assignee_en_top3": row.empleado_id in (e for e, _ in top3_filtrado),
+            }
+        )
+
+    return predicciones_df
+
+
+def calendario_por_defecto(
+    tasks_dat: pd.DataFrame, empleados_dat: pd.DataFrame
+) -> CalendarioDisponibilidad:
+    """
+    Args:
+        tasks_dat (pd.DataFrame): Tareas a asignar.
+        empleados_dat (pd.DataFrame): Empleados activos.
+    Returns:
+        CalendarioDisponibilidad: Calendario de los meses de las tareas con el límite
+            mensual completo para todos los empleados.
+    """
+
+    meses = pd.to_datetime(tasks_dat["fecha"]).dropna().dt.strftime("%Y-%m").unique()
+    return CalendarioDisponibilidad(empleados_dat["codificacion"].tolist(), meses)
+
+
+def resolver_mes(
+    tareas: np.ndarray,
+    empleados: np.ndarray,
+    puntuaciones: np.ndarray,
+    horas: np.ndarray,
+    capacidad: np.ndarray,
+    limite_tiempo: float,
+) -> np.ndarray | None:
+    """
+    Elige los pares de un mes que maximizan la puntuación total con como mucho
+    NUM_CANDIDATOS empleados por tarea y sin pasar la capacidad de horas de cada
+    empleado. Es un problema de asignación generalizada (las horas dependen del
+    par), así que se resuelve como programa lineal entero con HiGHS.
+
+    Args:
+        tareas (np.ndarray): Fila local de la tarea de cada par.
+        empleados (np.ndarray): Fila local del empleado de cada par.
+        puntuaciones (np.ndarray): Puntuación de cada par.
+        horas (np.ndarray): Horas estimadas de cada par.
+        capacidad (np.ndarray): Horas disponibles de cada empleado en el mes.
+        limite_tiempo (float): Segundos que puede tardar el solver.
+    Returns:
+        np.ndarray | None: Máscara de los pares elegidos, o None si el solver no ha
+            encontrado una solución a tiempo.
+    """
+
+    n_pares = len(puntuaciones)
+    pares = np.arange(n_pares)
+    por_tarea = sparse.csr_matrix(
+        (np.ones(n_pares), (tareas, pares)), shape=(tareas.max() + 1, n_pares)
+    )
+    por_empleado = sparse.csr_matrix(
+        (horas, (empleados, pares)), shape=(len(capacidad), n_pares)
+    )
+
+    resultado = milp(
+        c=-puntuaciones,
+        integrality=np.ones(n_pares),
+        bounds=Bounds(0, 1),
+        constraints=[
+            LinearConstraint(por_tarea, -np.inf, NUM_CANDIDATOS),
+            LinearConstraint(por_empleado, -np.inf, capacidad),
+        ],
+        options={"time_limit": limite_tiempo, "mip_rel_gap": 1e-3},
+    )
+    if resultado.x is None:
+        return None
+    return resultado.x > 0.5
+
+
+
+def asignar_candidatos_global(
+    tasks_dat: pd.DataFrame,
+    empleados_dat: pd.DataFrame,
+    inicio: np.ndarray,
+    candidatos: np.ndarray,
+    puntuaciones: np.ndarray,
+    max_time: float,
+    predicciones_voraz: List[dict],
+    limite_tiempo: float = LIMITE_TIEMPO_SOLVER,
+    horas_comprometidas: dict | None = None,
+    calendario: CalendarioDisponibilidad | None = None,
+) -> Tuple[List[dict], int]:
+    """
+    Asigna los candidatos resolviendo cada mes de forma global con `resolver_mes`.
+    Los meses son independientes porque la capacidad es mensual. El tiempo
+    se reparte entre los meses que quedan; si el solver no encuentra solución o la
+    que encuentra puntúa menos que la voraz, el mes se queda con el resultado voraz.
+
+    Args:
+        tasks_dat (pd.DataFrame): Tareas puntuadas.
+        empleados_dat (pd.DataFrame): Empleados activos.
+        inicio (np.ndarray): Posición del primer candidato de cada tarea.
+        candidatos (np.ndarray): Índices de los empleados candidatos.
+        puntuaciones (np.ndarray): Puntuación de cada candidato.
+        max_time (float): Tiempo máximo de las tareas de entrenamiento.
+        predicciones_voraz (list): Resultado de `asignar_candidatos`, para los meses
+            que no se resuelven.
+        limite_tiempo (float): Segundos para resolver todos los meses.
+        horas_comprometidas (dict, optional): (codificacion, mes) -> horas ya reservadas.
+        calendario (CalendarioDisponibilidad, optional): Horas disponibles de cada
+            empleado; si no se indica, LIMITE_HORAS_MENSUAL en todos los meses.
+    Returns:
+        tuple: Predicciones con el mismo formato que `asignar_candidatos` y número de
+            meses que se han quedado con el resultado voraz.
+    """
+
+    codificaciones = np.asarray(empleados_dat["codificacion"].tolist(), dtype=object)
+    if calendario is None:
+        calendario = calendario_por_defecto(tasks_dat, empleados_dat)
+    disponible = calendario.capacidad(codificaciones) - calendario.reservas(
+        horas_comprometidas, codificaciones
+    )
+    voraz_por_tarea = {p["tarea_id"]: p for p in predicciones_voraz}
+
+    fechas = pd.to_datetime(tasks_dat["fecha"])
+    con_fecha = np.flatnonzero(fechas.notna().to_numpy())
+    meses = fechas.dt.strftime("%Y-%m").to_numpy()
+    tarea_ids = tasks_dat["tarea_id"].to_numpy()
+    asignados = tasks_dat["empleado_id"].to_numpy()
+
+    elegido = np.zeros(len(candidatos), dtype=bool)
+    tareas_voraces = set()
+    meses_voraces = 0
+    fin_plazo = time.perf_counter() + limite_tiempo
+
+    meses_pendientes = sorted(set(meses[con_fecha]))
+    for n_mes, mes in enumerate(meses_pendientes):
+        tareas_mes = con_fecha[meses[con_fecha] == mes]
+        longitudes = inicio[tareas_mes + 1] - inicio[tareas_mes]
+        posiciones = np.concatenate([np.arange(inicio[i], inicio[i + 1]) for i in tareas_mes])
+        if posiciones.size == 0:
+            continue
+
+        empleados_mes, empleados_locales = np.unique(candidatos[posiciones], return_inverse=True)
+        capacidad = disponible[empleados_mes, calendario.indice_meses[mes]]
+        restante = fin_plazo - time.perf_counter()
+        seleccion = None
+        if restante > 0:
+            seleccion = resolver_mes(
+                np.repeat(np.arange(len(tareas_mes)), longitudes),
+                empleados_locales,
+                puntuaciones[posiciones],
+                max_time * (1 - puntuaciones[posiciones]),
+                capacidad,
+                restante / (len(meses_pendientes) - n_mes),
             )
 
-            assignee_en_top3 = pred.get("assignee_en_top3", False)
+        puntuacion_voraz = sum(
+            score
+            for tarea_id in tarea_ids[tareas_mes]
+            for _, score in voraz_por_tarea[tarea_id]["top3_empleados"]
+        )
+        if seleccion is None or puntuaciones[posiciones][seleccion].sum() < puntuacion_voraz:
+            meses_voraces += 1
+            tareas_voraces.update(tarea_ids[tareas_mes])
+        else:
+            elegido[posiciones] = seleccion
+
+    predicciones_df = []
+    for i in con_fecha:
+        if tarea_ids[i] in tareas_voraces:
+            top = voraz_por_tarea[tarea_ids[i]]["top3_empleados"]
+        else:
+            top = [
+                (codificaciones[candidatos[p]], float(puntuaciones[p]))
+                for p in range(inicio[i], inicio[i + 1])
+                if elegido[p]
+            ]
+        predicciones_df.append(
+            {
+                "tarea_id": tarea_ids[i],
+                "top3_empleados": top,
+                "assignee_en_top3": asignados[i] in (e for e, _ in top),
+            }
+        )
+
+    return predicciones_df, meses_voraces
+
+
+def puntuacion_total(predicciones_df: List[dict]) -> float:
+    """
+    Args:
+        predicciones_df (list): Candidatos por tarea.
+    Returns:
+        float: Suma de las puntuaciones de todos los candidatos asignados.
+    """
+
+    return sum(score for pred in predicciones_df for _, score in pred["top3_empleados"])
+
+
+# -------------------- Ejecución por meses en paralelo --------------------
+# Datos de solo lectura que los procesos hijos heredan al crearse (fork), sin copiarlos
+_contexto_procesos: dict = {}
+
+
+def iniciar_proceso_asignacion() -> None:
+    # Como en guardar_excel: las conexiones del pool heredadas del proceso padre no se
+    # pueden compartir, así que el hijo las olvida sin cerrarlas
+    if _contexto_procesos.get("engine") is not None:
+        _contexto_procesos["engine"].dispose(close=False)
+
+
+def repartir_meses(tasks_dat: pd.DataFrame, n_grupos: int) -> List[np.ndarray]:
+    """
+    Reparte los meses en grupos de tamaño parecido, asignando cada mes (de mayor a
+    menor número de tareas) al grupo con menos tareas.
+    Args:
+        tasks_dat (pd.DataFrame): Tareas a asignar.
+        n_grupos (int): Número máximo de grupos.
+    Returns:
+        list: Filas de las tareas de cada grupo, en orden ascendente.
+    """
+
+    meses = pd.to_datetime(tasks_dat["fecha"]).dt.strftime("%Y-%m").fillna("")
+    filas_por_mes = sorted(
+        meses.groupby(meses.to_numpy()).indices.items(), key=lambda m: (-len(m[1]), m[0])
+    )
+
+    grupos: List[List[np.ndarray]] = [[] for _ in range(min(n_grupos, len(filas_por_mes)))]
+    carga = [0] * len(grupos)
+    for _, filas in filas_por_mes:
+        destino = carga.index(min(carga))
+        grupos[destino].append(filas)
+        carga[destino] += len(filas)
+
+    return [np.sort(np.concatenate(g)) for g in grupos]
+
+
+def asignar_filas(filas: np.ndarray, limite_tiempo: float) -> dict:
+    """
+    Puntúa y asigna un grupo de meses completo. Se ejecuta en los procesos hijos
+    con los datos de `_contexto_procesos`.
+    Args:
+        filas (np.ndarray): Filas de las tareas del grupo.
+        limite_tiempo (float): Segundos para el solver global en este grupo.
+    Returns:
+        dict: Predicciones del grupo y sus estadísticas.
+    """
+
+    contexto = _contexto_procesos
+    tareas = contexto["tasks_dat"].iloc[filas]
+    empleados = contexto["empleados_dat"]
+
+    num_candidatos = CANDIDATOS_SOLVER if MODO_ASIGNACION == "global" else NUM_CANDIDATOS
+    inicio, candidatos, puntuaciones, pares = puntuar_candidatos(
+        contexto["puntuacion"], contexto["modelo"], filas, num_candidatos
+    )
+    voraz = asignar_candidatos(
+        tareas,
+        empleados,
+        *recortar_candidatos(inicio, candidatos, puntuaciones, NUM_CANDIDATOS),
+        contexto["max_time"],
+        horas_comprometidas=contexto["horas_comprometidas"],
+        calendario=contexto["calendario"],
+    )
+
+    resultado = {"predicciones": voraz, "voraz": voraz, "pares": pares, "meses_voraces": 0}
+    if MODO_ASIGNACION == "global":
+        resultado["predicciones"], resultado["meses_voraces"] = asignar_candidatos_global(
+            tareas, empleados, inicio, candidatos, puntuaciones, contexto["max_time"], voraz,
+            limite_tiempo, horas_comprometidas=contexto["horas_comprometidas"],
+            calendario=contexto["calendario"],
+        )
+    return resultado
+
+
+def asignar_por_meses(
+    tasks_dat: pd.DataFrame,
+    empleados_dat: pd.DataFrame,
+    modelo: Any,
+    puntuacion: dict,
+    max_time: float,
+    procesos: int = PROCESOS_ASIGNACION,
+    horas_comprometidas: dict | None = None,
+    calendario: CalendarioDisponibilidad | None = None,
+    sumidero: "SumideroCandidatos | None" = None,
+) -> Tuple[List[dict], dict]:
+    """
+    Puntúa y asigna las tareas repartiendo los meses entre varios procesos. La
+    capacidad es mensual, así que los meses no dependen unos de otros y el resultado
+    es el mismo que en un único proceso.
+
+    Args:
+        tasks_dat (pd.DataFrame): Tareas a asignar.
+        empleados_dat (pd.DataFrame): Empleados activos.
+        modelo (Any): Modelo con método `predict`.
+        puntuacion (dict): Resultado de `preparar_puntuacion`.
+        max_time (float): Tiempo máximo de las tareas de entrenamiento.
+        procesos (int): Procesos a usar; con 1 se ejecuta en el proceso actual.
+        horas_comprometidas (dict, optional): (codificacion, mes) -> horas ya reservadas
+            por tareas que no se asignan ahora.
+        calendario (CalendarioDisponibilidad, optional): Horas disponibles de cada
+            empleado; si no se indica, LIMITE_HORAS_MENSUAL en todos los meses.
+        sumidero (SumideroCandidatos, optional): Sin abrir; recibe las predicciones de
+            cada grupo de meses en cuanto se termina de asignar. Se abre aquí, después de
+            crear los procesos, para que no hereden su conexión.
+    Returns:
+        tuple: Predicciones en el orden de `tasks_dat` y resumen con los pares
+            puntuados, las puntuaciones voraz y final y los meses que se han quedado
+            con el resultado voraz.
+    """
+
+    _contexto_procesos.update(
+        tasks_dat=tasks_dat,
+        empleados_dat=empleados_dat,
+        modelo=modelo,
+        puntuacion=puntuacion,
+        max_time=max_time,
+        horas_comprometidas=horas_comprometidas,
+        calendario=calendario or calendario_por_defecto(tasks_dat, empleados_dat),
+        engine=sumidero.engine if sumidero is not None else None,
+    )
+
+    grupos = repartir_meses(tasks_dat, max(procesos, 1) * GRUPOS_POR_PROCESO)
+    # Cada proceso resuelve varios grupos seguidos; el tiempo del solver se reparte entre ellos
+    limite_grupo = LIMITE_TIEMPO_SOLVER * max(procesos, 1) / max(len(grupos), 1)
+
+    resultados = []
+
+    def recoger(resultado: dict) -> None:
+        resultados.append(resultado)
+        if sumidero is not None:
+            sumidero.escribir(resultado["predicciones"])
+
+    if procesos <= 1 or len(grupos) <= 1:
+        with sumidero or nullcontext():
+            for filas in grupos:
+                recoger(asignar_filas(filas, limite_grupo))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=iniciar_proceso_asignacion,
+        ) as pool:
+            # map envía todos los grupos y crea los procesos antes de abrir el sumidero
+            resultados_grupos = pool.map(asignar_filas, grupos, [limite_grupo] * len(grupos))
+            with sumidero or nullcontext():
+                for resultado in resultados_grupos:
+                    recoger(resultado)
+
+    por_tarea = {p["tarea_id"]: p for r in resultados for p in r["predicciones"]}
+    predicciones_df = [por_tarea[t] for t in tasks_dat["tarea_id"] if t in por_tarea]
+
+    resumen = {
+        "pares": sum(r["pares"] for r in resultados),
+        "puntuacion_voraz": sum(puntuacion_total(r["voraz"]) for r in resultados),
+        "puntuacion": puntuacion_total(predicciones_df),
+        "meses_voraces": sum(r["meses_voraces"] for r in resultados),
+    }
+    return predicciones_df, resumen
+
+
+# -------------------- Asignación incremental --------------------
+def huella_empleados(empleados_dat: pd.DataFrame) -> str:
+    """
+    Args:
+        empleados_dat (pd.DataFrame): Empleados activos.
+    Returns:
+        str: Hash del conjunto de codificaciones de los empleados activos.
+    """
+
+    codificaciones = sorted(empleados_dat["codificacion"].astype(str))
+    return hashlib.sha256("\n".join(codificaciones).encode()).hexdigest()
+
+
+def cargar_estado_incremental(
+    engine: Engine,
+) -> Tuple[Tuple[str, str] | None, pd.DataFrame, pd.DataFrame]:
+    """
+    Carga lo que guardó la última ejecución para poder puntuar solo las tareas nuevas.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    Returns:
+        tuple: huellas del modelo y de los empleados de la última ejecución (o None si
+            no hay ninguna), firmas de las tareas y reservas de horas.
+    """
+
+    try:
+        with engine.connect() as conn:
+            ultima = conn.execute(text(query_ultima_ejecucion)).first()
+            firmas = pd.read_sql(text(query_firmas), conn)
+            reservas = pd.read_sql(text(query_reservas), conn)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer el estado de la última asignación: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    return (tuple(ultima) if ultima else None), firmas, reservas
+
+
+def seleccionar_tareas_pendientes(tasks_dat: pd.DataFrame, firmas: pd.DataFrame) -> np.ndarray:
+    """
+    Args:
+        tasks_dat (pd.DataFrame): Tareas con la columna `firma`.
+        firmas (pd.DataFrame): tarea_id y firma con las que se puntuó cada tarea.
+    Returns:
+        np.ndarray: Filas, en orden ascendente, de las tareas abiertas y de las que no
+            tienen firma o la tienen distinta.
+    """
+
+    firma_anterior = tasks_dat["tarea_id"].map(firmas.set_index("tarea_id")["firma"])
+    pendientes = tasks_dat["status_text"].isin(ESTADOS_ABIERTOS) | (
+        firma_anterior != tasks_dat["firma"]
+    )
+    return np.flatnonzero(pendientes.to_numpy())
+
+
+def horas_reservadas(reservas: pd.DataFrame, tarea_ids: Any) -> dict:
+    """
+    Args:
+        reservas (pd.DataFrame): tarea_id, codificacion, mes y horas.
+        tarea_ids (Any): Tareas cuyas reservas se mantienen.
+    Returns:
+        dict: (codificacion, mes) -> horas reservadas por esas tareas.
+    """
 
-            update_sql = text(
-                f"""
-                UPDATE Tareas
-                SET candidatos = ARRAY[{empleados_pg}]::Candidatos[],
-                    fecha_modificacion = date_trunc('second', now()),
-                    assignee_in_candidatos = :assignee_en_top3
-                WHERE id = :tarea_id
-            """
+    conservadas = reservas[reservas["tarea_id"].isin(tarea_ids)]
+    return conservadas.groupby(["codificacion", "mes"])["horas"].sum().astype(float).to_dict()
+
+
+def guardar_estado_incremental(
+    engine: Engine,
+    tareas: pd.DataFrame,
+    predicciones_df: List[dict],
+    max_time: float,
+    huellas: Tuple[str, str],
+    incremental: bool,
+) -> None:
+    """
+    Sustituye las reservas de horas y las firmas de las tareas puntuadas y registra
+    la ejecución. En una ejecución completa se vacían antes ambas tablas.
+
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        tareas (pd.DataFrame): Tareas puntuadas en esta ejecución.
+        predicciones_df (list): Candidatos de esas tareas.
+        max_time (float): Tiempo máximo de las tareas de entrenamiento.
+        huellas (tuple): Huella del modelo y de los empleados activos.
+        incremental (bool): Si solo se han puntuado parte de las tareas.
+    """
+
+    meses = dict(
+        zip(tareas["tarea_id"], pd.to_datetime(tareas["fecha"]).dt.strftime("%Y-%m"))
+    )
+    reservas = [
+        (pred["tarea_id"], emp, meses[pred["tarea_id"]], max_time * (1 - score))
+        for pred in predicciones_df
+        for emp, score in pred["top3_empleados"]
+    ]
+    tarea_ids = [int(t) for t in tareas["tarea_id"]]
+
+    try:
+        with engine.begin() as conn:
+            if incremental:
+                conn.execute(
+                    text("DELETE FROM reservas_horas WHERE tarea_id = ANY(:ids)"), {"ids": tarea_ids}
+                )
+            else:
+                conn.execute(text("TRUNCATE reservas_horas, firmas_asignacion"))
+
+            conn.execute(
+                text(insert_reservas),
+                {
+                    "tarea_id": [int(r[0]) for r in reservas],
+                    "codificacion": [r[1] for r in reservas],
+                    "mes": [r[2] for r in reservas],
+                    "horas": [float(r[3]) for r in reservas],
+                },
+            )
+            conn.execute(
+                text(upsert_firmas),
+                {"tarea_id": tarea_ids, "firma": tareas["firma"].tolist()},
             )
             conn.execute(
-                update_sql, {"tarea_id": tarea_id, "assignee_en_top3": assignee_en_top3}
+                text(
+                    """
+                    INSERT INTO ejecuciones_asignacion
+                        (huella_modelo, huella_empleados, incremental, tareas_puntuadas)
+                    VALUES (:huella_modelo, :huella_empleados, :incremental, :tareas_puntuadas)
+                    """
+                ),
+                {
+                    "huella_modelo": huellas[0],
+                    "huella_empleados": huellas[1],
+                    "incremental": incremental,
+                    "tareas_puntuadas": len(tareas),
+                },
+            )
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al guardar el estado de la asignación: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+
+# -------------------- Guardar resultados con SQLAlchemy --------------------
+def literal_candidatos(top3: List[Tuple[str, float]], fecha: date) -> str:
+    """
+    Args:
+        top3 (list): Pares (codificacion, puntuación).
+        fecha (date): Fecha de modificación de los candidatos.
+    Returns:
+        str: Literal de un array Candidatos[], con las comillas y barras escapadas en
+            cada nivel (campo del tipo compuesto y elemento del array).
+    """
+
+    def escapar(valor: Any) -> str:
+        return '"' + str(valor).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    return "{" + ",".join(
+        escapar(f"({escapar(emp)},{round(score, 4)},{fecha})") for emp, score in top3
+    ) + "}"
+
+
+class SumideroCandidatos:
+    """
+    Recibe los candidatos de las tareas a medida que se asignan y los escribe en
+    bloques de `filas_por_escritura` tareas: un COPY a una tabla temporal y un único
+    UPDATE ... FROM contra Tareas por bloque. Cada bloque se confirma al escribirlo,
+    así las filas de Tareas no se quedan bloqueadas mientras se puntúan los meses
+    siguientes. Si la ejecución se interrumpe, las tareas quedan con los candidatos
+    de algunos bloques nuevos, pero sus firmas (Firmas_Asignacion) solo se guardan al
+    terminar, así que la siguiente ejecución incremental las vuelve a puntuar.
+
+    Uso:
+        with SumideroCandidatos(engine) as sumidero:
+            sumidero.escribir(predicciones)
+    """
+
+    def __init__(self, engine: Engine, filas_por_escritura: int = FILAS_POR_ESCRITURA):
+        self.engine = engine
+        self.filas_por_escritura = max(filas_por_escritura, 1)
+        self.pendientes: List[dict] = []
+        self.escritas = 0
+        self.fecha = date.today()
+        self.conexion = None
+
+    def __enter__(self) -> "SumideroCandidatos":
+        self.conexion = self.engine.raw_connection()
+        return self
+
+    def escribir(self, predicciones_df: List[dict]) -> None:
+        """
+        Args:
+            predicciones_df (list): Candidatos por tarea, como los devuelve `asignar_candidatos`.
+        """
+
+        self.pendientes.extend(predicciones_df)
+        if len(self.pendientes) >= self.filas_por_escritura:
+            # Solo bloques completos: el resto espera a los candidatos siguientes
+            completas = len(self.pendientes) - len(self.pendientes) % self.filas_por_escritura
+            self.vaciar(completas)
+
+    def vaciar(self, filas: int | None = None) -> None:
+        """
+        Escribe en la base de datos los candidatos pendientes, en bloques de
+        `filas_por_escritura` tareas.
+        Args:
+            filas (int, optional): Cuántas de las tareas pendientes se escriben; todas si no se indica.
+        """
+
+        filas = len(self.pendientes) if filas is None else filas
+        for inicio in range(0, filas, self.filas_por_escritura):
+            self._escribir_bloque(self.pendientes[inicio : min(inicio + self.filas_por_escritura, filas)])
+        self.pendientes = self.pendientes[filas:]
+
+    def _escribir_bloque(self, bloque: List[dict]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for pred in bloque:
+            writer.writerow(
+                [
+                    int(pred["tarea_id"]),
+                    literal_candidatos(pred["top3_empleados"], self.fecha),
+                    "t" if pred["assignee_en_top3"] else "f",
+                ]
+            )
+        buffer.seek(0)
+
+        # La tabla temporal se borra al confirmar el bloque
+        try:
+            with self.conexion.cursor() as cur:
+                cur.execute(crear_candidatos_pendientes)
+                cur.copy_expert(copy_candidatos_pendientes, buffer)
+                cur.execute(update_candidatos)
+            self.conexion.commit()
+        except Exception as e:
+            self.conexion.rollback()
+            print(
+                Fore.RED
+                + Style.BRIGHT
+                + f"\n❌ Error al guardar los resultados en la base de datos: {e}\n"
+                + Style.RESET_ALL
             )
+            exit(1)
 
+        self.escritas += len(bloque)
+
+    def __exit__(self, tipo, valor, traza) -> None:
+        try:
+            if tipo is None:
+                self.vaciar()
+        finally:
+            self.conexion.close()
 
-except Exception as e:
+
+def guardar_predicciones(engine: Engine, predicciones_df: List[dict]) -> None:
+    """
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        predicciones_df (list): Candidatos por tarea, como los devuelve `asignar_candidatos`.
+    """
+
+    with SumideroCandidatos(engine) as sumidero:
+        sumidero.escribir(predicciones_df)
+
+
+def ejecutar(engine: Engine, antiguedad_dat: pd.DataFrame | None = None) -> None:
+    """
+    Etapa de asignación de candidatos a las tareas.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        antiguedad_dat (pd.DataFrame, optional): codificacion y primera_fecha de cada
+            empleado, si ya se tienen las tareas en memoria (`antiguedad_desde_tareas`).
+    """
+
+    global MODELO_ASIGNACION, MODO_ASIGNACION
+
+    tasks_dat, empleados_dat, antiguedad_leida = cargar_datos(engine, antiguedad_dat is None)
+    if antiguedad_dat is None:
+        antiguedad_dat = antiguedad_leida
+    antiguedad_dict = calcular_antiguedad(antiguedad_dat, date.today())
+
+    if MODELO_ASIGNACION not in ("gb", "hgb"):
+        print(
+            f"{Fore.RED}⚠️ MODELO_ASIGNACION '{MODELO_ASIGNACION}' desconocido, se usa GradientBoostingRegressor{Style.RESET_ALL}"
+        )
+        MODELO_ASIGNACION = "gb"
+
+    pipeline, tfidf, svd, max_time, huella_modelo = entrenar_modelo(
+        tasks_dat,
+        antiguedad_dict,
+        dict(zip(antiguedad_dat["codificacion"], antiguedad_dat["primera_fecha"])),
+        MODELO_ASIGNACION,
+        DIAS_REENTRENAMIENTO if ASIGNACION_INCREMENTAL else 0,
+    )
+    huellas = (huella_modelo, huella_empleados(empleados_dat))
+
+    # -------------------- Tareas a puntuar --------------------
+    incremental = False
+    horas_comprometidas = None
+    tareas_pendientes = tasks_dat
+    if ASIGNACION_INCREMENTAL:
+        ultima, firmas, reservas = cargar_estado_incremental(engine)
+        if ultima != huellas:
+            print(
+                f"{Fore.YELLOW}🔁 El modelo o los empleados activos han cambiado desde la última "
+                f"ejecución: se puntúan todas las tareas\n{Style.RESET_ALL}"
+            )
+        else:
+            incremental = True
+            filas = seleccionar_tareas_pendientes(tasks_dat, firmas)
+            tareas_pendientes = tasks_dat.iloc[filas].reset_index(drop=True)
+            horas_comprometidas = horas_reservadas(
+                reservas, tasks_dat["tarea_id"].drop(tasks_dat.index[filas])
+            )
+            print(
+                f"{Fore.YELLOW}🔁 Asignación incremental: {len(tareas_pendientes)} de "
+                f"{len(tasks_dat)} tareas abiertas o con cambios\n{Style.RESET_ALL}"
+            )
+
+    # -------------------- Resultados --------------------
+    print(f"{Fore.YELLOW}Realizando predicciones para las tareas...\n{Style.RESET_ALL}")
+
+    if MODO_ASIGNACION not in ("voraz", "global"):
+        print(
+            f"{Fore.RED}⚠️ MODO_ASIGNACION '{MODO_ASIGNACION}' desconocido, se usa la asignación voraz{Style.RESET_ALL}"
+        )
+        MODO_ASIGNACION = "voraz"
+
+    inicio = time.perf_counter()
+    if len(tareas_pendientes):
+        puntuacion = preparar_puntuacion(
+            tareas_pendientes, empleados_dat, tfidf, svd, antiguedad_dict
+        )
+    tiempo_preparacion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    if len(tareas_pendientes):
+        calendario = calendario_por_defecto(tareas_pendientes, empleados_dat)
+        disponibilidad = cargar_disponibilidad(engine, calendario.meses)
+        calendario.aplicar_disponibilidad(disponibilidad)
+        print(
+            f"{Fore.CYAN}\t📅 Calendario de {len(calendario.empleados)} empleados × "
+            f"{len(calendario.dias)} días con {len(disponibilidad)} periodos de disponibilidad{Style.RESET_ALL}"
+        )
+
+        # Los candidatos de cada grupo de meses se escriben en cuanto se asignan
+        predicciones_df, resumen = asignar_por_meses(
+            tareas_pendientes, empleados_dat, pipeline, puntuacion, max_time,
+            horas_comprometidas=horas_comprometidas, calendario=calendario,
+            sumidero=SumideroCandidatos(engine),
+        )
+    else:
+        predicciones_df = []
+        resumen = {"pares": 0, "puntuacion_voraz": 0.0, "puntuacion": 0.0, "meses_voraces": 0}
+    tiempo_asignacion = time.perf_counter() - inicio
+
+    print(
+        f"{Fore.CYAN}\t🔎 Pares puntuados: {resumen['pares']} de "
+        f"{len(tareas_pendientes) * len(empleados_dat)} posibles{Style.RESET_ALL}"
+    )
+    print(
+        f"{Fore.CYAN}\t⏱️  {len(tareas_pendientes)} tareas × {len(empleados_dat)} empleados "
+        f"({PROCESOS_ASIGNACION} procesos, modo {MODO_ASIGNACION}): preparación "
+        f"{tiempo_preparacion:.3f} s | puntuación, asignación y escritura {tiempo_asignacion:.3f} s{Style.RESET_ALL}"
+    )
     print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al guardar los resultados en la base de datos: {e}\n"
-        + Style.RESET_ALL
+        f"{Fore.CYAN}\t📈 Puntuación total: voraz {resumen['puntuacion_voraz']:.2f} | "
+        f"final {resumen['puntuacion']:.2f} ({resumen['meses_voraces']} meses con el "
+        f"resultado voraz){Style.RESET_ALL}"
     )
-    exit(1)
 
-print(
-    f"{Fore.GREEN}✅ Predicciones de empleados actualizadas correctamente{Style.RESET_ALL}"
-)
+    guardar_estado_incremental(
+        engine, tareas_pendientes, predicciones_df, max_time, huellas, incremental
+    )
+
+    print(
+        f"{Fore.GREEN}✅ Predicciones de empleados actualizadas correctamente{Style.RESET_ALL}"
+    )
+
+
+if __name__ == "__main__":
+    ejecutar(obtener_conexion())
@@ -0,0 +1,224 @@
+# -------------------- Standard Library --------------------
+from typing import Any, Iterable, List
+
+# -------------------- Third-Party Libraries --------------------
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine, text
+
+# -------------------- Configuración --------------------
+LIMITE_HORAS_MENSUAL = 160  # Horas de cada empleado en un mes sin ausencias
+DECIMALES_CAPACIDAD = 6  # Las sumas de horas diarias se redondean para que un mes completo dé el límite exacto
+
+# -------------------- Consultas --------------------
+query_disponibilidad = """
+SELECT codificacion, fecha_inicio, fecha_fin, horas_dia
+FROM disponibilidad_empleados
+WHERE fecha_fin >= :desde AND fecha_inicio <= :hasta
+ORDER BY id
+"""
+
+
+def cargar_disponibilidad(engine: Engine, meses: Iterable[str]) -> pd.DataFrame:
+    """
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        meses (Iterable[str]): Meses ("YYYY-MM") que se van a planificar.
+    Returns:
+        pd.DataFrame: Periodos de disponibilidad que tocan esos meses, en el orden en
+            que se registraron.
+    """
+
+    meses = sorted(meses)
+    if not meses:
+        return pd.DataFrame(columns=["codificacion", "fecha_inicio", "fecha_fin", "horas_dia"])
+
+    desde = pd.Timestamp(f"{meses[0]}-01")
+    hasta = pd.Timestamp(f"{meses[-1]}-01") + pd.offsets.MonthEnd(1)
+    with engine.connect() as conn:
+        return pd.read_sql(
+            text(query_disponibilidad), conn, params={"desde": desde.date(), "hasta": hasta.date()}
+        )
+
+
+class CalendarioDisponibilidad:
+    """
+    Horas disponibles de cada empleado en cada día de los meses que se planifican,
+    en un array (empleados × días). Solo se guardan los días de esos meses, así que
+    los huecos entre meses con tareas no ocupan memoria.
+
+    Por defecto el límite mensual se reparte a partes iguales entre los días
+    laborables del mes; los fines de semana tienen 0 horas. Las ausencias y las
+    jornadas reducidas fijan las horas de los días laborables de un periodo. La
+    capacidad de cada mes es la suma de sus días, calculada para todos los
+    empleados a la vez con `np.add.reduceat`.
+    """
+
+    def __init__(
+        self,
+        empleados: Iterable[str],
+        meses: Iterable[str],
+        limite_mensual: float = LIMITE_HORAS_MENSUAL,
+    ):
+        self.empleados: List[str] = list(empleados)
+        self.indice = {c: i for i, c in enumerate(self.empleados)}
+        self.meses: List[str] = sorted(set(meses))
+        self.indice_meses = {m: i for i, m in enumerate(self.meses)}
+
+        dias_por_mes = [
+            pd.date_range(f"{m}-01", pd.Timestamp(f"{m}-01") + pd.offsets.MonthEnd(1), freq="D")
+            for m in self.meses
+        ]
+        self.dias = (
+            np.concatenate([d.to_numpy().astype("datetime64[D]") for d in dias_por_mes])
+            if dias_por_mes
+            else np.empty(0, dtype="datetime64[D]")
+        )
+        self.inicio_mes = np.r_[0, np.cumsum([len(d) for d in dias_por_mes])[:-1]].astype(np.int64)
+        self.mes_de_dia = np.repeat(np.arange(len(self.meses)), [len(d) for d in dias_por_mes])
+        self.laborable = np.is_busday(self.dias)
+        self.laborables_mes = (
+            np.add.reduceat(self.laborable.astype(int), self.inicio_mes)
+            if len(self.dias)
+            else np.empty(0, dtype=int)
+        )
+
+        self.horas = np.zeros((len(self.empleados), len(self.dias)))
+        self.fijar_limite_mensual(limite_mensual)
+
+    # ---------- Edición ----------
+    def fijar_limite_mensual(self, limite: float, empleados: Iterable[str] | None = None) -> None:
+        """
+        Reparte un límite mensual entre los días laborables de cada mes.
+        Args:
+            limite (float): Horas por mes.
+            empleados (Iterable[str], optional): Empleados afectados; todos si no se indica.
+        """
+
+        filas = slice(None) if empleados is None else self._filas(empleados)
+        por_dia = np.where(
+            self.laborable, float(limite) / np.maximum(self.laborables_mes, 1)[self.mes_de_dia], 0.0
+        )
+        self.horas[filas] = por_dia
+        self._capacidad = None
+
+    def establecer(self, empleado: str, desde: Any, hasta: Any, horas_dia: float) -> None:
+        """
+        Fija las horas de los días laborables de un periodo, ambos días incluidos.
+        Args:
+            empleado (str): Codificación del empleado.
+            desde (Any): Primer día.
+            hasta (Any): Último día.
+            horas_dia (float): Horas disponibles en cada día laborable (0 para una ausencia).
+        """
+
+        dias = (self.dias >= np.datetime64(pd.Timestamp(desde).date(), "D")) & (
+            self.dias <= np.datetime64(pd.Timestamp(hasta).date(), "D")
+        )
+        self.horas[self.indice[empleado], dias & self.laborable] = float(horas_dia)
+        self._capacidad = None
+
+    def aplicar_disponibilidad(self, disponibilidad: pd.DataFrame) -> None:
+        """
+        Aplica en orden los periodos de Disponibilidad_Empleados; si dos se solapan,
+        manda el último. Se ignoran los de empleados que no están en el calendario.
+        Args:
+            disponibilidad (pd.DataFrame): codificacion, fecha_inicio, fecha_fin y horas_dia.
+        """
+
+        for fila in disponibilidad.itertuples(index=False):
+            if fila.codificacion in self.indice:
+                self.establecer(fila.codificacion, fila.fecha_inicio, fila.fecha_fin, fila.horas_dia)
+
+    def copia(self) -> "CalendarioDisponibilidad":
+        """
+        Returns:
+            CalendarioDisponibilidad: Calendario independiente con las mismas horas.
+        """
+
+        nuevo = object.__new__(CalendarioDisponibilidad)
+        nuevo.__dict__.update(self.__dict__)
+        nuevo.empleados = list(self.empleados)
+        nuevo.indice = dict(self.indice)
+        nuevo.horas = self.horas.copy()
+        return nuevo
+
+    def ampliar(self, empleados: Iterable[str], limite_mensual: float = LIMITE_HORAS_MENSUAL) -> None:
+        """
+        Añade empleados con el límite mensual indicado repartido en sus días laborables.
+        Args:
+            empleados (Iterable[str]): Codificaciones nuevas.
+            limite_mensual (float): Horas por mes de los empleados nuevos.
+        """
+
+        nuevos = [c for c in empleados if c not in self.indice]
+        if not nuevos:
+            return
+        self.indice.update({c: len(self.empleados) + i for i, c in enumerate(nuevos)})
+        self.empleados = self.empleados + nuevos
+        self.horas = np.vstack([self.horas, np.zeros((len(nuevos), len(self.dias)))])
+        self.fijar_limite_mensual(limite_mensual, nuevos)
+
+    # ---------- Consultas ----------
+    def _filas(self, empleados: Iterable[str]) -> np.ndarray:
+        return np.array([self.indice[c] for c in empleados], dtype=np.int64)
+
+    def capacidad(self, empleados: Iterable[str] | None = None) -> np.ndarray:
+        """
+        Args:
+            empleados (Iterable[str], optional): Orden de las filas; el del calendario si no se indica.
+        Returns:
+            np.ndarray: Horas disponibles de cada empleado en cada mes (empleados × meses).
+        """
+
+        if getattr(self, "_capacidad", None) is None:
+            self._capacidad = (
+                np.round(np.add.reduceat(self.horas, self.inicio_mes, axis=1), DECIMALES_CAPACIDAD)
+                if len(self.dias)
+                else np.zeros((len(self.empleados), 0))
+            )
+        return self._capacidad if empleados is None else self._capacidad[self._filas(empleados)]
+
+    def horas_periodo(self, empleados: Iterable[str], desde: Any, hasta: Any) -> np.ndarray:
+        """
+        Args:
+            empleados (Iterable[str]): Codificaciones.
+            desde (Any): Primer día.
+            hasta (Any): Último día (incluido).
+        Returns:
+            np.ndarray: Horas disponibles de cada empleado en el periodo.
+        """
+
+        dias = (self.dias >= np.datetime64(pd.Timestamp(desde).date(), "D")) & (
+            self.dias <= np.datetime64(pd.Timestamp(hasta).date(), "D")
+        )
+        return self.horas[self._filas(empleados)][:, dias].sum(axis=1)
+
+    def indice_mes(self, fechas: Any) -> np.ndarray:
+        """
+        Args:
+            fechas (Any): Fechas de las tareas.
+        Returns:
+            np.ndarray: Columna del mes de cada fecha, o -1 si no tiene fecha o su mes
+                no está en el calendario.
+        """
+
+        meses = pd.Series(pd.to_datetime(fechas)).dt.strftime("%Y-%m")
+        return meses.map(self.indice_meses).fillna(-1).to_numpy(np.int64)
+
+    def reservas(self, horas_comprometidas: dict | None, empleados: Iterable[str]) -> np.ndarray:
+        """
+        Args:
+            horas_comprometidas (dict, optional): (codificacion, mes) -> horas ya reservadas.
+            empleados (Iterable[str]): Orden de las filas.
+        Returns:
+            np.ndarray: Horas reservadas de cada empleado en cada mes (empleados × meses),
+                desde las que empieza una asignación.
+        """
+
+        filas = {c: i for i, c in enumerate(empleados)}
+        reservado = np.zeros((len(filas), len(self.meses)))
+        for (codificacion, mes), horas in (horas_comprometidas or {}).items():
+            if codificacion in filas and mes in self.indice_meses:
+                reservado[filas[codificacion], self.indice_meses[mes]] += horas
+        return reservado
@@ -0,0 +1,519 @@
+# -------------------- Standard Library --------------------
+import os
+import re
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, List, Sequence
+
+# -------------------- Third-Party Libraries --------------------
+import numpy as np
+from colorama import Fore, Style
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -------------------- Configuración --------------------
+DIRECTORIO_MODELOS = Path(
+    os.getenv("DIRECTORIO_MODELOS_COMPILADOS", "modelos/compilados")
+)  # Directorio en el que se guardan los modelos compilados
+RUTA_CLASIFICADOR_HABILIDADES = DIRECTORIO_MODELOS / "habilidades_tareas.npz"
+RUTA_REGRESOR_ASIGNACION = DIRECTORIO_MODELOS / "asignacion_tareas.npz"
+
+TAMANO_BLOQUE = 256  # Filas que se puntúan a la vez para acotar la memoria
+
+
+# -------------------- Exportación --------------------
+def exportar_vectorizador(tfidf: Any, prefijo: str = "tfidf") -> dict[str, np.ndarray]:
+    """
+    Convierte un TfidfVectorizer entrenado en arrays planos (vocabulario ordenado e idf).
+    Solo se admite la configuración que usan los scripts del proyecto.
+
+    Args:
+        tfidf (TfidfVectorizer): Vectorizador entrenado.
+        prefijo (str): Prefijo de las claves en el fichero exportado.
+    Returns:
+        dict: Arrays que describen el vectorizador.
+    """
+
+    if (
+        tfidf.analyzer != "word"
+        or tfidf.ngram_range != (1, 1)
+        or tfidf.stop_words is not None
+        or tfidf.preprocessor is not None
+        or tfidf.tokenizer is not None
+        or tfidf.strip_accents is not None
+        or tfidf.binary
+        or tfidf.sublinear_tf
+        or not tfidf.use_idf
+        or tfidf.norm != "l2"
+    ):
+        raise ValueError("Configuración de TfidfVectorizer no soportada por el formato compilado")
+
+    vocabulario = np.empty(len(tfidf.vocabulary_), dtype=object)
+    for termino, indice in tfidf.vocabulary_.items():
+        vocabulario[indice] = termino
+
+    return {
+        f"{prefijo}_vocabulario": vocabulario.astype(str),
+        f"{prefijo}_idf": np.asarray(tfidf.idf_, dtype=np.float64),
+        f"{prefijo}_patron": np.array(tfidf.token_pattern),
+        f"{prefijo}_minusculas": np.array(bool(tfidf.lowercase)),
+    }
+
+
+def aplanar_arboles(
+    arboles: List[Any],
+    valores_hoja: List[np.ndarray],
+    prefijo: str,
+    faltantes_izquierda: List[np.ndarray] | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Concatena los nodos de varios árboles en arrays planos con índices globales.
+    Las hojas apuntan a sí mismas para que el recorrido vectorizado pueda avanzar
+    todos los árboles a la vez sin ramas.
+
+    Args:
+        arboles (list): Objetos `tree_` de scikit-learn.
+        valores_hoja (list): Valor escalar de cada nodo, uno por árbol.
+        prefijo (str): Prefijo de las claves en el fichero exportado.
+        faltantes_izquierda (list, optional): Por árbol, si los valores ausentes van a
+            la izquierda en cada nodo. Los árboles de histogramas comparan además en
+            float64, así que con este argumento el bosque se recorre sin pasar a float32.
+    Returns:
+        dict: Arrays con la estructura de todos los árboles.
+    """
+
+    raices, izquierda, derecha, caracteristica, umbral, valor = [], [], [], [], [], []
+    desplazamiento = 0
+    profundidad_maxima = 0
+
+    for arbol, valores in zip(arboles, valores_hoja):
+        n_nodos = arbol.node_count
+        indices = np.arange(n_nodos) + desplazamiento
+        es_hoja = arbol.children_left == -1
+
+        raices.append(desplazamiento)
+        izquierda.append(np.where(es_hoja, indices, arbol.children_left + desplazamiento))
+        derecha.append(np.where(es_hoja, indices, arbol.children_right + desplazamiento))
+        caracteristica.append(np.where(es_hoja, 0, arbol.feature))
+        umbral.append(np.where(es_hoja, 0.0, arbol.threshold))
+        valor.append(np.asarray(valores, dtype=np.float64))
+
+        profundidad_maxima = max(profundidad_maxima, int(arbol.max_depth))
+        desplazamiento += n_nodos
+
+    def concatenar(partes: list, dtype: Any) -> np.ndarray:
+        return np.concatenate(partes).astype(dtype) if partes else np.empty(0, dtype)
+
+    arrays = {
+        f"{prefijo}_raices": np.asarray(raices, dtype=np.int64),
+        f"{prefijo}_izquierda": concatenar(izquierda, np.int64),
+        f"{prefijo}_derecha": concatenar(derecha, np.int64),
+        f"{prefijo}_caracteristica": concatenar(caracteristica, np.int64),
+        f"{prefijo}_umbral": concatenar(umbral, np.float64),
+        f"{prefijo}_valor": concatenar(valor, np.float64),
+        f"{prefijo}_profundidad": np.array(profundidad_maxima),
+    }
+    if faltantes_izquierda is not None:
+        arrays[f"{prefijo}_faltantes_izquierda"] = concatenar(faltantes_izquierda, bool)
+    return arrays
+
+
+def _arbol_histograma(predictor: Any) -> SimpleNamespace:
+    """
+    Da a un árbol de HistGradientBoostingRegressor (`TreePredictor`) los atributos
+    de un `tree_` de scikit-learn que usa `aplanar_arboles`.
+    """
+
+    nodos = predictor.nodes
+    es_hoja = nodos["is_leaf"].astype(bool)
+    return SimpleNamespace(
+        node_count=len(nodos),
+        children_left=np.where(es_hoja, -1, nodos["left"].astype(np.int64)),
+        children_right=np.where(es_hoja, -1, nodos["right"].astype(np.int64)),
+        feature=nodos["feature_idx"].astype(np.int64),
+        threshold=nodos["num_threshold"].astype(np.float64),
+        max_depth=int(nodos["depth"].max()),
+    )
+
+
+def exportar_clasificador_habilidades(
+    pipeline: Any, mlb: Any, ruta: Path = RUTA_CLASIFICADOR_HABILIDADES
+) -> Path:
+    """
+    Exporta el pipeline TF-IDF + OneVsRest(RandomForest) de asignar_habilidades_tareas.py.
+
+    Args:
+        pipeline (Pipeline): Pipeline entrenado.
+        mlb (MultiLabelBinarizer): Binarizador con los nombres de las habilidades.
+        ruta (Path): Fichero de destino.
+    Returns:
+        Path: Ruta del fichero generado.
+    """
+
+    tfidf, ovr = pipeline.steps[0][1], pipeline.steps[-1][1]
+
+    arboles, valores = [], []
+    arboles_por_etiqueta = np.zeros(len(ovr.estimators_), dtype=np.int64)
+    constantes = np.full(len(ovr.estimators_), np.nan)
+
+    for i, estimador in enumerate(ovr.estimators_):
+        if not hasattr(estimador, "estimators_"):  # Etiqueta constante en el entrenamiento
+            constantes[i] = float(np.ravel(estimador.y_)[0])
+            continue
+
+        columna_positiva = list(estimador.classes_).index(1)
+        for arbol in estimador.estimators_:
+            valor = arbol.tree_.value[:, 0, :]
+            normalizador = valor.sum(axis=1)
+            normalizador[normalizador == 0.0] = 1.0
+            arboles.append(arbol.tree_)
+            valores.append(valor[:, columna_positiva] / normalizador)
+        arboles_por_etiqueta[i] = len(estimador.estimators_)
+
+    arrays = {
+        **exportar_vectorizador(tfidf),
+        **aplanar_arboles(arboles, valores, "bosque"),
+        "etiquetas": np.asarray(mlb.classes_).astype(str),
+        "arboles_por_etiqueta": arboles_por_etiqueta,
+        "constantes": constantes,
+    }
+
+    return _guardar(arrays, ruta)
+
+
+def exportar_regresor_asignacion(
+    pipeline: Any, tfidf: Any, svd: Any, ruta: Path = RUTA_REGRESOR_ASIGNACION
+) -> Path:
+    """
+    Exporta el modelo de asignar_tareas_empleados.py: TF-IDF + SVD para el texto y
+    StandardScaler + GradientBoostingRegressor (o HistGradientBoostingRegressor)
+    para la puntuación.
+
+    Args:
+        pipeline (Pipeline): Pipeline scaler + regresor entrenado.
+        tfidf (TfidfVectorizer): Vectorizador del texto de las tareas.
+        svd (TruncatedSVD): Reducción de dimensionalidad del texto.
+        ruta (Path): Fichero de destino.
+    Returns:
+        Path: Ruta del fichero generado.
+    """
+
+    scaler, gb = pipeline.named_steps["scaler"], pipeline.named_steps["gb"]
+
+    if hasattr(gb, "_predictors"):  # HistGradientBoostingRegressor
+        predictores = [iteracion[0] for iteracion in gb._predictors]
+        bosque = aplanar_arboles(
+            [_arbol_histograma(p) for p in predictores],
+            [p.nodes["value"] for p in predictores],
+            "bosque",
+            faltantes_izquierda=[p.nodes["missing_go_to_left"] for p in predictores],
+        )
+        valor_inicial = float(np.ravel(gb._baseline_prediction)[0])
+        tasa_aprendizaje = 1.0  # Los valores de las hojas ya incluyen la tasa de aprendizaje
+    else:
+        arboles = [estimador[0].tree_ for estimador in gb.estimators_]
+        bosque = aplanar_arboles(arboles, [arbol.value[:, 0, 0] for arbol in arboles], "bosque")
+        valor_inicial = float(np.ravel(gb.init_.constant_)[0])
+        tasa_aprendizaje = float(gb.learning_rate)
+
+    arrays = {
+        **exportar_vectorizador(tfidf),
+        **bosque,
+        "svd_componentes": np.asarray(svd.components_, dtype=np.float64),
+        "escalado_media": np.asarray(scaler.mean_, dtype=np.float64),
+        "escalado_escala": np.asarray(scaler.scale_, dtype=np.float64),
+        "valor_inicial": np.array(valor_inicial),
+        "tasa_aprendizaje": np.array(tasa_aprendizaje),
+    }
+
+    return _guardar(arrays, ruta)
+
+
+def _guardar(arrays: dict[str, np.ndarray], ruta: Path) -> Path:
+    """
+    Escribe el fichero en una ruta temporal y lo renombra, para que quien lo esté
+    cargando nunca lea un modelo a medio escribir.
+    """
+
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(f".{ruta.stem}.tmp.npz")
+    np.savez_compressed(temporal, **arrays)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def publicar_compilado(
+    exportar: Callable[[Path], Path], verificar: Callable[[Path], bool], ruta: Path
+) -> Path:
+    """
+    Exporta el modelo a un fichero provisional, comprueba que predice lo mismo que
+    scikit-learn y solo entonces lo mueve a `ruta`. Si algo falla se borra también el
+    fichero anterior, que es de otro entrenamiento, para que los servicios no lo sirvan.
+
+    Args:
+        exportar (Callable): Escribe el modelo compilado en la ruta que recibe.
+        verificar (Callable): Comprueba la paridad del modelo guardado en la ruta que recibe.
+        ruta (Path): Fichero de destino.
+    Returns:
+        Path: Ruta del fichero publicado.
+    Raises:
+        ValueError: Si las predicciones del modelo compilado no coinciden.
+    """
+
+    ruta = Path(ruta)
+    provisional = ruta.with_name(f".{ruta.stem}.verificando.npz")
+    try:
+        exportar(provisional)
+        if not verificar(provisional):
+            raise ValueError("las predicciones del modelo compilado no coinciden con las de scikit-learn")
+        os.replace(provisional, ruta)
+    except Exception:
+        provisional.unlink(missing_ok=True)
+        ruta.unlink(missing_ok=True)
+        raise
+    return ruta
+
+
+# -------------------- Inferencia --------------------
+class VectorizadorCompilado:
+    """
+    Reimplementación de TfidfVectorizer (palabras, l2, idf suavizado) sobre arrays de NumPy.
+    """
+
+    def __init__(self, datos: Any, prefijo: str = "tfidf"):
+        vocabulario = datos[f"{prefijo}_vocabulario"]
+        self.indices = {termino: i for i, termino in enumerate(vocabulario.tolist())}
+        self.idf = datos[f"{prefijo}_idf"]
+        self.patron = re.compile(str(datos[f"{prefijo}_patron"]))
+        self.minusculas = bool(datos[f"{prefijo}_minusculas"])
+
+    def transformar(self, textos: Sequence[str]) -> np.ndarray:
+        """
+        Args:
+            textos (Sequence[str]): Textos a vectorizar.
+        Returns:
+            np.ndarray: Matriz densa (textos x vocabulario) normalizada en l2.
+        """
+
+        X = np.zeros((len(textos), len(self.idf)), dtype=np.float64)
+        for fila, texto in enumerate(textos):
+            texto = texto or ""
+            if self.minusculas:
+                texto = texto.lower()
+            columnas = [
+                self.indices[t] for t in self.patron.findall(texto) if t in self.indices
+            ]
+            np.add.at(X[fila], columnas, 1.0)
+
+        X *= self.idf
+        normas = np.sqrt(np.einsum("ij,ij->i", X, X))
+        normas[normas == 0.0] = 1.0
+        return X / normas[:, None]
+
+
+class BosqueCompilado:
+    """
+    Conjunto de árboles aplanados que se recorren a la vez con operaciones vectorizadas.
+    """
+
+    def __init__(self, datos: Any, prefijo: str = "bosque"):
+        self.raices = datos[f"{prefijo}_raices"]
+        self.izquierda = datos[f"{prefijo}_izquierda"]
+        self.derecha = datos[f"{prefijo}_derecha"]
+        self.caracteristica = datos[f"{prefijo}_caracteristica"]
+        self.umbral = datos[f"{prefijo}_umbral"]
+        self.valor = datos[f"{prefijo}_valor"]
+        self.profundidad = int(datos[f"{prefijo}_profundidad"])
+        self.faltantes_izquierda = (
+            datos[f"{prefijo}_faltantes_izquierda"]
+            if f"{prefijo}_faltantes_izquierda" in datos
+            else None
+        )
+
+    def valores_hoja(self, X: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            X (np.ndarray): Matriz de características (filas x columnas).
+        Returns:
+            np.ndarray: Valor de la hoja alcanzada en cada árbol (filas x árboles).
+        """
+
+        # scikit-learn compara en float32 las características de sus árboles, salvo en
+        # los de histogramas, que comparan en float64 y mandan los ausentes a un lado fijo
+        X = np.asarray(X, dtype=np.float32 if self.faltantes_izquierda is None else np.float64)
+        filas = np.arange(X.shape[0])[:, None]
+        nodos = np.broadcast_to(self.raices, (X.shape[0], len(self.raices))).copy()
+
+        for _ in range(self.profundidad):
+            valores = X[filas, self.caracteristica[nodos]]
+            a_la_izquierda = valores <= self.umbral[nodos]
+            if self.faltantes_izquierda is not None:
+                a_la_izquierda |= np.isnan(valores) & self.faltantes_izquierda[nodos]
+            siguientes = np.where(a_la_izquierda, self.izquierda[nodos], self.derecha[nodos])
+            if np.array_equal(siguientes, nodos):
+                break
+            nodos = siguientes
+
+        return self.valor[nodos]
+
+
+class ClasificadorHabilidadesCompilado:
+    """
+    Predicción de habilidades a partir del fichero generado por `exportar_clasificador_habilidades`.
+    """
+
+    def __init__(self, ruta: Path = RUTA_CLASIFICADOR_HABILIDADES):
+        with np.load(ruta, allow_pickle=False) as datos:
+            self.vectorizador = VectorizadorCompilado(datos)
+            self.bosque = BosqueCompilado(datos)
+            self.etiquetas = datos["etiquetas"]
+            self.arboles_por_etiqueta = datos["arboles_por_etiqueta"]
+            self.constantes = datos["constantes"]
+
+        self.ruta = Path(ruta)
+        self.con_arboles = np.flatnonzero(self.arboles_por_etiqueta > 0)
+        self.inicio_etiqueta = np.concatenate(([0], np.cumsum(self.arboles_por_etiqueta)[:-1]))
+
+    def predecir_probabilidades(self, textos: Sequence[str]) -> np.ndarray:
+        """
+        Args:
+            textos (Sequence[str]): Textos de las tareas.
+        Returns:
+            np.ndarray: Probabilidad de cada habilidad (textos x habilidades).
+        """
+
+        probabilidades = np.broadcast_to(
+            self.constantes, (len(textos), len(self.etiquetas))
+        ).copy()
+
+        for inicio in range(0, len(textos), TAMANO_BLOQUE):
+            bloque = textos[inicio : inicio + TAMANO_BLOQUE]
+            hojas = self.bosque.valores_hoja(self.vectorizador.transformar(bloque))
+
+            if len(self.con_arboles):
+                sumas = np.add.reduceat(
+                    hojas, self.inicio_etiqueta[self.con_arboles], axis=1
+                )
+                probabilidades[inicio : inicio + len(bloque), self.con_arboles] = (
+                    sumas / self.arboles_por_etiqueta[self.con_arboles]
+                )
+
+        return probabilidades
+
+    def predecir(self, textos: Sequence[str]) -> List[tuple]:
+        """
+        Args:
+            textos (Sequence[str]): Textos de las tareas.
+        Returns:
+            list[tuple]: Habilidades predichas para cada texto, como `mlb.inverse_transform`.
+        """
+
+        activas = self.predecir_probabilidades(textos) > 0.5
+        return [tuple(self.etiquetas[fila].tolist()) for fila in activas]
+
+
+class RegresorAsignacionCompilado:
+    """
+    Puntuación tarea-empleado a partir del fichero generado por `exportar_regresor_asignacion`.
+    """
+
+    def __init__(self, ruta: Path = RUTA_REGRESOR_ASIGNACION):
+        with np.load(ruta, allow_pickle=False) as datos:
+            self.vectorizador = VectorizadorCompilado(datos)
+            self.bosque = BosqueCompilado(datos)
+            self.componentes = datos["svd_componentes"]
+            self.media = datos["escalado_media"]
+            self.escala = datos["escalado_escala"]
+            self.valor_inicial = float(datos["valor_inicial"])
+            self.tasa_aprendizaje = float(datos["tasa_aprendizaje"])
+
+        self.ruta = Path(ruta)
+
+    def transformar_texto(self, textos: Sequence[str]) -> np.ndarray:
+        """
+        Args:
+            textos (Sequence[str]): Textos de las tareas.
+        Returns:
+            np.ndarray: Componentes SVD del texto, equivalentes a `svd.transform(tfidf.transform(...))`.
+        """
+
+        return self.vectorizador.transformar(textos) @ self.componentes.T
+
+    def predecir(self, X: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            X (np.ndarray): Características construidas como en `construir_features`.
+        Returns:
+            np.ndarray: Puntuación de cada fila.
+        """
+
+        X = (np.asarray(X, dtype=np.float64) - self.media) / self.escala
+        salida = np.empty(X.shape[0], dtype=np.float64)
+
+        for inicio in range(0, X.shape[0], TAMANO_BLOQUE):
+            hojas = self.bosque.valores_hoja(X[inicio : inicio + TAMANO_BLOQUE])
+            sumandos = np.column_stack(
+                (np.full(hojas.shape[0], self.valor_inicial), self.tasa_aprendizaje * hojas)
+            )
+            # cumsum suma de forma secuencial, en el mismo orden que scikit-learn
+            salida[inicio : inicio + hojas.shape[0]] = np.cumsum(sumandos, axis=1)[:, -1]
+
+        return salida
+
+
+# -------------------- Verificación --------------------
+# Paridad que exige `publicar_compilado` antes de sustituir el modelo publicado. Las
+# pruebas están en test_compilar_modelos.py y la latencia se mide con medir_compilados.py
+def verificar_clasificador_habilidades(
+    pipeline: Any, compilado: ClasificadorHabilidadesCompilado, textos: Sequence[str]
+) -> bool:
+    """
+    Compara las predicciones del pipeline de scikit-learn con las del modelo compilado.
+
+    Args:
+        pipeline (Pipeline): Pipeline original.
+        compilado (ClasificadorHabilidadesCompilado): Modelo compilado.
+        textos (Sequence[str]): Textos de prueba.
+    Returns:
+        bool: True si las predicciones coinciden.
+    """
+
+    textos = list(textos)
+    esperado = np.asarray(pipeline.predict(textos)).astype(bool)
+    obtenido = compilado.predecir_probabilidades(textos) > 0.5
+    diferencias = int((esperado != obtenido).any(axis=1).sum())
+
+    _mostrar_verificacion("clasificador de habilidades", diferencias, len(textos))
+    return diferencias == 0
+
+
+def verificar_regresor_asignacion(
+    pipeline: Any, compilado: RegresorAsignacionCompilado, X: np.ndarray
+) -> bool:
+    """
+    Compara las puntuaciones del pipeline de scikit-learn con las del modelo compilado.
+
+    Args:
+        pipeline (Pipeline): Pipeline scaler + regresor original.
+        compilado (RegresorAsignacionCompilado): Modelo compilado.
+        X (np.ndarray): Características de prueba.
+    Returns:
+        bool: True si las puntuaciones coinciden.
+    """
+
+    X = np.asarray(X, dtype=np.float64)
+    esperado = pipeline.predict(X)
+    obtenido = compilado.predecir(X)
+    diferencias = int((~np.isclose(esperado, obtenido, rtol=1e-9, atol=1e-12)).sum())
+
+    _mostrar_verificacion("regresor de asignación", diferencias, len(X))
+    return diferencias == 0
+
+
+def _mostrar_verificacion(nombre: str, diferencias: int, n_filas: int) -> None:
+    color = Fore.GREEN if diferencias == 0 else Fore.RED
+    print(
+        f"{color}\t🔎 Paridad del {nombre}: {n_filas - diferencias}/{n_filas} filas iguales{Style.RESET_ALL}"
+    )
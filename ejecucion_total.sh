@@ -19,20 +19,16 @@ print_box() {
 # Función para ejecutar y verificar scripts
 run_script() {
   local script="$1"
-  local label="$2"
+  shift
 
   print_box "Ejecutando script $script" "$BLUE"
-  python3 "$script"
+  python3 "$script" "$@"
   if [ $? -ne 0 ]; then
     print_box "Error en $script. Abortando ejecución." "$RED"
     exit 1
   fi
 }
 
-# Lista de scripts a ejecutar
-run_script "leer_datos.py" "Leer datos"
-run_script "estimacion_tiempos.py" "Estimación de tiempos"
-run_script "asignar_habilidades_tareas.py" "Asignar habilidades a tareas"
-run_script "asignar_habilidades_empleados.py" "Asignar habilidades a empleados"
-run_script "asignar_tareas_empleados.py" "Asignar tareas a empleados"
-run_script "guardar_excel.py" "Guardar Excel"
+# Todas las etapas se ejecutan en un mismo proceso (ver orquestador.py). Se puede indicar
+# la etapa por la que empezar, p. ej. ./ejecucion_total.sh asignar_tareas_empleados
+run_script "orquestador.py" "$@"
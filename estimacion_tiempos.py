@@ -17,165 +17,236 @@ db_config: dict[str, str | int] = {
     "dbname": os.getenv("DATABASE", ""),
 }
 
-# Consulta a la base de datos para extraer datos de tareas y empleados
+# Consulta a la base de datos para extraer datos de tareas
 query: str = "SELECT * FROM tareas"
-query_empleados: str = "SELECT codificacion, habilidades FROM empleados"
 
-
-# Leer los datos directamente a un DataFrame
-db_url: str = (
-    f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
-    f"@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
+update_query = text(
+    """
+    UPDATE tareas
+    SET timespent_real = :real, timespent_estimado = :estimado, bien_estimado = :bien,
+        -- Solo cuenta como modificación si cambia algún valor (lo usa la exportación incremental)
+        fecha_modificacion = CASE
+            WHEN (timespent_real, timespent_estimado, bien_estimado)
+                IS DISTINCT FROM (CAST(:real AS numeric), CAST(:estimado AS numeric), CAST(:bien AS boolean))
+            THEN date_trunc('second', now())
+            ELSE fecha_modificacion
+        END
+    WHERE clave = :clave
+"""
 )
 
-try:
-    engine: Engine = create_engine(db_url)
-    # Probar conexión
-    with engine.connect() as conn:
-        pass  # Si falla, salta al except
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al conectar con la base de datos: {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
-
-try:
-    tasks_dat: pd.DataFrame = pd.read_sql_query(query, engine)
-    empleados_dat: pd.DataFrame = pd.read_sql_query(query_empleados, engine)
-except Exception as e:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al leer datos de la base de datos: {e}\n"
-        + Style.RESET_ALL
+
+def obtener_conexion() -> Engine:
+    """
+    Crea una conexión a la base de datos PostgreSQL utilizando SQLAlchemy.
+    Returns:
+        Engine: Un objeto Engine de SQLAlchemy para interactuar con la base de datos.
+    """
+
+    db_url: str = (
+        f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
+        f"@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
     )
-    exit(1)
 
+    try:
+        engine: Engine = create_engine(db_url)
+        # Probar conexión
+        with engine.connect() as conn:
+            pass  # Si falla, salta al except
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al conectar con la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-print(
-    f"{Fore.GREEN}✅ Datos de tareas y empleados cargados correctamente\n{Style.RESET_ALL}"
-)
+    return engine
 
 
-j_aux: int = 1  # Variable auxiliar para el progreso
+def cargar_tareas(engine: Engine) -> pd.DataFrame:
+    """
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    Returns:
+        pd.DataFrame: Todas las tareas, activas y archivadas.
+    """
 
-# 1. Asignar timespent_real = 0 para todas las tareas en "To Do"
-tasks_dat.loc[tasks_dat["status_text"] == "To Do", "timespent_real"] = 0
+    try:
+        tasks_dat: pd.DataFrame = pd.read_sql_query(query, engine)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer datos de la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
-# 2. Identificar tareas que necesitan estimación
-tareas_a_estimar: pd.DataFrame = tasks_dat.copy()
+    print(f"{Fore.GREEN}✅ Datos de tareas cargados correctamente\n{Style.RESET_ALL}")
+    return tasks_dat
 
-# 3. Estimación por proyecto y empleado
-print(f"{Fore.YELLOW}\n⚙️ Estimando tiempos para tareas\n{Style.RESET_ALL}")
-for p in tareas_a_estimar["project_key"].unique():
 
-    print(
-        f"{Fore.CYAN}\t🧮 Estimando tiempos para el proyecto {p} ({j_aux}/{len(tareas_a_estimar['project_key'].unique())}){Style.RESET_ALL}"
-    )
+def estimar_tiempos(tasks_dat: pd.DataFrame) -> pd.DataFrame:
+    """
+    Estima el tiempo de cada tarea con la media del empleado en su proyecto (o la del
+    proyecto si no tiene asignado). Modifica `tasks_dat`.
+    Args:
+        tasks_dat (pd.DataFrame): Todas las tareas, como las devuelve `cargar_tareas`.
+    Returns:
+        pd.DataFrame: Las mismas tareas con timespent_real y timespent_estimado rellenos.
+    """
 
-    j_aux += 1  # Incrementar el contador de progreso
+    j_aux: int = 1  # Variable auxiliar para el progreso
 
-    tareas_proyecto: pd.DataFrame = tasks_dat[
-        (tasks_dat["project_key"] == p)
-    ]  # Filtrar tareas del proyecto actual
+    # En la base de datos timespent_real está en horas y las medias se calculan en segundos,
+    # como los de Jira. Las tareas sin timespent_jira pasan sus horas a segundos: si no, cada
+    # ejecución las volvería a dividir entre 3600 al guardarlas
+    tasks_dat["timespent_real"] = tasks_dat["timespent_jira"].fillna(tasks_dat["timespent_real"] * 3600)
 
-    empleados: np.ndarray = (
-        tareas_a_estimar[tareas_a_estimar["project_key"] == p]["assignee"]
-        .dropna()
-        .unique()
-    )  # Obtener empleados que tienen tareas en el proyecto actual
+    # 1. Asignar timespent_real = 0 para todas las tareas en "To Do"
+    tasks_dat.loc[tasks_dat["status_text"] == "To Do", "timespent_real"] = 0
 
-    if (
-        empleados.size == 0
-    ):  # Si no hay empleados asignados, continuar al siguiente proyecto
-        continue
+    # 2. Identificar tareas que necesitan estimación
+    tareas_a_estimar: pd.DataFrame = tasks_dat.copy()
 
-    for e in empleados:  # Recorrer cada empleado asignado al proyecto
+    # 3. Estimación por proyecto y empleado
+    print(f"{Fore.YELLOW}\n⚙️ Estimando tiempos para tareas\n{Style.RESET_ALL}")
+    for p in tareas_a_estimar["project_key"].unique():
 
-        tareas_empleado: pd.DataFrame = tareas_proyecto[
-            tareas_proyecto["assignee"] == e
-        ]  # Filtrar tareas del empleado actual
+        print(
+            f"{Fore.CYAN}\t🧮 Estimando tiempos para el proyecto {p} ({j_aux}/{len(tareas_a_estimar['project_key'].unique())}){Style.RESET_ALL}"
+        )
 
-        if not tareas_empleado.empty:  # Si el empleado tiene tareas asignadas
-            media_timespent: float = tareas_empleado[
-                "timespent_real"
-            ].mean()  # Calcular la media de timespent_real
+        j_aux += 1  # Incrementar el contador de progreso
+
+        tareas_proyecto: pd.DataFrame = tasks_dat[
+            (tasks_dat["project_key"] == p)
+        ]  # Filtrar tareas del proyecto actual
+
+        empleados: np.ndarray = (
+            tareas_a_estimar[tareas_a_estimar["project_key"] == p]["assignee"]
+            .dropna()
+            .unique()
+        )  # Obtener empleados que tienen tareas en el proyecto actual
+
+        if (
+            empleados.size == 0
+        ):  # Si no hay empleados asignados, continuar al siguiente proyecto
+            continue
+
+        for e in empleados:  # Recorrer cada empleado asignado al proyecto
+
+            tareas_empleado: pd.DataFrame = tareas_proyecto[
+                tareas_proyecto["assignee"] == e
+            ]  # Filtrar tareas del empleado actual
+
+            if not tareas_empleado.empty:  # Si el empleado tiene tareas asignadas
+                media_timespent: float = tareas_empleado[
+                    "timespent_real"
+                ].mean()  # Calcular la media de timespent_real
+
+            elif (
+                not tareas_proyecto.empty
+            ):  # Si el empleado no tiene tareas asignadas pero hay tareas en el proyecto
+                media_timespent: float = tareas_proyecto[
+                    "timespent_real"
+                ].mean()  # Calcular la media de timespent_real del proyecto
+
+            else:  # Si no hay tareas en el proyecto
+                media_timespent: float = 0
+
+            mask: pd.Series = (
+                (tasks_dat["project_key"] == p)
+                & (tasks_dat["assignee"] == e)
+                & (tasks_dat["status_text"] != "To Do")
+            )  # Crear una máscara para las tareas del proyecto y empleado actual
+
+            tasks_dat.loc[mask, "timespent_estimado"] = (
+                media_timespent  # Asignar la media de timespent_real a las tareas del empleado
+            )
 
-        elif (
-            not tareas_proyecto.empty
-        ):  # Si el empleado no tiene tareas asignadas pero hay tareas en el proyecto
+        # Estimar tareas sin asignar
+        sin_asignar_mask: pd.Series = (
+            (tasks_dat["project_key"] == p)
+            & (tasks_dat["assignee"].isnull())
+            & (tasks_dat["status_text"] != "To Do")
+        )  # Crear una máscara para las tareas sin asignar en el proyecto actual
+
+        if not tareas_proyecto.empty:  # Si hay tareas en el proyecto
             media_timespent: float = tareas_proyecto[
                 "timespent_real"
             ].mean()  # Calcular la media de timespent_real del proyecto
 
         else:  # Si no hay tareas en el proyecto
-            media_timespent: float = 0
+            media_timespent: float = 0  # Asignar 0 como media de timespent_real
 
-        mask: pd.Series = (
-            (tasks_dat["project_key"] == p)
-            & (tasks_dat["assignee"] == e)
-            & (tasks_dat["status_text"] != "To Do")
-        )  # Crear una máscara para las tareas del proyecto y empleado actual
-
-        tasks_dat.loc[mask, "timespent_estimado"] = (
-            media_timespent  # Asignar la media de timespent_real a las tareas del empleado
+        tasks_dat.loc[sin_asignar_mask, "timespent_estimado"] = (
+            media_timespent  # Asignar la media de timespent_real a las tareas sin asignar
         )
 
-    # Estimar tareas sin asignar
-    sin_asignar_mask: pd.Series = (
-        (tasks_dat["project_key"] == p)
-        & (tasks_dat["assignee"].isnull())
-        & (tasks_dat["status_text"] != "To Do")
-    )  # Crear una máscara para las tareas sin asignar en el proyecto actual
+    # Rellenar nulos antes de insertar
+    tasks_dat["timespent_estimado"] = (
+        tasks_dat["timespent_estimado"].fillna(0).astype(float)
+    )
+    tasks_dat["timespent_real"] = tasks_dat["timespent_real"].fillna(0).astype(float)
+    return tasks_dat
 
-    if not tareas_proyecto.empty:  # Si hay tareas en el proyecto
-        media_timespent: float = tareas_proyecto[
-            "timespent_real"
-        ].mean()  # Calcular la media de timespent_real del proyecto
 
-    else:  # Si no hay tareas en el proyecto
-        media_timespent: float = 0  # Asignar 0 como media de timespent_real
+def guardar_estimaciones(engine: Engine, tasks_dat: pd.DataFrame) -> pd.DataFrame:
+    """
+    Guarda en horas los tiempos de las tareas activas y si están bien estimadas.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        tasks_dat (pd.DataFrame): Resultado de `estimar_tiempos`.
+    Returns:
+        pd.DataFrame: Las tareas activas con los valores que quedan en la base de datos,
+            para pasárselas a la siguiente etapa sin volver a leerlas.
+    """
 
-    tasks_dat.loc[sin_asignar_mask, "timespent_estimado"] = (
-        media_timespent  # Asignar la media de timespent_real a las tareas sin asignar
-    )
+    # Las medias usan todo el histórico, pero las tareas archivadas no cambian
+    activas = tasks_dat[~tasks_dat["archivada"]].copy()
+    bien_estimado = (
+        (activas["timespent_real"] - activas["timespent_estimado"]).abs()
+        <= 0.05 * activas["timespent_estimado"]
+    ).astype(object).where(activas["timespent_estimado"].notna(), None)
 
-# 4. Guardar resultados en la base de datos
-# Rellenar nulos antes de insertar
-tasks_dat["timespent_estimado"] = (
-    tasks_dat["timespent_estimado"].fillna(0).astype(float)
-)
-tasks_dat["timespent_real"] = tasks_dat["timespent_real"].fillna(0).astype(float)
+    with engine.connect() as conn:
+        with conn.begin():  # Maneja commit/rollback automáticamente
+            for row, bien in zip(activas.itertuples(index=False), bien_estimado):
+                conn.execute(
+                    update_query,
+                    {
+                        "real": float(row.timespent_real / 3600),
+                        "estimado": float(row.timespent_estimado / 3600),
+                        "bien": bien,
+                        "clave": row.clave,
+                    },
+                )
 
-update_query = text(
+    print(f"\n{Fore.GREEN}✅ Cambios efectuados en base de datos{Style.RESET_ALL}\n")
+
+    activas["timespent_real"] = activas["timespent_real"] / 3600
+    activas["timespent_estimado"] = activas["timespent_estimado"] / 3600
+    activas["bien_estimado"] = bien_estimado
+    return activas.reset_index(drop=True)
+
+
+def ejecutar(engine: Engine, tasks_dat: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Etapa de estimación de tiempos.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        tasks_dat (pd.DataFrame, optional): Todas las tareas, si ya se han leído.
+    Returns:
+        pd.DataFrame: Las tareas activas tal y como quedan en la base de datos.
     """
-    UPDATE tareas
-    SET timespent_real = :real, timespent_estimado = :estimado, bien_estimado = :bien
-    WHERE clave = :clave
-"""
-)
 
-with engine.connect() as conn:
-    with conn.begin():  # Maneja commit/rollback automáticamente
-        for _, row in tasks_dat.iterrows():
-            conn.execute(
-                update_query,
-                {
-                    "real": float(row["timespent_real"] / 3600),
-                    "estimado": float(row["timespent_estimado"] / 3600),
-                    "bien": (
-                        bool(
-                            abs(row["timespent_real"] - row["timespent_estimado"])
-                            <= 0.05 * row["timespent_estimado"]
-                        )
-                        if pd.notnull(row["timespent_estimado"])
-                        else None
-                    ),
-                    "clave": row["clave"],
-                },
-            )
+    if tasks_dat is None:
+        tasks_dat = cargar_tareas(engine)
+    return guardar_estimaciones(engine, estimar_tiempos(tasks_dat))
 
-    print(f"\n{Fore.GREEN}✅ Cambios efectuados en base de datos{Style.RESET_ALL}\n")
+
+if __name__ == "__main__":
+    ejecutar(obtener_conexion())
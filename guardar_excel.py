@@ -1,14 +1,26 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 from pathlib import Path
 from sqlalchemy import create_engine, Engine, text
+import itertools
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 import os
+import re
+import sys
+import time
 import warnings
+import xlsxwriter
 from dotenv import load_dotenv
 from colorama import init, Fore, Style
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.worksheet.table import Table, TableStyleInfo
 from datetime import date, datetime
+from typing import Callable, Iterable, Iterator
+
+from almacen_historico import AlmacenHistorico
 
 
 # -------------------- Inicialización --------------------
@@ -16,6 +28,61 @@ warnings.filterwarnings("ignore", category=UserWarning)
 load_dotenv()
 init(autoreset=True)
 
+# -------------------- Configuración del informe --------------------
+FILAS_MUESTRA_ANCHOS = 10_000  # Filas con las que se estima el ancho de cada columna
+ANCHO_MAXIMO_COLUMNA = 50
+FILAS_POR_LOTE = 10_000  # Filas que se convierten a la vez antes de escribirlas
+MAX_FILAS_HOJA = 1_048_575  # Límite de filas de Excel (1.048.576) sin la cabecera
+MAX_LONGITUD_NOMBRE_HOJA = 31
+# Filas del histórico que se leen de cada vez con un cursor del lado del servidor
+FILAS_POR_BLOQUE_LECTURA = int(os.getenv("FILAS_POR_BLOQUE_LECTURA", 50_000))
+COLOR_CABECERA = "#5F249F"
+COLOR_TEXTO_CABECERA = "#FCFCFC"
+FORMATO_FECHA = "yyyy-mm-dd hh:mm:ss"
+FORMATO_DIA = "yyyy-mm-dd"
+
+# -------------------- Configuración de la exportación --------------------
+# excel: libro .xlsx; parquet: un conjunto Parquet por hoja; ambos: los dos, comparando tiempos y tamaños
+FORMATO_INFORME = os.getenv("FORMATO_INFORME", "excel")
+CONJUNTOS_PARQUET = {
+    "Tareas Mes Actual o En Progreso": "tareas_mes_actual",
+    "Empleados": "empleados",
+    "Proyectos": "proyectos",
+    "Historico de tareas": "historico_tareas",
+}
+# Las hojas de tareas se particionan por mes (de `fecha`) y proyecto, al estilo Hive
+COLUMNAS_PARTICION = ["mes", "nombre_proyecto"]
+# Cada fichero de una partición guarda el diccionario completo de la columna, así que solo se
+# codifican como diccionario las columnas con pocos valores distintos (estado, tipo, habilidad,
+# empleado...). Parquet sigue codificando el resto con un diccionario propio de cada fichero
+MAX_VALORES_DICCIONARIO = 1000
+
+# Exportación incremental: el histórico se guarda en un almacén local que solo recibe las
+# tareas modificadas; la hoja del histórico se escribe con `completo` o `reconstruir`
+EXPORTACION_INCREMENTAL = os.getenv("EXPORTACION_INCREMENTAL", "false").lower() == "true"
+DIRECTORIO_HISTORICO = Path(os.getenv("DIRECTORIO_HISTORICO", "salidas/historico"))
+
+# Informes por proyecto (`python guardar_excel.py proyectos`): un libro por proyecto y un índice
+PROCESOS_INFORMES = int(os.getenv("PROCESOS_INFORMES", os.cpu_count() or 1))
+FICHERO_INDICE = "indice"
+FICHERO_SIN_PROYECTO = "sin_proyecto"  # Libro de las tareas sin proyecto
+ETIQUETA_SIN_PROYECTO = "(sin proyecto)"  # Su nombre en el índice y en los mensajes
+
+# -------------------- Configuración de los KPIs --------------------
+TARIFA_HORA_POR_DEFECTO = float(os.getenv("TARIFA_HORA_POR_DEFECTO", 30))  # Empleados sin fila en Tarifas_Empleados
+UMBRAL_DESVIACION_HORAS = float(os.getenv("UMBRAL_DESVIACION_HORAS", 0.2))  # Horas reales sobre las estimadas
+UMBRAL_PRECISION_ESTIMACION = float(os.getenv("UMBRAL_PRECISION_ESTIMACION", 0.5))  # Tareas bien estimadas
+COLUMNAS_SUMA_KPI = [
+    "num_tareas",
+    "horas_reales",
+    "horas_estimadas",
+    "tareas_evaluadas",
+    "tareas_bien_estimadas",
+    "tareas_con_candidatos",
+    "aciertos_candidatos",
+    "coste",
+]
+
 # -------------------- Configuración de conexión --------------------
 db_config = {
     "user": os.getenv("USUARIO", "test"),
@@ -50,140 +117,466 @@ def obtener_conexion() -> Engine:
     return engine
 
 
+# -------------------- Consultas SQL --------------------
+# La unión de tareas, proyectos, empleados, candidatos y habilidades está en la vista
+# Vista_Informe_Tareas (Tablas.sql) y se ejecuta una sola vez por informe
+query_historico_tareas = """
+    SELECT *
+    FROM vista_informe_tareas
+    ORDER BY fecha_modificacion asc
+"""
+
+# Todas las filas de las tareas modificadas desde la última exportación incremental
+query_cambios_historico = """
+    SELECT *
+    FROM vista_informe_tareas
+    WHERE fecha_modificacion >= :marca_agua
+    ORDER BY fecha_modificacion asc
+"""
+
+# Ids de todas las tareas, para quitar del almacén las que se han borrado
+query_ids_tareas = "SELECT id FROM tareas_claves"
+
+# Nivel actual de cada empleado en cada habilidad, con el mismo criterio que la vista
+query_niveles_candidatos = """
+    SELECT DISTINCT ON (e.empleado, eh.habilidad)
+        e.empleado AS nombre_candidato,
+        eh.habilidad,
+        eh.nivel AS nivel_candidato
+    FROM
+        empleados e
+        JOIN empleado_habilidad eh ON eh.codificacion = e.codificacion
+    ORDER BY
+        e.empleado, eh.habilidad, eh.posicion
+"""
+
+# Agregados de KPI_Tareas (mantenidos por trigger) con el coste según la tarifa de cada empleado
+query_kpis = """
+    SELECT
+        COALESCE(p.proyecto, k.project_key) AS proyecto,
+        COALESCE(e.empleado, k.assignee) AS empleado,
+        to_char(k.mes, 'YYYY-MM') AS mes,
+        k.num_tareas,
+        k.horas_reales,
+        k.horas_estimadas,
+        k.tareas_evaluadas,
+        k.tareas_bien_estimadas,
+        k.tareas_con_candidatos,
+        k.aciertos_candidatos,
+        k.horas_reales * COALESCE(r.tarifa_hora, :tarifa_por_defecto) AS coste
+    FROM
+        kpi_tareas k
+        LEFT JOIN proyectos p ON p.codificacion = k.project_key
+        LEFT JOIN empleados e ON e.codificacion = k.assignee
+        LEFT JOIN tarifas_empleados r ON r.codificacion = k.assignee
+    ORDER BY
+        k.mes asc, proyecto asc, empleado asc
+"""
+
+# Consultas de los informes por proyecto: solo las filas del proyecto, los empleados que
+# aparecen en sus tareas (asignados o candidatos) y sus habilidades necesarias. Con
+# :proyecto nulo son las de las tareas sin proyecto
+query_historico_proyecto = """
+    SELECT *
+    FROM vista_informe_tareas
+    WHERE nombre_proyecto = :proyecto OR (:proyecto IS NULL AND nombre_proyecto IS NULL)
+    ORDER BY fecha_modificacion asc
+"""
+
+query_empleados_proyecto = """
+    SELECT
+        e.id,
+        e.empleado,
+        e.is_active,
+        eh.habilidad,
+        eh.nivel AS nivel_actual,
+        e.fecha_modificacion
+    FROM
+        empleados e
+        JOIN empleado_habilidad eh ON eh.codificacion = e.codificacion
+    WHERE
+        e.codificacion IN (
+            SELECT t.assignee
+            FROM tareas t LEFT JOIN proyectos p ON p.codificacion = t.project_key
+            WHERE p.proyecto = :proyecto OR (:proyecto IS NULL AND t.project_key IS NULL)
+            UNION
+            SELECT c.codificacion
+            FROM tareas t
+                LEFT JOIN proyectos p ON p.codificacion = t.project_key
+                JOIN tarea_candidato c ON c.tarea_id = t.id
+            WHERE p.proyecto = :proyecto OR (:proyecto IS NULL AND t.project_key IS NULL)
+        )
+    ORDER BY
+        e.id asc, eh.habilidad desc
+"""
+
+# Proyectos de mayor a menor número de tareas, para repartir primero los libros más
+# grandes, y una fila con proyecto nulo si hay tareas sin proyecto
+query_proyectos_por_tamano = """
+    SELECT p.codificacion, p.proyecto, COUNT(t.id) AS num_tareas
+    FROM proyectos p LEFT JOIN tareas t ON t.project_key = p.codificacion
+    GROUP BY p.codificacion, p.proyecto
+    UNION ALL
+    SELECT NULL, NULL, COUNT(*)
+    FROM tareas
+    WHERE project_key IS NULL
+    HAVING COUNT(*) > 0
+    ORDER BY num_tareas desc, proyecto asc
+"""
+
+MESES_EN_PROGRESO = 3  # Meses hacia atrás en los que se incluyen las tareas en progreso
+
+# Los niveles de los empleados se recalculan sin que cambien sus tareas, así que el almacén
+# no guarda el nivel de los candidatos: se toma de los niveles actuales al leerlo. Los
+# nombres sí se guardan, porque cada codificación es el hash del nombre y no puede cambiar
+COLUMNAS_SIN_ALMACENAR = ["nivel_candidato"]
+
+# Tipos de las columnas del histórico. Al leer por bloques, una columna sin valores en un
+# bloque se quedaría con tipo object; así todos los bloques tienen los mismos tipos
+TIPOS_HISTORICO = {
+    "clave": "string",
+    "fecha": "datetime64[us]",
+    "timespent_real": "float64",
+    "timespent_estimado": "float64",
+    "bien_estimado": "boolean",
+    "nombre_proyecto": "string",
+    "Empleado entre candidatos": "boolean",
+    "nombre_assignee": "string",
+    "status_text": "string",
+    "issue_type": "string",
+    "texto": "string",
+    "nombre_candidato": "string",
+    "nivel_candidato": "float64",
+    "habilidad": "string",
+    "experiencia": "float64",
+    "fecha_modificacion": "datetime64[us]",
+}
+
+query_empleados = """
+    SELECT
+        e.id,
+        e.empleado,
+        e.is_active,
+        eh.habilidad,
+        eh.nivel AS nivel_actual,
+        e.fecha_modificacion
+    FROM
+        empleados e
+        JOIN empleado_habilidad eh ON eh.codificacion = e.codificacion
+    ORDER BY
+        e.id asc, eh.habilidad desc
+"""
+
+query_proyectos = """
+    SELECT
+        p.id,
+        p.proyecto,
+        h.habilidad,
+        h.nivel_necesario,
+        p.fecha_modificacion
+    FROM
+        proyectos p
+            LEFT JOIN LATERAL unnest(
+                COALESCE(p.habilidades_necesarias, ARRAY[]::habilidades_proyecto[])
+                            ) AS h(habilidad, nivel_necesario, fecha_modificacion)
+                    ON TRUE
+    ORDER BY
+        p.id asc, habilidad desc
+"""
+
+query_proyecto = """
+    SELECT
+        p.id,
+        p.proyecto,
+        h.habilidad,
+        h.nivel_necesario,
+        p.fecha_modificacion
+    FROM
+        proyectos p
+            LEFT JOIN LATERAL unnest(
+                COALESCE(p.habilidades_necesarias, ARRAY[]::habilidades_proyecto[])
+                            ) AS h(habilidad, nivel_necesario, fecha_modificacion)
+                    ON TRUE
+    WHERE
+        p.proyecto = :proyecto
+    ORDER BY
+        habilidad desc
+"""
+
+
+def filtrar_mes_actual(historico_tareas: pd.DataFrame, primer_dia_mes: date) -> pd.DataFrame:
+    """
+    Filtra del histórico las tareas no archivadas del mes actual en adelante y las que
+    siguen en progreso desde hace como mucho MESES_EN_PROGRESO meses.
+    Args:
+        historico_tareas (pd.DataFrame): Resultado de query_historico_tareas.
+        primer_dia_mes (date): Primer día del mes actual.
+    Returns:
+        pd.DataFrame: Tareas del mes actual o en progreso, ordenadas por fecha.
+    """
+
+    inicio_mes = pd.Timestamp(primer_dia_mes)
+    fecha = historico_tareas["fecha"]
+    en_mes_actual = ~historico_tareas["archivada"].astype(bool) & (
+        (fecha >= inicio_mes)
+        | (
+            (historico_tareas["status_text"] == "In Progress")
+            & (fecha >= inicio_mes - pd.DateOffset(months=MESES_EN_PROGRESO))
+        )
+    )
+    return historico_tareas[en_mes_actual].sort_values("fecha", kind="stable")
+
+
+def leer_en_bloques(
+    engine: Engine, consulta: str, params: dict | None = None, filas: int | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Lee una consulta del histórico con un cursor del lado del servidor, de forma que en
+    memoria solo está el bloque que se está procesando.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        consulta (str): Consulta sobre vista_informe_tareas.
+        params (dict, optional): Parámetros de la consulta.
+        filas (int, optional): Filas por bloque; FILAS_POR_BLOQUE_LECTURA si no se indica.
+    Returns:
+        Iterator[pd.DataFrame]: Bloques con los tipos de TIPOS_HISTORICO.
+    """
+
+    filas = filas or FILAS_POR_BLOQUE_LECTURA
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True, max_row_buffer=filas)
+            yield from pd.read_sql(
+                text(consulta), conn, params=params, chunksize=filas, dtype=TIPOS_HISTORICO
+            )
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer el histórico desde la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+
+class HistoricoEnBloques:
+    """
+    Recorre una sola vez los bloques del histórico y, a la vez, separa las filas de la
+    hoja del mes actual, que solo están completas cuando se ha recorrido todo.
+    """
+
+    def __init__(self, bloques: Iterable[pd.DataFrame], primer_dia_mes: date):
+        self.bloques = bloques
+        self.primer_dia_mes = primer_dia_mes
+        self.filas = 0
+        self._mes_actual: list[pd.DataFrame] = []
+        self._recorrido = False
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self._recorrido:
+            raise RuntimeError("El histórico por bloques solo se puede recorrer una vez")
+        self._recorrido = True
+        for bloque in self.bloques:
+            self._mes_actual.append(filtrar_mes_actual(bloque, self.primer_dia_mes))
+            self.filas += len(bloque)
+            # La columna archivada solo sirve para filtrar
+            yield bloque.drop(columns="archivada")
+
+    def tareas_mes_actual(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: Tareas del mes actual o en progreso de todo el histórico, por fecha.
+        """
+
+        if not self._recorrido:
+            raise RuntimeError("Hay que recorrer el histórico antes de pedir el mes actual")
+        if not self._mes_actual:
+            return pd.DataFrame()
+        return (
+            pd.concat(self._mes_actual, ignore_index=True)
+            .sort_values("fecha", kind="stable")
+            .drop(columns="archivada")
+        )
+
+
+def cargar_tablas_pequenas(engine: Engine) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns:
+        tuple: empleados y proyectos, que caben enteros en memoria.
+    """
+
+    try:
+        with engine.connect() as conn:
+            empleados = pd.read_sql(text(query_empleados), conn)
+            proyectos = pd.read_sql(text(query_proyectos), conn)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al cargar datos desde la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+    return empleados, proyectos
+
+
 def cargar_datos(
     engine: Engine,
-) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+) -> tuple[Callable[[], pd.DataFrame], pd.DataFrame, pd.DataFrame, HistoricoEnBloques]:
     """
-    Carga los datos de tareas, empleados, proyectos e histórico de tareas desde la base de datos.
+    Prepara los datos del informe. El histórico no se lee aquí: se va leyendo por bloques
+    mientras se escribe, y la hoja del mes actual se obtiene de esos mismos bloques.
     Args:
         engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
     Returns:
-        tuple: Un tuple que contiene cuatro DataFrames:
-            - tareas_mes_actual: Tareas del mes actual.
+        tuple: Un tuple que contiene:
+            - tareas_mes_actual: Función que devuelve las tareas del mes actual una vez
+              recorrido el histórico.
             - empleados: Información de los empleados.
             - proyectos: Información de los proyectos.
-            - historico_tareas: Histórico de tareas con habilidades extraídas y candidatos.
+            - historico_tareas: Bloques del histórico de tareas con habilidades y candidatos.
     """
 
-    hoy = date.today()  # Obtener la fecha actual
-    primer_dia_mes = hoy.replace(day=1)  # Calcular el primer día del mes actual
-    try:
-        tareas_mes_actual = pd.read_sql(
-            f"""
-            SELECT
-                t.id,
-                p.proyecto || '-' || split_part(t.clave, '-', 2) AS clave,
-                t.fecha,
-                t.timespent_real,
-                t.timespent_estimado,
-                t.bien_estimado,
-                p.proyecto AS nombre_proyecto,
-                t.assignee_in_candidatos as "Empleado entre candidatos",
-                a.empleado AS nombre_assignee,
-                t.status_text,
-                t.issue_type,
-                t.texto,
-                e.empleado AS nombre_candidato,
-                eh.nivel_actual AS nivel_candidato,
-                h.habilidad,
-                LEAST(h.experiencia::numeric, 10) AS experiencia,
-                t.fecha_modificacion
-            FROM
-                tareas t
-                LEFT JOIN proyectos p ON p.codificacion = t.project_key
-                LEFT JOIN empleados a ON a.codificacion = t.assignee
-                LEFT JOIN LATERAL unnest(COALESCE(t.candidatos, ARRAY[]::candidatos[])) WITH ORDINALITY AS c(codificacion, porcentaje_acierto, fecha_modificacion, ord1) ON TRUE
-                LEFT JOIN empleados e ON e.codificacion = c.codificacion
-                LEFT JOIN LATERAL unnest(COALESCE(t.habilidades_extraidas, ARRAY[]::habilidades_tarea[])) WITH ORDINALITY AS h(habilidad, experiencia, fecha_modificacion, ord2) ON TRUE
-                LEFT JOIN LATERAL (
-                    SELECT eh.nivel_actual
-                    FROM unnest(COALESCE(e.habilidades, ARRAY[]::habilidades_empleado[])) AS eh(habilidad, nivel_actual, fecha_modificacion)
-                    WHERE eh.habilidad = h.habilidad
-                    LIMIT 1
-                ) eh ON TRUE
-            WHERE
-                (ord1 = ord2 OR (ord1 IS NULL AND ord2 IS NULL))
-                AND (
-                    t.fecha >= '{primer_dia_mes}'
-                    OR (
-                        t.status_text = 'In Progress'
-                        AND t.fecha >= (date_trunc('month', CURRENT_DATE) - INTERVAL '3 months')
-                    )
-                )
-            ORDER BY
-                t.fecha asc;
-            """,
-            engine,
-        )
-        empleados = pd.read_sql(
-            "SELECT id, empleado, is_active, habilidad.habilidad as habilidad, habilidad.nivel_actual, empleados.fecha_modificacion FROM empleados, unnest(habilidades) as habilidad order by id asc, habilidad desc",
-            engine,
+    primer_dia_mes = date.today().replace(day=1)  # Calcular el primer día del mes actual
+    empleados, proyectos = cargar_tablas_pequenas(engine)
+    historico_tareas = HistoricoEnBloques(
+        leer_en_bloques(engine, query_historico_tareas), primer_dia_mes
+    )
+
+    print(
+        f"{Fore.GREEN}✅ Datos de empleados y proyectos cargados; el histórico se leerá por bloques de {FILAS_POR_BLOQUE_LECTURA} filas\n{Style.RESET_ALL}"
+    )
+    return historico_tareas.tareas_mes_actual, empleados, proyectos, historico_tareas
+
+
+def sin_columnas_derivadas(bloques: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Args:
+        bloques (Iterable[pd.DataFrame]): Bloques de vista_informe_tareas.
+    Returns:
+        Iterator[pd.DataFrame]: Los mismos bloques sin COLUMNAS_SIN_ALMACENAR.
+    """
+
+    for bloque in bloques:
+        yield bloque.drop(columns=COLUMNAS_SIN_ALMACENAR)
+
+
+def anadir_niveles(bloque: pd.DataFrame, niveles: pd.DataFrame) -> pd.DataFrame:
+    """
+    Devuelve las filas del almacén con el nivel actual de cada candidato en la habilidad
+    de la fila, en la misma posición que en la vista.
+    Args:
+        bloque (pd.DataFrame): Filas del almacén.
+        niveles (pd.DataFrame): Resultado de query_niveles_candidatos.
+    Returns:
+        pd.DataFrame: Las mismas filas con la columna nivel_candidato.
+    """
+
+    claves = ["nombre_candidato", "habilidad"]
+    nivel = bloque[claves].merge(niveles, on=claves, how="left")["nivel_candidato"]
+    bloque = bloque.copy()
+    bloque.insert(
+        bloque.columns.get_loc("nombre_candidato") + 1,
+        "nivel_candidato",
+        nivel.astype(TIPOS_HISTORICO["nivel_candidato"]).to_numpy(),
+    )
+    return bloque
+
+
+def actualizar_almacen(engine: Engine, almacen: AlmacenHistorico, reconstruir: bool = False) -> None:
+    """
+    Lleva al almacén local las tareas modificadas desde la marca de agua y quita las
+    borradas, o guarda el histórico completo (por bloques) si el almacén está vacío, se
+    pide reconstruirlo o se creó con columnas que ya no se almacenan.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        almacen (AlmacenHistorico): Almacén del histórico.
+        reconstruir (bool): Si se vuelve a leer el histórico completo aunque el almacén exista.
+    """
+
+    if reconstruir or almacen.vacio or set(COLUMNAS_SIN_ALMACENAR) & set(almacen.columnas):
+        filas = almacen.reconstruir(sin_columnas_derivadas(leer_en_bloques(engine, query_historico_tareas)))
+        print(
+            f"{Fore.CYAN}\t🗃️  Histórico reconstruido: {filas} filas hasta {almacen.marca_agua}{Style.RESET_ALL}"
         )
-        proyectos = pd.read_sql(
-            """SELECT
-                p.id,
-                p.proyecto,
-                h.habilidad,
-                h.nivel_necesario,
-                p.fecha_modificacion
-            FROM
-                proyectos p
-                    LEFT JOIN LATERAL unnest(
-                        COALESCE(p.habilidades_necesarias, ARRAY[]::habilidades_proyecto[])
-                                    ) AS h(habilidad, nivel_necesario, fecha_modificacion)
-                            ON TRUE
-            ORDER BY
-                p.id asc, habilidad desc""",
-            engine,
+        return
+
+    marca_anterior = almacen.marca_agua
+    bloques = list(
+        sin_columnas_derivadas(
+            leer_en_bloques(engine, query_cambios_historico, params={"marca_agua": marca_anterior})
         )
-        historico_tareas = pd.read_sql(
-            """
-            SELECT
-                t.id,
-                p.proyecto || '-' || split_part(t.clave, '-', 2) AS clave,
-                t.fecha,
-                t.timespent_real,
-                t.timespent_estimado,
-                t.bien_estimado,
-                p.proyecto AS nombre_proyecto,
-                t.assignee_in_candidatos as "Empleado entre candidatos",
-                a.empleado AS nombre_assignee,
-                t.status_text,
-                t.issue_type,
-                t.texto,
-                e.empleado AS nombre_candidato,
-                eh.nivel_actual AS nivel_candidato,
-                h.habilidad,
-                LEAST(h.experiencia::numeric, 10) AS experiencia,
-                t.fecha_modificacion
-            FROM
-                tareas t
-                LEFT JOIN proyectos p ON p.codificacion = t.project_key
-                LEFT JOIN empleados a ON a.codificacion = t.assignee
-                LEFT JOIN LATERAL unnest(COALESCE(t.candidatos, ARRAY[]::candidatos[])) WITH ORDINALITY AS c(codificacion, porcentaje_acierto, fecha_modificacion, ord1) ON TRUE
-                LEFT JOIN empleados e ON e.codificacion = c.codificacion
-                LEFT JOIN LATERAL unnest(COALESCE(t.habilidades_extraidas, ARRAY[]::habilidades_tarea[])) WITH ORDINALITY AS h(habilidad, experiencia, fecha_modificacion, ord2) ON TRUE
-                LEFT JOIN LATERAL (
-                    SELECT eh.nivel_actual
-                    FROM unnest(COALESCE(e.habilidades, ARRAY[]::habilidades_empleado[])) AS eh(habilidad, nivel_actual, fecha_modificacion)
-                    WHERE eh.habilidad = h.habilidad
-                    LIMIT 1
-                ) eh ON TRUE
-            WHERE
-                (ord1 = ord2 OR (ord1 IS NULL AND ord2 IS NULL))
-                order by t.fecha_modificacion asc
-        """,
-            engine,
+    )
+    cambios = pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame()
+
+    # Los ids se leen después de los cambios: una tarea borrada entre medias no se queda en el almacén
+    try:
+        with engine.connect() as conn:
+            vigentes = pd.read_sql(text(query_ids_tareas), conn)["id"]
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al leer las tareas desde la base de datos: {e}\n"
+            + Style.RESET_ALL
         )
+        exit(1)
+
+    borradas = almacen.anadir(cambios, vigentes)
+    print(
+        f"{Fore.CYAN}\t🔄 {cambios['id'].nunique() if len(cambios) else 0} tareas ({len(cambios)} filas) modificadas y {len(borradas)} borradas desde {marca_anterior}{Style.RESET_ALL}"
+    )
+
+
+def cargar_datos_incrementales(
+    engine: Engine,
+    almacen: AlmacenHistorico,
+    incluir_historico: bool = False,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Iterator[pd.DataFrame] | None]:
+    """
+    Como `cargar_datos`, pero el histórico sale del almacén local (ya actualizado con
+    `actualizar_almacen`). La hoja del mes actual se filtra de las tareas recientes.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        almacen (AlmacenHistorico): Almacén del histórico.
+        incluir_historico (bool): Si se devuelve el histórico completo, por bloques, para
+            escribir su hoja.
+    Returns:
+        tuple: tareas_mes_actual, empleados, proyectos e historico_tareas (None si no se incluye).
+    """
+
+    primer_dia_mes = date.today().replace(day=1)
+    empleados, proyectos = cargar_tablas_pequenas(engine)
+    try:
+        with engine.connect() as conn:
+            niveles = pd.read_sql(
+                text(query_niveles_candidatos),
+                conn,
+                dtype={"nombre_candidato": "string", "habilidad": "string", "nivel_candidato": "float64"},
+            )
     except Exception as e:
         print(
             Fore.RED
             + Style.BRIGHT
-            + f"\n❌ Error al cargar datos desde la base de datos: {e}\n"
+            + f"\n❌ Error al cargar los niveles de los empleados: {e}\n"
             + Style.RESET_ALL
         )
         exit(1)
 
+    # Solo se leen las tareas que pueden entrar en la hoja del mes actual
+    recientes = almacen.leer(pd.Timestamp(primer_dia_mes) - pd.DateOffset(months=MESES_EN_PROGRESO))
+    tareas_mes_actual = anadir_niveles(
+        filtrar_mes_actual(recientes, primer_dia_mes).drop(columns="archivada"), niveles
+    )
+    historico_tareas = (
+        (
+            anadir_niveles(bloque.drop(columns="archivada"), niveles)
+            for bloque in almacen.iterar(FILAS_POR_BLOQUE_LECTURA)
+        )
+        if incluir_historico
+        else None
+    )
+
     print(
         f"{Fore.GREEN}✅ Datos de tareas, empleados, proyectos e histórico cargados correctamente\n{Style.RESET_ALL}"
     )
@@ -218,60 +611,272 @@ def color_por_estado(estado: str) -> str:
     return colores.get(estado, "FFFFFFFF")  # Blanco por defecto
 
 
-def aplicar_estilo_excel(writer: pd.ExcelWriter, hojas: list[str]):
+def calcular_anchos(muestra: pd.DataFrame) -> dict[str, int]:
     """
-    Aplica estilos a las hojas de un archivo Excel.
+    Estima el ancho de cada columna a partir de la longitud de sus valores en una
+    muestra de filas y de la de su cabecera.
     Args:
-        writer (pd.ExcelWriter): El objeto ExcelWriter de pandas.
-        hojas (list[str]): Lista de nombres de hojas a las que se aplicarán los estilos.
+        muestra (pd.DataFrame): Primeras filas de la hoja.
+    Returns:
+        dict: columna -> ancho, como mucho ANCHO_MAXIMO_COLUMNA.
     """
 
-    border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
+    anchos = {}
+    for columna in muestra.columns:
+        valores = muestra[columna]
+        longitudes = valores.astype(str).str.len().where(valores.notna(), 0)
+        maximo = max(len(str(columna)), int(longitudes.max()) if len(longitudes) else 0)
+        anchos[columna] = min(maximo + 2, ANCHO_MAXIMO_COLUMNA)
+    return anchos
+
+
+def formato_columna(serie: pd.Series) -> str | None:
+    """
+    Args:
+        serie (pd.Series): Valores de una columna.
+    Returns:
+        str | None: Formato de número de Excel para las fechas, o None.
+    """
 
-    for nombre_hoja in hojas:
-        ws = writer.sheets[nombre_hoja]
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return FORMATO_FECHA
+    primero = serie.dropna().head(1)
+    if len(primero) and isinstance(primero.iloc[0], datetime):
+        return FORMATO_FECHA
+    if len(primero) and isinstance(primero.iloc[0], date):
+        return FORMATO_DIA
+    return None
+
+
+class EscritorInforme:
+    """
+    Escribe un libro Excel fila a fila con xlsxwriter en modo `constant_memory`: cada
+    fila se vuelca a disco en cuanto se completa, así que la memoria no crece con el
+    número de filas. Los estilos se aplican al escribir cada celda:
 
-        for col_idx, col in enumerate(ws.iter_cols(1, ws.max_column), 1):
-            max_length = max(len(str(cell.value)) if cell.value else 0 for cell in col)
-            ancho = min(max_length + 2, 50)
-            ws.column_dimensions[get_column_letter(col_idx)].width = ancho
+    - Cabecera en negrita, centrada, con fondo morado.
+    - Filas con el color de `color_por_estado` si la hoja tiene `status_text`.
+    - Borde fino en todas las celdas y anchos de columna calculados de antemano.
 
-        header_font = Font(bold=True)
-        alignment = Alignment(horizontal="center")
-        fill = PatternFill(
-            start_color="FF5F249F", end_color="FF5F249F", fill_type="solid"
+    Los formatos se crean una sola vez por combinación de color y formato de número y
+    se comparten entre todas las celdas. Cuando una hoja llega a MAX_FILAS_HOJA filas, sigue
+    en hojas de continuación numeradas ("Historico de tareas (2)", ...).
+    """
+
+    def __init__(self, ruta: Path):
+        self.libro = xlsxwriter.Workbook(
+            str(ruta),
+            {
+                "constant_memory": True,
+                "remove_timezone": True,
+                # Como con openpyxl: los textos se guardan tal cual, sin convertirlos en fórmulas ni enlaces
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+            },
+        )
+        self.formato_cabecera = self.libro.add_format(
+            {
+                "bold": True,
+                "font_color": COLOR_TEXTO_CABECERA,
+                "bg_color": COLOR_CABECERA,
+                "align": "center",
+                "border": 1,
+            }
         )
-        header_font.color = "FCFCFC"
-
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.alignment = alignment
-            cell.fill = fill
-            cell.border = border
-
-        header_cols = [cell.value for cell in ws[1]]
-        if "status_text" in header_cols:
-            col_estado_idx = header_cols.index("status_text") + 1
-
-            for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-                estado = row[col_estado_idx - 1].value
-                fill_color = color_por_estado(estado)
-                for cell in row:
-                    cell.fill = PatternFill(
-                        start_color=fill_color, end_color=fill_color, fill_type="solid"
+        self._formatos: dict = {}
+        self._reservadas: dict = {}
+
+    def __enter__(self) -> "EscritorInforme":
+        return self
+
+    def __exit__(self, tipo, valor, traza) -> None:
+        self.libro.close()
+
+    def formato(self, color: str | None, formato_numero: str | None = None):
+        """
+        Args:
+            color (str, optional): Color de fondo en ARGB, como `color_por_estado`.
+            formato_numero (str, optional): Formato de número de la celda.
+        Returns:
+            Format: Formato compartido con borde fino.
+        """
+
+        clave = (color, formato_numero)
+        if clave not in self._formatos:
+            propiedades = {"border": 1}
+            if color:
+                propiedades["bg_color"] = "#" + color[-6:]
+            if formato_numero:
+                propiedades["num_format"] = formato_numero
+            self._formatos[clave] = self.libro.add_format(propiedades)
+        return self._formatos[clave]
+
+    def reservar_hoja(self, nombre: str) -> None:
+        """
+        Crea una hoja vacía para fijar su posición en el libro y escribirla más tarde.
+        Args:
+            nombre (str): Nombre de la hoja.
+        """
+
+        self._reservadas[nombre] = self.libro.add_worksheet(nombre)
+
+    def _nueva_hoja(self, nombre: str, columnas: list, anchos: dict):
+        hoja = self._reservadas.pop(nombre, None) or self.libro.add_worksheet(nombre)
+        for j, columna in enumerate(columnas):
+            hoja.set_column(j, j, anchos.get(columna, ANCHO_MAXIMO_COLUMNA))
+            hoja.write_string(0, j, str(columna), self.formato_cabecera)
+        return hoja
+
+    def escribir_hoja(
+        self,
+        nombre: str,
+        datos: pd.DataFrame | Iterable[pd.DataFrame],
+        anchos: dict[str, int] | None = None,
+    ) -> int:
+        """
+        Escribe una hoja a partir de un DataFrame o de una secuencia de bloques con las
+        mismas columnas.
+        Args:
+            nombre (str): Nombre de la hoja.
+            datos (pd.DataFrame | Iterable[pd.DataFrame]): Filas de la hoja.
+            anchos (dict, optional): columna -> ancho; si no se indica, se estima con las
+                primeras FILAS_MUESTRA_ANCHOS filas.
+        Returns:
+            int: Número de filas escritas en total, sin las cabeceras.
+        """
+
+        bloques = iter([datos] if isinstance(datos, pd.DataFrame) else datos)
+        primero = next(bloques, None)
+        if primero is None:
+            primero = pd.DataFrame()
+        columnas = list(primero.columns)
+        anchos = anchos or calcular_anchos(primero.head(FILAS_MUESTRA_ANCHOS))
+
+        hoja = self._nueva_hoja(nombre, columnas, anchos)
+
+        # Formato de número de cada columna y formatos de cada fila según su estado
+        formatos_numero = [formato_columna(primero[c]) for c in columnas]
+        col_estado = columnas.index("status_text") if "status_text" in columnas else None
+        formatos_por_estado: dict = {}
+
+        def formatos_fila(estado) -> list:
+            if estado not in formatos_por_estado:
+                color = color_por_estado(estado) if col_estado is not None else None
+                formatos_por_estado[estado] = [self.formato(color, f) for f in formatos_numero]
+            return formatos_por_estado[estado]
+
+        fila, total, continuacion = 1, 0, 1
+        for bloque in itertools.chain([primero], bloques):
+            for inicio in range(0, len(bloque), FILAS_POR_LOTE):
+                lote = bloque.iloc[inicio : inicio + FILAS_POR_LOTE]
+                valores = [
+                    lote[c].astype(object).where(lote[c].notna(), None).tolist() for c in columnas
+                ]
+                for fila_valores in zip(*valores):
+                    if fila > MAX_FILAS_HOJA:
+                        continuacion += 1
+                        sufijo = f" ({continuacion})"
+                        hoja = self._nueva_hoja(
+                            nombre[: MAX_LONGITUD_NOMBRE_HOJA - len(sufijo)] + sufijo, columnas, anchos
+                        )
+                        fila = 1
+                    formatos = formatos_fila(
+                        fila_valores[col_estado] if col_estado is not None else None
                     )
-                    cell.border = border
-        else:
-            for row in ws.iter_rows(
-                min_row=2, max_row=ws.max_row, max_col=ws.max_column
-            ):
-                for cell in row:
-                    cell.border = border
+                    for j, valor in enumerate(fila_valores):
+                        hoja.write(fila, j, valor, formatos[j])
+                    fila += 1
+                    total += 1
+
+        return total
+
+
+def cargar_kpis(engine: Engine) -> pd.DataFrame:
+    """
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    Returns:
+        pd.DataFrame: Agregados por proyecto, empleado y mes, con su coste.
+    """
+
+    try:
+        with engine.connect() as conn:
+            return pd.read_sql(
+                text(query_kpis), conn, params={"tarifa_por_defecto": TARIFA_HORA_POR_DEFECTO}
+            )
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al cargar los KPIs desde la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+
+def resumir_kpis(detalle: pd.DataFrame, columnas: list[str]) -> pd.DataFrame:
+    """
+    Suma los agregados por las columnas indicadas y calcula los ratios sobre las sumas.
+    Args:
+        detalle (pd.DataFrame): Resultado de `cargar_kpis`.
+        columnas (list[str]): Columnas por las que se agrupa.
+    Returns:
+        pd.DataFrame: Sumas y ratios; los ratios sin denominador quedan vacíos.
+    """
+
+    resumen = detalle.groupby(columnas, dropna=False)[COLUMNAS_SUMA_KPI].sum().reset_index()
+
+    def ratio(numerador: pd.Series, denominador: pd.Series) -> pd.Series:
+        return (numerador / denominador.where(denominador != 0)).round(4)
+
+    resumen["desviacion_horas"] = ratio(
+        resumen["horas_reales"] - resumen["horas_estimadas"], resumen["horas_estimadas"]
+    )
+    resumen["precision_estimacion"] = ratio(resumen["tareas_bien_estimadas"], resumen["tareas_evaluadas"])
+    resumen["acierto_candidatos"] = ratio(resumen["aciertos_candidatos"], resumen["tareas_con_candidatos"])
+    resumen["coste_por_tarea"] = ratio(resumen["coste"], resumen["num_tareas"])
+    resumen[["horas_reales", "horas_estimadas", "coste", "coste_por_tarea"]] = resumen[
+        ["horas_reales", "horas_estimadas", "coste", "coste_por_tarea"]
+    ].round(2)
+    return resumen
+
+
+def guardar_kpis_en_excel(detalle: pd.DataFrame, ruta_salida: Path) -> None:
+    """
+    Escribe un libro pequeño con los KPIs por proyecto, empleado y mes, los proyectos de
+    bajo rendimiento (más horas de las estimadas o estimaciones poco precisas) y el detalle.
+    Args:
+        detalle (pd.DataFrame): Resultado de `cargar_kpis`.
+        ruta_salida (Path): Ruta del libro.
+    """
+
+    ruta_salida = Path(ruta_salida)
+    ruta_salida.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"{Fore.YELLOW}📈 Guardando KPIs en Excel{Style.RESET_ALL}")
+    por_proyecto = resumir_kpis(detalle, ["proyecto"]).sort_values("coste", ascending=False)
+    bajo_rendimiento = por_proyecto[
+        (por_proyecto["desviacion_horas"] > UMBRAL_DESVIACION_HORAS)
+        | (por_proyecto["precision_estimacion"] < UMBRAL_PRECISION_ESTIMACION)
+    ]
+    hojas = {
+        "KPI por proyecto": por_proyecto,
+        "KPI por empleado": resumir_kpis(detalle, ["empleado"]).sort_values("coste", ascending=False),
+        "KPI por mes": resumir_kpis(detalle, ["mes"]),
+        "Proyectos bajo rendimiento": bajo_rendimiento,
+        "Detalle": resumir_kpis(detalle, ["mes", "proyecto", "empleado"]),
+    }
+
+    inicio = time.perf_counter()
+    with EscritorInforme(ruta_salida) as escritor:
+        for nombre_hoja, df in hojas.items():
+            escritor.escribir_hoja(nombre_hoja, df)
+
+    print(
+        f"{Fore.CYAN}\t⏱️  {len(por_proyecto)} proyectos ({len(bajo_rendimiento)} de bajo rendimiento), "
+        f"{len(detalle)} filas de detalle en {time.perf_counter() - inicio:.2f} s{Style.RESET_ALL}"
+    )
+    print(f"{Fore.GREEN}\n✅  KPIs guardados correctamente en: {ruta_salida}\n{Style.RESET_ALL}")
 
 
 def generar_ruta_versionada(base_path: Path) -> Path:
@@ -295,42 +900,440 @@ def generar_ruta_versionada(base_path: Path) -> Path:
         version += 1
 
 
+def hojas_informe(tareas_mes_actual, empleados, proyectos, historico_tareas) -> dict:
+    # En la exportación incremental el histórico solo se incluye cuando se pide
+    hojas = {
+        "Tareas Mes Actual o En Progreso": tareas_mes_actual,
+        "Empleados": empleados,
+        "Proyectos": proyectos,
+        "Historico de tareas": historico_tareas,
+    }
+    return {nombre: df for nombre, df in hojas.items() if df is not None}
+
+
+def orden_de_escritura(hojas: dict) -> list:
+    """
+    Las hojas que se calculan al recorrer otra (funciones, como las tareas del mes actual
+    de `cargar_datos`) se escriben al final, cuando ya se ha recorrido el histórico.
+    """
+
+    return [(n, d) for n, d in hojas.items() if not callable(d)] + [
+        (n, d) for n, d in hojas.items() if callable(d)
+    ]
+
+
 def guardar_base_datos_en_excel(
-    tareas_mes_actual, empleados, proyectos, historico_tareas, ruta_salida
-):
+    tareas_mes_actual, empleados, proyectos, historico_tareas, ruta_salida, mostrar: bool = True
+) -> dict:
+    """
+    Args:
+        mostrar (bool): Si se muestra el progreso de cada hoja; los informes por proyecto,
+            que se escriben en paralelo, solo muestran una línea por libro.
+    Returns:
+        dict: hoja -> {"filas", "segundos"}.
+    """
+
     ruta_salida = Path(ruta_salida)
     ruta_salida.parent.mkdir(parents=True, exist_ok=True)
 
-    print(f"{Fore.YELLOW}📝 Guardando base de datos en Excel{Style.RESET_ALL}")
-    with pd.ExcelWriter(ruta_salida, engine="openpyxl") as writer:
-        hojas = {
-            "Tareas Mes Actual o En Progreso": tareas_mes_actual,
-            "Empleados": empleados,
-            "Proyectos": proyectos,
-            "Historico de tareas": historico_tareas,
+    if mostrar:
+        print(f"{Fore.YELLOW}📝 Guardando base de datos en Excel{Style.RESET_ALL}")
+    hojas = hojas_informe(tareas_mes_actual, empleados, proyectos, historico_tareas)
+
+    estadisticas = {}
+    with EscritorInforme(ruta_salida) as escritor:
+        # Las hojas se crean antes para que el libro las tenga en su orden aunque se escriban en otro
+        for nombre_hoja in hojas:
+            escritor.reservar_hoja(nombre_hoja)
+        for nombre_hoja, datos in orden_de_escritura(hojas):
+            inicio = time.perf_counter()
+            filas = escritor.escribir_hoja(nombre_hoja, datos() if callable(datos) else datos)
+            estadisticas[nombre_hoja] = {"filas": filas, "segundos": time.perf_counter() - inicio}
+            if mostrar:
+                print(
+                    f"{Fore.CYAN}\t⏱️  {nombre_hoja}: {filas} filas en {estadisticas[nombre_hoja]['segundos']:.2f} s{Style.RESET_ALL}"
+                )
+
+    if mostrar:
+        print(
+            f"{Fore.GREEN}\n✅  Base de datos guardada correctamente en: {ruta_salida}\n{Style.RESET_ALL}"
+        )
+    return {nombre_hoja: estadisticas[nombre_hoja] for nombre_hoja in hojas}
+
+
+def tabla_arrow(df: pd.DataFrame, particionar: bool, esquema: pa.Schema | None = None) -> pa.Table:
+    """
+    Convierte una hoja en una tabla de Arrow con las columnas de texto repetitivas
+    codificadas como diccionario, que se leen como categorías.
+    Args:
+        df (pd.DataFrame): Filas de la hoja.
+        particionar (bool): Si se añade la columna `mes` y se ordena por las columnas de
+            partición, para escribir cada partición de una vez.
+        esquema (pa.Schema, optional): Esquema del primer bloque, al que se convierten los
+            siguientes para que todo el conjunto tenga los mismos tipos.
+    Returns:
+        pa.Table: Tabla lista para escribir.
+    """
+
+    if particionar:
+        df = df.assign(mes=pd.to_datetime(df["fecha"]).dt.strftime("%Y-%m"))
+        df = df.sort_values(COLUMNAS_PARTICION, kind="stable", na_position="last")
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    if esquema is not None:
+        return tabla.cast(esquema)
+
+    for i, campo in enumerate(tabla.schema):
+        texto = pa.types.is_string(campo.type) or pa.types.is_large_string(campo.type)
+        if not texto or (particionar and campo.name in COLUMNAS_PARTICION):
+            continue
+        codificada = pc.dictionary_encode(tabla.column(i))
+        distintos = max((len(trozo.dictionary) for trozo in codificada.chunks), default=0)
+        if distintos <= MAX_VALORES_DICCIONARIO:
+            tabla = tabla.set_column(i, campo.name, codificada)
+    return tabla
+
+
+def tamano_directorio(ruta: Path) -> int:
+    return sum(f.stat().st_size for f in ruta.rglob("*") if f.is_file())
+
+
+def escribir_conjunto_parquet(datos: pd.DataFrame | Iterable[pd.DataFrame], destino: Path) -> int:
+    """
+    Escribe una hoja como conjunto Parquet a medida que llegan sus bloques. Las hojas de
+    tareas se particionan por mes y proyecto (mes=YYYY-MM/nombre_proyecto=...).
+    Args:
+        datos (pd.DataFrame | Iterable[pd.DataFrame]): Filas de la hoja.
+        destino (Path): Carpeta del conjunto.
+    Returns:
+        int: Filas escritas.
+    """
+
+    bloques = iter([datos] if isinstance(datos, pd.DataFrame) else datos)
+    primero = next(bloques, None)
+    if primero is None:
+        primero = pd.DataFrame()
+    particionar = "fecha" in primero.columns and "nombre_proyecto" in primero.columns
+    tabla = tabla_arrow(primero, particionar)
+    esquema = tabla.schema
+    filas = 0
+
+    def lotes():
+        nonlocal filas
+        for t in itertools.chain([tabla], (tabla_arrow(b, particionar, esquema) for b in bloques)):
+            filas += t.num_rows
+            yield from t.to_batches(max_chunksize=FILAS_POR_BLOQUE_LECTURA)
+
+    particiones = {}
+    if particionar:
+        particiones = {
+            "partitioning": ds.partitioning(
+                pa.schema([esquema.field(c) for c in COLUMNAS_PARTICION]), flavor="hive"
+            ),
+            # pyarrow limita a 1024 las particiones de cada lote; un lote no puede tener más que filas
+            "max_partitions": max(1024, FILAS_POR_BLOQUE_LECTURA),
         }
+    ds.write_dataset(
+        pa.RecordBatchReader.from_batches(esquema, lotes()), destino, format="parquet", **particiones
+    )
+    return filas
 
-        for nombre_hoja, df in hojas.items():
-            df.to_excel(writer, sheet_name=nombre_hoja, index=False)
 
-        aplicar_estilo_excel(writer, hojas.keys())
+def guardar_base_datos_en_parquet(
+    tareas_mes_actual, empleados, proyectos, historico_tareas, directorio_salida
+) -> dict:
+    """
+    Guarda cada hoja del informe como un conjunto Parquet en su propia carpeta. Las hojas
+    de tareas se particionan por mes y proyecto; las de empleados y proyectos son un solo
+    fichero.
+    Args:
+        directorio_salida (Path): Carpeta del informe.
+    Returns:
+        dict: hoja -> {"filas", "segundos", "bytes"}.
+    """
+
+    directorio_salida = Path(directorio_salida)
+    directorio_salida.mkdir(parents=True, exist_ok=True)
+
+    print(f"{Fore.YELLOW}📝 Guardando base de datos en Parquet{Style.RESET_ALL}")
+    hojas = hojas_informe(tareas_mes_actual, empleados, proyectos, historico_tareas)
+
+    estadisticas = {}
+    for nombre_hoja, datos in orden_de_escritura(hojas):
+        destino = directorio_salida / CONJUNTOS_PARQUET[nombre_hoja]
+        inicio = time.perf_counter()
+        filas = escribir_conjunto_parquet(datos() if callable(datos) else datos, destino)
+        estadisticas[nombre_hoja] = {
+            "filas": filas,
+            "segundos": time.perf_counter() - inicio,
+            "bytes": tamano_directorio(destino),
+        }
+        print(
+            f"{Fore.CYAN}\t⏱️  {nombre_hoja}: {filas} filas en {estadisticas[nombre_hoja]['segundos']:.2f} s, "
+            f"{estadisticas[nombre_hoja]['bytes'] / 1024**2:.2f} MB{Style.RESET_ALL}"
+        )
 
     print(
-        f"{Fore.GREEN}\n✅  Base de datos guardada correctamente en: {ruta_salida}\n{Style.RESET_ALL}"
+        f"{Fore.GREEN}\n✅  Base de datos guardada correctamente en: {directorio_salida}\n{Style.RESET_ALL}"
     )
+    return {nombre_hoja: estadisticas[nombre_hoja] for nombre_hoja in hojas}
 
 
-if __name__ == "__main__":
-    engine = obtener_conexion()
-    tareas_mes_actual, empleados, proyectos, historico_tareas = cargar_datos(engine)
-    nombre_base = f"gestion_{date.today().strftime('%Y%m%d')}.xlsx"
-    ruta_base = Path("./salidas") / nombre_base
-    ruta_final = generar_ruta_versionada(ruta_base)
-
-    guardar_base_datos_en_excel(
-        tareas_mes_actual,
-        empleados,
-        proyectos,
-        historico_tareas,
-        ruta_final,
+def comparar_formatos(excel: dict, bytes_excel: int, parquet: dict) -> None:
+    """
+    Muestra los tiempos de escritura de cada hoja en los dos formatos y el tamaño total.
+    """
+
+    print(f"{Fore.YELLOW}📊 Excel frente a Parquet{Style.RESET_ALL}")
+    print(f"\t{'hoja':<34}{'filas':>10}{'excel (s)':>12}{'parquet (s)':>13}{'parquet (MB)':>14}")
+    for nombre_hoja, datos in parquet.items():
+        print(
+            f"\t{nombre_hoja:<34}{datos['filas']:>10}{excel[nombre_hoja]['segundos']:>12.2f}"
+            f"{datos['segundos']:>13.2f}{datos['bytes'] / 1024**2:>14.2f}"
+        )
+    segundos_excel = sum(d["segundos"] for d in excel.values())
+    segundos_parquet = sum(d["segundos"] for d in parquet.values())
+    bytes_parquet = sum(d["bytes"] for d in parquet.values())
+    print(
+        f"\t{'Total':<34}{'':>10}{segundos_excel:>12.2f}{segundos_parquet:>13.2f}{bytes_parquet / 1024**2:>14.2f}"
+    )
+    print(
+        f"{Fore.GREEN}\n✅ Excel: {bytes_excel / 1024**2:.2f} MB en {segundos_excel:.2f} s; "
+        f"Parquet: {bytes_parquet / 1024**2:.2f} MB en {segundos_parquet:.2f} s\n{Style.RESET_ALL}"
     )
+
+
+# -------------------- Informes por proyecto --------------------
+# Datos de solo lectura que los procesos hijos heredan al crearse (fork), sin copiarlos
+_contexto_procesos: dict = {}
+
+
+def iniciar_proceso_informe() -> None:
+    # Las conexiones del pool heredadas del proceso padre no se pueden compartir: el hijo
+    # las olvida sin cerrarlas y abre las suyas
+    _contexto_procesos["engine"].dispose(close=False)
+
+
+def nombre_fichero_proyecto(proyecto: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", proyecto).strip("_") or "proyecto"
+
+
+def nombres_ficheros_proyectos(proyectos: pd.DataFrame) -> list[str]:
+    """
+    Nombre del libro de cada proyecto. Si varios proyectos dan el mismo nombre ("A/B" y
+    "A B" dan "A_B"; también sin distinguir mayúsculas, por los sistemas de ficheros que no
+    las distinguen) o coinciden con el índice o con el libro de las tareas sin proyecto,
+    se les añade el principio de su codificación.
+    Args:
+        proyectos (pd.DataFrame): Resultado de `query_proyectos_por_tamano`.
+    Returns:
+        list[str]: Nombres sin extensión, en el orden de `proyectos`.
+    """
+
+    nombres = [
+        nombre_fichero_proyecto(proyecto) if pd.notna(proyecto) else FICHERO_SIN_PROYECTO
+        for proyecto in proyectos["proyecto"]
+    ]
+    repetidos = Counter(nombre.casefold() for nombre in nombres + [FICHERO_INDICE])
+    return [
+        f"{nombre}_{codificacion[:8]}" if pd.notna(codificacion) and repetidos[nombre.casefold()] > 1 else nombre
+        for nombre, codificacion in zip(nombres, proyectos["codificacion"])
+    ]
+
+
+def generar_informe_proyecto(proyecto: str | None, fichero: str, directorio: Path) -> dict:
+    """
+    Escribe el libro de un proyecto con las mismas hojas y estilos que el informe completo,
+    leyendo de la base de datos solo las filas del proyecto. Se ejecuta en los procesos
+    hijos con el engine de `_contexto_procesos`.
+    Args:
+        proyecto (str | None): Nombre del proyecto; None para las tareas sin proyecto.
+        fichero (str): Nombre del libro, de `nombres_ficheros_proyectos`.
+        directorio (Path): Carpeta de los informes.
+    Returns:
+        dict: Fila del índice con el fichero, las filas de cada hoja y los segundos.
+    """
+
+    engine = _contexto_procesos["engine"]
+    inicio = time.perf_counter()
+    parametros = {"proyecto": proyecto}
+    try:
+        with engine.connect() as conn:
+            empleados = pd.read_sql(text(query_empleados_proyecto), conn, params=parametros)
+            proyectos = pd.read_sql(text(query_proyecto), conn, params=parametros)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al cargar los datos del proyecto {proyecto or ETIQUETA_SIN_PROYECTO}: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    historico = HistoricoEnBloques(
+        leer_en_bloques(engine, query_historico_proyecto, params=parametros),
+        date.today().replace(day=1),
+    )
+    fichero = f"{fichero}.xlsx"
+    estadisticas = guardar_base_datos_en_excel(
+        historico.tareas_mes_actual, empleados, proyectos, historico, directorio / fichero, mostrar=False
+    )
+
+    return {
+        "proyecto": proyecto,
+        "fichero": fichero,
+        "filas_historico": estadisticas["Historico de tareas"]["filas"],
+        "filas_mes_actual": estadisticas["Tareas Mes Actual o En Progreso"]["filas"],
+        "empleados": empleados["id"].nunique(),
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+
+
+def generar_informes_por_proyecto(
+    engine: Engine, directorio: Path, procesos: int = PROCESOS_INFORMES
+) -> pd.DataFrame:
+    """
+    Escribe un libro por proyecto en paralelo, otro con las tareas sin proyecto si las hay,
+    y un libro `indice.xlsx` con una fila por libro: su fichero, el tamaño de sus hojas y
+    sus KPIs (de KPI_Tareas).
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        directorio (Path): Carpeta de los informes.
+        procesos (int): Procesos a usar; con 1 se ejecuta en el proceso actual.
+    Returns:
+        pd.DataFrame: El índice.
+    """
+
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    try:
+        with engine.connect() as conn:
+            proyectos = pd.read_sql(text(query_proyectos_por_tamano), conn)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al cargar los proyectos desde la base de datos: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    # Cada libro con el nombre del proyecto (None en vez de NaN, para pasarlo como NULL) y su fichero
+    libros = list(
+        zip(
+            [proyecto if pd.notna(proyecto) else None for proyecto in proyectos["proyecto"]],
+            nombres_ficheros_proyectos(proyectos),
+        )
+    )
+
+    print(
+        f"{Fore.YELLOW}📝 Generando {len(libros)} informes por proyecto con {procesos} procesos{Style.RESET_ALL}"
+    )
+    inicio = time.perf_counter()
+    _contexto_procesos["engine"] = engine
+
+    filas_indice = []
+
+    def recoger(fila: dict) -> None:
+        filas_indice.append(fila)
+        print(
+            f"{Fore.CYAN}\t📄 {fila['proyecto'] or ETIQUETA_SIN_PROYECTO}: {fila['filas_historico']} filas "
+            f"en {fila['segundos']:.2f} s{Style.RESET_ALL}"
+        )
+
+    if procesos <= 1 or len(libros) <= 1:
+        for proyecto, fichero in libros:
+            recoger(generar_informe_proyecto(proyecto, fichero, directorio))
+    else:
+        # Los proyectos se envían de mayor a menor, así los grandes no se quedan para el final
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=iniciar_proceso_informe,
+        ) as pool:
+            futuros = [pool.submit(generar_informe_proyecto, p, f, directorio) for p, f in libros]
+            for futuro in as_completed(futuros):
+                recoger(futuro.result())
+
+    # En los KPIs las tareas sin proyecto también tienen el proyecto nulo, y merge une los nulos
+    kpis = resumir_kpis(cargar_kpis(engine), ["proyecto"])
+    indice = (
+        pd.DataFrame(
+            filas_indice,
+            columns=["proyecto", "fichero", "filas_historico", "filas_mes_actual", "empleados", "segundos"],
+        )
+        .merge(kpis, on="proyecto", how="left")
+        .sort_values("proyecto", kind="stable")
+        .reset_index(drop=True)
+    )
+    indice["proyecto"] = indice["proyecto"].fillna(ETIQUETA_SIN_PROYECTO)
+    with EscritorInforme(directorio / f"{FICHERO_INDICE}.xlsx") as escritor:
+        escritor.escribir_hoja("Indice", indice)
+
+    print(
+        f"{Fore.GREEN}\n✅  {len(libros)} informes e índice guardados en {directorio} "
+        f"en {time.perf_counter() - inicio:.2f} s\n{Style.RESET_ALL}"
+    )
+    return indice
+
+
+def ejecutar(engine: Engine, argumento: str | None = None) -> None:
+    """
+    Etapa de exportación del informe y de los KPIs.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        argumento (str, optional): completo, reconstruir o proyectos, como en la línea de comandos.
+    """
+
+    if FORMATO_INFORME not in ("excel", "parquet", "ambos"):
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ FORMATO_INFORME debe ser excel, parquet o ambos, no {FORMATO_INFORME}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    hoy = date.today().strftime("%Y%m%d")
+
+    if argumento == "proyectos":
+        # Cada libro lee sus filas directamente de la base de datos, también en la exportación incremental
+        generar_informes_por_proyecto(engine, generar_ruta_versionada(Path("./salidas") / f"proyectos_{hoy}"))
+    else:
+        # El histórico se lee por bloques y solo se puede recorrer una vez, así que cada formato
+        # pide sus propios datos
+        if EXPORTACION_INCREMENTAL:
+            almacen = AlmacenHistorico(DIRECTORIO_HISTORICO)
+            actualizar_almacen(engine, almacen, reconstruir=argumento == "reconstruir")
+            cargar = partial(cargar_datos_incrementales, engine, almacen, argumento is not None)
+        else:
+            cargar = partial(cargar_datos, engine)
+        nombre_base = f"gestion_{hoy}"
+
+        if FORMATO_INFORME in ("excel", "ambos"):
+            ruta_final = generar_ruta_versionada(Path("./salidas") / f"{nombre_base}.xlsx")
+            estadisticas_excel = guardar_base_datos_en_excel(*cargar(), ruta_final)
+
+        if FORMATO_INFORME in ("parquet", "ambos"):
+            directorio_parquet = generar_ruta_versionada(Path("./salidas") / f"{nombre_base}_parquet")
+            estadisticas_parquet = guardar_base_datos_en_parquet(*cargar(), directorio_parquet)
+
+        if FORMATO_INFORME == "ambos":
+            comparar_formatos(estadisticas_excel, ruta_final.stat().st_size, estadisticas_parquet)
+
+    guardar_kpis_en_excel(cargar_kpis(engine), generar_ruta_versionada(Path("./salidas") / f"kpis_{hoy}.xlsx"))
+
+
+if __name__ == "__main__":
+    # Uso: python guardar_excel.py [completo | reconstruir | proyectos]
+    argumento = sys.argv[1] if len(sys.argv) > 1 else None
+    if argumento not in (None, "completo", "reconstruir", "proyectos"):
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Argumento desconocido: {argumento}. Uso: python guardar_excel.py [completo | reconstruir | proyectos]\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    ejecutar(obtener_conexion(), argumento)
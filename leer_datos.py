@@ -50,6 +50,9 @@ total_errores: int = (
     0  # Contador de errores que se van a producir durante la ejecución del script
 )
 
+# Días tras los que una tarea cerrada pasa a la partición de archivo
+dias_archivo_tareas: int = int(os.getenv("DIAS_ARCHIVO_TAREAS", 365))
+
 # Nombre de la base de datos que queremos usar o crear
 target_db: str = os.getenv("DATABASE", "")
 
@@ -62,122 +65,149 @@ db_config: dict[str, str | int] = {
 }
 
 
-# -----------------------------------------------------
-# Paso 1: Verificamos y creamos la base si es necesario
-# -----------------------------------------------------
-
-try:
-    conn: psycopg2.extensions.connection = psycopg2.connect(
-        dbname="postgres", **db_config
-    )  # Conectamos a la base de datos por defecto para crear la nueva base en caso de que no exista
-
-    conn.autocommit = True  # Necesario para crear bases de datos
-    cur = conn.cursor()  # Creamos un cursor para ejecutar comandos SQL
-
-    cur.execute(
-        "SELECT 1 FROM pg_database WHERE datname = %s", (target_db,)
-    )  # Verificamos si la base de datos ya existe
+def preparar_base_datos() -> None:
+    """
+    Crea la base de datos si no existe y ejecuta el script de tablas si falta alguna.
+    """
 
-    exists: tuple | None = (
-        cur.fetchone()
-    )  # Si existe, fetchone devolverá una tupla con un valor, si no, devolverá None
+    # -----------------------------------------------------
+    # Paso 1: Verificamos y creamos la base si es necesario
+    # -----------------------------------------------------
 
-    if not exists:  # Si no existe, creamos la base de datos
-        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(target_db)))
+    try:
+        conn: psycopg2.extensions.connection = psycopg2.connect(
+            dbname="postgres", **db_config
+        )  # Conectamos a la base de datos por defecto para crear la nueva base en caso de que no exista
 
-    cur.close()  # Cerramos el cursor
-    conn.close()  # Cerramos la conexión
+        conn.autocommit = True  # Necesario para crear bases de datos
+        cur = conn.cursor()  # Creamos un cursor para ejecutar comandos SQL
 
-except Exception as e:  # En caso de error, mostramos un mensaje
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al verificar o crear la base de datos: {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
+        cur.execute(
+            "SELECT 1 FROM pg_database WHERE datname = %s", (target_db,)
+        )  # Verificamos si la base de datos ya existe
 
+        exists: tuple | None = (
+            cur.fetchone()
+        )  # Si existe, fetchone devolverá una tupla con un valor, si no, devolverá None
 
-# -----------------------------------------------------
-# Paso 2: Conexión a la base y verificación de tablas
-# -----------------------------------------------------
+        if not exists:  # Si no existe, creamos la base de datos
+            cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(target_db)))
 
-try:
-    conn = psycopg2.connect(
-        dbname=target_db, **db_config
-    )  # Conectamos a la base de datos creada o verificada
+        cur.close()  # Cerramos el cursor
+        conn.close()  # Cerramos la conexión
 
-    cur = conn.cursor()  # Creamos un cursor para ejecutar comandos SQL
-
-    # Verificamos si existen las tablas
-    cur.execute(
-        """
-        SELECT table_name FROM information_schema.tables
-        WHERE table_schema = 'public' AND table_name IN ('tareas', 'empleados', 'proyectos');
-    """
-    )  # Ejecutamos una consulta para obtener los nombres de las tablas existentes
-    tablas_existentes = {
-        row[0] for row in cur.fetchall()
-    }  # Fetchall devuelve todas las filas, y las convertimos a un set para facilitar la verificación
-
-    if {"tareas", "empleados", "proyectos"}.issubset(
-        tablas_existentes
-    ):  # Verificamos si todas las tablas necesarias existen
+    except Exception as e:  # En caso de error, mostramos un mensaje
         print(
-            Fore.GREEN
+            Fore.RED
             + Style.BRIGHT
-            + "\nLas tablas ya existen.\n"
+            + f"\n❌ Error al verificar o crear la base de datos: {e}\n"
             + Style.RESET_ALL
-            + Fore.RESET
         )
+        exit(1)
 
-    else:  # Si faltan tablas, ejecutamos el script SQL para crearlas
-        print(
-            Fore.YELLOW
-            + Style.BRIGHT
-            + f"""\n⚙️  Faltan una o más tablas. Ejecutando script '{os.getenv("FICHERO_TABLAS")}'...\n"""
-            + Style.RESET_ALL
-        )
 
-        if os.path.exists(
-            f"""{os.getenv("FICHERO_TABLAS")}"""
-        ):  # Verificamos si el archivo 'Tablas.sql' existe
+    # -----------------------------------------------------
+    # Paso 2: Conexión a la base y verificación de tablas
+    # -----------------------------------------------------
 
-            with open(
-                f"""{os.getenv("FICHERO_TABLAS")}""", "r", encoding="utf-8"
-            ) as f:  # Abrimos el archivo en modo lectura
-                sql_script = f.read()  # Leemos el contenido del archivo SQL
-                cur.execute(
-                    sql_script
-                )  # Ejecutamos el script SQL para crear las tablas
+    try:
+        conn = psycopg2.connect(
+            dbname=target_db, **db_config
+        )  # Conectamos a la base de datos creada o verificada
+
+        cur = conn.cursor()  # Creamos un cursor para ejecutar comandos SQL
+
+        tablas_necesarias: set[str] = {
+            "tareas",
+            "empleados",
+            "proyectos",
+            "experiencia_empleados",
+            "actividad_empleados",
+            "tarea_habilidad",
+            "tarea_candidato",
+            "empleado_habilidad",
+            "reservas_horas",
+            "firmas_asignacion",
+            "ejecuciones_asignacion",
+            "disponibilidad_empleados",
+            "kpi_tareas",
+            "tarifas_empleados",
+        }  # Tablas que crea el script SQL
+
+        # Verificamos si existen las tablas
+        cur.execute(
+            """
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = ANY(%s);
+        """,
+            (list(tablas_necesarias),),
+        )  # Ejecutamos una consulta para obtener los nombres de las tablas existentes
+        tablas_existentes = {
+            row[0] for row in cur.fetchall()
+        }  # Fetchall devuelve todas las filas, y las convertimos a un set para facilitar la verificación
+
+        # Las instalaciones anteriores tienen Tareas sin particionar; el script SQL la migra
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('tareas')")
+        tareas_particionada: bool = (cur.fetchone() or (None,))[0] == "p"
 
+        if (
+            tablas_necesarias.issubset(tablas_existentes) and tareas_particionada
+        ):  # Verificamos si todas las tablas necesarias existen
             print(
                 Fore.GREEN
                 + Style.BRIGHT
-                + f"""\n✅ Tablas creadas desde '{os.getenv("FICHERO_TABLAS")}'.\n"""
+                + "\nLas tablas ya existen.\n"
                 + Style.RESET_ALL
+                + Fore.RESET
             )
-        else:
+
+        else:  # Si faltan tablas, ejecutamos el script SQL para crearlas
             print(
-                Fore.RED
+                Fore.YELLOW
                 + Style.BRIGHT
-                + f"""\n❌ El archivo '{os.getenv("FICHERO_TABLAS")}' no fue encontrado.\n"""
+                + f"""\n⚙️  Faltan una o más tablas. Ejecutando script '{os.getenv("FICHERO_TABLAS")}'...\n"""
                 + Style.RESET_ALL
             )
-            exit(1)
-
-    cur.close()  # Cerramos el cursor
-    conn.commit()  # Hacemos commit de los cambios
-    conn.close()  # Cerramos la conexión
 
-except Exception as e:  # En caso de error, mostramos un mensaje y paramos la ejecución
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + f"\n❌ Error al conectar o al ejecutar el script SQL: {e}\n"
-        + Style.RESET_ALL
-    )
-    exit(1)
+            if os.path.exists(
+                f"""{os.getenv("FICHERO_TABLAS")}"""
+            ):  # Verificamos si el archivo 'Tablas.sql' existe
+
+                with open(
+                    f"""{os.getenv("FICHERO_TABLAS")}""", "r", encoding="utf-8"
+                ) as f:  # Abrimos el archivo en modo lectura
+                    sql_script = f.read()  # Leemos el contenido del archivo SQL
+                    cur.execute(
+                        sql_script
+                    )  # Ejecutamos el script SQL para crear las tablas
+
+                print(
+                    Fore.GREEN
+                    + Style.BRIGHT
+                    + f"""\n✅ Tablas creadas desde '{os.getenv("FICHERO_TABLAS")}'.\n"""
+                    + Style.RESET_ALL
+                )
+            else:
+                print(
+                    Fore.RED
+                    + Style.BRIGHT
+                    + f"""\n❌ El archivo '{os.getenv("FICHERO_TABLAS")}' no fue encontrado.\n"""
+                    + Style.RESET_ALL
+                )
+                exit(1)
+
+        cur.close()  # Cerramos el cursor
+        conn.commit()  # Hacemos commit de los cambios
+        conn.close()  # Cerramos la conexión
+
+    except Exception as e:  # En caso de error, mostramos un mensaje y paramos la ejecución
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al conectar o al ejecutar el script SQL: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
 
 
 def extraer_texto(obj: dict) -> str:
@@ -366,196 +396,278 @@ def anonimizar_tareas(tareas: List[dict]) -> Tuple[List[dict], List[dict], List[
     )  # Se devuelve la tupla de las tareas, usuarios codificados y proyectos codificados
 
 
-j_aux = 1
-
-print(
-    Fore.YELLOW
-    + Style.BRIGHT
-    + f"\n🔍 Procesando {len(projects)} proyectos de Jira...\n"
-    + Style.RESET_ALL
-)
-
-for p in projects:  # Recorrer el array de los proyectos
+def cargar_proyectos_jira() -> None:
+    """
+    Descarga las tareas de cada proyecto de Jira, las anonimiza y las guarda junto con
+    sus empleados y proyectos.
+    """
 
-    jira_url: str = os.getenv("URL_JIRA", "") + p  # URL de la API de Jira
+    j_aux = 1
 
     print(
-        f"{Fore.CYAN}\t📁 Procesando proyecto {j_aux}: {Fore.BLUE}{jira_url}{Style.RESET_ALL}"
+        Fore.YELLOW
+        + Style.BRIGHT
+        + f"\n🔍 Procesando {len(projects)} proyectos de Jira...\n"
+        + Style.RESET_ALL
     )
 
-    # Obtener todas las tareas
-    tareas: List[dict] = obtener_todas_las_tareas(jira_url=jira_url)
+    for p in projects:  # Recorrer el array de los proyectos
+
+        jira_url: str = os.getenv("URL_JIRA", "") + p  # URL de la API de Jira
 
-    if total_errores >= len(projects):  # Si ha habido errores, salir del bucle
         print(
-            Fore.RED
-            + Style.BRIGHT
-            + "\n❌ Se han producido demasiados errores, abortando la ejecución.\n"
-            + Style.RESET_ALL
+            f"{Fore.CYAN}\t📁 Procesando proyecto {j_aux}: {Fore.BLUE}{jira_url}{Style.RESET_ALL}"
         )
-        exit(1)
 
-    processed_tasks: List[dict] = (
-        []
-    )  # Array que va a contener todas las tareas extraidas y procesadas
+        # Obtener todas las tareas
+        tareas: List[dict] = obtener_todas_las_tareas(jira_url=jira_url)
+
+        if total_errores >= len(projects):  # Si ha habido errores, salir del bucle
+            print(
+                Fore.RED
+                + Style.BRIGHT
+                + "\n❌ Se han producido demasiados errores, abortando la ejecución.\n"
+                + Style.RESET_ALL
+            )
+            exit(1)
+
+        processed_tasks: List[dict] = (
+            []
+        )  # Array que va a contener todas las tareas extraidas y procesadas
 
-    for tarea in tareas:  # Recorrer las tareas
+        for tarea in tareas:  # Recorrer las tareas
 
-        json_tarea: dict[str, Any] = (
-            {}
-        )  # Diccionario para almacenar la información de la tarea
+            json_tarea: dict[str, Any] = (
+                {}
+            )  # Diccionario para almacenar la información de la tarea
 
-        json_tarea["key"] = tarea.get("key", "")  # Extraer la clave de la tarea
+            json_tarea["key"] = tarea.get("key", "")  # Extraer la clave de la tarea
 
-        iso_date = tarea["fields"].get(
-            "statuscategorychangedate", None
-        )  # Extraer la fecha de cambio de estado
+            iso_date = tarea["fields"].get(
+                "statuscategorychangedate", None
+            )  # Extraer la fecha de cambio de estado
 
-        if iso_date:  # Si la fecha no es nula
-            try:  # Intentar parsear la fecha
-                dt = parser.parse(iso_date)  # Parsear la fecha
-                iso_date = dt.strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )  # Convertir a formato legible
+            if iso_date:  # Si la fecha no es nula
+                try:  # Intentar parsear la fecha
+                    dt = parser.parse(iso_date)  # Parsear la fecha
+                    iso_date = dt.strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    )  # Convertir a formato legible
 
-            except Exception as e:  # Si hay un error al parsear la fecha
-                iso_date = "9999-12-31 23:59:59"
-        else:
-            iso_date = "9999-12-31 00:00:00"  # Si la fecha es nula, poner una fecha por defecto
+                except Exception as e:  # Si hay un error al parsear la fecha
+                    iso_date = "9999-12-31 23:59:59"
+            else:
+                iso_date = "9999-12-31 00:00:00"  # Si la fecha es nula, poner una fecha por defecto
 
-        json_tarea["fecha"] = iso_date  # Extraer la fecha de cambio de estado
+            json_tarea["fecha"] = iso_date  # Extraer la fecha de cambio de estado
 
-        json_tarea["timespent_real"] = tarea["fields"].get(
-            "timespent", 0
-        )  # Extraer el tiempo invertido
+            json_tarea["timespent_real"] = tarea["fields"].get(
+                "timespent", 0
+            )  # Extraer el tiempo invertido
 
-        json_tarea["project_key"] = tarea["fields"]["project"][
-            "key"
-        ]  # Extraer la clave del proyecto
+            json_tarea["project_key"] = tarea["fields"]["project"][
+                "key"
+            ]  # Extraer la clave del proyecto
 
-        json_tarea["assignee"] = (tarea.get("fields") or {}).get(
-            "assignee"
-        ) or {}  # Extraer el empleado asignado
+            json_tarea["assignee"] = (tarea.get("fields") or {}).get(
+                "assignee"
+            ) or {}  # Extraer el empleado asignado
 
-        json_tarea["assignee"] = json_tarea["assignee"].get(
-            "displayName", ""
-        )  # Extraer el correo del empleado asignado
+            json_tarea["assignee"] = json_tarea["assignee"].get(
+                "displayName", ""
+            )  # Extraer el correo del empleado asignado
 
-        json_tarea["status"] = (tarea.get("fields") or {}).get(
-            "status"
-        ) or {}  # Extraer el estado de la tarea
+            json_tarea["status"] = (tarea.get("fields") or {}).get(
+                "status"
+            ) or {}  # Extraer el estado de la tarea
 
-        json_tarea["status"] = json_tarea["status"].get(
-            "name", ""
-        )  # Extraer el nombre del estado
+            json_tarea["status"] = json_tarea["status"].get(
+                "name", ""
+            )  # Extraer el nombre del estado
 
-        json_tarea["issuetype"] = (tarea.get("fields") or {}).get(
-            "issuetype"
-        ) or {}  # Extraer el estado de la tarea
+            json_tarea["issuetype"] = (tarea.get("fields") or {}).get(
+                "issuetype"
+            ) or {}  # Extraer el estado de la tarea
 
-        json_tarea["issuetype"] = json_tarea["issuetype"].get(
-            "name", ""
-        )  # Extraer el nombre del estado
+            json_tarea["issuetype"] = json_tarea["issuetype"].get(
+                "name", ""
+            )  # Extraer el nombre del estado
 
-        description = extraer_texto(
-            (tarea.get("fields") or {}).get("description") or {}
-        )  # Extraer el texto de la descripción
+            description = extraer_texto(
+                (tarea.get("fields") or {}).get("description") or {}
+            )  # Extraer el texto de la descripción
 
-        json_tarea["texto"] = json_tarea["summary"] = (
-            tarea["fields"].get("summary", "") + "\n" + description
-        )  # Extraer el texto
+            json_tarea["texto"] = json_tarea["summary"] = (
+                tarea["fields"].get("summary", "") + "\n" + description
+            )  # Extraer el texto
 
-        processed_tasks.append(
-            json_tarea
-        )  # Agregar la información de la tarea al JSON final
+            processed_tasks.append(
+                json_tarea
+            )  # Agregar la información de la tarea al JSON final
 
-    processed_tasks, users_codifications, projects_codif = anonimizar_tareas(
-        processed_tasks
-    )  # Llamar a la función para anonimizar las tareas
+        processed_tasks, users_codifications, projects_codif = anonimizar_tareas(
+            processed_tasks
+        )  # Llamar a la función para anonimizar las tareas
 
-    try:
-        conn = psycopg2.connect(
-            dbname=target_db, **db_config
-        )  # Conectar a la base de datos
-        cur = conn.cursor()
+        try:
+            conn = psycopg2.connect(
+                dbname=target_db, **db_config
+            )  # Conectar a la base de datos
+            cur = conn.cursor()
+
+            # MERGE para TAREAS (por clave). La unicidad de la clave la garantiza
+            # Tareas_Claves: si dos cargas insertan a la vez la misma tarea, una falla.
+            # Las tareas que no han cambiado en Jira no se tocan, para no reescribir el
+            # archivo en cada carga ni mover la fecha_modificacion que usa la exportación
+            # incremental. Si una tarea archivada se reabre vuelve a la partición de
+            # tareas activas. timespent_real se guarda en horas y timespent_jira en segundos
+            upsert_query_tareas = """
+                MERGE INTO TAREAS t
+                USING (
+                    VALUES (%s, %s::timestamp, %s::numeric, %s, %s, %s, %s, %s)
+                ) AS s (
+                    clave, fecha, timespent_real, project_key, assignee, status_text,
+                    issue_type, texto
+                )
+                ON t.clave = s.clave
+                WHEN MATCHED AND (
+                    (t.fecha, t.timespent_jira, t.project_key, t.assignee, t.status_text, t.issue_type, t.texto)
+                        IS DISTINCT FROM
+                        (s.fecha, s.timespent_real, s.project_key, s.assignee, s.status_text, s.issue_type, s.texto)
+                ) THEN UPDATE SET
+                    fecha = s.fecha,
+                    timespent_real = s.timespent_real / 3600,
+                    timespent_jira = s.timespent_real,
+                    project_key = s.project_key,
+                    assignee = s.assignee,
+                    status_text = s.status_text,
+                    issue_type = s.issue_type,
+                    texto = s.texto,
+                    archivada = t.archivada AND s.status_text = 'Closed',
+                    fecha_modificacion = date_trunc('second', now())
+                WHEN NOT MATCHED THEN INSERT (
+                    clave, fecha, timespent_real, timespent_jira, project_key, assignee,
+                    status_text, issue_type, texto, fecha_modificacion
+                ) VALUES (
+                    s.clave, s.fecha, s.timespent_real / 3600, s.timespent_real, s.project_key,
+                    s.assignee, s.status_text, s.issue_type, s.texto, now()
+                )
+            """
+
+            # MERGE para EMPLEADOS (por empleado)
+            upsert_query_empleados = """
+                INSERT INTO EMPLEADOS (codificacion, empleado, habilidades, is_active, fecha_modificacion)
+                VALUES (%s, %s, null, true, now())
+                ON CONFLICT (empleado) DO UPDATE SET
+                    codificacion = EXCLUDED.codificacion,
+                    habilidades = EXCLUDED.habilidades,
+                    is_active = EXCLUDED.is_active,
+                    fecha_modificacion = date_trunc('second', now())
+            """
+
+            # MERGE para PROYECTOS (por proyecto)
+            upsert_query_proyectos = """
+                INSERT INTO PROYECTOS (codificacion, proyecto, habilidades_necesarias, fecha_modificacion)
+                VALUES (%s, %s, null, now())
+                ON CONFLICT (proyecto) DO UPDATE SET
+                    codificacion = EXCLUDED.codificacion,
+                    habilidades_necesarias = EXCLUDED.habilidades_necesarias,
+                    fecha_modificacion = date_trunc('second', now())
+            """
+
+            # Preparamos los datos como listas de tuplas
+            tareas_values = [
+                (
+                    tarea.get("key"),
+                    tarea.get("fecha"),
+                    (tarea.get("timespent_real") or 0),
+                    tarea.get("project_key"),
+                    tarea.get("assignee"),
+                    tarea.get("status"),
+                    tarea.get("issuetype"),
+                    tarea.get("texto"),
+                )
+                for tarea in processed_tasks
+            ]
+
+            # Particiones anuales que cubren las fechas del lote
+            anios = [
+                int(tarea["fecha"][:4])
+                for tarea in processed_tasks
+                if not tarea["fecha"].startswith("9999")
+            ]
+            if anios:
+                cur.execute(
+                    "SELECT crear_particiones_tareas(%s, %s)", (min(anios), max(anios))
+                )
 
-        # MERGE para TAREAS (por clave)
-        upsert_query_tareas = """
-            INSERT INTO TAREAS (
-                clave, fecha, timespent_real, project_key, assignee, status_text,
-                issue_type, texto, fecha_modificacion
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, now())
-            ON CONFLICT (clave) DO UPDATE SET
-                fecha = EXCLUDED.fecha,
-                timespent_real = EXCLUDED.timespent_real,
-                project_key = EXCLUDED.project_key,
-                assignee = EXCLUDED.assignee,
-                status_text = EXCLUDED.status_text,
-                issue_type = EXCLUDED.issue_type,
-                texto = EXCLUDED.texto,
-
-                fecha_modificacion = date_trunc('second', now())
-        """
-
-        # MERGE para EMPLEADOS (por empleado)
-        upsert_query_empleados = """
-            INSERT INTO EMPLEADOS (codificacion, empleado, habilidades, is_active, fecha_modificacion)
-            VALUES (%s, %s, null, true, now())
-            ON CONFLICT (empleado) DO UPDATE SET
-                codificacion = EXCLUDED.codificacion,
-                habilidades = EXCLUDED.habilidades,
-                is_active = EXCLUDED.is_active,
-                fecha_modificacion = date_trunc('second', now())
-        """
-
-        # MERGE para PROYECTOS (por proyecto)
-        upsert_query_proyectos = """
-            INSERT INTO PROYECTOS (codificacion, proyecto, habilidades_necesarias, fecha_modificacion)
-            VALUES (%s, %s, null, now())
-            ON CONFLICT (proyecto) DO UPDATE SET
-                codificacion = EXCLUDED.codificacion,
-                habilidades_necesarias = EXCLUDED.habilidades_necesarias,
-                fecha_modificacion = date_trunc('second', now())
-        """
-
-        # Preparamos los datos como listas de tuplas
-        tareas_values = [
-            (
-                tarea.get("key"),
-                tarea.get("fecha"),
-                (tarea.get("timespent_real") or 0),
-                tarea.get("project_key"),
-                tarea.get("assignee"),
-                tarea.get("status"),
-                tarea.get("issuetype"),
-                tarea.get("texto"),
+            # Ejecutamos en bloque
+            cur.executemany(upsert_query_proyectos, projects_codif)
+            cur.executemany(upsert_query_empleados, users_codifications)
+            cur.executemany(upsert_query_tareas, tareas_values)
+
+            conn.commit()
+            cur.close()
+            conn.close()
+
+        except Exception as e:
+            print(
+                Fore.RED
+                + Style.BRIGHT
+                + f"❌ Error al insertar datos: {e}"
+                + Style.RESET_ALL
             )
-            for tarea in processed_tasks
-        ]
+            exit(1)
+
+        j_aux += 1
+
 
-        # Ejecutamos en bloque
-        cur.executemany(upsert_query_proyectos, projects_codif)
-        cur.executemany(upsert_query_empleados, users_codifications)
-        cur.executemany(upsert_query_tareas, tareas_values)
+def archivar_tareas() -> None:
+    """
+    Pasa a la partición de archivo las tareas cerradas hace más de DIAS_ARCHIVO_TAREAS días.
+    """
 
+    # Las tareas cerradas antiguas pasan a la partición de archivo
+    try:
+        conn = psycopg2.connect(dbname=target_db, **db_config)
+        cur = conn.cursor()
+        cur.execute("SELECT archivar_tareas(%s)", (dias_archivo_tareas,))
+        tareas_archivadas: int = cur.fetchone()[0]
         conn.commit()
         cur.close()
         conn.close()
 
+        print(
+            f"{Fore.CYAN}\t🗄️  {tareas_archivadas} tareas cerradas hace más de {dias_archivo_tareas} días archivadas{Style.RESET_ALL}"
+        )
+
     except Exception as e:
         print(
             Fore.RED
             + Style.BRIGHT
-            + f"❌ Error al insertar datos: {e}"
+            + f"❌ Error al archivar tareas: {e}"
             + Style.RESET_ALL
         )
         exit(1)
 
-    j_aux += 1
 
-print(
-    Fore.GREEN
-    + Style.BRIGHT
-    + "\n✅ Datos insertados correctamente en la base de datos.\n"
-    + Style.RESET_ALL
-)
+def ejecutar() -> None:
+    """
+    Etapa de lectura de datos. Usa psycopg2 directamente porque puede tener que crear la
+    base de datos antes de poder conectarse a ella.
+    """
+
+    preparar_base_datos()
+    cargar_proyectos_jira()
+    archivar_tareas()
+
+    print(
+        Fore.GREEN
+        + Style.BRIGHT
+        + "\n✅ Datos insertados correctamente en la base de datos.\n"
+        + Style.RESET_ALL
+    )
+
+
+if __name__ == "__main__":
+    ejecutar()
@@ -0,0 +1,323 @@
+# -------------------- Librerías estándar --------------------
+import ast
+from typing import Any, Dict, Hashable, List, Tuple
+
+# -------------------- Terceros --------------------
+import numpy as np
+from scipy import sparse
+
+
+# -------------------- Lectura de habilidades --------------------
+def parsear_habilidad(entry: Any) -> Tuple[str | None, str | None]:
+    if isinstance(entry, tuple) and len(entry) >= 2:
+        return entry[0], entry[1]
+    elif isinstance(entry, str) and entry.startswith("("):
+        partes = entry.strip("()").split(",")
+        if len(partes) >= 2:
+            return partes[0], partes[1]
+    return None, None
+
+
+def get_hab_info(hab, tipo="empleado"):
+
+    if isinstance(hab, dict):
+        if tipo == "empleado":
+            return hab.get("habilidad"), hab.get("nivel_actual")
+        else:
+            return hab.get("habilidad"), hab.get("experiencia")
+    elif isinstance(hab, tuple):
+
+        return hab[0], hab[1]
+    elif isinstance(hab, str):
+
+        try:
+            tup = ast.literal_eval(hab)
+            return tup[0], tup[1]
+        except Exception:
+            return None, None
+    return None, None
+
+
+def nombres_habilidades(habs: Any) -> set:
+    """
+    Args:
+        habs (Any): Habilidades de una tarea o de un empleado, tal y como llegan de la base de datos.
+    Returns:
+        set: Nombres de las habilidades que reconoce `parsear_habilidad`.
+    """
+
+    return set(h[0] for h in map(parsear_habilidad, habs or []) if h[0])
+
+
+def niveles_habilidades(habs: Any, tipo: str, cache: Dict | None = None) -> Dict[Any, int]:
+    """
+    Lee el nivel entero de cada habilidad con las mismas reglas que
+    `cumple_experiencia_minima`: se ignoran las habilidades sin nombre o sin nivel y
+    los niveles que no se pueden convertir a entero, y si una habilidad se repite
+    se queda la última.
+
+    Args:
+        habs (Any): Habilidades de una tarea o de un empleado.
+        tipo (str): "empleado" o "tarea".
+        cache (dict, optional): Resultados de `get_hab_info` ya calculados, por elemento.
+    Returns:
+        dict: habilidad -> nivel.
+    """
+
+    niveles = {}
+    for h in habs:
+        if cache is not None and isinstance(h, (str, tuple)):
+            clave = (tipo, h)
+            if clave not in cache:
+                cache[clave] = get_hab_info(h, tipo=tipo)
+            hab, nivel = cache[clave]
+        else:
+            hab, nivel = get_hab_info(h, tipo=tipo)
+
+        if hab and nivel:
+            try:
+                niveles[hab] = int(nivel)
+            except ValueError:
+                continue
+    return niveles
+
+
+# -------------------- Comprobaciones por pares --------------------
+def cumple_experiencia_minima(habs_tarea, habs_empleado):
+    if not habs_tarea or not habs_empleado:
+        return False
+
+    dict_emp = niveles_habilidades(habs_empleado, "empleado")
+    dict_tar = niveles_habilidades(habs_tarea, "tarea")
+
+    for hab, exp_req in dict_tar.items():
+        nivel_emp = dict_emp.get(hab)
+        if nivel_emp is None or nivel_emp < exp_req:
+            return False
+    return True
+
+
+def calcular_match(
+    habs_tarea: List[str | None], habs_empleado: List[str | None]
+) -> float:
+    set_tarea = nombres_habilidades(habs_tarea)
+    set_emp = nombres_habilidades(habs_empleado)
+    if not set_tarea:
+        return 0.0
+    interseccion = set_tarea & set_emp
+    return len(interseccion) / len(set_tarea)
+
+
+# -------------------- Matrices para todos los pares --------------------
+def _matriz(filas: List[int], columnas: List[int], forma: Tuple[int, int]) -> sparse.csr_matrix:
+    return sparse.csr_matrix((np.ones(len(filas)), (filas, columnas)), shape=forma)
+
+
+class MatricesHabilidades:
+    """
+    Representa las habilidades de un conjunto de tareas y de empleados como matrices
+    dispersas sobre un vocabulario común de habilidades, para calcular `calcular_match`
+    y `cumple_experiencia_minima` de todos los pares con un producto de matrices.
+
+    - Solapamiento: incidencia de tareas (tareas × habilidades) por la traspuesta de
+      la de empleados da el número de habilidades comunes de cada par.
+    - Experiencia mínima: cada requisito (habilidad, nivel) de las tareas es una
+      columna; un empleado tiene un 1 en ella si su nivel en esa habilidad llega al
+      requerido. El producto cuenta los requisitos cubiertos, y el par cumple si los
+      cubre todos.
+    - Índice invertido: para cada habilidad, los empleados que la tienen ordenados por
+      nivel, de modo que los empleados que cumplen la experiencia mínima de una tarea
+      se obtienen sin recorrer la plantilla entera.
+    """
+
+    def __init__(self, habs_tareas: List[Any], habs_empleados: List[Any]):
+        self.vocabulario: Dict[Hashable, int] = {}
+        cache: Dict = {}
+
+        # Solapamiento de nombres
+        conjuntos_tareas = [nombres_habilidades(h) for h in habs_tareas]
+        conjuntos_empleados = [nombres_habilidades(h) for h in habs_empleados]
+        self.tamano_tareas = np.array([len(c) for c in conjuntos_tareas], dtype=float)
+
+        # Experiencia mínima
+        self.no_vacias_tareas = np.array([bool(h) for h in habs_tareas], dtype=bool)
+        self.no_vacias_empleados = np.array([bool(h) for h in habs_empleados], dtype=bool)
+        niveles_tareas = [
+            niveles_habilidades(h, "tarea", cache) if v else {}
+            for h, v in zip(habs_tareas, self.no_vacias_tareas)
+        ]
+        niveles_empleados = [
+            niveles_habilidades(h, "empleado", cache) if v else {}
+            for h, v in zip(habs_empleados, self.no_vacias_empleados)
+        ]
+
+        requisitos: Dict[Tuple[int, int], int] = {}  # (habilidad, nivel) -> columna
+        filas, columnas = [], []
+        for i, niveles in enumerate(niveles_tareas):
+            for hab, nivel in niveles.items():
+                clave = (self._id(hab), nivel)
+                filas.append(i)
+                columnas.append(requisitos.setdefault(clave, len(requisitos)))
+        self.requisitos_tareas = _matriz(filas, columnas, (len(niveles_tareas), len(requisitos)))
+        self.num_requisitos = np.diff(self.requisitos_tareas.indptr)
+
+        umbrales_por_habilidad: Dict[int, List[Tuple[int, int]]] = {}
+        for (hab_id, nivel), columna in requisitos.items():
+            umbrales_por_habilidad.setdefault(hab_id, []).append((nivel, columna))
+
+        filas, columnas = [], []
+        for j, niveles in enumerate(niveles_empleados):
+            for hab, nivel in niveles.items():
+                for umbral, columna in umbrales_por_habilidad.get(self.vocabulario.get(hab), []):
+                    if nivel >= umbral:
+                        filas.append(j)
+                        columnas.append(columna)
+        self.cobertura_empleados = _matriz(
+            filas, columnas, (len(niveles_empleados), len(requisitos))
+        )
+
+        # Índice invertido: habilidad -> (niveles ascendentes, empleados en ese orden)
+        self.requisitos_por_tarea = [
+            [(self._id(hab), nivel) for hab, nivel in niveles.items()]
+            for niveles in niveles_tareas
+        ]
+        publicaciones: Dict[int, List[Tuple[int, int]]] = {}
+        for j, niveles in enumerate(niveles_empleados):
+            for hab, nivel in niveles.items():
+                publicaciones.setdefault(self._id(hab), []).append((nivel, j))
+        self.indice: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for hab_id, lista in publicaciones.items():
+            lista.sort()
+            self.indice[hab_id] = (
+                np.array([nivel for nivel, _ in lista]),
+                np.array([j for _, j in lista], dtype=np.int64),
+            )
+        self.empleados_no_vacios = np.flatnonzero(self.no_vacias_empleados)
+
+        # Las incidencias se construyen al final, con el vocabulario ya completo
+        for conjunto in conjuntos_tareas + conjuntos_empleados:
+            for hab in conjunto:
+                self._id(hab)
+        self.incidencia_tareas = self._incidencia(conjuntos_tareas)
+        self.incidencia_empleados = self._incidencia(conjuntos_empleados)
+
+    def _id(self, habilidad: Hashable) -> int:
+        return self.vocabulario.setdefault(habilidad, len(self.vocabulario))
+
+    def _incidencia(self, conjuntos: List[set]) -> sparse.csr_matrix:
+        filas = [i for i, c in enumerate(conjuntos) for _ in c]
+        columnas = [self.vocabulario[h] for c in conjuntos for h in c]
+        return _matriz(filas, columnas, (len(conjuntos), len(self.vocabulario)))
+
+    def match(self, tareas: slice | np.ndarray = slice(None)) -> np.ndarray:
+        """
+        Args:
+            tareas (slice | np.ndarray): Tareas (filas) para las que se calcula.
+        Returns:
+            np.ndarray: (tareas, empleados) con el valor de `calcular_match` de cada par.
+        """
+
+        comunes = (self.incidencia_tareas[tareas] @ self.incidencia_empleados.T).toarray()
+        tamano = self.tamano_tareas[tareas][:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(tamano > 0, comunes / tamano, 0.0)
+
+    def elegibles(self, tarea: int) -> np.ndarray:
+        """
+        Args:
+            tarea (int): Fila de la tarea.
+        Returns:
+            np.ndarray: Índices ordenados de los empleados para los que
+                `cumple_experiencia_minima` es cierto.
+        """
+
+        if not self.no_vacias_tareas[tarea]:
+            return np.empty(0, dtype=np.int64)
+        return self._cumplen(self.requisitos_por_tarea[tarea])
+
+    def _cumplen(self, requisitos: List[Tuple[int | None, int]]) -> np.ndarray:
+        """
+        Args:
+            requisitos (list): Pares (id de habilidad, nivel mínimo); None si la habilidad
+                no está en el vocabulario.
+        Returns:
+            np.ndarray: Índices ordenados de los empleados con habilidades que cubren
+                todos los requisitos.
+        """
+
+        resultado = self.empleados_no_vacios
+        # Se empieza por las listas más cortas para que la intersección se vacíe antes
+        listas = []
+        for hab_id, requerido in requisitos:
+            if hab_id not in self.indice:
+                return np.empty(0, dtype=np.int64)
+            niveles, empleados = self.indice[hab_id]
+            listas.append(empleados[np.searchsorted(niveles, requerido, side="left") :])
+        for lista in sorted(listas, key=len):
+            resultado = np.intersect1d(resultado, lista, assume_unique=True)
+            if resultado.size == 0:
+                break
+        return resultado
+
+    def evaluar_tarea(self, habs_tarea: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula `elegibles` y `calcular_match` de una tarea que no estaba al construir
+        las matrices, usando solo la parte de los empleados (índice invertido e
+        incidencia), sin reconstruir nada.
+
+        Args:
+            habs_tarea (Any): Habilidades de la tarea, en el mismo formato que las de las
+                tareas de la base de datos.
+        Returns:
+            tuple: Índices ordenados de los empleados elegibles y el match de cada uno.
+        """
+
+        if not habs_tarea:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        elegibles = self._cumplen(
+            [
+                (self.vocabulario.get(hab), nivel)
+                for hab, nivel in niveles_habilidades(habs_tarea, "tarea").items()
+            ]
+        )
+        nombres = nombres_habilidades(habs_tarea)
+        if not nombres:
+            return elegibles, np.zeros(elegibles.size)
+
+        columnas = [self.vocabulario[h] for h in nombres if h in self.vocabulario]
+        comunes = np.asarray(
+            self.incidencia_empleados[elegibles][:, columnas].sum(axis=1)
+        ).ravel()
+        return elegibles, comunes / len(nombres)
+
+    def match_pares(self, tareas: np.ndarray, empleados: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            tareas (np.ndarray): Fila de la tarea de cada par.
+            empleados (np.ndarray): Fila del empleado de cada par.
+        Returns:
+            np.ndarray: El valor de `calcular_match` de cada par.
+        """
+
+        comunes = np.asarray(
+            self.incidencia_tareas[tareas].multiply(self.incidencia_empleados[empleados]).sum(axis=1)
+        ).ravel()
+        tamano = self.tamano_tareas[tareas]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(tamano > 0, comunes / tamano, 0.0)
+
+    def cumple(self, tareas: slice | np.ndarray = slice(None)) -> np.ndarray:
+        """
+        Args:
+            tareas (slice | np.ndarray): Tareas (filas) para las que se calcula.
+        Returns:
+            np.ndarray: (tareas, empleados) con el valor de `cumple_experiencia_minima` de cada par.
+        """
+
+        cubiertos = (self.requisitos_tareas[tareas] @ self.cobertura_empleados.T).toarray()
+        return (
+            (cubiertos == self.num_requisitos[tareas][:, None])
+            & self.no_vacias_tareas[tareas][:, None]
+            & self.no_vacias_empleados[None, :]
+        )
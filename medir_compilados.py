@@ -0,0 +1,163 @@
+# -------------------- Standard Library --------------------
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+# -------------------- Third-Party Libraries --------------------
+import numpy as np
+from colorama import Fore, Style, init
+from sklearn.decomposition import TruncatedSVD
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MultiLabelBinarizer
+
+from asignar_tareas_empleados import crear_regresor
+from compilar_modelos import (
+    ClasificadorHabilidadesCompilado,
+    RegresorAsignacionCompilado,
+    exportar_clasificador_habilidades,
+    exportar_regresor_asignacion,
+)
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+VOCABULARIO = np.array([f"palabra{i}" for i in range(400)])
+HABILIDADES = [f"Habilidad {i}" for i in range(15)]
+
+
+# -------------------- Datos sintéticos --------------------
+def generar_textos(n_textos: int, rng: np.random.Generator) -> tuple[List[str], List[tuple]]:
+    """
+    Args:
+        n_textos (int): Número de textos.
+        rng (np.random.Generator): Generador.
+    Returns:
+        tuple: Textos de entre 5 y 40 palabras y sus habilidades, que dependen de las
+            primeras palabras de cada texto.
+    """
+
+    textos, habilidades = [], []
+    for _ in range(n_textos):
+        palabras = rng.choice(VOCABULARIO, rng.integers(5, 40))
+        indices = {int(p.removeprefix("palabra")) % len(HABILIDADES) for p in palabras[:3]}
+        textos.append(" ".join(palabras))
+        habilidades.append(tuple(HABILIDADES[i] for i in sorted(indices)))
+    return textos, habilidades
+
+
+# -------------------- Medición --------------------
+def medir_latencia(funcion: Callable[[], Any], repeticiones: int) -> float:
+    """
+    Args:
+        funcion (Callable): Llamada a medir.
+        repeticiones (int): Número de ejecuciones.
+    Returns:
+        float: Mediana del tiempo por llamada en milisegundos.
+    """
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos))
+
+
+def medir(
+    sklearn: Callable[[Any], Any], compilado: Callable[[Any], Any], entradas: Any, repeticiones: int
+) -> dict:
+    """
+    Args:
+        sklearn (Callable): Predicción de scikit-learn.
+        compilado (Callable): Predicción del modelo compilado.
+        entradas: Lote de entrada (textos o características).
+        repeticiones (int): Ejecuciones con una fila; con el lote se hacen la quinta parte.
+    Returns:
+        dict: Milisegundos de cada predicción con una fila y con el lote.
+    """
+
+    return {
+        "sklearn_uno": medir_latencia(lambda: sklearn(entradas[:1]), repeticiones),
+        "compilado_uno": medir_latencia(lambda: compilado(entradas[:1]), repeticiones),
+        "sklearn_lote": medir_latencia(lambda: sklearn(entradas), max(repeticiones // 5, 1)),
+        "compilado_lote": medir_latencia(lambda: compilado(entradas), max(repeticiones // 5, 1)),
+    }
+
+
+def medir_clasificador(textos_entrenamiento: int, filas: int, repeticiones: int, directorio: Path) -> dict:
+    """
+    Mide el pipeline TF-IDF + OneVsRest(RandomForest) de asignar_habilidades_tareas.py.
+    """
+
+    rng = np.random.default_rng(0)
+    textos, habilidades = generar_textos(textos_entrenamiento, rng)
+    mlb = MultiLabelBinarizer()
+    pipeline = make_pipeline(
+        TfidfVectorizer(), OneVsRestClassifier(RandomForestClassifier(n_estimators=100, n_jobs=-1))
+    )
+    pipeline.fit(textos, mlb.fit_transform(habilidades))
+    compilado = ClasificadorHabilidadesCompilado(
+        exportar_clasificador_habilidades(pipeline, mlb, directorio / "habilidades.npz")
+    )
+
+    lote, _ = generar_textos(filas, rng)
+    resultado = medir(pipeline.predict, compilado.predecir, lote, repeticiones)
+    resultado["iguales"] = np.array_equal(
+        np.asarray(pipeline.predict(lote)).astype(bool), compilado.predecir_probabilidades(lote) > 0.5
+    )
+    return resultado
+
+
+def medir_regresor(tipo: str, textos_entrenamiento: int, filas: int, repeticiones: int, directorio: Path) -> dict:
+    """
+    Mide el regresor de asignar_tareas_empleados.py (`crear_regresor`) sobre el texto
+    reducido con SVD y cuatro características numéricas.
+    """
+
+    rng = np.random.default_rng(0)
+    textos, _ = generar_textos(textos_entrenamiento + filas, rng)
+    tfidf = TfidfVectorizer(max_features=250, stop_words=None)
+    svd = TruncatedSVD(n_components=5, random_state=42)
+    X = np.column_stack(
+        (svd.fit_transform(tfidf.fit_transform(textos)), rng.random((len(textos), 4)) * [1, 10, 100, 1])
+    )
+    y = X[:, 0] + 0.3 * X[:, 6] - 0.01 * X[:, 7] + rng.normal(0, 0.05, len(X))
+
+    pipeline = crear_regresor(tipo).fit(X[:textos_entrenamiento], y[:textos_entrenamiento])
+    compilado = RegresorAsignacionCompilado(
+        exportar_regresor_asignacion(pipeline, tfidf, svd, directorio / f"asignacion_{tipo}.npz")
+    )
+
+    lote = X[textos_entrenamiento:]
+    resultado = medir(pipeline.predict, compilado.predecir, lote, repeticiones)
+    resultado["iguales"] = np.array_equal(pipeline.predict(lote), compilado.predecir(lote))
+    return resultado
+
+
+if __name__ == "__main__":
+    # Uso: python medir_compilados.py [filas_lote] [repeticiones] [textos_entrenamiento]
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    textos_entrenamiento = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    print(
+        f"\t{'modelo':<8}{'sklearn 1 fila (ms)':>21}{'compilado 1 fila (ms)':>23}"
+        f"{f'sklearn {filas} (ms)':>20}{f'compilado {filas} (ms)':>22}{'iguales':>9}"
+    )
+    with tempfile.TemporaryDirectory() as directorio:
+        for modelo in ("rf", "gb", "hgb"):
+            if modelo == "rf":
+                r = medir_clasificador(textos_entrenamiento, filas, repeticiones, Path(directorio))
+            else:
+                r = medir_regresor(modelo, textos_entrenamiento, filas, repeticiones, Path(directorio))
+            print(
+                f"\t{modelo:<8}{r['sklearn_uno']:>21.2f}{r['compilado_uno']:>23.2f}"
+                f"{r['sklearn_lote']:>20.2f}{r['compilado_lote']:>22.2f}{'=' if r['iguales'] else '≠':>9}"
+            )
+
+    print(f"{Fore.GREEN}\n✅ Medición terminada{Style.RESET_ALL}")
@@ -0,0 +1,245 @@
+# -------------------- Standard Library --------------------
+import json
+import statistics
+import sys
+from datetime import date
+from pathlib import Path
+
+# -------------------- Third-Party Libraries --------------------
+from colorama import Fore, Style, init
+from sqlalchemy import Engine, text
+
+from guardar_excel import obtener_conexion, query_historico_tareas
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+DIRECTORIO_MEDICIONES = Path("./salidas/mediciones")
+REPETICIONES = 3  # Ejecuciones de cada consulta; se guarda la mediana
+
+# -------------------- Consultas sobre los arrays de tipos compuestos --------------------
+# Versiones anteriores a las tablas normalizadas, para comparar sobre la misma base de datos
+consulta_tareas_arrays = """
+    SELECT
+        t.id,
+        p.proyecto || '-' || split_part(t.clave, '-', 2) AS clave,
+        t.fecha,
+        t.timespent_real,
+        t.timespent_estimado,
+        t.bien_estimado,
+        p.proyecto AS nombre_proyecto,
+        t.assignee_in_candidatos as "Empleado entre candidatos",
+        a.empleado AS nombre_assignee,
+        t.status_text,
+        t.issue_type,
+        t.texto,
+        e.empleado AS nombre_candidato,
+        eh.nivel_actual AS nivel_candidato,
+        h.habilidad,
+        LEAST(h.experiencia::numeric, 10) AS experiencia,
+        t.fecha_modificacion
+    FROM
+        tareas t
+        LEFT JOIN proyectos p ON p.codificacion = t.project_key
+        LEFT JOIN empleados a ON a.codificacion = t.assignee
+        LEFT JOIN LATERAL unnest(COALESCE(t.candidatos, ARRAY[]::candidatos[])) WITH ORDINALITY AS c(codificacion, porcentaje_acierto, fecha_modificacion, ord1) ON TRUE
+        LEFT JOIN empleados e ON e.codificacion = c.codificacion
+        LEFT JOIN LATERAL unnest(COALESCE(t.habilidades_extraidas, ARRAY[]::habilidades_tarea[])) WITH ORDINALITY AS h(habilidad, experiencia, fecha_modificacion, ord2) ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT eh.nivel_actual
+            FROM unnest(COALESCE(e.habilidades, ARRAY[]::habilidades_empleado[])) AS eh(habilidad, nivel_actual, fecha_modificacion)
+            WHERE eh.habilidad = h.habilidad
+            LIMIT 1
+        ) eh ON TRUE
+    WHERE
+        (ord1 = ord2 OR (ord1 IS NULL AND ord2 IS NULL))
+"""
+
+CONSULTAS: dict[str, str] = {
+    "informe_mes_actual_arrays": consulta_tareas_arrays
+    + """
+        AND (
+            t.fecha >= :primer_dia_mes
+            OR (
+                t.status_text = 'In Progress'
+                AND t.fecha >= (date_trunc('month', CURRENT_DATE) - INTERVAL '3 months')
+            )
+        )
+    ORDER BY t.fecha asc
+    """,
+    # guardar_excel.py ya no la lanza: filtra el resultado de informe_historico en pandas
+    "informe_mes_actual": """
+        SELECT *
+        FROM vista_informe_tareas t
+        WHERE NOT t.archivada
+          AND (
+            t.fecha >= :primer_dia_mes
+            OR (
+                t.status_text = 'In Progress'
+                AND t.fecha >= (date_trunc('month', CURRENT_DATE) - INTERVAL '3 months')
+            )
+          )
+        ORDER BY t.fecha asc
+    """,
+    "informe_historico_arrays": consulta_tareas_arrays
+    + " ORDER BY t.fecha_modificacion asc",
+    "informe_historico": query_historico_tareas,
+    "empleados_con_habilidad_arrays": """
+        SELECT e.codificacion
+        FROM empleados e, unnest(e.habilidades) AS h(habilidad, nivel_actual, fecha_modificacion)
+        WHERE e.is_active
+          AND h.habilidad = :habilidad
+          AND texto_a_numerico(h.nivel_actual) >= :nivel
+    """,
+    "empleados_con_habilidad": """
+        SELECT eh.codificacion
+        FROM empleado_habilidad eh
+        JOIN empleados e ON e.codificacion = eh.codificacion
+        WHERE e.is_active
+          AND eh.habilidad = :habilidad
+          AND eh.nivel >= :nivel
+    """,
+    "tareas_con_habilidad_arrays": """
+        SELECT t.id
+        FROM tareas t, unnest(t.habilidades_extraidas) AS h(habilidad, experiencia, fecha_modificacion)
+        WHERE h.habilidad = :habilidad
+    """,
+    "tareas_con_habilidad": """
+        SELECT th.tarea_id
+        FROM tarea_habilidad th
+        WHERE th.habilidad = :habilidad
+    """,
+    # Lecturas de las etapas: con la tabla particionada solo tocan las tareas activas
+    "tareas_todas": "SELECT * FROM tareas",
+    "tareas_activas": "SELECT * FROM tareas WHERE NOT archivada",
+    "tareas_empleado_mes": """
+        SELECT t.id, t.timespent_estimado
+        FROM tareas t
+        WHERE NOT t.archivada
+          AND t.assignee = (SELECT assignee FROM actividad_empleados ORDER BY ultima_fecha DESC LIMIT 1)
+          AND t.fecha >= :primer_dia_mes
+    """,
+}
+
+
+def parametros_por_defecto(engine: Engine) -> dict:
+    """
+    Elige valores representativos para los parámetros de las consultas.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+    Returns:
+        dict: Parámetros con los que se ejecutan todas las consultas.
+    """
+
+    with engine.connect() as conn:
+        habilidad = conn.execute(
+            text(
+                "SELECT habilidad FROM empleado_habilidad GROUP BY habilidad ORDER BY COUNT(*) DESC LIMIT 1"
+            )
+        ).scalar()
+
+    return {
+        "primer_dia_mes": date.today().replace(day=1),
+        "habilidad": habilidad or "",
+        "nivel": 5,
+    }
+
+
+def medir_consultas(engine: Engine, parametros: dict) -> dict[str, dict]:
+    """
+    Ejecuta EXPLAIN (ANALYZE, BUFFERS) sobre cada consulta y resume el plan.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        parametros (dict): Parámetros de las consultas.
+    Returns:
+        dict: Por consulta, tiempo de ejecución y planificación (mediana, ms), coste
+            estimado, filas devueltas y bloques leídos.
+    """
+
+    resultados = {}
+    with engine.connect() as conn:
+        for nombre, consulta in CONSULTAS.items():
+            print(f"{Fore.CYAN}\t🔎 Midiendo {nombre}{Style.RESET_ALL}")
+            try:
+                planes = [
+                    conn.execute(
+                        text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + consulta),
+                        parametros,
+                    ).scalar()[0]
+                    for _ in range(REPETICIONES)
+                ]
+            except Exception as e:  # Consultas que el esquema medido aún no admite
+                conn.rollback()
+                print(f"{Fore.RED}\t⚠️ No se ha podido medir {nombre}: {e.orig}{Style.RESET_ALL}")
+                continue
+            raiz = planes[-1]["Plan"]
+            resultados[nombre] = {
+                "ejecucion_ms": statistics.median(p["Execution Time"] for p in planes),
+                "planificacion_ms": statistics.median(p["Planning Time"] for p in planes),
+                "coste": raiz["Total Cost"],
+                "filas": raiz["Actual Rows"],
+                "bloques": raiz.get("Shared Hit Blocks", 0) + raiz.get("Shared Read Blocks", 0),
+                "nodo_raiz": raiz["Node Type"],
+            }
+
+    return resultados
+
+
+def mostrar_comparacion(
+    antes: dict[str, dict], despues: dict[str, dict], titulo: str
+) -> None:
+    """
+    Muestra el tiempo de ejecución de cada consulta en dos mediciones.
+    Args:
+        antes (dict): Mediciones de referencia, por consulta.
+        despues (dict): Mediciones a comparar, por consulta.
+        titulo (str): Cabecera de la tabla.
+    """
+
+    print(f"\n{Fore.YELLOW}{titulo}{Style.RESET_ALL}")
+    print(f"\t{'consulta':<35}{'antes (ms)':>14}{'después (ms)':>14}{'mejora':>10}")
+    for nombre, medicion in despues.items():
+        if nombre not in antes:
+            continue
+        t_antes, t_despues = antes[nombre]["ejecucion_ms"], medicion["ejecucion_ms"]
+        mejora = t_antes / t_despues if t_despues else float("inf")
+        color = Fore.GREEN if mejora >= 1 else Fore.RED
+        print(
+            f"\t{nombre:<35}{t_antes:>14.2f}{t_despues:>14.2f}{color}{mejora:>9.1f}x{Style.RESET_ALL}"
+        )
+
+
+if __name__ == "__main__":
+    # Uso: python medir_consultas.py [etiqueta] [etiqueta_con_la_que_comparar]
+    etiqueta = sys.argv[1] if len(sys.argv) > 1 else date.today().strftime("%Y%m%d")
+    referencia = sys.argv[2] if len(sys.argv) > 2 else None
+
+    engine = obtener_conexion()
+    print(f"{Fore.YELLOW}⏱️  Midiendo consultas ({etiqueta})...\n{Style.RESET_ALL}")
+    mediciones = medir_consultas(engine, parametros_por_defecto(engine))
+
+    DIRECTORIO_MEDICIONES.mkdir(parents=True, exist_ok=True)
+    ruta = DIRECTORIO_MEDICIONES / f"{etiqueta}.json"
+    ruta.write_text(json.dumps(mediciones, indent=2), encoding="utf-8")
+
+    # Consultas sobre arrays frente a su versión sobre las tablas normalizadas
+    mostrar_comparacion(
+        {n.removesuffix("_arrays"): m for n, m in mediciones.items() if n.endswith("_arrays")},
+        {n: m for n, m in mediciones.items() if not n.endswith("_arrays")},
+        "Arrays de tipos compuestos frente a tablas normalizadas",
+    )
+
+    if referencia:
+        ruta_referencia = DIRECTORIO_MEDICIONES / f"{referencia}.json"
+        if not ruta_referencia.exists():
+            print(
+                f"{Fore.RED}\n❌ No existe la medición '{ruta_referencia}'.\n{Style.RESET_ALL}"
+            )
+            exit(1)
+        mostrar_comparacion(
+            json.loads(ruta_referencia.read_text(encoding="utf-8")),
+            mediciones,
+            f"Medición '{referencia}' frente a '{etiqueta}'",
+        )
+
+    print(f"{Fore.GREEN}\n✅ Mediciones guardadas en: {ruta}\n{Style.RESET_ALL}")
@@ -0,0 +1,190 @@
+# -------------------- Standard Library --------------------
+import sys
+import time
+
+# -------------------- Third-Party Libraries --------------------
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+from scipy.stats import spearmanr
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import ndcg_score
+
+from asignar_tareas_empleados import (
+    caracteristicas_empleados,
+    caracteristicas_entrenamiento,
+    caracteristicas_tareas,
+    crear_regresor,
+    ensamblar_caracteristicas,
+)
+from matrices_habilidades import MatricesHabilidades
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+HABILIDADES = [f"habilidad_{i}" for i in range(60)]
+PALABRAS = [f"palabra{i}" for i in range(400)]
+NUM_EMPLEADOS = 500
+TAREAS_EVALUACION = 2000  # Tareas de validación, cada una con CANDIDATOS_EVALUACION empleados
+CANDIDATOS_EVALUACION = 20
+
+
+# -------------------- Datos sintéticos --------------------
+def generar_datos(n_tareas: int, semilla: int = 0) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Genera tareas y empleados con la forma de las consultas de asignar_tareas_empleados.py.
+    El tiempo de cada tarea baja con el solapamiento de habilidades y la antigüedad
+    de su empleado, más ruido.
+
+    Args:
+        n_tareas (int): Número de tareas de entrenamiento.
+        semilla (int): Semilla del generador.
+    Returns:
+        tuple: tareas, empleados y antigüedad normalizada por empleado.
+    """
+
+    rng = np.random.default_rng(semilla)
+
+    def habilidades(n: int) -> list:
+        elegidas = rng.choice(len(HABILIDADES), size=n, replace=False)
+        return [(HABILIDADES[h], str(rng.integers(1, 11))) for h in elegidas]
+
+    empleados = pd.DataFrame(
+        {
+            "codificacion": [f"empleado_{j}" for j in range(NUM_EMPLEADOS)],
+            "habilidades": [habilidades(rng.integers(3, 15)) for _ in range(NUM_EMPLEADOS)],
+        }
+    )
+    antiguedad = dict(zip(empleados["codificacion"], rng.random(NUM_EMPLEADOS)))
+
+    asignados = rng.integers(0, NUM_EMPLEADOS, n_tareas)
+    tareas = pd.DataFrame(
+        {
+            "texto": [" ".join(rng.choice(PALABRAS, 12)) for _ in range(n_tareas)],
+            "habilidades_extraidas": [habilidades(rng.integers(1, 6)) for _ in range(n_tareas)],
+            "status_text": rng.choice(["Closed", "Resolved", "In Progress"], n_tareas),
+            "issue_type": rng.choice(["Sub-task", "Task", "Bug"], n_tareas),
+            "empleado_id": empleados["codificacion"].to_numpy()[asignados],
+            "habilidades_empleado": empleados["habilidades"].to_numpy()[asignados],
+        }
+    )
+    idoneidad = idoneidad_real(tareas, empleados, antiguedad, np.arange(n_tareas), asignados)
+    tareas["timespent_real"] = np.maximum(
+        1.0, 40 * (1 - idoneidad) + rng.normal(0, 4, n_tareas)
+    )
+    return tareas, empleados, antiguedad
+
+
+def idoneidad_real(
+    tareas: pd.DataFrame,
+    empleados: pd.DataFrame,
+    antiguedad: dict,
+    filas_tareas: np.ndarray,
+    filas_empleados: np.ndarray,
+) -> np.ndarray:
+    """
+    Args:
+        tareas (pd.DataFrame): Tareas.
+        empleados (pd.DataFrame): Empleados.
+        antiguedad (dict): codificacion -> antigüedad normalizada.
+        filas_tareas (np.ndarray): Fila de la tarea de cada par.
+        filas_empleados (np.ndarray): Fila del empleado de cada par.
+    Returns:
+        np.ndarray: Idoneidad sin ruido de cada par, entre 0 y 1, con la que se generan los tiempos.
+    """
+
+    matrices = MatricesHabilidades(
+        tareas["habilidades_extraidas"].tolist(), empleados["habilidades"].tolist()
+    )
+    match = matrices.match_pares(filas_tareas, filas_empleados)
+    veterania = empleados["codificacion"].map(antiguedad).to_numpy()[filas_empleados]
+    subtarea = (tareas["issue_type"].to_numpy()[filas_tareas] == "Sub-task").astype(float)
+    return 0.6 * match**2 + 0.3 * veterania + 0.1 * subtarea
+
+
+# -------------------- Medición --------------------
+def medir(n_tareas: int, tipos: list[str]) -> dict[str, dict]:
+    """
+    Entrena cada tipo de regresor sobre los mismos datos sintéticos y mide el tiempo
+    de ajuste y la calidad de la ordenación de candidatos en tareas no vistas.
+
+    Args:
+        n_tareas (int): Número de tareas de entrenamiento.
+        tipos (list): Tipos de regresor, como en `crear_regresor`.
+    Returns:
+        dict: Por tipo, segundos de ajuste, árboles, NDCG@3 medio y correlación de Spearman.
+    """
+
+    tareas, empleados, antiguedad = generar_datos(n_tareas + TAREAS_EVALUACION)
+    entrenamiento = tareas.iloc[:n_tareas].reset_index(drop=True)
+    evaluacion = tareas.iloc[n_tareas:].reset_index(drop=True)
+
+    inicio = time.perf_counter()
+    tfidf = TfidfVectorizer(max_features=250, stop_words=None)
+    svd = TruncatedSVD(n_components=5, random_state=42)
+    X_texto = svd.fit_transform(tfidf.fit_transform(entrenamiento["texto"].tolist()))
+    X = caracteristicas_entrenamiento(entrenamiento, antiguedad, X_texto)
+    max_time = entrenamiento["timespent_real"].max()
+    y = ((max_time - entrenamiento["timespent_real"]) / max_time).to_numpy(float)
+    print(
+        f"{Fore.CYAN}\t⏱️  Características de {n_tareas} filas: "
+        f"{time.perf_counter() - inicio:.3f} s{Style.RESET_ALL}"
+    )
+
+    # Candidatos al azar para cada tarea de evaluación
+    rng = np.random.default_rng(1)
+    filas_tareas = np.repeat(np.arange(TAREAS_EVALUACION), CANDIDATOS_EVALUACION)
+    filas_empleados = rng.integers(0, NUM_EMPLEADOS, len(filas_tareas))
+    relevancia = idoneidad_real(evaluacion, empleados, antiguedad, filas_tareas, filas_empleados)
+    X_evaluacion = ensamblar_caracteristicas(
+        caracteristicas_tareas(evaluacion, tfidf, svd),
+        caracteristicas_empleados(empleados, antiguedad),
+        filas_tareas,
+        filas_empleados,
+        MatricesHabilidades(
+            evaluacion["habilidades_extraidas"].tolist(), empleados["habilidades"].tolist()
+        ).match_pares(filas_tareas, filas_empleados),
+    )
+
+    resultados = {}
+    for tipo in tipos:
+        pipeline = crear_regresor(tipo)
+        inicio = time.perf_counter()
+        pipeline.fit(X, y)
+        tiempo_ajuste = time.perf_counter() - inicio
+
+        prediccion = pipeline.predict(X_evaluacion)
+        regresor = pipeline.named_steps["gb"]
+        resultados[tipo] = {
+            "ajuste_s": tiempo_ajuste,
+            "arboles": getattr(regresor, "n_iter_", None) or regresor.n_estimators_,
+            "ndcg@3": ndcg_score(
+                relevancia.reshape(TAREAS_EVALUACION, -1),
+                prediccion.reshape(TAREAS_EVALUACION, -1),
+                k=3,
+            ),
+            "spearman": spearmanr(relevancia, prediccion).statistic,
+        }
+
+    return resultados
+
+
+if __name__ == "__main__":
+    # Uso: python medir_entrenamiento.py [tareas_1,tareas_2,...] [tipo_1,tipo_2,...]
+    tamanos = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000").split(",")]
+    tipos = (sys.argv[2] if len(sys.argv) > 2 else "gb,hgb").split(",")
+
+    for n_tareas in tamanos:
+        print(f"{Fore.YELLOW}⏱️  Entrenando con {n_tareas} tareas sintéticas...\n{Style.RESET_ALL}")
+        resultados = medir(n_tareas, tipos)
+
+        print(f"\t{'modelo':<8}{'ajuste (s)':>12}{'árboles':>10}{'NDCG@3':>10}{'Spearman':>10}")
+        for tipo, r in resultados.items():
+            print(
+                f"\t{tipo:<8}{r['ajuste_s']:>12.2f}{r['arboles']:>10}"
+                f"{r['ndcg@3']:>10.4f}{r['spearman']:>10.4f}"
+            )
+        print()
+
+    print(f"{Fore.GREEN}✅ Medición terminada{Style.RESET_ALL}")
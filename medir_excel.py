@@ -0,0 +1,158 @@
+# -------------------- Standard Library --------------------
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# -------------------- Third-Party Libraries --------------------
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from guardar_excel import EscritorInforme, color_por_estado
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+ESTADOS = ["Resolved", "Closed", "In Progress", "To Do"]
+
+
+# -------------------- Datos sintéticos --------------------
+def generar_historico(n_filas: int, semilla: int = 0) -> pd.DataFrame:
+    """
+    Args:
+        n_filas (int): Número de filas.
+        semilla (int): Semilla del generador.
+    Returns:
+        pd.DataFrame: Filas con las columnas de la hoja "Historico de tareas".
+    """
+
+    rng = np.random.default_rng(semilla)
+    fechas = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 4000 * 24, n_filas), unit="h")
+    palabras = np.array([f"palabra{i}" for i in range(300)])
+    return pd.DataFrame(
+        {
+            "id": np.arange(n_filas),
+            "clave": [f"PRO-{i}" for i in rng.integers(1, 99999, n_filas)],
+            "fecha": fechas,
+            "timespent_real": rng.gamma(2, 5, n_filas).round(2),
+            "timespent_estimado": rng.gamma(2, 5, n_filas).round(2),
+            "bien_estimado": rng.random(n_filas) > 0.5,
+            "nombre_proyecto": rng.choice(["Proyecto A", "Proyecto B", "Proyecto C"], n_filas),
+            "Empleado entre candidatos": rng.random(n_filas) > 0.3,
+            "nombre_assignee": [f"Empleado {i}" for i in rng.integers(0, 500, n_filas)],
+            "status_text": rng.choice(ESTADOS, n_filas),
+            "issue_type": rng.choice(["Task", "Bug", "Sub-task"], n_filas),
+            "texto": [" ".join(rng.choice(palabras, 12)) for _ in range(n_filas)],
+            "nombre_candidato": [f"Empleado {i}" for i in rng.integers(0, 500, n_filas)],
+            "nivel_candidato": rng.integers(1, 11, n_filas).astype(float),
+            "habilidad": rng.choice(["Python", "SQL", "Docker", "AWS", "Java"], n_filas),
+            "experiencia": rng.integers(1, 11, n_filas),
+            "fecha_modificacion": fechas + pd.Timedelta(days=30),
+        }
+    )
+
+
+# -------------------- Escritores --------------------
+def escribir_streaming(df: pd.DataFrame, ruta: Path) -> None:
+    with EscritorInforme(ruta) as escritor:
+        escritor.escribir_hoja("Historico de tareas", df)
+
+
+def escribir_referencia(df: pd.DataFrame, ruta: Path) -> None:
+    """
+    El camino anterior de guardar_excel.py: `to_excel` con openpyxl y después un
+    recorrido de todas las celdas para los anchos, los colores y los bordes.
+    """
+
+    borde = Border(*(Side(style="thin"),) * 4)
+    with pd.ExcelWriter(ruta, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="Historico de tareas", index=False)
+        ws = writer.sheets["Historico de tareas"]
+
+        for col_idx, col in enumerate(ws.iter_cols(1, ws.max_column), 1):
+            max_length = max(len(str(cell.value)) if cell.value else 0 for cell in col)
+            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 50)
+
+        for cell in ws[1]:
+            cell.font = Font(bold=True, color="FCFCFC")
+            cell.alignment = Alignment(horizontal="center")
+            cell.fill = PatternFill(start_color="FF5F249F", end_color="FF5F249F", fill_type="solid")
+            cell.border = borde
+
+        col_estado = [cell.value for cell in ws[1]].index("status_text")
+        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
+            color = color_por_estado(row[col_estado].value)
+            for cell in row:
+                cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+                cell.border = borde
+
+
+ESCRITORES = {"streaming": escribir_streaming, "referencia": escribir_referencia}
+
+
+# -------------------- Medición --------------------
+def memoria_actual() -> float:
+    """
+    Returns:
+        float: Memoria residente del proceso en MB.
+    """
+
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1024**2
+
+
+def medir_en_proceso(escritor: str, df: pd.DataFrame, cola: multiprocessing.Queue) -> None:
+    """
+    Escribe el libro en un proceso hijo, que hereda los datos ya generados, para
+    que el pico de memoria de cada medición no dependa de las anteriores.
+    """
+
+    memoria_datos = memoria_actual()
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = Path(directorio) / "informe.xlsx"
+        inicio = time.perf_counter()
+        ESCRITORES[escritor](df, ruta)
+        segundos = time.perf_counter() - inicio
+        tamano = ruta.stat().st_size
+    memoria_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    cola.put((segundos, memoria_pico - memoria_datos, tamano / 1024**2))
+
+
+def medir(escritor: str, df: pd.DataFrame) -> tuple[float, float, float]:
+    """
+    Args:
+        escritor (str): Clave de ESCRITORES.
+        df (pd.DataFrame): Filas de la hoja.
+    Returns:
+        tuple: Segundos, MB de memoria por encima de los datos y MB del fichero.
+    """
+
+    contexto = multiprocessing.get_context("fork")
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=medir_en_proceso, args=(escritor, df, cola))
+    proceso.start()
+    resultado = cola.get()
+    proceso.join()
+    return resultado
+
+
+if __name__ == "__main__":
+    # Uso: python medir_excel.py [filas_streaming,...] [filas_referencia,...]
+    filas_streaming = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else "100000,1000000").split(",")]
+    filas_referencia = [int(n) for n in (sys.argv[2] if len(sys.argv) > 2 else "50000").split(",") if n]
+
+    print(f"\t{'escritor':<12}{'filas':>10}{'tiempo (s)':>12}{'filas/s':>10}{'memoria (MB)':>14}{'fichero (MB)':>14}")
+    for escritor, tamanos in (("referencia", filas_referencia), ("streaming", filas_streaming)):
+        for n_filas in tamanos:
+            segundos, memoria, tamano = medir(escritor, generar_historico(n_filas))
+            print(
+                f"\t{escritor:<12}{n_filas:>10}{segundos:>12.1f}{n_filas / segundos:>10.0f}"
+                f"{memoria:>14.0f}{tamano:>14.1f}"
+            )
+
+    print(f"{Fore.GREEN}\n✅ Medición terminada{Style.RESET_ALL}")
@@ -0,0 +1,146 @@
+# -------------------- Standard Library --------------------
+import sys
+import time
+from datetime import date
+
+# -------------------- Third-Party Libraries --------------------
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+
+from asignar_habilidades_empleados import DIAS_INACTIVIDAD, calcular_niveles_habilidades
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+HABILIDADES_POR_EMPLEADO = 20
+HABILIDADES = np.array([f"Habilidad {i}" for i in range(200)])
+
+
+# -------------------- Datos sintéticos --------------------
+def generar_datos(n_empleados: int, hoy: date, semilla: int = 0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Args:
+        n_empleados (int): Número de empleados.
+        hoy (date): Fecha de referencia.
+        semilla (int): Semilla del generador.
+    Returns:
+        tuple: `experiencia` (assignee, habilidad y total_experiencia, ordenada como la
+            consulta de la etapa) y `fechas` (assignee, primera_fecha y ultima_fecha).
+    """
+
+    rng = np.random.default_rng(semilla)
+    empleados = np.array([f"Empleado {i:05d}" for i in range(n_empleados)])
+    habilidades = np.concatenate(
+        [np.sort(rng.choice(HABILIDADES, HABILIDADES_POR_EMPLEADO, replace=False)) for _ in empleados]
+    )
+    experiencia = pd.DataFrame(
+        {
+            "assignee": np.repeat(empleados, HABILIDADES_POR_EMPLEADO),
+            "habilidad": habilidades,
+            # Algunos empleados con toda la experiencia igual, que se normalizan a 0.5
+            "total_experiencia": np.where(
+                np.repeat(rng.random(n_empleados) < 0.05, HABILIDADES_POR_EMPLEADO),
+                10,
+                rng.integers(1, 200, n_empleados * HABILIDADES_POR_EMPLEADO),
+            ),
+        }
+    )
+
+    hoy = pd.Timestamp(hoy)
+    primera = hoy - pd.to_timedelta(rng.integers(30, 3000, n_empleados), unit="D")
+    fechas = pd.DataFrame(
+        {
+            "assignee": empleados,
+            "primera_fecha": primera,
+            "ultima_fecha": hoy - pd.to_timedelta(rng.integers(0, 120, n_empleados), unit="D"),
+        }
+    )
+    return experiencia, fechas
+
+
+# -------------------- Referencia --------------------
+def niveles_por_empleado(
+    experiencia: pd.DataFrame, fechas: pd.DataFrame, hoy: date
+) -> tuple[list, list]:
+    """
+    El cálculo anterior de asignar_habilidades_empleados.py: una máscara por empleado
+    sobre todas las filas y `iterrows` para el nivel de cada habilidad.
+
+    Returns:
+        tuple: Niveles de cada fila de `experiencia` y, por empleado, si está activo.
+    """
+
+    hoy = pd.Timestamp(hoy)
+    antiguedad_max = fechas["primera_fecha"].apply(lambda x: (hoy - x).days).max()
+    limite_actividad = hoy - pd.Timedelta(days=DIAS_INACTIVIDAD)
+
+    niveles, activos = [], []
+    for empleado in experiencia["assignee"].dropna().unique():
+        tareas = experiencia[experiencia["assignee"] == empleado]
+        fechas_empleado = fechas[fechas["assignee"] == empleado]
+        primera = fechas_empleado["primera_fecha"].min()
+        min_exp, max_exp = tareas["total_experiencia"].min(), tareas["total_experiencia"].max()
+
+        for _, fila in tareas.iterrows():
+            experiencia_norm = (
+                0.5 if min_exp == max_exp else (fila["total_experiencia"] - min_exp) / (max_exp - min_exp)
+            )
+            antiguedad_norm = min((hoy - primera).days / antiguedad_max, 1.0)
+            niveles.append(1 + 9 * (0.7 * experiencia_norm + 0.3 * antiguedad_norm))
+
+        activos.append(
+            bool(fechas_empleado["ultima_fecha"].values[0] > limite_actividad)
+            if not fechas_empleado.empty
+            else False
+        )
+    return niveles, activos
+
+
+# -------------------- Medición --------------------
+def medir(n_empleados: int, referencia: bool) -> dict[str, float]:
+    """
+    Args:
+        n_empleados (int): Número de empleados sintéticos.
+        referencia (bool): Si se mide también el cálculo por empleado.
+    Returns:
+        dict: Segundos de cada cálculo y diferencia máxima entre sus niveles.
+    """
+
+    hoy = date.today()
+    experiencia, fechas = generar_datos(n_empleados, hoy)
+
+    inicio = time.perf_counter()
+    niveles, estados = calcular_niveles_habilidades(experiencia, fechas, hoy)
+    resultado = {"vectorizado_s": time.perf_counter() - inicio}
+
+    if referencia:
+        inicio = time.perf_counter()
+        niveles_ref, activos_ref = niveles_por_empleado(experiencia, fechas, hoy)
+        resultado["referencia_s"] = time.perf_counter() - inicio
+        resultado["diferencia"] = float(np.abs(niveles["nivel"].to_numpy() - niveles_ref).max())
+        resultado["activos_iguales"] = estados["is_active"].tolist() == activos_ref
+
+    return resultado
+
+
+if __name__ == "__main__":
+    # Uso: python medir_habilidades_empleados.py [empleados_1,...] [empleados_con_referencia,...]
+    tamanos = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else "1000,10000,100000").split(",")]
+    con_referencia = {int(n) for n in (sys.argv[2] if len(sys.argv) > 2 else "1000,10000").split(",") if n}
+
+    print(
+        f"\t{'empleados':>10}{'habilidades':>13}{'vectorizado (s)':>17}{'por empleado (s)':>18}"
+        f"{'dif. máx. nivel':>17}{'activos':>9}"
+    )
+    for n_empleados in tamanos:
+        r = medir(n_empleados, n_empleados in con_referencia)
+        referencia = f"{r['referencia_s']:>18.2f}" if "referencia_s" in r else f"{'-':>18}"
+        diferencia = f"{r['diferencia']:>17.1e}" if "diferencia" in r else f"{'-':>17}"
+        activos = ("=" if r["activos_iguales"] else "≠") if "activos_iguales" in r else "-"
+        print(
+            f"\t{n_empleados:>10}{n_empleados * HABILIDADES_POR_EMPLEADO:>13}"
+            f"{r['vectorizado_s']:>17.3f}{referencia}{diferencia}{activos:>9}"
+        )
+
+    print(f"{Fore.GREEN}\n✅ Medición terminada{Style.RESET_ALL}")
@@ -0,0 +1,102 @@
+# -------------------- Standard Library --------------------
+import sys
+import time
+
+# -------------------- Third-Party Libraries --------------------
+import numpy as np
+from colorama import Fore, Style, init
+
+from asignar_tareas_empleados import FILAS_POR_BLOQUE, NUM_CANDIDATOS, seleccionar_top
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+
+# -------------------- Datos sintéticos --------------------
+def generar_bloques(n_empleados: int, n_tareas: int, fraccion: float, semilla: int = 0):
+    """
+    Genera los pares tarea-empleado como los recibe `seleccionar_top` en
+    `puntuar_candidatos`: por bloques de unas FILAS_POR_BLOQUE filas, agrupados por
+    tarea y con los empleados elegibles de cada tarea en orden.
+
+    Args:
+        n_empleados (int): Número de empleados.
+        n_tareas (int): Número de tareas.
+        fraccion (float): Fracción de empleados elegibles para cada tarea.
+        semilla (int): Semilla del generador.
+    Returns:
+        Iterator[tuple]: tareas, empleados y puntuaciones de cada bloque. Las puntuaciones
+            se redondean a tres decimales para que haya empates, como con los árboles.
+    """
+
+    rng = np.random.default_rng(semilla)
+    tareas_por_bloque = max(1, int(FILAS_POR_BLOQUE / max(n_empleados * fraccion, 1)))
+    for primera in range(0, n_tareas, tareas_por_bloque):
+        tareas_bloque = min(tareas_por_bloque, n_tareas - primera)
+        tareas, empleados = np.nonzero(rng.random((tareas_bloque, n_empleados)) < fraccion)
+        puntuaciones = np.round(rng.random(len(tareas)), 3)
+        yield tareas + primera, empleados, puntuaciones
+
+
+# -------------------- Referencia --------------------
+def seleccionar_top_ordenando(
+    tareas: np.ndarray, empleados: np.ndarray, puntuaciones: np.ndarray, k: int
+) -> np.ndarray:
+    """
+    La selección anterior de asignar_tareas_empleados.py: ordena todos los pares del
+    bloque por tarea, puntuación y empleado y se queda con los k primeros de cada tarea.
+    """
+
+    orden = np.lexsort((empleados, -puntuaciones, tareas))
+    tareas_ordenadas = tareas[orden]
+    inicio_grupo = np.r_[0, np.flatnonzero(np.diff(tareas_ordenadas)) + 1]
+    tamano_grupo = np.diff(np.r_[inicio_grupo, len(orden)])
+    posicion = np.arange(len(orden)) - np.repeat(inicio_grupo, tamano_grupo)
+    return orden[posicion < k]
+
+
+# -------------------- Medición --------------------
+def medir(n_empleados: int, n_tareas: int, fraccion: float) -> dict:
+    """
+    Args:
+        n_empleados (int): Número de empleados sintéticos.
+        n_tareas (int): Número de tareas sintéticas.
+        fraccion (float): Fracción de empleados elegibles para cada tarea.
+    Returns:
+        dict: Pares, segundos de cada selección y si eligen los mismos pares.
+    """
+
+    resultado = {"pares": 0, "particion_s": 0.0, "ordenacion_s": 0.0, "iguales": True}
+    for tareas, empleados, puntuaciones in generar_bloques(n_empleados, n_tareas, fraccion):
+        inicio = time.perf_counter()
+        elegidos = seleccionar_top(tareas, empleados, puntuaciones, NUM_CANDIDATOS)
+        resultado["particion_s"] += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        referencia = seleccionar_top_ordenando(tareas, empleados, puntuaciones, NUM_CANDIDATOS)
+        resultado["ordenacion_s"] += time.perf_counter() - inicio
+
+        resultado["pares"] += len(tareas)
+        resultado["iguales"] &= np.array_equal(elegidos, referencia)
+
+    return resultado
+
+
+if __name__ == "__main__":
+    # Uso: python medir_seleccion_candidatos.py [empleados] [tareas] [fraccion_elegibles,...]
+    n_empleados = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_tareas = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    fracciones = [float(f) for f in (sys.argv[3] if len(sys.argv) > 3 else "1,0.1,0.01").split(",")]
+
+    print(
+        f"\t{'empleados':>10}{'tareas':>10}{'elegibles':>11}{'pares':>13}"
+        f"{'partición (s)':>15}{'ordenación (s)':>16}{'iguales':>9}"
+    )
+    for fraccion in fracciones:
+        r = medir(n_empleados, n_tareas, fraccion)
+        print(
+            f"\t{n_empleados:>10}{n_tareas:>10}{fraccion:>11.0%}{r['pares']:>13}"
+            f"{r['particion_s']:>15.2f}{r['ordenacion_s']:>16.2f}{'=' if r['iguales'] else '≠':>9}"
+        )
+
+    print(f"{Fore.GREEN}\n✅ Medición terminada{Style.RESET_ALL}")
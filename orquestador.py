@@ -0,0 +1,140 @@
+# -------------------- Standard Library --------------------
+import sys
+import time
+import traceback
+from typing import Any, Callable
+
+# -------------------- Third-Party Libraries --------------------
+from colorama import Fore, Style, init
+
+# Las librerías pesadas (pandas, scikit-learn, transformers...) se importan una sola vez para
+# todas las etapas
+inicio_importacion = time.perf_counter()
+import leer_datos
+import estimacion_tiempos
+import asignar_habilidades_tareas
+import asignar_habilidades_empleados
+import asignar_tareas_empleados
+import guardar_excel
+from asignar_tareas_empleados import antiguedad_desde_tareas
+
+tiempo_importacion = time.perf_counter() - inicio_importacion
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+# Etapas en orden de ejecución (el mismo que tenía ejecucion_total.sh)
+ETAPAS = {
+    "leer_datos": "Leer datos",
+    "estimacion_tiempos": "Estimación de tiempos",
+    "asignar_habilidades_tareas": "Asignar habilidades a tareas",
+    "asignar_habilidades_empleados": "Asignar habilidades a empleados",
+    "asignar_tareas_empleados": "Asignar tareas a empleados",
+    "guardar_excel": "Guardar Excel",
+}
+
+
+def mostrar_caja(mensaje: str, color: str) -> None:
+    borde = "-" * (len(mensaje) + 4)
+    print(f"\n{color}{Style.BRIGHT}+{borde}+\n|  {mensaje}  |\n+{borde}+{Style.RESET_ALL}\n")
+
+
+def mostrar_resumen(tiempos: dict[str, float], fallida: str | None = None) -> None:
+    """
+    Muestra el tiempo de cada etapa ejecutada y el total.
+    Args:
+        tiempos (dict): Nombre de la etapa -> segundos, en orden de ejecución.
+        fallida (str, optional): Etapa que ha fallado, si alguna.
+    """
+
+    total = sum(tiempos.values())
+    print(f"{Fore.YELLOW}⏱️  Tiempos por etapa{Style.RESET_ALL}")
+    print(f"\t{'etapa':<36}{'tiempo (s)':>12}{'%':>8}")
+    for nombre, segundos in tiempos.items():
+        color = Fore.RED if nombre == fallida else Fore.CYAN
+        print(f"{color}\t{nombre:<36}{segundos:>12.2f}{100 * segundos / max(total, 1e-9):>8.1f}{Style.RESET_ALL}")
+    print(f"\t{'Total':<36}{total:>12.2f}")
+
+
+def ejecutar_etapas(desde: str = "leer_datos") -> dict[str, float]:
+    """
+    Ejecuta las etapas de la planificación en este proceso, desde la indicada. Todas
+    comparten un único engine y las tareas se leen una sola vez: la estimación de tiempos
+    pasa las tareas activas ya actualizadas a la asignación de habilidades, y la antigüedad
+    de los empleados se calcula con esas mismas tareas. Cada etapa sigue guardando sus
+    resultados en la base de datos, así que se puede volver a empezar desde cualquiera.
+    Args:
+        desde (str): Clave de ETAPAS por la que se empieza.
+    Returns:
+        dict: Nombre de la etapa -> segundos.
+    """
+
+    pendientes = list(ETAPAS)[list(ETAPAS).index(desde) :]
+    tiempos = {"Importación de librerías": tiempo_importacion}
+
+    def etapa(nombre: str, funcion: Callable, *args) -> Any:
+        mostrar_caja(f"Ejecutando etapa {nombre}", Fore.BLUE)
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion(*args)
+        except SystemExit as e:
+            # Las etapas terminan con exit(1) cuando fallan
+            if e.code in (None, 0):
+                raise
+            error = None
+        except Exception:
+            error = traceback.format_exc()
+        else:
+            tiempos[nombre] = time.perf_counter() - inicio
+            return resultado
+
+        tiempos[nombre] = time.perf_counter() - inicio
+        if error:
+            print(f"{Fore.RED}{error}{Style.RESET_ALL}")
+        mostrar_caja(f"Error en la etapa {nombre}. Abortando ejecución.", Fore.RED)
+        mostrar_resumen(tiempos, fallida=nombre)
+        exit(1)
+
+    if "leer_datos" in pendientes:
+        # Va antes de conectarse porque puede tener que crear la base de datos
+        etapa(ETAPAS["leer_datos"], leer_datos.ejecutar)
+
+    engine = etapa("Conexión a la base de datos", asignar_habilidades_empleados.obtener_conexion)
+
+    tareas_activas, antiguedad = None, None
+    if "estimacion_tiempos" in pendientes:
+        tareas = etapa("Lectura de tareas", estimacion_tiempos.cargar_tareas, engine)
+        antiguedad = antiguedad_desde_tareas(tareas)
+        tareas_activas = etapa(ETAPAS["estimacion_tiempos"], estimacion_tiempos.ejecutar, engine, tareas)
+
+    if "asignar_habilidades_tareas" in pendientes:
+        etapa(ETAPAS["asignar_habilidades_tareas"], asignar_habilidades_tareas.ejecutar, engine, tareas_activas)
+        tareas_activas = None  # Ya no se necesitan
+
+    if "asignar_habilidades_empleados" in pendientes:
+        etapa(ETAPAS["asignar_habilidades_empleados"], asignar_habilidades_empleados.ejecutar, engine)
+
+    if "asignar_tareas_empleados" in pendientes:
+        etapa(ETAPAS["asignar_tareas_empleados"], asignar_tareas_empleados.ejecutar, engine, antiguedad)
+
+    if "guardar_excel" in pendientes:
+        etapa(ETAPAS["guardar_excel"], guardar_excel.ejecutar, engine)
+
+    return tiempos
+
+
+if __name__ == "__main__":
+    # Uso: python orquestador.py [etapa inicial]
+    desde = sys.argv[1] if len(sys.argv) > 1 else "leer_datos"
+    if desde not in ETAPAS:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Etapa desconocida: {desde}. Etapas: {', '.join(ETAPAS)}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    tiempos = ejecutar_etapas(desde)
+    mostrar_resumen(tiempos)
+    print(f"{Fore.GREEN}\n✅ Planificación completada{Style.RESET_ALL}")
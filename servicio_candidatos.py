@@ -0,0 +1,438 @@
+# -------------------- Standard Library --------------------
+import os
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Tuple
+
+# -------------------- Third-Party Libraries --------------------
+import joblib
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+from dotenv import load_dotenv
+from sqlalchemy import Engine, text
+
+from asignar_tareas_empleados import (
+    NUM_CANDIDATOS,
+    RUTA_CACHE_MODELO,
+    calcular_antiguedad,
+    caracteristicas_empleados,
+    caracteristicas_tareas,
+    obtener_conexion,
+    puntuar_pares,
+    query_antiguedad,
+    query_empleados,
+    seleccionar_top,
+)
+from calendario_disponibilidad import CalendarioDisponibilidad, cargar_disponibilidad
+from matrices_habilidades import MatricesHabilidades
+from servicio_habilidades import AgrupadorPeticiones, ModeloRecargable, leer_json, responder_json
+from simular_capacidad import literal_habilidades
+
+# -------------------- Inicialización --------------------
+load_dotenv()
+init(autoreset=True)
+
+HOST_SERVICIO = os.getenv("HOST_SERVICIO_CANDIDATOS", "0.0.0.0")
+PUERTO_SERVICIO = int(os.getenv("PUERTO_SERVICIO_CANDIDATOS", 8002))
+MESES_CALENDARIO = 12  # Meses, a partir del actual, con capacidad en memoria
+MAX_TAREAS_PETICION = 20  # Límite de tareas aceptadas en una sola petición
+
+query_horas_reservadas = """
+SELECT codificacion, to_char(mes, 'YYYY-MM') AS mes, SUM(horas) AS horas
+FROM reservas_horas
+GROUP BY codificacion, mes
+"""
+
+query_ultima_asignacion = "SELECT max(fecha_modificacion) AS fecha FROM ejecuciones_asignacion"
+
+
+# -------------------- Estado de los empleados --------------------
+class EstadoEmpleados:
+    """
+    Todo lo que la puntuación necesita de los empleados activos, calculado una vez:
+    sus características, las matrices de habilidades (con el índice invertido para
+    obtener los elegibles de una tarea) y el libro de capacidad, con las horas
+    disponibles de cada mes según el calendario y las ya reservadas por la última
+    asignación. Las tareas que se reservan desde el servicio se suman a las reservadas
+    y se guardan en `reservas_servicio`, para mantenerlas al refrescar el estado.
+    """
+
+    def __init__(
+        self,
+        empleados: pd.DataFrame,
+        antiguedad_dict: dict,
+        meses: List[str],
+        disponibilidad: pd.DataFrame,
+        horas_comprometidas: dict,
+        ultima_asignacion: datetime | None = None,
+    ):
+        self.empleados = empleados.reset_index(drop=True)
+        self.codificaciones: List[str] = self.empleados["codificacion"].tolist()
+        self.feat_empleados = caracteristicas_empleados(self.empleados, antiguedad_dict)
+        self.matrices = MatricesHabilidades([], self.empleados["habilidades"].tolist())
+        # Las habilidades de las tareas se escriben en el mismo formato que llegan las de la base de datos
+        self.como_texto = bool(len(self.empleados)) and isinstance(
+            self.empleados["habilidades"].iloc[0], str
+        )
+
+        self.calendario = CalendarioDisponibilidad(self.codificaciones, meses)
+        self.calendario.aplicar_disponibilidad(disponibilidad)
+        self.capacidad = self.calendario.capacidad()
+        self.reservado = self.calendario.reservas(horas_comprometidas, self.codificaciones)
+        self.ultima_asignacion = ultima_asignacion
+        self.reservas_servicio: List[Tuple[str, str, float, datetime]] = []  # (empleado, mes, horas, instante)
+        self.cerrojo = threading.Lock()
+        self.cargado_en = time.time()
+
+    def reservar(self, empleados: np.ndarray, mes: int, horas: np.ndarray) -> None:
+        """
+        Suma las horas de una tarea a los empleados indicados. Se llama con el cerrojo tomado.
+        Args:
+            empleados (np.ndarray): Filas de los empleados.
+            mes (int): Columna del mes.
+            horas (np.ndarray): Horas de cada empleado.
+        """
+
+        self.reservado[empleados, mes] += horas
+        instante = datetime.now()
+        self.reservas_servicio.extend(
+            (self.codificaciones[e], self.calendario.meses[mes], float(h), instante)
+            for e, h in zip(empleados, horas)
+        )
+
+    def conservar_reservas(self, anterior: "EstadoEmpleados") -> None:
+        """
+        Copia las reservas hechas desde el servicio en el estado anterior que todavía no
+        recoge Reservas_Horas: las posteriores a la última asignación guardada. Las
+        anteriores ya las ha vuelto a calcular esa asignación a partir de las tareas de Jira.
+        Args:
+            anterior (EstadoEmpleados): Estado al que sustituye este.
+        """
+
+        filas = {c: i for i, c in enumerate(self.codificaciones)}
+        for codificacion, mes, horas, instante in anterior.reservas_servicio:
+            if self.ultima_asignacion is not None and instante <= self.ultima_asignacion:
+                continue
+            self.reservas_servicio.append((codificacion, mes, horas, instante))
+            if codificacion in filas and mes in self.calendario.indice_meses:
+                self.reservado[filas[codificacion], self.calendario.indice_meses[mes]] += horas
+
+    def habilidades_tarea(self, habilidades: List[List[Any]]) -> Any:
+        """
+        Args:
+            habilidades (list): Pares (habilidad, experiencia) de la tarea.
+        Returns:
+            Any: Las habilidades en el formato de `habilidades_extraidas`.
+        """
+
+        if self.como_texto:
+            # Sin fracciones de segundo, como las fechas que devuelve la base de datos
+            fecha = datetime.now().replace(microsecond=0)
+            return literal_habilidades(habilidades, fecha) if habilidades else None
+        return [tuple(h) for h in habilidades]
+
+
+def cargar_estado(engine: Engine, hoy: date) -> EstadoEmpleados:
+    """
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        hoy (date): Fecha de referencia para la antigüedad y el primer mes del calendario.
+    Returns:
+        EstadoEmpleados: Estado de los empleados activos según la base de datos.
+    """
+
+    with engine.connect() as conn:
+        empleados = pd.read_sql(text(query_empleados), conn)
+        antiguedad = pd.read_sql(text(query_antiguedad), conn)
+        reservas = pd.read_sql(text(query_horas_reservadas), conn)
+        ultima_asignacion = conn.execute(text(query_ultima_asignacion)).scalar()
+
+    # Los meses con reservas y los siguientes al actual, donde caen las tareas nuevas
+    meses = set(reservas["mes"]) | set(
+        pd.period_range(pd.Timestamp(hoy), periods=MESES_CALENDARIO, freq="M").strftime("%Y-%m")
+    )
+    horas_comprometidas = reservas.set_index(["codificacion", "mes"])["horas"].astype(float).to_dict()
+    return EstadoEmpleados(
+        empleados,
+        calcular_antiguedad(antiguedad, hoy),
+        sorted(meses),
+        cargar_disponibilidad(engine, meses),
+        horas_comprometidas,
+        ultima_asignacion,
+    )
+
+
+# -------------------- Ranking --------------------
+def clasificar_tareas(modelo: dict, estado: EstadoEmpleados, tareas: List[dict]) -> List[dict]:
+    """
+    Puntúa contra todos los empleados elegibles un lote de tareas en una sola llamada
+    al modelo y, para cada tarea, se queda con los NUM_CANDIDATOS mejores que caben en
+    las horas libres de su mes, como la asignación voraz.
+
+    Args:
+        modelo (dict): Caché del modelo de asignación (pipeline, tfidf, svd y max_time).
+        estado (EstadoEmpleados): Estado de los empleados.
+        tareas (list): Tareas validadas por `validar_tarea`.
+    Returns:
+        list: Por tarea, los candidatos con su puntuación y horas, los empleados
+            elegibles y los que se han descartado por falta de horas.
+    """
+
+    habilidades = [estado.habilidades_tarea(t["habilidades"]) for t in tareas]
+    feat_tareas = caracteristicas_tareas(
+        pd.DataFrame(
+            {
+                "texto": [t["texto"] for t in tareas],
+                "habilidades_extraidas": habilidades,
+                "status_text": [t["status_text"] for t in tareas],
+                "issue_type": [t["issue_type"] for t in tareas],
+            }
+        ),
+        modelo["tfidf"],
+        modelo["svd"],
+    )
+
+    pares = [estado.matrices.evaluar_tarea(h) for h in habilidades]
+    filas_tareas = np.repeat(np.arange(len(tareas)), [len(e) for e, _ in pares])
+    filas_empleados = np.concatenate([e for e, _ in pares])
+    puntuaciones = puntuar_pares(
+        modelo["pipeline"],
+        feat_tareas,
+        estado.feat_empleados,
+        filas_tareas,
+        filas_empleados,
+        np.concatenate([m for _, m in pares]),
+    )
+    orden = seleccionar_top(filas_tareas, filas_empleados, puntuaciones, len(estado.codificaciones))
+    limites = np.searchsorted(filas_tareas[orden], np.arange(len(tareas) + 1))
+    meses = estado.calendario.indice_mes([t["fecha"] for t in tareas])
+
+    resultados = []
+    with estado.cerrojo:  # Las reservas de una tarea cuentan para las siguientes
+        for i, tarea in enumerate(tareas):
+            posiciones = orden[limites[i] : limites[i + 1]]
+            empleados, scores, mes = filas_empleados[posiciones], puntuaciones[posiciones], meses[i]
+            horas = modelo["max_time"] * (1 - scores)
+            reservado, capacidad = estado.reservado[empleados, mes], estado.capacidad[empleados, mes]
+            cabe = np.flatnonzero(reservado + horas <= capacidad)[:NUM_CANDIDATOS]
+            libres = capacidad - reservado
+            if tarea["reservar"]:
+                estado.reservar(empleados[cabe], mes, horas[cabe])
+
+            ultimo = cabe[-1] + 1 if len(cabe) == NUM_CANDIDATOS else len(empleados)
+            resultados.append(
+                {
+                    "candidatos": [
+                        {
+                            "empleado": estado.codificaciones[empleados[k]],
+                            "puntuacion": round(float(scores[k]), 4),
+                            "horas_estimadas": round(float(horas[k]), 2),
+                            "horas_libres": round(float(libres[k]), 2),
+                        }
+                        for k in cabe
+                    ],
+                    "elegibles": int(len(empleados)),
+                    "descartados_por_capacidad": int(ultimo - len(cabe)),
+                    "mes": estado.calendario.meses[mes],
+                }
+            )
+    return resultados
+
+
+def validar_tarea(tarea: Any, estado: EstadoEmpleados) -> dict:
+    """
+    Args:
+        tarea (Any): Tarea recibida en la petición.
+        estado (EstadoEmpleados): Estado de los empleados, para comprobar el mes.
+    Returns:
+        dict: Tarea con los valores por defecto completados.
+    Raises:
+        ValueError: Si falta el texto, las habilidades no son pares con experiencia
+            numérica o el mes de la fecha no está en el calendario.
+    """
+
+    if not isinstance(tarea, dict) or not isinstance(tarea.get("texto"), str):
+        raise ValueError("Cada tarea necesita un 'texto'")
+    habilidades = tarea.get("habilidades", [])
+    if not isinstance(habilidades, list) or not all(
+        isinstance(h, list)
+        and len(h) == 2
+        and isinstance(h[0], str)
+        and isinstance(h[1], (int, float))
+        and not isinstance(h[1], bool)
+        for h in habilidades
+    ):
+        raise ValueError(
+            "'habilidades' debe ser una lista de pares [habilidad, experiencia numérica]"
+        )
+
+    fecha = pd.Timestamp(tarea.get("fecha") or date.today())
+    if fecha.strftime("%Y-%m") not in estado.calendario.indice_meses:
+        raise ValueError(
+            f"La fecha {fecha.date()} está fuera del calendario "
+            f"({estado.calendario.meses[0]} a {estado.calendario.meses[-1]})"
+        )
+
+    return {
+        "texto": tarea["texto"],
+        "habilidades": habilidades,
+        "fecha": fecha,
+        "status_text": tarea.get("status_text", "To Do"),
+        "issue_type": tarea.get("issue_type", "Task"),
+        "reservar": bool(tarea.get("reservar", False)),
+    }
+
+
+# -------------------- Servidor --------------------
+def crear_servidor(
+    modelo: ModeloRecargable,
+    engine: Engine,
+    host: str = HOST_SERVICIO,
+    puerto: int = PUERTO_SERVICIO,
+) -> ThreadingHTTPServer:
+    """
+    Crea el servidor HTTP de candidatos.
+
+    Endpoints:
+        - POST /candidatos: {"tarea": {...}} o {"tareas": [...]}, cada una con "texto",
+          "habilidades" ([[habilidad, experiencia], ...]) y opcionalmente "fecha",
+          "issue_type", "status_text" y "reservar" (suma sus horas al libro de capacidad).
+        - POST /refrescar: vuelve a leer los empleados, la disponibilidad y las reservas;
+          mantiene las hechas desde el servicio después de la última asignación guardada.
+        - GET /salud: estado del servicio, del modelo y de los empleados cargados.
+
+    Args:
+        modelo (ModeloRecargable): Caché del modelo de asignación, recargable.
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        host (str): Dirección en la que escuchar.
+        puerto (int): Puerto en el que escuchar.
+    Returns:
+        ThreadingHTTPServer: Servidor listo para `serve_forever`.
+    """
+
+    servicio = {"estado": cargar_estado(engine, date.today())}
+    # El estado se lee una vez por lote, así que un refresco no cambia un lote a medias
+    agrupador = AgrupadorPeticiones(
+        lambda tareas: clasificar_tareas(modelo.modelo, servicio["estado"], tareas)
+    )
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/salud":
+                responder_json(self, 404, {"error": "Ruta no encontrada"})
+                return
+            estado = servicio["estado"]
+            responder_json(
+                self,
+                200,
+                {
+                    "modelo": str(modelo.ruta),
+                    "modelo_cargado_en": modelo.cargado_en,
+                    "empleados": len(estado.codificaciones),
+                    "meses": estado.calendario.meses,
+                    "empleados_cargados_en": estado.cargado_en,
+                },
+            )
+
+        def do_POST(self) -> None:
+            if self.path == "/refrescar":
+                inicio = time.perf_counter()
+                try:
+                    nuevo = cargar_estado(engine, date.today())
+                except Exception as e:  # Se mantiene el estado anterior
+                    responder_json(self, 500, {"error": f"No se ha podido refrescar: {e}"})
+                    return
+                anterior = servicio["estado"]
+                with anterior.cerrojo:  # Ninguna reserva se queda en el estado que se descarta
+                    nuevo.conservar_reservas(anterior)
+                    servicio["estado"] = nuevo
+                responder_json(
+                    self,
+                    200,
+                    {
+                        "empleados": len(nuevo.codificaciones),
+                        "reservas_conservadas": len(nuevo.reservas_servicio),
+                        "segundos": round(time.perf_counter() - inicio, 3),
+                    },
+                )
+                return
+
+            if self.path != "/candidatos":
+                responder_json(self, 404, {"error": "Ruta no encontrada"})
+                return
+
+            try:
+                cuerpo = leer_json(self)
+            except ValueError:
+                responder_json(self, 400, {"error": "Se esperaba un objeto JSON"})
+                return
+
+            tareas = cuerpo.get("tareas", [cuerpo["tarea"]] if "tarea" in cuerpo else None)
+            if not isinstance(tareas, list) or not tareas or len(tareas) > MAX_TAREAS_PETICION:
+                responder_json(
+                    self,
+                    400,
+                    {"error": f"Se esperaba 'tarea' o entre 1 y {MAX_TAREAS_PETICION} 'tareas'"},
+                )
+                return
+            try:
+                tareas = [validar_tarea(t, servicio["estado"]) for t in tareas]
+            except ValueError as e:
+                responder_json(self, 400, {"error": str(e)})
+                return
+
+            inicio = time.perf_counter()
+            try:
+                resultados = agrupador.enviar(tareas)
+            except Exception as e:
+                responder_json(self, 500, {"error": f"Error al puntuar las tareas: {e}"})
+                return
+            responder_json(
+                self,
+                200,
+                {
+                    "tareas": resultados,
+                    "milisegundos": round((time.perf_counter() - inicio) * 1000, 3),
+                },
+            )
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # Sin una línea de log por petición
+
+    return ThreadingHTTPServer((host, puerto), Manejador)
+
+
+if __name__ == "__main__":
+    if not RUTA_CACHE_MODELO.exists():
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ No existe el modelo de asignación '{RUTA_CACHE_MODELO}'. Ejecuta antes asignar_tareas_empleados.py\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    engine = obtener_conexion()
+    modelo = ModeloRecargable(RUTA_CACHE_MODELO, joblib.load)
+    modelo.vigilar()
+    try:
+        servidor = crear_servidor(modelo, engine)
+    except Exception as e:
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ Error al cargar los empleados: {e}\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    print(
+        f"{Fore.GREEN}✅ Servicio de candidatos escuchando en http://{HOST_SERVICIO}:{PUERTO_SERVICIO}\n{Style.RESET_ALL}"
+    )
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
@@ -0,0 +1,276 @@
+# -------------------- Standard Library --------------------
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, List
+
+# -------------------- Third-Party Libraries --------------------
+from colorama import Fore, Style, init
+from dotenv import load_dotenv
+
+from compilar_modelos import RUTA_CLASIFICADOR_HABILIDADES, ClasificadorHabilidadesCompilado
+
+# -------------------- Inicialización --------------------
+load_dotenv()
+init(autoreset=True)
+
+HOST_SERVICIO = os.getenv("HOST_SERVICIO_HABILIDADES", "0.0.0.0")
+PUERTO_SERVICIO = int(os.getenv("PUERTO_SERVICIO_HABILIDADES", 8001))
+ESPERA_LOTE_MS = float(os.getenv("ESPERA_LOTE_MS", 5))  # Ventana para juntar peticiones
+TAMANO_LOTE_MAXIMO = int(os.getenv("TAMANO_LOTE_MAXIMO", 64))  # Textos por lote como máximo
+MAX_TEXTOS_PETICION = 100  # Límite de textos aceptados en una sola petición
+INTERVALO_RECARGA_S = 2.0  # Cada cuánto se comprueba si hay un modelo nuevo
+
+
+class ModeloRecargable:
+    """
+    Mantiene un modelo cargado en memoria y lo sustituye cuando el fichero del que
+    procede cambia en disco. La carga se hace en un hilo aparte y el cambio de
+    referencia es atómico, así que las predicciones en curso no se interrumpen.
+    """
+
+    def __init__(self, ruta: Path, cargador: Callable[[Path], Any]):
+        self.ruta = Path(ruta)
+        self.cargador = cargador
+        self.modelo = cargador(self.ruta)
+        self.version = self.ruta.stat().st_mtime_ns
+        self.cargado_en = time.time()
+
+    def vigilar(self, intervalo: float = INTERVALO_RECARGA_S) -> None:
+        """
+        Arranca un hilo que recarga el modelo cuando se guarda una versión nueva.
+
+        Args:
+            intervalo (float): Segundos entre comprobaciones.
+        """
+
+        def bucle() -> None:
+            while True:
+                time.sleep(intervalo)
+                try:
+                    version = self.ruta.stat().st_mtime_ns
+                    if version == self.version:
+                        continue
+                    self.modelo = self.cargador(self.ruta)
+                    self.version = version
+                    self.cargado_en = time.time()
+                    print(
+                        f"{Fore.GREEN}🔁 Modelo recargado desde {self.ruta}{Style.RESET_ALL}"
+                    )
+                except Exception as e:  # Se mantiene el modelo anterior
+                    print(
+                        f"{Fore.RED}⚠️ No se ha podido recargar el modelo: {e}{Style.RESET_ALL}"
+                    )
+
+        threading.Thread(target=bucle, daemon=True).start()
+
+
+class AgrupadorPeticiones:
+    """
+    Junta en un único lote las peticiones concurrentes que llegan dentro de una
+    ventana corta, llama una sola vez a la función de predicción y reparte los
+    resultados entre las peticiones.
+    """
+
+    def __init__(
+        self,
+        funcion_lote: Callable[[List[Any]], List[Any]],
+        espera_ms: float = ESPERA_LOTE_MS,
+        tamano_maximo: int = TAMANO_LOTE_MAXIMO,
+    ):
+        self.funcion_lote = funcion_lote
+        self.espera = espera_ms / 1000
+        self.tamano_maximo = tamano_maximo
+        self.cola: queue.Queue = queue.Queue()
+        threading.Thread(target=self._bucle, daemon=True).start()
+
+    def enviar(self, elementos: List[Any]) -> List[Any]:
+        """
+        Args:
+            elementos (list): Elementos de una petición.
+        Returns:
+            list: Un resultado por elemento, en el mismo orden.
+        """
+
+        futuro: Future = Future()
+        self.cola.put((elementos, futuro))
+        return futuro.result()
+
+    def _bucle(self) -> None:
+        while True:
+            pendientes = [self.cola.get()]  # Bloquea hasta la primera petición
+            total = len(pendientes[0][0])
+            limite = time.perf_counter() + self.espera
+
+            while total < self.tamano_maximo:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    pendientes.append(self.cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+                total += len(pendientes[-1][0])
+
+            lote = [e for elementos, _ in pendientes for e in elementos]
+            try:
+                resultados = self.funcion_lote(lote)
+            except Exception:
+                # Se repite cada petición por separado, para que el error solo llegue
+                # a la que lo provoca y no a las que compartían lote con ella
+                self._resolver_por_separado(pendientes)
+                continue
+
+            inicio = 0
+            for elementos, futuro in pendientes:
+                futuro.set_result(resultados[inicio : inicio + len(elementos)])
+                inicio += len(elementos)
+
+    def _resolver_por_separado(self, pendientes: List[tuple]) -> None:
+        for elementos, futuro in pendientes:
+            try:
+                futuro.set_result(self.funcion_lote(elementos))
+            except Exception as e:
+                futuro.set_exception(e)
+
+
+def leer_json(peticion: BaseHTTPRequestHandler) -> dict:
+    """
+    Args:
+        peticion (BaseHTTPRequestHandler): Petición HTTP en curso.
+    Returns:
+        dict: Cuerpo de la petición decodificado.
+    Raises:
+        ValueError: Si el cuerpo no es JSON o no es un objeto.
+    """
+
+    longitud = int(peticion.headers.get("Content-Length", 0))
+    cuerpo = json.loads(peticion.rfile.read(longitud) or b"{}")
+    if not isinstance(cuerpo, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    return cuerpo
+
+
+def responder_json(peticion: BaseHTTPRequestHandler, codigo: int, cuerpo: dict) -> None:
+    """
+    Args:
+        peticion (BaseHTTPRequestHandler): Petición HTTP en curso.
+        codigo (int): Código de estado HTTP.
+        cuerpo (dict): Contenido de la respuesta.
+    """
+
+    datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+    peticion.send_response(codigo)
+    peticion.send_header("Content-Type", "application/json; charset=utf-8")
+    peticion.send_header("Content-Length", str(len(datos)))
+    peticion.end_headers()
+    peticion.wfile.write(datos)
+
+
+def crear_servidor(
+    modelo: ModeloRecargable, host: str = HOST_SERVICIO, puerto: int = PUERTO_SERVICIO
+) -> ThreadingHTTPServer:
+    """
+    Crea el servidor HTTP de predicción de habilidades.
+
+    Endpoints:
+        - POST /habilidades: {"texto": "..."} o {"textos": ["...", ...]}.
+        - GET /salud: estado del servicio y versión del modelo cargado.
+
+    Args:
+        modelo (ModeloRecargable): Clasificador compilado recargable.
+        host (str): Dirección en la que escuchar.
+        puerto (int): Puerto en el que escuchar.
+    Returns:
+        ThreadingHTTPServer: Servidor listo para `serve_forever`.
+    """
+
+    agrupador = AgrupadorPeticiones(lambda textos: modelo.modelo.predecir(textos))
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/salud":
+                responder_json(self, 404, {"error": "Ruta no encontrada"})
+                return
+            responder_json(
+                self,
+                200,
+                {
+                    "modelo": str(modelo.ruta),
+                    "cargado_en": modelo.cargado_en,
+                    "habilidades": modelo.modelo.etiquetas.tolist(),
+                },
+            )
+
+        def do_POST(self) -> None:
+            if self.path != "/habilidades":
+                responder_json(self, 404, {"error": "Ruta no encontrada"})
+                return
+
+            try:
+                cuerpo = leer_json(self)
+            except ValueError:
+                responder_json(self, 400, {"error": "Se esperaba un objeto JSON"})
+                return
+
+            textos = cuerpo.get("textos", [cuerpo["texto"]] if "texto" in cuerpo else None)
+            if (
+                not isinstance(textos, list)
+                or not textos
+                or len(textos) > MAX_TEXTOS_PETICION
+                or not all(isinstance(t, str) for t in textos)
+            ):
+                responder_json(
+                    self,
+                    400,
+                    {"error": f"Se esperaba 'texto' o entre 1 y {MAX_TEXTOS_PETICION} 'textos'"},
+                )
+                return
+
+            inicio = time.perf_counter()
+            try:
+                habilidades = agrupador.enviar(textos)
+            except Exception as e:
+                responder_json(self, 500, {"error": f"Error al predecir las habilidades: {e}"})
+                return
+            responder_json(
+                self,
+                200,
+                {
+                    "habilidades": [list(h) for h in habilidades],
+                    "milisegundos": round((time.perf_counter() - inicio) * 1000, 3),
+                },
+            )
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # Sin una línea de log por petición
+
+    return ThreadingHTTPServer((host, puerto), Manejador)
+
+
+if __name__ == "__main__":
+    if not RUTA_CLASIFICADOR_HABILIDADES.exists():
+        print(
+            Fore.RED
+            + Style.BRIGHT
+            + f"\n❌ No existe el modelo compilado '{RUTA_CLASIFICADOR_HABILIDADES}'. Ejecuta antes asignar_habilidades_tareas.py\n"
+            + Style.RESET_ALL
+        )
+        exit(1)
+
+    modelo = ModeloRecargable(RUTA_CLASIFICADOR_HABILIDADES, ClasificadorHabilidadesCompilado)
+    modelo.vigilar()
+    servidor = crear_servidor(modelo)
+
+    print(
+        f"{Fore.GREEN}✅ Servicio de habilidades escuchando en http://{HOST_SERVICIO}:{PUERTO_SERVICIO}\n{Style.RESET_ALL}"
+    )
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
@@ -0,0 +1,511 @@
+# -------------------- Standard Library --------------------
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, List, Tuple
+
+# -------------------- Third-Party Libraries --------------------
+import joblib
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+
+from asignar_tareas_empleados import (
+    MODELO_ASIGNACION,
+    NUM_CANDIDATOS,
+    asignar_candidatos,
+    calcular_antiguedad,
+    caracteristicas_empleados,
+    cargar_datos,
+    entrenar_modelo,
+    obtener_conexion,
+    preparar_puntuacion,
+    puntuacion_total,
+    puntuar_candidatos,
+    puntuar_pares,
+    recortar_candidatos,
+    seleccionar_top,
+)
+from calendario_disponibilidad import (
+    LIMITE_HORAS_MENSUAL,
+    CalendarioDisponibilidad,
+    cargar_disponibilidad,
+)
+from matrices_habilidades import MatricesHabilidades
+
+# -------------------- Inicialización --------------------
+init(autoreset=True)
+
+RUTA_PUNTUACIONES = Path(
+    os.getenv("RUTA_CACHE_PUNTUACIONES", "modelos/puntuaciones_asignacion.joblib")
+)  # Puntuaciones de todos los pares elegibles, para simular escenarios sin volver a puntuar
+DIRECTORIO_SIMULACIONES = Path("./salidas/simulaciones")
+
+
+# -------------------- Preparación --------------------
+def preparar_simulacion(engine: Any, ruta: Path = RUTA_PUNTUACIONES) -> Path:
+    """
+    Puntúa todos los pares tarea-empleado elegibles con el modelo de asignación y los
+    guarda en disco junto con lo necesario para puntuar empleados nuevos y con los
+    periodos de Disponibilidad_Empleados de los meses de las tareas.
+    Args:
+        engine (Engine): El objeto Engine de SQLAlchemy para la conexión a la base de datos.
+        ruta (Path): Fichero de destino.
+    Returns:
+        Path: Ruta del fichero generado.
+    """
+
+    tasks_dat, empleados_dat, antiguedad_dat = cargar_datos(engine)
+    antiguedad_dict = calcular_antiguedad(antiguedad_dat, date.today())
+    pipeline, tfidf, svd, max_time, huella = entrenar_modelo(
+        tasks_dat,
+        antiguedad_dict,
+        dict(zip(antiguedad_dat["codificacion"], antiguedad_dat["primera_fecha"])),
+        MODELO_ASIGNACION,
+    )
+
+    print(f"{Fore.YELLOW}⚙️ Puntuando todos los pares elegibles...\n{Style.RESET_ALL}")
+    inicio = time.perf_counter()
+    contexto = preparar_puntuacion(tasks_dat, empleados_dat, tfidf, svd, antiguedad_dict)
+    # Se guardan todos los candidatos de cada tarea: la estructura dispersa es la máscara de elegibilidad
+    inicio_csr, candidatos, puntuaciones, pares = puntuar_candidatos(
+        contexto, pipeline, np.arange(len(tasks_dat)), len(empleados_dat)
+    )
+    print(
+        f"{Fore.CYAN}\t⏱️  {pares} pares puntuados en {time.perf_counter() - inicio:.3f} s{Style.RESET_ALL}"
+    )
+
+    meses = pd.to_datetime(tasks_dat["fecha"]).dropna().dt.strftime("%Y-%m").unique()
+    datos = {
+        "huella": huella,
+        "fecha": datetime.now(),
+        "tareas": tasks_dat[["tarea_id", "fecha", "empleado_id", "habilidades_extraidas"]],
+        "empleados": empleados_dat[["codificacion", "habilidades"]],
+        "feat_tareas": contexto["feat_tareas"],
+        "inicio": inicio_csr,
+        "candidatos": candidatos,
+        "puntuaciones": puntuaciones,
+        "pipeline": pipeline,
+        "max_time": max_time,
+        "disponibilidad": cargar_disponibilidad(engine, meses),
+    }
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(f".{ruta.name}.tmp")
+    joblib.dump(datos, temporal)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def literal_habilidades(habilidades: Iterable[Tuple[str, Any]], fecha: datetime) -> str:
+    """
+    Escribe un perfil de habilidades como el texto con el que psycopg2 devuelve una
+    columna habilidades_empleado[], para que un empleado simulado se lea igual que los reales.
+    Args:
+        habilidades (Iterable): Pares (habilidad, nivel).
+        fecha (datetime): Fecha de modificación de cada habilidad.
+    Returns:
+        str: Literal del array de tipos compuestos.
+    """
+
+    elementos = [f'"({hab},{nivel},\\"{fecha}\\")"' for hab, nivel in habilidades]
+    return "{" + ",".join(elementos) + "}"
+
+
+# -------------------- Simulación --------------------
+class SimuladorCapacidad:
+    """
+    Mantiene en memoria las puntuaciones de todos los pares elegibles y recalcula la
+    asignación voraz de `asignar_tareas_empleados` bajo un escenario de capacidad:
+
+    - Ausencias: un empleado no está disponible entre dos fechas. No puede recibir
+      tareas de esas fechas y sus días laborables del periodo pasan a 0 horas en el
+      calendario de disponibilidad.
+    - Límites de horas: un nuevo límite mensual para todos o para algunos empleados.
+    - Contrataciones: empleados nuevos con un perfil de habilidades, que se puntúan
+      con el mismo modelo contra todas las tareas.
+
+    Los periodos de Disponibilidad_Empleados guardados al preparar la simulación se
+    aplican siempre, en la referencia y en cada escenario. La capacidad es mensual,
+    así que solo se vuelven a asignar los meses en los que cambia algún candidato o
+    la capacidad de alguno de sus candidatos; el resto conserva el resultado de
+    referencia.
+    """
+
+    def __init__(self, datos: dict):
+        self.tareas: pd.DataFrame = datos["tareas"].reset_index(drop=True)
+        self.empleados: pd.DataFrame = datos["empleados"].reset_index(drop=True)
+        self.feat_tareas: np.ndarray = datos["feat_tareas"]
+        self.inicio: np.ndarray = datos["inicio"]
+        self.candidatos: np.ndarray = datos["candidatos"]
+        self.puntuaciones: np.ndarray = datos["puntuaciones"]
+        self.pipeline = datos["pipeline"]
+        self.max_time: float = datos["max_time"]
+        self.fecha_datos: datetime = datos["fecha"]
+        self.disponibilidad: pd.DataFrame = datos.get("disponibilidad", pd.DataFrame())
+
+        self.codificaciones = self.empleados["codificacion"].tolist()
+        self.indice_empleado = {c: j for j, c in enumerate(self.codificaciones)}
+        self.fechas = pd.to_datetime(self.tareas["fecha"])
+        self.meses = self.fechas.dt.strftime("%Y-%m").to_numpy()
+        self.tarea_de_par = np.repeat(np.arange(len(self.tareas)), np.diff(self.inicio))
+        self.calendario = self.crear_calendario(self.codificaciones)
+        self.mes_tarea = self.calendario.indice_mes(self.fechas)
+
+        # Resultado de referencia, igual que la asignación voraz del script de asignación
+        self.top_inicio, self.top_candidatos, self.top_puntuaciones = recortar_candidatos(
+            self.inicio, self.candidatos, self.puntuaciones, NUM_CANDIDATOS
+        )
+        self.referencia = asignar_candidatos(
+            self.tareas,
+            self.empleados,
+            self.top_inicio,
+            self.top_candidatos,
+            self.top_puntuaciones,
+            self.max_time,
+            calendario=self.calendario,
+        )
+        self.referencia_por_tarea = {p["tarea_id"]: p for p in self.referencia}
+
+    @classmethod
+    def cargar(cls, ruta: Path = RUTA_PUNTUACIONES) -> "SimuladorCapacidad":
+        """
+        Args:
+            ruta (Path): Fichero generado por `preparar_simulacion`.
+        Returns:
+            SimuladorCapacidad: Simulador con las puntuaciones del fichero.
+        """
+
+        return cls(joblib.load(ruta))
+
+    def crear_calendario(
+        self,
+        codificaciones: List[str],
+        limite_horas: float | None = None,
+        limites_empleado: dict | None = None,
+    ) -> CalendarioDisponibilidad:
+        """
+        Args:
+            codificaciones (list): Empleados del calendario.
+            limite_horas (float, optional): Límite mensual para todos los empleados.
+            limites_empleado (dict, optional): codificacion -> límite mensual propio.
+        Returns:
+            CalendarioDisponibilidad: Calendario de los meses de las tareas con los
+                límites indicados y los periodos de disponibilidad guardados.
+        """
+
+        meses = self.meses[self.fechas.notna().to_numpy()]
+        calendario = CalendarioDisponibilidad(
+            codificaciones, meses, LIMITE_HORAS_MENSUAL if limite_horas is None else limite_horas
+        )
+        for codificacion, limite in (limites_empleado or {}).items():
+            calendario.fijar_limite_mensual(limite, [codificacion])
+        calendario.aplicar_disponibilidad(self.disponibilidad)
+        return calendario
+
+    # ---------- Edición de candidatos ----------
+    def _puntuar_contrataciones(
+        self, contrataciones: List[dict]
+    ) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Args:
+            contrataciones (list): Por empleado nuevo, "empleado", "habilidades"
+                (pares habilidad, nivel) y opcionalmente "antiguedad" (0 por defecto).
+        Returns:
+            tuple: Empleados nuevos y sus pares elegibles (tarea, empleado, puntuación),
+                con los empleados numerados a continuación de los existentes.
+        """
+
+        # Se escriben en el mismo formato que las habilidades de los empleados cargados
+        como_texto = bool(len(self.empleados)) and isinstance(self.empleados["habilidades"].iloc[0], str)
+        nuevos = pd.DataFrame(
+            {
+                "codificacion": [c["empleado"] for c in contrataciones],
+                "habilidades": [
+                    literal_habilidades(c["habilidades"], self.fecha_datos)
+                    if como_texto
+                    else [tuple(h) for h in c["habilidades"]]
+                    for c in contrataciones
+                ],
+            }
+        )
+        if nuevos.empty:
+            return nuevos, np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0)
+
+        antiguedad = {c["empleado"]: float(c.get("antiguedad", 0.0)) for c in contrataciones}
+        matrices = MatricesHabilidades(
+            self.tareas["habilidades_extraidas"].tolist(), nuevos["habilidades"].tolist()
+        )
+        tareas, locales = np.nonzero(matrices.cumple())
+        puntuaciones = puntuar_pares(
+            self.pipeline,
+            self.feat_tareas,
+            caracteristicas_empleados(nuevos, antiguedad),
+            tareas,
+            locales,
+            matrices.match_pares(tareas, locales),
+        )
+        return nuevos, tareas, locales + len(self.empleados), puntuaciones
+
+    def aplicar_escenario(
+        self,
+        ausencias: List[dict] = (),
+        limite_horas: float | None = None,
+        limites_empleado: dict | None = None,
+        contrataciones: List[dict] = (),
+    ) -> dict:
+        """
+        Traduce un escenario a candidatos y capacidades, sin asignar todavía.
+        Args:
+            ausencias (list): Por ausencia, "empleado", "desde" y "hasta" (incluido).
+            limite_horas (float, optional): Nuevo límite mensual para todos los empleados.
+            limites_empleado (dict, optional): codificacion -> límite mensual propio.
+            contrataciones (list): Empleados nuevos, como en `_puntuar_contrataciones`.
+        Returns:
+            dict: Empleados (existentes y nuevos), los NUM_CANDIDATOS mejores candidatos de
+                cada tarea en formato CSR, el calendario de disponibilidad del escenario
+                y las tareas cuyos candidatos han cambiado.
+        """
+
+        limites_empleado = limites_empleado or {}
+        ausencias = [
+            {
+                "empleado": a["empleado"],
+                "desde": pd.Timestamp(a["desde"]).normalize(),
+                "hasta": pd.Timestamp(a["hasta"]).normalize(),
+            }
+            for a in ausencias
+        ]
+        desconocidos = {a["empleado"] for a in ausencias} - set(self.codificaciones)
+        desconocidos |= set(limites_empleado) - set(self.codificaciones) - {
+            c["empleado"] for c in contrataciones
+        }
+        if desconocidos:
+            raise ValueError(f"Empleados desconocidos en el escenario: {sorted(desconocidos)}")
+
+        # Pares que desaparecen por ausencias
+        conservar = np.ones(len(self.candidatos), dtype=bool)
+        fecha_par = self.fechas.to_numpy()[self.tarea_de_par]
+        for a in ausencias:
+            conservar &= ~(
+                (self.candidatos == self.indice_empleado[a["empleado"]])
+                & (fecha_par >= a["desde"].to_datetime64())
+                & (fecha_par < (a["hasta"] + pd.Timedelta(days=1)).to_datetime64())
+            )
+
+        nuevos, tareas_nuevas, empleados_nuevos, puntuaciones_nuevas = self._puntuar_contrataciones(
+            list(contrataciones)
+        )
+        tocadas = np.union1d(self.tarea_de_par[~conservar], tareas_nuevas)
+
+        # Las tareas tocadas vuelven a elegir sus mejores candidatos; el resto conserva los suyos
+        en_tocadas = np.isin(self.tarea_de_par, tocadas) & conservar
+        t = np.r_[self.tarea_de_par[en_tocadas], tareas_nuevas]
+        e = np.r_[self.candidatos[en_tocadas], empleados_nuevos]
+        s = np.r_[self.puntuaciones[en_tocadas], puntuaciones_nuevas]
+        elegidos = seleccionar_top(t, e, s, NUM_CANDIDATOS)
+
+        tarea_top = np.repeat(np.arange(len(self.tareas)), np.diff(self.top_inicio))
+        fuera = ~np.isin(tarea_top, tocadas)
+        t = np.r_[tarea_top[fuera], t[elegidos]]
+        orden = np.argsort(t, kind="stable")  # Mantiene el orden de cada tarea
+        top_candidatos = np.r_[self.top_candidatos[fuera], e[elegidos]][orden]
+        top_puntuaciones = np.r_[self.top_puntuaciones[fuera], s[elegidos]][orden]
+        top_inicio = np.r_[0, np.cumsum(np.bincount(t, minlength=len(self.tareas)))]
+
+        cambiadas = [
+            i
+            for i in tocadas
+            if not np.array_equal(
+                top_candidatos[top_inicio[i] : top_inicio[i + 1]],
+                self.top_candidatos[self.top_inicio[i] : self.top_inicio[i + 1]],
+            )
+            or not np.array_equal(
+                top_puntuaciones[top_inicio[i] : top_inicio[i + 1]],
+                self.top_puntuaciones[self.top_inicio[i] : self.top_inicio[i + 1]],
+            )
+        ]
+
+        # Las horas disponibles de cada empleado salen del calendario del escenario
+        codificaciones = self.codificaciones + nuevos["codificacion"].tolist()
+        calendario = self.crear_calendario(codificaciones, limite_horas, limites_empleado)
+        for a in ausencias:
+            calendario.establecer(a["empleado"], a["desde"], a["hasta"], 0.0)
+
+        return {
+            "empleados": pd.concat([self.empleados, nuevos], ignore_index=True),
+            "codificaciones": codificaciones,
+            "inicio": top_inicio,
+            "candidatos": top_candidatos,
+            "puntuaciones": top_puntuaciones,
+            "calendario": calendario,
+            "tareas_cambiadas": np.asarray(cambiadas, dtype=int),
+        }
+
+    def meses_afectados(self, escenario: dict) -> set:
+        """
+        Args:
+            escenario (dict): Resultado de `aplicar_escenario`.
+        Returns:
+            set: Meses con alguna tarea cuyos candidatos han cambiado o con algún
+                candidato cuya capacidad ha cambiado.
+        """
+
+        afectados = set(self.meses[escenario["tareas_cambiadas"]])
+
+        # Meses en los que cambia la capacidad de algún empleado que es candidato
+        referencia = self.calendario.capacidad()
+        capacidad = escenario["calendario"].capacidad()
+        cambiada = np.zeros(capacidad.shape, dtype=bool)
+        cambiada[: len(referencia)] = capacidad[: len(referencia)] != referencia
+        tarea_top = np.repeat(np.arange(len(self.tareas)), np.diff(escenario["inicio"]))
+        con_mes = self.mes_tarea[tarea_top] >= 0
+        presentes = cambiada[escenario["candidatos"][con_mes], self.mes_tarea[tarea_top][con_mes]]
+        afectados |= set(self.meses[tarea_top[con_mes][presentes]])
+        return afectados
+
+    def reasignar(self, escenario: dict, meses: Iterable[str]) -> List[dict]:
+        """
+        Vuelve a ejecutar la asignación voraz en los meses indicados.
+        Args:
+            escenario (dict): Resultado de `aplicar_escenario`.
+            meses (Iterable): Meses a reasignar.
+        Returns:
+            list: Predicciones de las tareas de esos meses, como `asignar_candidatos`.
+        """
+
+        filas = np.flatnonzero(np.isin(self.meses, list(meses)))
+        longitudes = np.diff(escenario["inicio"])[filas]
+        posiciones = (
+            np.concatenate([np.arange(escenario["inicio"][i], escenario["inicio"][i + 1]) for i in filas])
+            if len(filas)
+            else np.empty(0, dtype=int)
+        )
+        return asignar_candidatos(
+            self.tareas.iloc[filas],
+            escenario["empleados"],
+            np.r_[0, np.cumsum(longitudes)],
+            escenario["candidatos"][posiciones],
+            escenario["puntuaciones"][posiciones],
+            self.max_time,
+            calendario=escenario["calendario"],
+        )
+
+    def simular(
+        self,
+        ausencias: List[dict] = (),
+        limite_horas: float | None = None,
+        limites_empleado: dict | None = None,
+        contrataciones: List[dict] = (),
+    ) -> dict:
+        """
+        Args:
+            ausencias (list): Por ausencia, "empleado", "desde" y "hasta" (incluido).
+            limite_horas (float, optional): Nuevo límite mensual para todos los empleados.
+            limites_empleado (dict, optional): codificacion -> límite mensual propio.
+            contrataciones (list): Por empleado nuevo, "empleado", "habilidades" (pares
+                habilidad, nivel) y opcionalmente "antiguedad".
+        Returns:
+            dict: Predicciones de todas las tareas en el escenario, tareas cuyo resultado
+                cambia respecto a la referencia, meses recalculados, puntuaciones total
+                de referencia y del escenario, y segundos empleados.
+        """
+
+        inicio = time.perf_counter()
+        escenario = self.aplicar_escenario(ausencias, limite_horas, limites_empleado, contrataciones)
+        meses = self.meses_afectados(escenario)
+        recalculadas = {p["tarea_id"]: p for p in self.reasignar(escenario, meses)}
+
+        predicciones = [recalculadas.get(p["tarea_id"], p) for p in self.referencia]
+        cambios = [
+            p
+            for p in recalculadas.values()
+            if p["top3_empleados"] != self.referencia_por_tarea[p["tarea_id"]]["top3_empleados"]
+        ]
+
+        return {
+            "predicciones": predicciones,
+            "cambios": cambios,
+            "meses_recalculados": sorted(meses),
+            "tareas_recalculadas": len(recalculadas),
+            "puntuacion_referencia": puntuacion_total(self.referencia),
+            "puntuacion": puntuacion_total(predicciones),
+            "sin_candidatos_referencia": sum(not p["top3_empleados"] for p in self.referencia),
+            "sin_candidatos": sum(not p["top3_empleados"] for p in predicciones),
+            "segundos": time.perf_counter() - inicio,
+        }
+
+
+def mostrar_resultado(nombre: str, resultado: dict) -> None:
+    """
+    Args:
+        nombre (str): Nombre del escenario.
+        resultado (dict): Resultado de `SimuladorCapacidad.simular`.
+    """
+
+    print(f"\n{Fore.YELLOW}Escenario '{nombre}'{Style.RESET_ALL}")
+    print(
+        f"\t{len(resultado['meses_recalculados'])} meses y {resultado['tareas_recalculadas']} "
+        f"tareas recalculadas en {resultado['segundos']:.3f} s"
+    )
+    print(f"\t{len(resultado['cambios'])} tareas cambian de candidatos")
+    print(
+        f"\tPuntuación total: {resultado['puntuacion_referencia']:.2f} → {resultado['puntuacion']:.2f}"
+    )
+    print(
+        f"\tTareas sin candidatos: {resultado['sin_candidatos_referencia']} → {resultado['sin_candidatos']}"
+    )
+
+
+if __name__ == "__main__":
+    # Uso: python simular_capacidad.py preparar
+    #      python simular_capacidad.py escenario_1.json [escenario_2.json ...]
+    if len(sys.argv) < 2:
+        print(
+            f"{Fore.RED}\n❌ Uso: python simular_capacidad.py preparar | escenario.json [...]\n{Style.RESET_ALL}"
+        )
+        exit(1)
+
+    if sys.argv[1] == "preparar":
+        ruta = preparar_simulacion(obtener_conexion())
+        print(f"{Fore.GREEN}\n✅ Puntuaciones guardadas en: {ruta}\n{Style.RESET_ALL}")
+        exit(0)
+
+    if not RUTA_PUNTUACIONES.exists():
+        print(
+            f"{Fore.RED}\n❌ No existe '{RUTA_PUNTUACIONES}'. Ejecuta antes: python simular_capacidad.py preparar\n{Style.RESET_ALL}"
+        )
+        exit(1)
+
+    inicio = time.perf_counter()
+    simulador = SimuladorCapacidad.cargar()
+    print(
+        f"{Fore.CYAN}\t⏱️  Simulador cargado en {time.perf_counter() - inicio:.3f} s "
+        f"({len(simulador.tareas)} tareas, {len(simulador.candidatos)} pares){Style.RESET_ALL}"
+    )
+
+    DIRECTORIO_SIMULACIONES.mkdir(parents=True, exist_ok=True)
+    for fichero in sys.argv[1:]:
+        ruta_escenario = Path(fichero)
+        try:
+            parametros = json.loads(ruta_escenario.read_text(encoding="utf-8"))
+            resultado = simulador.simular(**parametros)
+        except Exception as e:
+            print(f"{Fore.RED}\n❌ Error en el escenario '{fichero}': {e}\n{Style.RESET_ALL}")
+            exit(1)
+
+        mostrar_resultado(ruta_escenario.stem, resultado)
+        salida = DIRECTORIO_SIMULACIONES / f"{ruta_escenario.stem}.json"
+        salida.write_text(
+            json.dumps(
+                {k: v for k, v in resultado.items() if k != "predicciones"},
+                indent=2,
+                default=str,
+            ),
+            encoding="utf-8",
+        )
+
+    print(f"{Fore.GREEN}\n✅ Simulaciones guardadas en: {DIRECTORIO_SIMULACIONES}\n{Style.RESET_ALL}")
@@ -0,0 +1,184 @@
+# -------------------- Librerías estándar --------------------
+import tempfile
+import warnings
+from pathlib import Path
+from typing import List, Tuple
+
+# -------------------- Terceros --------------------
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import MultiLabelBinarizer, StandardScaler
+
+from compilar_modelos import (
+    ClasificadorHabilidadesCompilado,
+    RegresorAsignacionCompilado,
+    exportar_clasificador_habilidades,
+    exportar_regresor_asignacion,
+    publicar_compilado,
+    verificar_clasificador_habilidades,
+    verificar_regresor_asignacion,
+)
+
+# Uso: python -m pytest -q test_compilar_modelos.py  (o python test_compilar_modelos.py)
+
+SEMILLAS = range(3)
+# Palabras que indican cada habilidad y palabras de relleno
+PALABRAS_HABILIDAD = {
+    "Python": ["python", "pandas", "script"],
+    "SQL": ["sql", "consulta", "tabla"],
+    "Docker": ["docker", "contenedor", "imagen"],
+    "Excel": ["excel", "hoja", "macro"],
+}
+RELLENO = ["revisar", "error", "cliente", "informe", "urgente", "nuevo", "cambio", "datos", "de", "la"]
+
+
+# -------------------- Datos sintéticos --------------------
+def generar_textos(rng: np.random.Generator, n_textos: int) -> Tuple[List[str], List[tuple]]:
+    """
+    Textos de tareas con las palabras de sus habilidades entre el relleno. Todas las
+    tareas tienen "General", así OneVsRest entrena una etiqueta constante.
+    """
+
+    textos, habilidades = [], []
+    for _ in range(n_textos):
+        elegidas = [h for h in PALABRAS_HABILIDAD if rng.random() < 0.35]
+        palabras = list(rng.choice(RELLENO, rng.integers(0, 8)))
+        for habilidad in elegidas:
+            palabras += list(rng.choice(PALABRAS_HABILIDAD[habilidad], rng.integers(1, 3)))
+        rng.shuffle(palabras)
+        textos.append(" ".join(palabras).capitalize())
+        habilidades.append(tuple(elegidas) + ("General",))
+    return textos, habilidades
+
+
+def textos_prueba(rng: np.random.Generator) -> List[str]:
+    textos, _ = generar_textos(rng, 150)
+    return textos + ["", "Palabras que nadie ha visto", "SQL, SQL y más SQL!", "PYTHON docker"]
+
+
+def entrenar_clasificador(semilla: int) -> Tuple[Pipeline, MultiLabelBinarizer]:
+    # Como en asignar_habilidades_tareas.py, con menos árboles
+    textos, habilidades = generar_textos(np.random.default_rng(semilla), 300)
+    mlb = MultiLabelBinarizer()
+    y = mlb.fit_transform(habilidades)
+    pipeline = make_pipeline(
+        TfidfVectorizer(),
+        OneVsRestClassifier(RandomForestClassifier(n_estimators=15, random_state=semilla)),
+    )
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", "Label .* is present in all training examples")
+        pipeline.fit(textos, y)
+    return pipeline, mlb
+
+
+def entrenar_regresor(semilla: int, tipo: str) -> Tuple[Pipeline, TfidfVectorizer, TruncatedSVD, np.ndarray]:
+    """
+    Como `crear_regresor` y `entrenar_modelo` de asignar_tareas_empleados.py, con menos
+    árboles. Las características de HistGradientBoosting tienen valores ausentes.
+
+    Returns:
+        tuple: Pipeline, vectorizador, SVD y características de prueba.
+    """
+
+    rng = np.random.default_rng(semilla)
+
+    def caracteristicas(textos: List[str]) -> np.ndarray:
+        numericas = rng.random((len(textos), 4)) * [1, 10, 100, 1]
+        if tipo == "hgb":
+            numericas[rng.random(numericas.shape) < 0.1] = np.nan
+        return np.column_stack((svd.transform(tfidf.transform(textos)), numericas))
+
+    textos, _ = generar_textos(rng, 400)
+    tfidf = TfidfVectorizer(max_features=250, stop_words=None)
+    svd = TruncatedSVD(n_components=5, random_state=42).fit(tfidf.fit_transform(textos))
+    X = caracteristicas(textos)
+    y = np.nan_to_num(X[:, 0] + 0.3 * X[:, 6] - 0.01 * X[:, 7]) + rng.normal(0, 0.05, len(X))
+
+    if tipo == "hgb":
+        regresor = HistGradientBoostingRegressor(max_iter=40, max_depth=5, random_state=42)
+    else:
+        regresor = GradientBoostingRegressor(n_estimators=40, learning_rate=0.05, max_depth=5, random_state=42)
+    pipeline = Pipeline([("scaler", StandardScaler()), ("gb", regresor)]).fit(X, y)
+
+    return pipeline, tfidf, svd, caracteristicas(textos_prueba(rng))
+
+
+# -------------------- Pruebas --------------------
+def test_clasificador_habilidades():
+    for semilla in SEMILLAS:
+        pipeline, mlb = entrenar_clasificador(semilla)
+        textos = textos_prueba(np.random.default_rng(semilla + 100))
+
+        with tempfile.TemporaryDirectory() as directorio:
+            compilado = ClasificadorHabilidadesCompilado(
+                exportar_clasificador_habilidades(pipeline, mlb, Path(directorio) / "habilidades.npz")
+            )
+
+        assert compilado.predecir(textos) == mlb.inverse_transform(pipeline.predict(textos))
+        np.testing.assert_allclose(
+            compilado.predecir_probabilidades(textos), pipeline.predict_proba(textos), err_msg=f"semilla {semilla}"
+        )
+        assert verificar_clasificador_habilidades(pipeline, compilado, textos)
+
+
+def test_regresor_asignacion():
+    for tipo in ("gb", "hgb"):
+        for semilla in SEMILLAS:
+            pipeline, tfidf, svd, X = entrenar_regresor(semilla, tipo)
+            textos = textos_prueba(np.random.default_rng(semilla + 100))
+
+            with tempfile.TemporaryDirectory() as directorio:
+                compilado = RegresorAsignacionCompilado(
+                    exportar_regresor_asignacion(pipeline, tfidf, svd, Path(directorio) / "asignacion.npz")
+                )
+
+            np.testing.assert_allclose(
+                compilado.transformar_texto(textos),
+                svd.transform(tfidf.transform(textos)),
+                atol=1e-12,
+                err_msg=f"{tipo}, semilla {semilla}",
+            )
+            np.testing.assert_array_equal(
+                compilado.predecir(X), pipeline.predict(X), err_msg=f"{tipo}, semilla {semilla}"
+            )
+            assert verificar_regresor_asignacion(pipeline, compilado, X)
+
+
+def test_publicar_compilado_sin_paridad():
+    pipeline, mlb = entrenar_clasificador(0)
+    otro, _ = entrenar_clasificador(1)
+    textos = textos_prueba(np.random.default_rng(0))
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = Path(directorio) / "habilidades.npz"
+
+        publicar_compilado(
+            lambda r: exportar_clasificador_habilidades(pipeline, mlb, r),
+            lambda r: verificar_clasificador_habilidades(pipeline, ClasificadorHabilidadesCompilado(r), textos),
+            ruta,
+        )
+        assert ruta.exists()
+
+        # Un modelo que no predice lo mismo no se publica y se retira el anterior
+        try:
+            publicar_compilado(
+                lambda r: exportar_clasificador_habilidades(pipeline, mlb, r),
+                lambda r: verificar_clasificador_habilidades(otro, ClasificadorHabilidadesCompilado(r), textos),
+                ruta,
+            )
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("se ha publicado un modelo sin paridad")
+        assert list(Path(directorio).iterdir()) == []
+
+
+if __name__ == "__main__":
+    for nombre, prueba in list(globals().items()):
+        if nombre.startswith("test_") and callable(prueba):
+            prueba()
+            print(f"✅ {nombre}")
@@ -0,0 +1,218 @@
+# -------------------- Librerías estándar --------------------
+import ast
+import random
+from typing import Any, List, Tuple
+
+# -------------------- Terceros --------------------
+import numpy as np
+
+from matrices_habilidades import MatricesHabilidades
+
+# Uso: python -m pytest -q test_matrices_habilidades.py  (o python test_matrices_habilidades.py)
+
+SEMILLAS = range(25)
+NOMBRES = ["Python", "SQL", "Java", "Docker", "Excel", "Linux", "Redes", "Jira"]
+NIVELES = [1, 2, 3, 5, 7, 10, "4", "8", 0, None, "", "alto", "3.5", 6.9]
+
+
+# -------------------- Referencia --------------------
+# Comprobaciones por pares de asignar_tareas_empleados.py antes de MatricesHabilidades,
+# copiadas tal cual para que un cambio en las funciones que se conservan no las altere
+def parsear_habilidad(entry: Any) -> Tuple[str | None, str | None]:
+    if isinstance(entry, tuple) and len(entry) >= 2:
+        return entry[0], entry[1]
+    elif isinstance(entry, str) and entry.startswith("("):
+        partes = entry.strip("()").split(",")
+        if len(partes) >= 2:
+            return partes[0], partes[1]
+    return None, None
+
+
+def get_hab_info(hab, tipo="empleado"):
+
+    if isinstance(hab, dict):
+        if tipo == "empleado":
+            return hab.get("habilidad"), hab.get("nivel_actual")
+        else:
+            return hab.get("habilidad"), hab.get("experiencia")
+    elif isinstance(hab, tuple):
+
+        return hab[0], hab[1]
+    elif isinstance(hab, str):
+
+        try:
+            tup = ast.literal_eval(hab)
+            return tup[0], tup[1]
+        except Exception:
+            return None, None
+    return None, None
+
+
+def cumple_experiencia_minima(habs_tarea, habs_empleado):
+    if not habs_tarea or not habs_empleado:
+        return False
+
+    dict_emp = {}
+    for h in habs_empleado:
+        hab, nivel = get_hab_info(h, tipo="empleado")
+        if hab and nivel:
+            try:
+                dict_emp[hab] = int(nivel)
+            except ValueError:
+                continue
+
+    dict_tar = {}
+    for h in habs_tarea:
+        hab, exp = get_hab_info(h, tipo="tarea")
+        if hab and exp:
+            try:
+                dict_tar[hab] = int(exp)
+            except ValueError:
+                continue
+
+    for hab, exp_req in dict_tar.items():
+        nivel_emp = dict_emp.get(hab)
+        if nivel_emp is None or nivel_emp < exp_req:
+            return False
+    return True
+
+
+def conjunto_habilidades(habs: List[str | None]) -> set:
+    return set(h[0] for h in map(parsear_habilidad, habs or []) if h[0])
+
+
+def calcular_match(
+    habs_tarea: List[str | None], habs_empleado: List[str | None]
+) -> float:
+    set_tarea = conjunto_habilidades(habs_tarea)
+    set_emp = conjunto_habilidades(habs_empleado)
+    if not set_tarea:
+        return 0.0
+    interseccion = set_tarea & set_emp
+    return len(interseccion) / len(set_tarea)
+
+
+# -------------------- Perfiles aleatorios --------------------
+def habilidad_aleatoria(rng: random.Random, tipo: str) -> Any:
+    """
+    Una habilidad en cualquiera de los formatos que pueden llegar de la base de datos,
+    con niveles ausentes, vacíos o no enteros.
+    """
+
+    nombre = rng.choice(NOMBRES + [None, ""])
+    nivel = rng.choice(NIVELES)
+    formato = rng.randrange(7)
+    if formato == 0:
+        return (nombre, nivel)
+    if formato == 1:
+        return (nombre, nivel, "2024-01-01")
+    if formato == 2:
+        return f"({nombre or ''},{'' if nivel is None else nivel},2024-01-01)"
+    if formato == 3:
+        return repr((nombre, None if nivel is None else str(nivel)))
+    if formato == 4:
+        return {"habilidad": nombre, ("nivel_actual" if tipo == "empleado" else "experiencia"): nivel}
+    if formato == 5:
+        return None
+    return (rng.choice(NOMBRES), rng.choice([1, 3, 5, 8]))  # Bien formada
+
+
+def perfil_aleatorio(rng: random.Random, tipo: str) -> Any:
+    """
+    Lista de habilidades con repetidas, o una lista vacía, o None.
+    """
+
+    forma = rng.random()
+    if forma < 0.08:
+        return None
+    if forma < 0.16:
+        return []
+    perfil = [habilidad_aleatoria(rng, tipo) for _ in range(rng.randint(1, 6))]
+    if rng.random() < 0.3:
+        perfil.append(rng.choice([h for h in perfil if h is not None] or [None]))  # Habilidad repetida
+    return perfil
+
+
+def generar(semilla: int, n_tareas: int = 40, n_empleados: int = 30) -> Tuple[list, list]:
+    rng = random.Random(semilla)
+    return (
+        [perfil_aleatorio(rng, "tarea") for _ in range(n_tareas)],
+        [perfil_aleatorio(rng, "empleado") for _ in range(n_empleados)],
+    )
+
+
+# -------------------- Pruebas --------------------
+def test_match_y_cumple_de_todos_los_pares():
+    for semilla in SEMILLAS:
+        tareas, empleados = generar(semilla)
+        matrices = MatricesHabilidades(tareas, empleados)
+
+        match = np.array([[calcular_match(t, e) for e in empleados] for t in tareas])
+        cumple = np.array([[cumple_experiencia_minima(t, e) for e in empleados] for t in tareas])
+
+        np.testing.assert_allclose(matrices.match(), match, err_msg=f"semilla {semilla}")
+        np.testing.assert_array_equal(matrices.cumple(), cumple, err_msg=f"semilla {semilla}")
+        np.testing.assert_array_equal(
+            matrices.cumple(np.arange(0, len(tareas), 3)), cumple[::3], err_msg=f"semilla {semilla}"
+        )
+
+
+def test_match_pares():
+    for semilla in SEMILLAS:
+        tareas, empleados = generar(semilla)
+        matrices = MatricesHabilidades(tareas, empleados)
+        rng = np.random.default_rng(semilla)
+        filas_tareas = rng.integers(0, len(tareas), 500)
+        filas_empleados = rng.integers(0, len(empleados), 500)
+
+        esperado = [calcular_match(tareas[i], empleados[j]) for i, j in zip(filas_tareas, filas_empleados)]
+        np.testing.assert_allclose(
+            matrices.match_pares(filas_tareas, filas_empleados), esperado, err_msg=f"semilla {semilla}"
+        )
+
+
+def test_elegibles():
+    for semilla in SEMILLAS:
+        tareas, empleados = generar(semilla)
+        matrices = MatricesHabilidades(tareas, empleados)
+
+        for i, tarea in enumerate(tareas):
+            esperado = [j for j, e in enumerate(empleados) if cumple_experiencia_minima(tarea, e)]
+            np.testing.assert_array_equal(
+                matrices.elegibles(i), esperado, err_msg=f"semilla {semilla}, tarea {i}"
+            )
+
+
+def test_evaluar_tarea_nueva():
+    for semilla in SEMILLAS:
+        tareas, empleados = generar(semilla)
+        matrices = MatricesHabilidades(tareas, empleados)
+        # Tareas que no estaban al construir las matrices, con habilidades que nadie tiene
+        nuevas, _ = generar(semilla + 1000, n_tareas=30, n_empleados=0)
+        nuevas += [[("Cobol", 2)], [("Cobol", 2), ("Python", 1)], [(None, 3)], [("Python", None)]]
+
+        for tarea in nuevas:
+            elegibles, match = matrices.evaluar_tarea(tarea)
+            esperado = [j for j, e in enumerate(empleados) if cumple_experiencia_minima(tarea, e)]
+            np.testing.assert_array_equal(elegibles, esperado, err_msg=f"semilla {semilla}, {tarea}")
+            np.testing.assert_allclose(
+                match, [calcular_match(tarea, empleados[j]) for j in elegibles], err_msg=f"semilla {semilla}, {tarea}"
+            )
+
+
+def test_sin_tareas_ni_empleados():
+    matrices = MatricesHabilidades([], [])
+    assert matrices.match().shape == (0, 0)
+    assert matrices.cumple().shape == (0, 0)
+
+    matrices = MatricesHabilidades([None, [], [("Python", 3)]], [])
+    assert matrices.cumple().shape == (3, 0)
+    assert matrices.elegibles(2).size == 0
+    assert matrices.evaluar_tarea([("Python", 1)])[0].size == 0
+
+
+if __name__ == "__main__":
+    for nombre, prueba in list(globals().items()):
+        if nombre.startswith("test_") and callable(prueba):
+            prueba()
+            print(f"✅ {nombre}")